@@ -1,75 +1,100 @@
+import os
+
+import click
 from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
-from flask_migrate import Migrate
-from flask_wtf.csrf import CSRFProtect
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
-import os
 
-# Initialize extensions
-db = SQLAlchemy()
+from .models.models import db
+
+# Templates and static files live next to the package, not inside it
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Initialize extensions. Migrate, CSRFProtect and the limiter (app/rate_limits.py)
+# are imported in create_app(): alembic alone costs ~80 ms, and everything that
+# imports app.models would otherwise pay for it.
 login_manager = LoginManager()
-migrate = Migrate()
-csrf = CSRFProtect()
-limiter = Limiter(
-    key_func=get_remote_address,
-    default_limits=["200 per day", "50 per hour"]
-)
+
+@login_manager.user_loader
+def load_user(user_id):
+    from .user_cache import load_cached_user
+    return load_cached_user(user_id)
 
 def create_app(config_class='config.Config'):
-    """Create and configure the Flask application."""
-    app = Flask(__name__)
+    """Create and configure the Flask application.
+
+    ``config_class`` is a Config class, its import path, or a key of
+    ``config.config`` ('development', 'testing', 'production', 'default').
+    """
+    if isinstance(config_class, str):
+        from werkzeug.utils import import_string
+        from config import config
+        config_class = config.get(config_class) or import_string(config_class)
+
+    app = Flask(__name__,
+                template_folder=os.path.join(PROJECT_ROOT, 'templates'),
+                static_folder=os.path.join(PROJECT_ROOT, 'static'))
     app.config.from_object(config_class)
+    if hasattr(config_class, 'init_app'):
+        config_class.init_app(app)
 
     # Initialize extensions
     db.init_app(app)
+    from . import compression, inventory, profiling, replica_routing, sqlite_tuning, static_assets
+    sqlite_tuning.init_app(app, db)
+    replica_routing.init_app(app)
     login_manager.init_app(app)
-    migrate.init_app(app, db)
-    
+    # Only the `flask db` commands need Flask-Migrate (and alembic); the
+    # flask CLI builds the app inside a click context, gunicorn does not
+    if click.get_current_context(silent=True) is not None:
+        from flask_migrate import Migrate
+        Migrate(app, db)
+    static_assets.init_app(app)
+    compression.init_app(app)
+    profiling.init_app(app)
+    inventory.init_app(app)
+
     # Initialize CSRF protection
-    csrf.init_app(app)
-    
-    # Initialize rate limiter
-    limiter.init_app(app)
-    
-    # Make CSRF token available in all templates
-    @app.context_processor
-    def inject_csrf_token():
-        from flask_wtf.csrf import generate_csrf
-        return {'csrf_token': generate_csrf}
-        
-    # Import and register blueprints
-    from .main import main as main_blueprint
-    from .auth import auth as auth_blueprint
-    from .shop import shop as shop_blueprint
-    
-    app.register_blueprint(main_blueprint)
-    app.register_blueprint(auth_blueprint, url_prefix='/auth')
-    app.register_blueprint(shop_blueprint, url_prefix='/shop')
+    from .csrf import CSRFProtect
+    csrf = CSRFProtect(app)
+    # POS clients authenticate with an API key; the view checks CSRF for browsers
+    csrf.exempt('app.routes.api.update_shop_inventory')
+
+    # Initialize rate limiter from RATELIMIT_* config
+    from . import rate_limits
+    rate_limits.init_app(app)
+
+    # Register blueprints
+    from .routes import admin, api, auth, customer, main, shop_owner
+
+    app.register_blueprint(main.main)
+    app.register_blueprint(auth.auth)
+    app.register_blueprint(customer.customer)
+    app.register_blueprint(shop_owner.shop_owner)
+    app.register_blueprint(admin.admin)
+    app.register_blueprint(api.api)
 
     # Configure login manager
     login_manager.login_view = 'auth.login'
-    login_manager.login_message_category = 'info'
-
-    # Register blueprints - these are imported in app.py and shops_route.py
-    # Blueprints will be registered in those files directly
+    login_manager.login_message = 'Please log in to access this page.'
 
-    # Create upload folders
-    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-    os.makedirs(os.path.join(app.config['UPLOAD_FOLDER'], 'products'), exist_ok=True)
-    os.makedirs(os.path.join(app.config['UPLOAD_FOLDER'], 'shops'), exist_ok=True)
-    os.makedirs(os.path.join(app.config['UPLOAD_FOLDER'], 'services'), exist_ok=True)
+    # Upload folders are created on first save (utils.save_image)
 
     # Error handlers
-    from .errors import page_not_found, forbidden, internal_server_error
+    from .errors import page_not_found, forbidden, internal_server_error, image_too_large
+    from .image_pipeline import ImageTooLarge
     app.register_error_handler(404, page_not_found)
     app.register_error_handler(403, forbidden)
     app.register_error_handler(500, internal_server_error)
+    app.register_error_handler(ImageTooLarge, image_too_large)
 
-    # Context processors
-    from .context_processors import inject_now
-    app.context_processor(inject_now)
+    # Context processors and template helpers
+    from .context_processors import inject_csrf_token, inject_user, utility_processor, format_currency
+    from .image_variants import responsive_image
+    app.context_processor(inject_csrf_token)
+    app.context_processor(inject_user)
+    app.context_processor(utility_processor)
+    app.add_template_filter(format_currency)
+    app.add_template_global(responsive_image)
 
     # Shell context
     @app.shell_context_processor
@@ -92,4 +117,4 @@ def create_app(config_class='config.Config'):
     return app
 
 # Import models here to avoid circular imports
-from .models.models import db, User, Shop, Product, Service, Order, OTP, CartItem, ServiceCartItem, OrderItem, ServiceOrderItem, Notification  # noqa
+from .models.models import User, Shop, Product, Service, Order, OTP, CartItem, ServiceCartItem, OrderItem, ServiceOrderItem, Notification  # noqa
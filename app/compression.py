@@ -0,0 +1,145 @@
+"""
+Response compression for the SHOP_SERV application.
+
+HTML pages such as ``shops.html`` and ``admin/orders.html`` and the JSON
+API payloads compress 4-60x (see benchmarks/bench_compression.py).
+``init_app()`` registers an ``after_request`` hook that encodes a response
+with Brotli or gzip when:
+
+* ``COMPRESS_ENABLED`` is on and the client accepts one of
+  ``COMPRESS_ALGORITHMS`` (Brotli needs the optional ``brotli`` package);
+* the mimetype is in ``COMPRESS_MIMETYPES``;
+* the body is at least ``COMPRESS_MIN_SIZE`` bytes, since tiny bodies can
+  come out larger;
+* the response is not already encoded and is not a file sent with
+  ``send_file`` (those are precompressed, see app/static_assets.py).
+
+Compressing a page that holds a secret next to attacker-chosen text leaks
+the secret through the compressed length (BREACH): a page can make a
+victim's browser request ``/products?search=<guess>`` many times and watch
+the sizes. The secret here is the CSRF token that base.html and the forms
+render, and app/csrf.py masks it afresh in every response, so filtered and
+searched pages are compressed like the rest.
+
+Streamed responses (``stream_with_context`` generators, exports) are
+compressed chunk by chunk when ``COMPRESS_STREAMS`` is on. Each chunk is
+flushed so the client still receives data as it is produced.
+"""
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only without it
+    brotli = None
+
+DEFAULT_MIMETYPES = frozenset({
+    'text/html', 'text/css', 'text/plain', 'text/xml', 'text/csv', 'text/javascript',
+    'application/json', 'application/javascript', 'application/xml', 'application/x-ndjson',
+    'image/svg+xml',
+})
+
+
+class _Encoder:
+    """Incremental gzip or Brotli encoder with a common interface."""
+
+    def __init__(self, encoding, gzip_level, brotli_quality):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits=31: zlib stream with a gzip header and trailer
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        if self.encoding == 'br':
+            return self._compressor.process(data)
+        return self._compressor.compress(data)
+
+    def flush(self):
+        if self.encoding == 'br':
+            return self._compressor.flush()
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self._compressor.finish()
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+def choose_encoding(accept_encodings, algorithms):
+    """Pick the algorithm the client rates highest; ties go to config order."""
+    best, best_quality = None, 0
+    for algorithm in algorithms:
+        if algorithm == 'br' and brotli is None:
+            continue
+        quality = accept_encodings.quality(algorithm)
+        if quality > best_quality:
+            best, best_quality = algorithm, quality
+    return best
+
+
+def _stream(chunks, encoder):
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            if chunk:
+                yield encoder.compress(chunk) + encoder.flush()
+        yield encoder.finish()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+def compress_response(response, config):
+    """Compress ``response`` in place if the rules above allow it."""
+    if (not config.get('COMPRESS_ENABLED', True)
+            or response.direct_passthrough
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in config.get('COMPRESS_MIMETYPES', DEFAULT_MIMETYPES)):
+        return response
+
+    streamed = response.is_streamed
+    if streamed and not config.get('COMPRESS_STREAMS', True):
+        return response
+    if not streamed and (response.content_length or 0) < config.get('COMPRESS_MIN_SIZE', 500):
+        return response
+
+    # Whatever this client sent, the body a cache stores depends on it
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.accept_encodings, config.get('COMPRESS_ALGORITHMS', ('br', 'gzip')))
+    if encoding is None:
+        return response
+
+    encoder = _Encoder(encoding, config.get('COMPRESS_GZIP_LEVEL', 6), config.get('COMPRESS_BROTLI_QUALITY', 4))
+    if streamed:
+        response.response = _stream(response.response, encoder)
+        response.headers.pop('Content-Length', None)
+    else:
+        response.set_data(encoder.compress(response.get_data()) + encoder.finish())
+
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        # The encoded body is a different representation
+        response.set_etag(f'{etag}-{encoding}', weak=weak)
+    return response
+
+
+def matching_etag(if_none_match, etag):
+    """The tag in ``if_none_match`` for ``etag`` as sent, plain or encoded; else None."""
+    for tag in if_none_match.as_set():
+        # compress_response appends '-br' / '-gzip'
+        if tag == etag or (tag.startswith(etag + '-') and tag[len(etag) + 1:] in ('br', 'gzip')):
+            return tag
+    return None
+
+
+def init_app(app):
+    """Compress every eligible response of ``app``."""
+    @app.after_request
+    def compress(response):
+        return compress_response(response, app.config)
@@ -28,13 +28,24 @@ def inject_user():
     if current_user.is_authenticated:
         user_data.update({
             'is_admin': current_user.role == 'admin',
-            'is_shop_owner': current_user.role == 'shop_owner',
+            'is_shop_owner': current_user.role == 'shopowner',
             'is_customer': current_user.role == 'customer',
-            'cart_count': current_user.cart_items.count() + current_user.service_cart_items.count()
+            # The navbar cart badge (base.html); only customers have one
+            'cart_count': cart_count(current_user.id) if current_user.role == 'customer' else 0
         })
     
     return user_data
 
+def cart_count(customer_id):
+    """Count product and service cart items in a single round-trip."""
+    from app.models.models import db, CartItem, ServiceCartItem
+    
+    products = db.select(db.func.count(CartItem.id)).where(CartItem.customer_id == customer_id)
+    services = db.select(db.func.count(ServiceCartItem.id)).where(ServiceCartItem.customer_id == customer_id)
+    return db.session.execute(
+        db.select(products.scalar_subquery() + services.scalar_subquery())
+    ).scalar() or 0
+
 def inject_global_vars():
     """Inject global variables into all templates."""
     return {
@@ -43,6 +54,30 @@ def inject_global_vars():
         'upn_id': current_app.config.get('UPI_ID', ''),
     }
 
+def inject_csrf_token():
+    """Expose ``csrf_token()`` to templates, including ones without a form."""
+    from app.csrf import masked_csrf_token
+    # Return the function itself, not the result of calling it
+    return {'csrf_token': masked_csrf_token}
+
+def utility_processor():
+    """Make a few builtins available to templates."""
+    return dict(
+        enumerate=enumerate,
+        len=len,
+        str=str
+    )
+
+def format_currency(value):
+    """Template filter: format ``value`` as rupees with thousand separators."""
+    if value is None:
+        return "₹0"
+    try:
+        # Format with Indian numbering system (comma as thousand separator)
+        return f"₹{float(value):,.2f}"
+    except (ValueError, TypeError):
+        return str(value)
+
 def init_app(app):
     """Register context processors with the Flask application."""
     app.context_processor(inject_now)
@@ -0,0 +1,79 @@
+"""
+Per-response CSRF tokens for the SHOP_SERV application.
+
+flask-wtf signs the same session secret into every token it renders, so a
+page holding the token next to text the request chose (``/products?search=``)
+would give the secret away through its compressed length (BREACH). Every
+token a page shows is therefore masked, as Django and Rails do: a random pad
+followed by the token XORed with it, base64url encoded. No two responses
+carry the same bytes, and app/compression.py can compress every page.
+
+``CSRFProtect`` (used by create_app()) unmasks the submitted token before
+flask-wtf checks it, and renders ``csrf_token()`` masked; forms.py's forms
+do the same through ``MaskedFormCSRF``. Unmasked tokens are still accepted.
+"""
+import base64
+import binascii
+import secrets
+
+from flask import g
+from flask_wtf import csrf
+from flask_wtf.csrf import generate_csrf, validate_csrf
+from wtforms.csrf.core import CSRF
+
+
+def _xor(data, pad):
+    return bytes(a ^ b for a, b in zip(data, pad))
+
+
+def mask(token):
+    """``token`` under a fresh random pad."""
+    data = token.encode()
+    pad = secrets.token_bytes(len(data))
+    return base64.urlsafe_b64encode(pad + _xor(data, pad)).decode()
+
+
+def unmask(value):
+    """The token in a ``mask()`` result; anything else is returned as it is."""
+    try:
+        data = base64.b64decode(value, altchars=b'-_', validate=True)
+        if not data or len(data) % 2:
+            return value
+        half = len(data) // 2
+        return _xor(data[half:], data[:half]).decode('ascii')
+    except (binascii.Error, ValueError):
+        return value
+
+
+def masked_csrf_token():
+    """``generate_csrf()``, masked; the ``csrf_token()`` of the templates."""
+    return mask(generate_csrf())
+
+
+class CSRFProtect(csrf.CSRFProtect):
+    """flask-wtf's CSRFProtect for masked tokens."""
+
+    def init_app(self, app):
+        super().init_app(app)
+        app.jinja_env.globals['csrf_token'] = masked_csrf_token
+
+    def _get_csrf_token(self):
+        token = super()._get_csrf_token()
+        return unmask(token) if token else token
+
+
+class MaskedFormCSRF(CSRF):
+    """FlaskForm's CSRF implementation, rendering and reading masked tokens."""
+
+    def setup_form(self, form):
+        self.meta = form.meta
+        return super().setup_form(form)
+
+    def generate_csrf_token(self, csrf_token_field):
+        return mask(generate_csrf(secret_key=self.meta.csrf_secret, token_key=self.meta.csrf_field_name))
+
+    def validate_csrf_token(self, form, field):
+        if g.get('csrf_valid', False):
+            return  # CSRFProtect already checked this request
+        validate_csrf(unmask(field.data or ''), self.meta.csrf_secret, self.meta.csrf_time_limit,
+                      self.meta.csrf_field_name)
@@ -0,0 +1,363 @@
+"""
+Synthetic data for scale-testing the SHOP_SERV application.
+
+``generate()`` fills the database with customers, shop owners and their
+shops (spread around real Indian cities, with weekly opening hours), products,
+services, carts, orders with product and service items, notifications, and
+reviews of shops and products (at most one per customer and target) with
+their rating aggregates filled in.
+The output is deterministic: the same ``seed`` and ``until`` date always
+produce the same rows (all accounts share one password, ``PASSWORD``, whose
+salted hash differs between runs).
+
+Rows go in through Core ``executemany`` inserts, ``chunk_size`` rows per
+transaction, with primary keys assigned up front. That skips the ORM
+unit of work and per-row round trips, so a million orders take minutes,
+not hours. Run it on a fresh database or next to existing data; ids
+continue from the current maximum. ``generate_data.py`` is the CLI.
+"""
+import random
+import time
+from datetime import datetime, time as dtime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+# (city, state, latitude, longitude, pincode prefix)
+CITIES = [
+    ('Mumbai', 'Maharashtra', 19.0760, 72.8777, '400'),
+    ('Delhi', 'Delhi', 28.6139, 77.2090, '110'),
+    ('Bengaluru', 'Karnataka', 12.9716, 77.5946, '560'),
+    ('Hyderabad', 'Telangana', 17.3850, 78.4867, '500'),
+    ('Chennai', 'Tamil Nadu', 13.0827, 80.2707, '600'),
+    ('Kolkata', 'West Bengal', 22.5726, 88.3639, '700'),
+    ('Pune', 'Maharashtra', 18.5204, 73.8567, '411'),
+    ('Ahmedabad', 'Gujarat', 23.0225, 72.5714, '380'),
+    ('Jaipur', 'Rajasthan', 26.9124, 75.7873, '302'),
+    ('Lucknow', 'Uttar Pradesh', 26.8467, 80.9462, '226'),
+    ('Indore', 'Madhya Pradesh', 22.7196, 75.8577, '452'),
+    ('Kochi', 'Kerala', 9.9312, 76.2673, '682'),
+]
+
+# service_type -> (product categories, product names, service names)
+SHOP_TYPES = {
+    'Bakery': (['Bread', 'Cakes', 'Cookies'], ['Sourdough Loaf', 'Chocolate Cake', 'Butter Cookies', 'Croissant',
+                                               'Multigrain Bread', 'Cupcake'], ['Custom Cake Order']),
+    'Grocery': (['Staples', 'Dairy', 'Snacks'], ['Basmati Rice 5kg', 'Toor Dal 1kg', 'Paneer 200g', 'Ghee 500ml',
+                                                  'Masala Chips', 'Atta 10kg'], ['Home Delivery Subscription']),
+    'Electronics': (['Accessories', 'Audio', 'Mobiles'], ['USB-C Cable', 'Bluetooth Speaker', 'Power Bank',
+                                                           'Earphones', 'Phone Case', 'Smart Watch'],
+                    ['Screen Replacement', 'Battery Replacement']),
+    'Pharmacy': (['Medicines', 'Wellness', 'Personal Care'], ['Paracetamol 500mg', 'Vitamin C', 'Hand Sanitizer',
+                                                              'Face Mask Pack', 'Cough Syrup', 'Bandages'],
+                 ['Blood Pressure Check']),
+    'Salon': (['Hair Care', 'Skin Care'], ['Herbal Shampoo', 'Hair Oil', 'Face Wash', 'Moisturiser'],
+              ['Haircut', 'Facial', 'Manicure', 'Hair Spa']),
+    'Stationery': (['Office', 'School', 'Art'], ['A4 Paper Ream', 'Gel Pens', 'Notebook', 'Sketch Pens',
+                                                 'Geometry Box', 'Watercolours'], ['Photocopy', 'Spiral Binding']),
+}
+
+FIRST_NAMES = ['Aarav', 'Vivaan', 'Aditya', 'Ananya', 'Diya', 'Isha', 'Kabir', 'Meera', 'Rohan', 'Saanvi',
+               'Arjun', 'Priya', 'Rahul', 'Sneha', 'Vikram', 'Neha', 'Karan', 'Pooja', 'Siddharth', 'Riya']
+LAST_NAMES = ['Sharma', 'Patel', 'Reddy', 'Iyer', 'Singh', 'Gupta', 'Nair', 'Das', 'Joshi', 'Mehta',
+              'Kulkarni', 'Banerjee', 'Rao', 'Khan', 'Verma']
+
+# (status, payment_status, weight)
+ORDER_STATES = [
+    ('delivered', 'completed', 60), ('confirmed', 'completed', 10), ('processing', 'pending', 8),
+    ('shipped', 'completed', 7), ('pending', 'pending', 10), ('cancelled', 'cancelled', 5),
+]
+PAYMENT_METHODS = (['cod', 'qr', 'online'], [50, 35, 15])
+
+# Every generated account can log in with this password
+PASSWORD = 'password123'
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _next_id(conn, table):
+    from sqlalchemy import func, select
+    return (conn.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+
+
+class _Inserter:
+    """Insert row dicts in chunked transactions and report per-table timings."""
+
+    def __init__(self, engine, chunk_size, report):
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self.report = report
+
+    def __call__(self, table, rows, statement=None):
+        """Run ``statement`` (default: an INSERT into ``table``) for ``rows``."""
+        statement = table.insert() if statement is None else statement
+        start = time.perf_counter()
+        count = 0
+        for chunk in _chunks(rows, self.chunk_size):
+            with self.engine.begin() as conn:
+                conn.execute(statement, chunk)
+            count += len(chunk)
+        if self.report:
+            elapsed = time.perf_counter() - start
+            verb = 'inserted' if statement.is_insert else 'updated'
+            self.report(f"{table.name}: {count:,} rows {verb} in {elapsed:.1f}s "
+                        f"({count / elapsed if elapsed else 0:,.0f} rows/s)")
+        return count
+
+
+def generate(engine, seed=42, customers=1000, shops=50, products_per_shop=20, services_per_shop=2,
+             orders=5000, cart_ratio=0.2, reviews=1000, days=365, until=None, chunk_size=20000, report=None):
+    """Generate a dataset with ``engine`` and return ``{table name: rows inserted}``.
+
+    ``until`` (default: today, midnight UTC) is the newest timestamp; orders
+    are spread over the ``days`` before it.
+    """
+    from app.models.models import (User, Shop, ShopHours, Product, Service, CartItem, ServiceCartItem, Order,
+                                   OrderItem, ServiceOrderItem, Notification, Review)
+    from app.reviews import HISTOGRAM, RATINGS
+    from app.shop_hours import weekly_intervals
+    from sqlalchemy import bindparam
+
+    rng = random.Random(seed)
+    until = until or datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    since = until - timedelta(days=days)
+    span = int((until - since).total_seconds())
+    insert = _Inserter(engine, chunk_size, report)
+    # Hashing is deliberately slow; every account shares one hash
+    password_hash = generate_password_hash(PASSWORD)
+
+    tables = [User, Shop, ShopHours, Product, Service, Order, OrderItem, ServiceOrderItem]
+    with engine.connect() as conn:
+        first = {model: _next_id(conn, model.__table__) for model in tables}
+
+    def moment():
+        return since + timedelta(seconds=rng.randrange(span))
+
+    def phone():
+        return f'9{rng.randrange(10 ** 9):09d}'
+
+    def name():
+        return f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+
+    counts = {}
+
+    # Users: shop owners first, then customers
+    owner_ids = range(first[User], first[User] + shops)
+    customer_ids = range(owner_ids.stop, owner_ids.stop + customers)
+
+    def users():
+        for user_id in owner_ids:
+            yield {'id': user_id, 'email': f'owner{user_id}@example.com', 'password_hash': password_hash,
+                   'full_name': name(), 'phone': phone(), 'role': 'shopowner', 'is_active': True,
+                   'created_at': since, 'updated_at': since}
+        for user_id in customer_ids:
+            created = moment()
+            yield {'id': user_id, 'email': f'customer{user_id}@example.com', 'password_hash': password_hash,
+                   'full_name': name(), 'phone': phone(), 'role': 'customer', 'is_active': rng.random() > 0.01,
+                   'created_at': created, 'updated_at': created}
+    counts['users'] = insert(User.__table__, users())
+
+    # Shops, one per owner
+    shop_rows = []
+    for offset, owner_id in enumerate(owner_ids):
+        city, state, lat, lng, pincode = rng.choice(CITIES)
+        shop_type = rng.choice(list(SHOP_TYPES))
+        opens = rng.choice([7, 8, 9, 10])
+        shop_rows.append({
+            'id': first[Shop] + offset, 'owner_id': owner_id, 'service_type': shop_type,
+            'name': f'{rng.choice(LAST_NAMES)} {shop_type} {offset + 1}',
+            'description': f'Your neighbourhood {shop_type.lower()} in {city}.',
+            'address': f'{rng.randrange(1, 400)}, {rng.choice(["MG Road", "Station Road", "Main Bazaar", "Park Street", "Market Lane"])}',
+            'city': city, 'state': state, 'pincode': f'{pincode}{rng.randrange(1000):03d}',
+            # ~10 km around the city centre
+            'latitude': round(lat + rng.uniform(-0.09, 0.09), 6),
+            'longitude': round(lng + rng.uniform(-0.09, 0.09), 6),
+            'contact_phone': phone(), 'contact_email': f'shop{owner_id}@example.com',
+            'opening_time': dtime(opens, rng.choice([0, 30])),
+            'closing_time': dtime(rng.choice([18, 20, 21, 22]), rng.choice([0, 30])),
+            'is_delivery_available': rng.random() < 0.8, 'is_cod_available': rng.random() < 0.9,
+            'delivery_radius_km': rng.choice([2.0, 3.0, 5.0, 8.0]),
+            'delivery_charge': rng.choice([0.0, 20.0, 30.0, 40.0]),
+            'min_order_amount': rng.choice([0.0, 100.0, 200.0]),
+            'is_verified': rng.random() < 0.7, 'is_approved': True, 'is_active': rng.random() > 0.03,
+            'upi_id': f'shop{owner_id}@upi', 'preferred_payment_method': 'upi',
+            'created_at': since, 'updated_at': since,
+        })
+    counts['shops'] = insert(Shop.__table__, shop_rows)
+
+    # Weekly hours: the shop's daily hours, and every third shop closes one day a week
+    def hours_rows():
+        hours_id = first[ShopHours]
+        for shop in shop_rows:
+            closed = {shop['id'] % 7} if shop['id'] % 3 == 0 else set()
+            spans = [(day, shop['opening_time'], shop['closing_time']) for day in range(7) if day not in closed]
+            for opens_at, closes_at in weekly_intervals(spans):
+                yield {'id': hours_id, 'shop_id': shop['id'], 'opens_at': opens_at, 'closes_at': closes_at}
+                hours_id += 1
+    counts['shop_hours'] = insert(ShopHours.__table__, hours_rows())
+
+    # Catalog; (id, shop_id, price) is kept for carts and orders
+    products, services = [], []
+
+    def catalog():
+        product_id = first[Product]
+        for shop in shop_rows:
+            categories, names, _ = SHOP_TYPES[shop['service_type']]
+            for _ in range(products_per_shop):
+                price = round(rng.uniform(10, 2500) if shop['service_type'] == 'Electronics'
+                              else rng.uniform(10, 600), 2)
+                created = moment()
+                products.append((product_id, shop['id'], price))
+                yield {'id': product_id, 'shop_id': shop['id'], 'name': rng.choice(names),
+                       'description': f'Quality {shop["service_type"].lower()} item from {shop["name"]}.',
+                       'price': price, 'stock': rng.randrange(0, 200), 'category': rng.choice(categories),
+                       'is_active': rng.random() > 0.05, 'created_at': created, 'updated_at': created}
+                product_id += 1
+    counts['products'] = insert(Product.__table__, catalog())
+
+    def service_rows():
+        service_id = first[Service]
+        for shop in shop_rows:
+            _, _, names = SHOP_TYPES[shop['service_type']]
+            for _ in range(services_per_shop):
+                price = round(rng.uniform(50, 1500), 2)
+                services.append((service_id, shop['id'], price))
+                yield {'id': service_id, 'shop_id': shop['id'], 'name': rng.choice(names),
+                       'description': f'Offered by {shop["name"]}.', 'price': price,
+                       'duration': rng.choice(['30 minutes', '1 hour', '2 hours', 'Same day']),
+                       'category': shop['service_type'], 'is_active': True,
+                       'created_at': since, 'updated_at': since}
+                service_id += 1
+    counts['services'] = insert(Service.__table__, service_rows())
+
+    # Carts: a share of customers with a few distinct products each
+    def cart_rows():
+        for customer_id in customer_ids:
+            if rng.random() >= cart_ratio:
+                continue
+            for product_id, _, _ in rng.sample(products, min(len(products), rng.randint(1, 5))):
+                yield {'customer_id': customer_id, 'product_id': product_id,
+                       'quantity': rng.randint(1, 3), 'added_at': until - timedelta(seconds=rng.randrange(86400 * 14))}
+    counts['cart_items'] = insert(CartItem.__table__, cart_rows())
+
+    def service_cart_rows():
+        for customer_id in customer_ids:
+            if services and rng.random() < cart_ratio / 4:
+                yield {'customer_id': customer_id, 'service_id': rng.choice(services)[0], 'quantity': 1,
+                       'added_at': until - timedelta(seconds=rng.randrange(86400 * 14))}
+    counts['service_cart_items'] = insert(ServiceCartItem.__table__, service_cart_rows())
+
+    # Orders, generated in time order; items mostly come from one shop
+    products_by_shop = {}
+    for product in products:
+        products_by_shop.setdefault(product[1], []).append(product)
+    shop_ids = list(products_by_shop)
+    statuses = [(status, payment) for status, payment, _ in ORDER_STATES]
+    status_weights = [weight for _, _, weight in ORDER_STATES]
+    timestamps = sorted(rng.randrange(span) for _ in range(orders))
+    item_id, service_item_id = first[OrderItem], first[ServiceOrderItem]
+    counts.update(orders=0, order_items=0, service_order_items=0, notifications=0)
+
+    start = time.perf_counter()
+    for chunk_start in range(0, orders, chunk_size):
+        order_rows, order_items, service_items, notifications = [], [], [], []
+        for offset in range(chunk_start, min(chunk_start + chunk_size, orders)):
+            order_id = first[Order] + offset
+            created = since + timedelta(seconds=timestamps[offset])
+            shop_products = products_by_shop[rng.choice(shop_ids)]
+            total = 0.0
+            for product_id, shop_id, price in rng.sample(shop_products, min(rng.randint(1, 4), len(shop_products))):
+                quantity = rng.choices([1, 2, 3, 5], [70, 20, 8, 2])[0]
+                order_items.append({'id': item_id, 'order_id': order_id, 'product_id': product_id,
+                                    'shop_id': shop_id, 'quantity': quantity, 'price': price})
+                total += quantity * price
+                item_id += 1
+            if services and rng.random() < 0.05:
+                service_id, shop_id, price = rng.choice(services)
+                service_items.append({'id': service_item_id, 'order_id': order_id, 'service_id': service_id,
+                                      'shop_id': shop_id, 'quantity': 1, 'price': price})
+                total += price
+                service_item_id += 1
+
+            status, payment_status = rng.choices(statuses, status_weights)[0]
+            customer_id = rng.choice(customer_ids)
+            order_number = f'ORD{created:%Y%m%d}{order_id:08d}'
+            order_rows.append({
+                'id': order_id, 'order_number': order_number, 'customer_id': customer_id,
+                'total_amount': round(total, 2), 'status': status, 'payment_status': payment_status,
+                'payment_method': rng.choices(*PAYMENT_METHODS)[0],
+                'shipping_address': f'{rng.randrange(1, 999)}, {rng.choice(CITIES)[0]}',
+                'shipping_phone': phone(), 'created_at': created,
+                'updated_at': created + timedelta(hours=rng.randrange(0, 72)),
+            })
+            notifications.append({'user_id': customer_id, 'message': f'Your order {order_number} is {status}.',
+                                  'is_read': created < until - timedelta(days=7) or rng.random() < 0.5,
+                                  'created_at': created})
+
+        # Orders and their children commit together, parents first
+        with engine.begin() as conn:
+            for table, rows in ((Order.__table__, order_rows), (OrderItem.__table__, order_items),
+                                (ServiceOrderItem.__table__, service_items),
+                                (Notification.__table__, notifications)):
+                if rows:
+                    conn.execute(table.insert(), rows)
+                counts[table.name] += len(rows)
+
+    if report:
+        elapsed = time.perf_counter() - start
+        report(f"orders: {counts['orders']:,} rows with {counts['order_items']:,} order_items, "
+               f"{counts['service_order_items']:,} service_order_items and {counts['notifications']:,} "
+               f"notifications in {elapsed:.1f}s ({counts['orders'] / elapsed if elapsed else 0:,.0f} orders/s)")
+
+    # Reviews: distinct (customer, target) pairs, a fifth of them of shops.
+    # Capped at half the possible pairs so drawing them stays cheap.
+    histograms = {Shop: {}, Product: {}}
+    reviews = min(reviews, len(customer_ids) * (len(products) + len(shop_rows)) // 2)
+
+    def review_rows():
+        pairs = set()
+        for created in sorted(moment() for _ in range(reviews)):
+            while True:
+                if rng.random() < 0.2:
+                    model, target_id = Shop, rng.choice(shop_rows)['id']
+                else:
+                    model, target_id = Product, rng.choice(products)[0]
+                customer_id = rng.choice(customer_ids)
+                if (customer_id, model, target_id) not in pairs:
+                    break
+            pairs.add((customer_id, model, target_id))
+            rating = rng.choices(RATINGS, [5, 7, 15, 33, 40])[0]
+            histograms[model].setdefault(target_id, [0] * len(RATINGS))[rating - 1] += 1
+            yield {'user_id': customer_id, 'rating': rating,
+                   'shop_id': target_id if model is Shop else None,
+                   'product_id': target_id if model is Product else None,
+                   'comment': rng.choice([None, None, 'Great service!', 'Good value.', 'Would buy again.',
+                                          'Delivery was late.', 'Not as described.']),
+                   'created_at': created, 'updated_at': created}
+    counts['reviews'] = insert(Review.__table__, review_rows())
+
+    # The rated shops and products get their aggregates in one executemany
+    # each, as app.reviews.rebuild_ratings() writes them
+    for model, by_target in histograms.items():
+        table = model.__table__
+        names = HISTOGRAM + ['review_count', 'average_rating']
+        statement = (table.update().where(table.c.id == bindparam('target_id'))
+                     .values({**{name: bindparam(f'new_{name}') for name in names},
+                              'updated_at': table.c.updated_at}))
+
+        def aggregate_rows():
+            for target_id, histogram in sorted(by_target.items()):
+                count = sum(histogram)
+                yield {'target_id': target_id, 'new_review_count': count,
+                       'new_average_rating': sum(r * n for r, n in zip(RATINGS, histogram)) / count,
+                       **{f'new_{name}': n for name, n in zip(HISTOGRAM, histogram)}}
+        insert(table, aggregate_rows(), statement)
+    return counts
@@ -1,7 +1,7 @@
 """
 Error handlers for the SHOP_SERV application.
 """
-from flask import render_template, request, jsonify
+from flask import render_template, request, jsonify, flash, redirect, url_for
 from werkzeug.exceptions import HTTPException
 from app import db
 
@@ -33,6 +33,12 @@ def internal_server_error(error):
         }), 500
     return render_template('errors/500.html'), 500
 
+def image_too_large(error):
+    """Send the uploader back to the form instead of decoding a huge image."""
+    db.session.rollback()
+    flash(f'{error}. Please upload a smaller image.', 'danger')
+    return redirect(request.referrer or url_for('main.index'))
+
 def bad_request(error):
     """Handle 400 errors."""
     if request.path.startswith('/api/'):
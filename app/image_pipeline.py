@@ -0,0 +1,240 @@
+"""
+Background image processing for the SHOP_SERV application.
+
+Decoding, converting and LANCZOS-thumbnailing a large upload can keep a
+worker busy for seconds. With ``IMAGE_PROCESSING_MODE = 'pool'`` the request
+only does the cheap part:
+
+1. the raw upload is streamed to ``IMAGE_STAGING_FOLDER``;
+2. its header is checked so obviously broken files are still rejected
+   inside the request;
+3. a tiny placeholder is written at the final path, so the path stored on the
+   Product/Shop/Service row renders straight away;
+4. an ``ImageJob`` row is added to the request's session and the work is
+   handed to a process pool.
+
+The pool atomically replaces the placeholder with the processed image and
+the job row moves to ``done`` (or ``failed``). That status write can wait for
+the queuing request to commit, so it runs on a small thread pool of its own
+rather than on the process pool's result thread, which would stall every
+other job's completion meanwhile. Job status can be read with
+``get_job_status()`` or the ``/api/image-status/<path>`` endpoint.
+
+``IMAGE_PROCESSING_MODE = 'sync'`` processes inline, as before.
+"""
+import logging
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+
+from flask import current_app
+
+from app.image_variants import build_variants
+
+logger = logging.getLogger(__name__)
+
+MAX_IMAGE_SIZE = (800, 800)
+MAX_IMAGE_PIXELS = 24_000_000  # ~96 MB once decoded to RGBA
+PLACEHOLDER_COLOR = (238, 238, 238)
+
+_executor = None
+_status_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+class ImageTooLarge(ValueError):
+    """The upload would decode to more pixels than IMAGE_MAX_PIXELS."""
+
+
+def open_image(source, max_size=MAX_IMAGE_SIZE, max_pixels=MAX_IMAGE_PIXELS):
+    """Open ``source`` lazily and bound what decoding it will cost.
+
+    Only the header has been read when this returns. JPEGs are switched to
+    DCT downscale-on-decode (1/2 to 1/8) via ``draft()``, keeping at least
+    twice ``max_size`` like ``thumbnail()`` does, so a 50 MP photo decodes
+    at a few MP. The pixel budget is then checked against the size that will
+    actually be decoded, which mostly rejects huge PNG/GIF/WebP uploads.
+    """
+    from PIL import Image
+
+    img = Image.open(source)
+    width, height = img.size
+    scale = min(max_size[0] / width, max_size[1] / height)
+    if img.format == 'JPEG' and scale < 1:
+        # draft() only reduces while both sides stay above the box, so the
+        # box must have the image's aspect ratio, as in thumbnail()
+        img.draft('RGB', (round(width * scale) * 2, round(height * scale) * 2))
+
+    width, height = img.size
+    if width * height > max_pixels:
+        img.close()
+        raise ImageTooLarge(
+            f"Image is {width}x{height} ({width * height / 1e6:.0f} MP); "
+            f"the limit is {max_pixels / 1e6:.0f} MP"
+        )
+    return img
+
+
+def process_image(source, target_path, max_size=MAX_IMAGE_SIZE, variants=True,
+                  max_pixels=MAX_IMAGE_PIXELS):
+    """Decode ``source``, flatten transparency, thumbnail and save to ``target_path``.
+
+    ``source`` may be a path or a file object. The result is written to a
+    temporary sibling first and moved into place, so readers never see a
+    half-written file. With ``variants`` the responsive WebP/AVIF copies are
+    written too. Runs in the request (sync mode) or in a pool process.
+    """
+    from PIL import Image
+
+    img = open_image(source, max_size, max_pixels)
+
+    # Convert RGBA to RGB if necessary
+    if img.mode in ('RGBA', 'LA', 'P'):
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
+        img = background
+
+    # Resize if too large
+    img.thumbnail(max_size, Image.Resampling.LANCZOS)
+
+    # Save optimized image
+    root, ext = os.path.splitext(target_path)
+    tmp_path = f'{root}.tmp{ext}'
+    img.save(tmp_path, quality=85, optimize=True)
+    os.replace(tmp_path, target_path)
+
+    if variants:
+        try:
+            build_variants(img, target_path)
+        except Exception as e:
+            # The original is in place; templates fall back to a plain <img>
+            logger.warning(f"Could not build variants for {target_path}: {e}")
+    return target_path
+
+
+def _run_job(staging_path, target_path, max_size, variants, max_pixels):
+    """Pool entry point: process the staged upload, then drop it."""
+    try:
+        return process_image(staging_path, target_path, max_size, variants, max_pixels)
+    finally:
+        try:
+            os.remove(staging_path)
+        except OSError:
+            pass
+
+
+def _get_executors(app):
+    """The (image process pool, job status thread pool) of this process."""
+    global _executor, _status_executor, _executor_pid
+    # Pools do not survive fork(); each gunicorn worker builds its own
+    if _executor is None or _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                workers = app.config.get('IMAGE_WORKERS', 2)
+                _executor = ProcessPoolExecutor(max_workers=workers)
+                _status_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='image-status')
+                _executor_pid = os.getpid()
+    return _executor, _status_executor
+
+
+def _write_placeholder(target_path):
+    from PIL import Image
+
+    Image.new('RGB', (8, 8), PLACEHOLDER_COLOR).save(target_path)
+
+
+def _update_job(app, job_id, retries=20, delay=0.25, **values):
+    from app.models.models import db, ImageJob
+
+    # The job row is committed with the request that queued it, which may
+    # still be running when a small image finishes; wait for it to appear.
+    with app.app_context():
+        for _ in range(retries):
+            with db.engine.begin() as conn:
+                updated = conn.execute(
+                    db.update(ImageJob).where(ImageJob.id == job_id).values(**values)
+                ).rowcount
+            if updated:
+                return
+            time.sleep(delay)
+        logger.warning(f"Image job {job_id} was never committed; status not recorded")
+
+
+def submit_image(file, folder, filename):
+    """Stage ``file`` and queue it for processing into ``folder/filename``.
+
+    Returns the relative image path, which points at a placeholder until the
+    job finishes.
+    """
+    from app.models.models import db, ImageJob
+
+    app = current_app._get_current_object()
+    staging_folder = app.config['IMAGE_STAGING_FOLDER']
+    folder_path = os.path.join(app.config['UPLOAD_FOLDER'], folder)
+    os.makedirs(staging_folder, exist_ok=True)
+    os.makedirs(folder_path, exist_ok=True)
+
+    image_path = f'{folder}/{filename}'
+    target_path = os.path.join(folder_path, filename)
+    staging_path = os.path.join(staging_folder, f'{secrets.token_hex(8)}_{filename}')
+    file.save(staging_path)
+
+    # Reject non-images and oversized images while we can still tell the user;
+    # only reads the header
+    try:
+        open_image(staging_path, app.config.get('IMAGE_MAX_SIZE', MAX_IMAGE_SIZE),
+                   app.config.get('IMAGE_MAX_PIXELS', MAX_IMAGE_PIXELS)).close()
+    except Exception:
+        os.remove(staging_path)
+        raise
+
+    _write_placeholder(target_path)
+
+    # Committed together with the Product/Shop/Service row that uses the image
+    job = ImageJob(image_path=image_path, status='pending')
+    db.session.add(job)
+    db.session.flush()
+    job_id = job.id
+
+    executor, status_executor = _get_executors(app)
+    future = executor.submit(
+        _run_job, staging_path, target_path,
+        app.config.get('IMAGE_MAX_SIZE', MAX_IMAGE_SIZE), app.config.get('IMAGE_VARIANTS', True),
+        app.config.get('IMAGE_MAX_PIXELS', MAX_IMAGE_PIXELS)
+    )
+
+    def on_done(fut):
+        # Runs on the process pool's result thread: hand the (possibly
+        # waiting) status write over instead of blocking it
+        error = fut.exception()
+        if error is not None:
+            logger.error(f"Image job {job_id} for {image_path} failed: {error}")
+        status_executor.submit(
+            _update_job, app, job_id,
+            status='failed' if error else 'done',
+            error=str(error)[:500] if error else None,
+            finished_at=datetime.utcnow()
+        )
+
+    future.add_done_callback(on_done)
+    return image_path
+
+
+def get_job_status(image_path):
+    """Return ``{'status', 'error', ...}`` for the latest job of ``image_path``."""
+    from app.models.models import ImageJob
+
+    job = ImageJob.query.filter_by(image_path=image_path).order_by(ImageJob.id.desc()).first()
+    if job is None:
+        return None
+    return {
+        'image_path': job.image_path,
+        'status': job.status,
+        'error': job.error,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
@@ -0,0 +1,115 @@
+"""
+Content-addressed image storage for the SHOP_SERV application.
+
+Uploads are named after a SHA-256 of their bytes (plus the processing
+settings), so the same catalog photo uploaded for many products is stored
+and processed once. The hash covers the upload as received, not the
+normalised image ``process_image`` writes: the name has to be known before
+processing, which in 'pool' mode happens after the request. Byte-identical
+uploads therefore share a file; the same photo saved twice with different
+encodings does not. The ``image_refs`` table counts how many rows point at
+each stored image:
+
+* ``acquire()`` is called by ``save_image``. If the image is already stored
+  it only bumps the count and the upload is not processed again.
+* ``release()`` is called by ``delete_image``. The files are only unlinked
+  when the last reference goes away, and only after the transaction
+  commits (``delete_after_commit()``), so a rolled-back change still has
+  its image.
+
+Both run on ``db.session``, so the count is committed together with the
+Product/Shop/Service change that caused it.
+"""
+import hashlib
+import logging
+import os
+
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+
+def content_hash(file, salt=''):
+    """SHA-256 hex digest of an uploaded file's bytes, as uploaded; rewinds the stream."""
+    stream = getattr(file, 'stream', file)
+    digest = hashlib.sha256(salt.encode())
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def acquire(image_path, digest):
+    """Add a reference to ``image_path``. Returns True if it was already stored."""
+    from app.models.models import db, ImageRef
+
+    updated = ImageRef.query.filter_by(image_path=image_path).update(
+        {ImageRef.refcount: ImageRef.refcount + 1}, synchronize_session=False
+    )
+    if updated:
+        return True
+
+    try:
+        with db.session.begin_nested():
+            db.session.add(ImageRef(image_path=image_path, content_hash=digest, refcount=1))
+    except IntegrityError:
+        # Another request stored the same image first
+        ImageRef.query.filter_by(image_path=image_path).update(
+            {ImageRef.refcount: ImageRef.refcount + 1}, synchronize_session=False
+        )
+        return True
+    return False
+
+
+def release(image_path):
+    """Drop a reference to ``image_path``. Returns True if the files should be deleted.
+
+    Images saved before content addressing have no ``image_refs`` row and are
+    always deleted, as before.
+    """
+    from app.models.models import ImageRef
+
+    updated = ImageRef.query.filter(
+        ImageRef.image_path == image_path,
+        ImageRef.refcount > 1
+    ).update({ImageRef.refcount: ImageRef.refcount - 1}, synchronize_session=False)
+    if updated:
+        return False
+
+    # Last reference (or a pre-content-addressing image without a row)
+    ImageRef.query.filter_by(image_path=image_path).delete(synchronize_session=False)
+    return True
+
+
+PENDING_KEY = 'image_store.unlink_after_commit'
+
+
+def _unlink_pending(session):
+    for full_path in session.info.pop(PENDING_KEY, ()):
+        if os.path.exists(full_path):
+            try:
+                os.remove(full_path)
+            except OSError as e:
+                # Left for cleanup_uploads.py to collect
+                logger.warning(f"Could not delete {full_path}: {e}")
+
+
+def _forget_pending(session, transaction):
+    # Runs after _unlink_pending on commit; on rollback the files stay
+    if transaction.parent is None:
+        session.info.pop(PENDING_KEY, None)
+
+
+def delete_after_commit(full_paths):
+    """Unlink ``full_paths`` once the ``db.session`` transaction commits; keep them if it rolls back."""
+    from app.models.models import db
+
+    if not event.contains(Session, 'after_commit', _unlink_pending):
+        event.listen(Session, 'after_commit', _unlink_pending)
+        event.listen(Session, 'after_transaction_end', _forget_pending)
+    db.session.info.setdefault(PENDING_KEY, set()).update(full_paths)
@@ -0,0 +1,122 @@
+"""
+Responsive image variants for the SHOP_SERV application.
+
+Every upload is stored as a single image of up to 800px, but listing grids
+show it at roughly 200px. When an upload is processed we also write smaller
+WebP (and AVIF, when Pillow can encode it) copies next to it:
+
+    products/3f2a.jpg                 original, as before
+    products/3f2a_320w.webp           one file per width and format
+    products/3f2a.variants.json       manifest describing the files above
+
+Templates call ``responsive_image(path, alt=..., sizes=...)``, which reads
+the manifest and emits a ``<picture>`` element with ``srcset``/``sizes``.
+Images without a manifest (older uploads, or a job still in the pool) fall
+back to a plain ``<img>``; ``generate_image_variants.py`` backfills them.
+"""
+import json
+import os
+from functools import lru_cache
+
+from flask import current_app, url_for
+from markupsafe import Markup, escape
+
+VARIANT_WIDTHS = (160, 320, 640, 800)
+VARIANT_QUALITY = {'webp': 80, 'avif': 60}
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp'}
+
+
+def supported_formats():
+    """Variant formats this Pillow build can encode, best first."""
+    from PIL import Image
+
+    Image.init()
+    return [fmt for fmt in ('avif', 'webp') if fmt.upper() in Image.SAVE]
+
+
+def manifest_path(image_file):
+    root, _ = os.path.splitext(image_file)
+    return f'{root}.variants.json'
+
+
+def variant_paths(image_path):
+    """Relative paths of every variant file a manifest for ``image_path`` may list."""
+    root, _ = os.path.splitext(image_path)
+    paths = [manifest_path(image_path)]
+    for fmt in MIME_TYPES:
+        paths.extend(f'{root}_{width}w.{fmt}' for width in VARIANT_WIDTHS)
+    return paths
+
+
+def build_variants(img, image_file, widths=VARIANT_WIDTHS, formats=None):
+    """Write resized copies of ``img`` (already flattened to RGB) and a manifest.
+
+    ``image_file`` is the absolute path of the processed original; variants
+    are written next to it. Widths larger than the image itself are skipped,
+    except that the image's own width is always included.
+    """
+    from PIL import Image
+
+    formats = formats or supported_formats()
+    if img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+    root, _ = os.path.splitext(image_file)
+    name = os.path.basename(root)
+    width, height = img.size
+
+    targets = sorted({w for w in widths if w < width} | {min(width, max(widths))})
+    variants = {}
+    for fmt in formats:
+        variants[fmt] = {}
+        for target in targets:
+            resized = img if target == width else img.resize(
+                (target, max(1, round(height * target / width))), Image.Resampling.LANCZOS
+            )
+            filename = f'{name}_{target}w.{fmt}'
+            resized.save(os.path.join(os.path.dirname(image_file), filename),
+                         quality=VARIANT_QUALITY[fmt])
+            variants[fmt][str(target)] = filename
+
+    manifest = {'width': width, 'height': height, 'variants': variants}
+    tmp_path = manifest_path(image_file) + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, manifest_path(image_file))
+    return manifest
+
+
+@lru_cache(maxsize=4096)
+def _read_manifest(path, mtime_ns):
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_manifest(image_path):
+    """Return the manifest for an ``UPLOAD_FOLDER``-relative path, or None."""
+    path = manifest_path(os.path.join(current_app.config['UPLOAD_FOLDER'], image_path))
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    return _read_manifest(path, mtime_ns)
+
+
+def responsive_image(image_path, alt='', sizes='100vw', **attrs):
+    """Template helper: ``<picture>`` with WebP/AVIF ``srcset`` for an upload."""
+    folder = os.path.dirname(image_path)
+    src = url_for('static', filename=f'uploads/{image_path}')
+    attributes = ''.join(f' {escape(k)}="{escape(v)}"' for k, v in attrs.items())
+    manifest = load_manifest(image_path)
+
+    img = Markup(f'<img src="{src}" alt="{escape(alt)}" loading="lazy" decoding="async"{attributes}>')
+    if not manifest:
+        return img
+
+    sources = []
+    for fmt, files in manifest['variants'].items():
+        srcset = ', '.join(
+            f"{url_for('static', filename=f'uploads/{folder}/{filename}')} {width}w"
+            for width, filename in sorted(files.items(), key=lambda item: int(item[0]))
+        )
+        sources.append(f'<source type="{MIME_TYPES[fmt]}" srcset="{srcset}" sizes="{escape(sizes)}">')
+    return Markup(f'<picture>{"".join(sources)}{img}</picture>')
@@ -0,0 +1,228 @@
+"""
+Inventory sync for the SHOP_SERV application.
+
+Point-of-sale systems keep a shop's stock and prices in step through
+``/api/shop/inventory``:
+
+* ``GET`` lists every product with its stock and price. The response has
+  an ETag, so a client polling with ``If-None-Match`` gets a 304 until
+  something changes.
+* ``POST`` takes a JSON list (or ``{"items": [...]}``) of
+  ``{"product_id" or "sku", "stock", "price"}``. ``stock`` and ``price``
+  are each optional and checked with the ProductForm rules. Rows that
+  change are written with one executemany UPDATE in one transaction. Each
+  item gets a result, and a bad item does not hold back the others.
+
+A POS authenticates with the shop's inventory API key,
+``Authorization: Bearer <key>``, which the owner creates (or replaces) on
+the import page. Only its SHA-256 is stored. Key requests are not subject
+to CSRF; the same endpoints also work from a logged-in owner's browser,
+where POSTs need the ``X-CSRFToken`` header as usual.
+
+The ETag is the shop's inventory version, ``shops.inventory_version``, a
+counter moved on in the same transaction as the product write that changes
+what GET returns. ORM writes (checkout, the product forms) bump it from
+mapper events; bulk UPDATEs and INSERTs skip those, so their callers use
+``bump_version`` (a batch here moves it once, however many rows it
+touches). A timestamp would not do: a writer stamps ``updated_at`` before
+it waits for SQLite's write lock, so a later commit can carry an earlier
+time than the version a client already has.
+"""
+import hashlib
+import math
+import secrets
+from datetime import datetime
+
+from sqlalchemy import event
+
+from app.models.models import db, Shop, Product
+
+MIN_PRICE = 0.01  # ProductForm's NumberRange on price
+MAX_INTEGER = 2 ** 63 - 1  # SQLite INTEGER; bigger values fail the whole UPDATE
+SYNCED_FIELDS = ('sku', 'name', 'stock', 'price', 'is_active')  # What inventory_rows() returns
+
+
+def _key_hash(key):
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def issue_api_key(shop):
+    """Give ``shop`` a new inventory API key, replacing any old one, and return it. The caller commits."""
+    key = secrets.token_urlsafe(32)
+    shop.inventory_key_hash = _key_hash(key)
+    return key
+
+
+def shop_for_api_key(key):
+    """The active shop whose inventory API key is ``key``, or None."""
+    if not key:
+        return None
+    return Shop.query.filter_by(inventory_key_hash=_key_hash(key), is_active=True).first()
+
+
+def _bump_statement(shop_ids):
+    return (db.update(Shop).where(Shop.id.in_(sorted(set(shop_ids))))
+            .values(inventory_version=Shop.inventory_version + 1))
+
+
+def bump_version(shop_ids):
+    """Move the inventory version of ``shop_ids`` on, in the current transaction."""
+    if shop_ids:
+        db.session.execute(_bump_statement(shop_ids))
+
+
+def _product_written(mapper, connection, target):
+    connection.execute(_bump_statement([target.shop_id]))
+
+
+def _product_updated(mapper, connection, target):
+    state = db.inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in SYNCED_FIELDS + ('shop_id',)):
+        old_shop_ids = state.attrs.shop_id.history.deleted or []
+        connection.execute(_bump_statement([target.shop_id, *old_shop_ids]))
+
+
+def init_app(app):
+    """Keep inventory versions current for ORM product writes (once per process)."""
+    if not event.contains(Product, 'after_insert', _product_written):
+        event.listen(Product, 'after_insert', _product_written)
+        event.listen(Product, 'after_delete', _product_written)
+        event.listen(Product, 'after_update', _product_updated)
+
+
+def inventory_version(shop_id):
+    """Opaque version of ``shop_id``'s stock and prices, used as the ETag."""
+    version = db.session.scalar(db.select(Shop.inventory_version).where(Shop.id == shop_id))
+    return f"{shop_id}-{version or 0}"
+
+
+def inventory_rows(shop_id):
+    """Every product of ``shop_id`` as a dict, by id."""
+    return [dict(row._mapping) for row in db.session.execute(
+        db.select(Product.id.label('product_id'), Product.sku, Product.name, Product.stock, Product.price,
+                  Product.is_active)
+        .where(Product.shop_id == shop_id)
+        .order_by(Product.id)
+    )]
+
+
+def _number(value, name, integer):
+    if isinstance(value, bool):
+        raise ValueError(f'{name} must be a number')
+    try:
+        number = int(value) if integer and not isinstance(value, float) else float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be {"a whole number" if integer else "a number"}')
+    # Before int(): json accepts Infinity and 1e999, and int(inf) raises OverflowError
+    if not math.isfinite(number):
+        raise ValueError(f'{name} must be a number')
+    if integer and number != int(number):
+        raise ValueError(f'{name} must be a whole number')
+    if abs(number) > MAX_INTEGER:
+        raise ValueError(f'{name} is too large')
+    return int(number) if integer else number
+
+
+def parse_item(item):
+    """Return ``(key, changes)`` for one batch item; raise ValueError if it is unusable.
+
+    ``key`` is ``('id', product_id)`` or ``('sku', sku)``.
+    """
+    if not isinstance(item, dict):
+        raise ValueError('Each item must be an object')
+    if item.get('product_id') is not None:
+        key = ('id', _number(item['product_id'], 'product_id', integer=True))
+    elif item.get('sku') not in (None, ''):
+        key = ('sku', str(item['sku']).strip())
+    else:
+        raise ValueError('product_id or sku is required')
+
+    changes = {}
+    if item.get('stock') is not None:
+        changes['stock'] = _number(item['stock'], 'stock', integer=True)
+        if changes['stock'] < 0:
+            raise ValueError('stock must be at least 0')
+    if item.get('price') is not None:
+        changes['price'] = _number(item['price'], 'price', integer=False)
+        if changes['price'] < MIN_PRICE:
+            raise ValueError(f'price must be at least {MIN_PRICE}')
+    if not changes:
+        raise ValueError('Nothing to update; send stock and/or price')
+    return key, changes
+
+
+def _load_products(shop_id, keys):
+    """``{key: row}`` for the products of ``shop_id`` named by ``keys``."""
+    ids = [value for kind, value in keys if kind == 'id']
+    skus = [value for kind, value in keys if kind == 'sku']
+    conditions = []
+    if ids:
+        conditions.append(Product.id.in_(ids))
+    if skus:
+        conditions.append(Product.sku.in_(skus))
+    if not conditions:
+        return {}
+    found = {}
+    for row in db.session.execute(
+        db.select(Product.id, Product.sku, Product.stock, Product.price)
+        .where(Product.shop_id == shop_id, db.or_(*conditions))
+    ):
+        found[('id', row.id)] = row
+        if row.sku is not None:
+            found[('sku', row.sku)] = row
+    return found
+
+
+def apply_updates(shop_id, items):
+    """Apply a batch of stock/price changes to ``shop_id``'s products and commit.
+
+    Returns ``{'updated', 'unchanged', 'failed', 'version', 'results'}`` with
+    one ``{'index', 'product_id', 'status', 'message'}`` result per item,
+    ``status`` being ``updated``, ``unchanged`` or ``error``.
+    """
+    results, parsed, seen = [], [], {}
+    for index, item in enumerate(items):
+        result = {'index': index, 'product_id': item.get('product_id') if isinstance(item, dict) else None}
+        results.append(result)
+        try:
+            key, changes = parse_item(item)
+        except ValueError as e:
+            result.update(status='error', message=str(e))
+            continue
+        parsed.append((result, key, changes))
+
+    products = _load_products(shop_id, [key for _, key, _ in parsed])
+    now = datetime.utcnow()
+    params = []
+    for result, key, changes in parsed:
+        product = products.get(key)
+        if product is None:
+            # Other shops' products look the same as missing ones
+            result.update(status='error', message='Product not found in your shop')
+            continue
+        result['product_id'] = product.id
+        if product.id in seen:
+            result.update(status='error', message=f'Duplicate of item {seen[product.id]}')
+            continue
+        seen[product.id] = result['index']
+
+        values = {'stock': product.stock, 'price': product.price, **changes}
+        if values['stock'] == product.stock and values['price'] == product.price:
+            result['status'] = 'unchanged'
+            continue
+        params.append({'id': product.id, 'updated_at': now, **values})
+        result['status'] = 'updated'
+
+    if params:
+        db.session.execute(db.update(Product), params)
+        bump_version([shop_id])
+        db.session.commit()
+
+    statuses = [result['status'] for result in results]
+    return {
+        'updated': statuses.count('updated'),
+        'unchanged': statuses.count('unchanged'),
+        'failed': statuses.count('error'),
+        'version': inventory_version(shop_id),
+        'results': results,
+    }
@@ -3,7 +3,10 @@ from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 
-db = SQLAlchemy()
+from app.replica_routing import RoutingSession
+
+# RoutingSession only differs from the default when a 'replica' bind is configured
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
@@ -42,6 +45,13 @@ class OTP(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     expires_at = db.Column(db.DateTime, nullable=False)
     is_used = db.Column(db.Boolean, default=False)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    
+    __table_args__ = (
+        # Covers the single-statement lookup in DatabaseOTPStore.verify
+        db.Index('ix_otps_email_code_used', 'email', 'otp_code', 'is_used'),
+        db.Index('ix_otps_expires_at', 'expires_at'),
+    )
     
     def __repr__(self):
         return f"<OTP {self.email}>"
@@ -88,14 +98,58 @@ class Shop(db.Model):
     ifsc_code = db.Column(db.String(20))  # IFSC code of the bank branch
     preferred_payment_method = db.Column(db.String(20), default='upi')  # upi, bank_transfer, etc.
     
+    # SHA-256 of the key POS systems send to /api/shop/inventory (app/inventory.py)
+    inventory_key_hash = db.Column(db.String(64))
+    # The inventory API's ETag; app/inventory.py moves it on with every product write
+    inventory_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
+    # Review aggregates, kept in step by app/reviews.py
+    average_rating = db.Column(db.Float, default=0.0)
+    review_count = db.Column(db.Integer, default=0)
+    rating_1_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_2_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_3_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_4_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_5_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
+    # Loaded only by queries using app.shop_hours.with_is_open(); None otherwise
+    is_open = db.query_expression()
+    
     # Relationships
     products = db.relationship('Product', backref='shop', lazy='dynamic', cascade='all, delete-orphan')
     services = db.relationship('Service', backref='shop', lazy='dynamic', cascade='all, delete-orphan')
+    reviews = db.relationship('Review', backref='shop', lazy='dynamic', cascade='all, delete-orphan')
+    hours = db.relationship('ShopHours', backref='shop', lazy='dynamic', cascade='all, delete-orphan')
+    
+    __table_args__ = (
+        # API key lookups; one shop per key
+        db.Index('uq_shops_inventory_key_hash', 'inventory_key_hash', unique=True),
+    )
     
     def __repr__(self):
         return f"<Shop {self.name}>"
 
 
+class ShopHours(db.Model):
+    __tablename__ = 'shop_hours'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    shop_id = db.Column(db.Integer, db.ForeignKey('shops.id'), nullable=False)
+    # Minutes of the week, Monday 00:00 = 0, shop local time; see app/shop_hours.py
+    opens_at = db.Column(db.Integer, nullable=False)
+    closes_at = db.Column(db.Integer, nullable=False)  # Exclusive; at most MAX_SPAN after opens_at
+    
+    __table_args__ = (
+        # "Open at minute m": opens_at in (m - MAX_SPAN, m], closes_at > m, all from the index
+        db.Index('ix_shop_hours_interval', 'opens_at', 'closes_at', 'shop_id'),
+        # One shop's schedule: Shop.is_open and rewriting the schedule
+        db.Index('ix_shop_hours_shop', 'shop_id', 'opens_at', 'closes_at'),
+    )
+    
+    def __repr__(self):
+        return f"<ShopHours {self.shop_id} {self.opens_at}-{self.closes_at}>"
+
+
 class Product(db.Model):
     __tablename__ = 'products'
     
@@ -107,13 +161,38 @@ class Product(db.Model):
     stock = db.Column(db.Integer, default=0)
     category = db.Column(db.String(50))
     image = db.Column(db.String(200))
+    sku = db.Column(db.String(64))  # Owner's product code; set by bulk imports
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Review aggregates, kept in step by app/reviews.py
+    average_rating = db.Column(db.Float, default=0.0)
+    review_count = db.Column(db.Integer, default=0)
+    rating_1_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_2_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_3_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_4_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_5_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
+    # Time-decayed units sold, kept current by app/popularity.py
+    popularity = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    
+    __table_args__ = (
+        # Catalog listing (newest active products) and shop product pages
+        db.Index('ix_products_active_created', 'is_active', 'created_at'),
+        db.Index('ix_products_shop_created', 'shop_id', 'created_at'),
+        # Most popular first: read backwards within is_active, ties newest first
+        db.Index('ix_products_active_popularity', 'is_active', 'popularity', 'id'),
+        # Bulk import matches rows by SKU, or by name when a row has none
+        db.Index('uq_products_shop_sku', 'shop_id', 'sku', unique=True),
+        db.Index('ix_products_shop_name', 'shop_id', 'name'),
+    )
+    
     # Relationships
     cart_items = db.relationship('CartItem', backref='product', lazy='dynamic', cascade='all, delete-orphan')
     order_items = db.relationship('OrderItem', backref='product', lazy='dynamic')
+    reviews = db.relationship('Review', backref='product', lazy='dynamic', cascade='all, delete-orphan')
     
     def __repr__(self):
         return f"<Product {self.name}>"
@@ -134,6 +213,13 @@ class Service(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Time-decayed units sold, kept current by app/popularity.py
+    popularity = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    
+    __table_args__ = (
+        db.Index('ix_services_active_popularity', 'is_active', 'popularity', 'id'),
+    )
+    
     # Relationships
     cart_items = db.relationship('ServiceCartItem', backref='service', lazy='dynamic', cascade='all, delete-orphan')
     order_items = db.relationship('ServiceOrderItem', backref='service', lazy='dynamic')
@@ -151,6 +237,11 @@ class CartItem(db.Model):
     quantity = db.Column(db.Integer, default=1)
     added_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        # One row per product per cart; also serves lookups by customer
+        db.UniqueConstraint('customer_id', 'product_id', name='uq_cart_items_customer_product'),
+    )
+    
     def __repr__(self):
         return f"<CartItem {self.id}>"
 
@@ -164,6 +255,10 @@ class ServiceCartItem(db.Model):
     quantity = db.Column(db.Integer, default=1)
     added_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.UniqueConstraint('customer_id', 'service_id', name='uq_service_cart_items_customer_service'),
+    )
+    
     # Additional relationship to avoid join with users table
     customer = db.relationship('User', backref='service_cart_items')
     
@@ -188,6 +283,13 @@ class Order(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        # Customer order history, newest first
+        db.Index('ix_orders_customer_created', 'customer_id', 'created_at'),
+        # Admin order list and date-range exports
+        db.Index('ix_orders_created_at', 'created_at'),
+    )
+    
     # Relationships
     items = db.relationship('OrderItem', backref='order', lazy='dynamic', cascade='all, delete-orphan')
     service_items = db.relationship('ServiceOrderItem', backref='order', lazy='dynamic', cascade='all, delete-orphan')
@@ -206,6 +308,13 @@ class OrderItem(db.Model):
     quantity = db.Column(db.Integer, nullable=False)
     price = db.Column(db.Float, nullable=False)  # Price at the time of order
     
+    __table_args__ = (
+        # Shop dashboard and shop order list, newest first
+        db.Index('ix_order_items_shop_id', 'shop_id', 'id'),
+        # order.items and per-order item counts in exports
+        db.Index('ix_order_items_order_id', 'order_id'),
+    )
+    
     # Additional relationship to avoid join with shops table
     shop = db.relationship('Shop', backref='order_items')
     
@@ -223,6 +332,11 @@ class ServiceOrderItem(db.Model):
     quantity = db.Column(db.Integer, nullable=False)
     price = db.Column(db.Float, nullable=False)  # Price at the time of order
     
+    __table_args__ = (
+        db.Index('ix_service_order_items_order_id', 'order_id'),
+        db.Index('ix_service_order_items_shop_id', 'shop_id', 'id'),
+    )
+    
     # Additional relationship to avoid join with shops table
     shop = db.relationship('Shop', backref='service_order_items')
     
@@ -239,8 +353,79 @@ class Notification(db.Model):
     is_read = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        # Unread notifications for the navbar, newest first
+        db.Index('ix_notifications_user_unread', 'user_id', 'is_read', 'created_at'),
+    )
+    
     # Relationship to avoid join with users table
     user = db.relationship('User', backref='notifications')
     
     def __repr__(self):
         return f"<Notification {self.id}>"
+
+
+class ImageJob(db.Model):
+    __tablename__ = 'image_jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    image_path = db.Column(db.String(200), nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, done, failed
+    error = db.Column(db.String(500))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f"<ImageJob {self.image_path} {self.status}>"
+
+
+class ImageRef(db.Model):
+    __tablename__ = 'image_refs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    image_path = db.Column(db.String(200), unique=True, nullable=False)  # e.g. products/<sha256[:32]>.jpg
+    content_hash = db.Column(db.String(64), nullable=False, index=True)
+    refcount = db.Column(db.Integer, nullable=False, default=1)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<ImageRef {self.image_path} x{self.refcount}>"
+
+
+class PopularityState(db.Model):
+    __tablename__ = 'popularity_state'
+    
+    name = db.Column(db.String(20), primary_key=True)  # 'products' or 'services'
+    last_item_id = db.Column(db.Integer, nullable=False, default=0)  # Newest order item already scored
+    landmark = db.Column(db.DateTime, nullable=False)  # A sale at this time weighs 1
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<PopularityState {self.name} @{self.last_item_id}>"
+
+
+class Review(db.Model):
+    __tablename__ = 'reviews'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    # Exactly one of shop_id / product_id is set
+    shop_id = db.Column(db.Integer, db.ForeignKey('shops.id'))
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'))
+    rating = db.Column(db.Integer, nullable=False)  # 1-5
+    comment = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        # One review per customer and shop/product; also the rebuild's per-rating counts
+        db.Index('uq_reviews_user_shop', 'user_id', 'shop_id', unique=True),
+        db.Index('uq_reviews_user_product', 'user_id', 'product_id', unique=True),
+        db.Index('ix_reviews_shop_rating', 'shop_id', 'rating'),
+        db.Index('ix_reviews_product_rating', 'product_id', 'rating'),
+    )
+    
+    user = db.relationship('User', backref=db.backref('reviews', lazy='dynamic'))
+    
+    def __repr__(self):
+        return f"<Review {self.rating} by User {self.user_id}>"
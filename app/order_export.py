@@ -0,0 +1,178 @@
+"""
+Streaming order exports for the SHOP_SERV application.
+
+``/admin/orders/export`` (one row per order) and ``/shop/orders/export``
+(one row per product or service item sold by the owner's shop) accept:
+
+* ``format``: ``csv`` (default) or ``jsonl``;
+* ``start`` / ``end``: ISO dates or datetimes; ``end`` is inclusive when
+  it is a plain date;
+* ``status``: order status, repeated or comma-separated.
+
+Rows are read with ``yield_per`` (a server-side cursor where the driver
+has one) and written by a generator, ``EXPORT_BATCH_SIZE`` rows per chunk.
+Memory stays constant however many orders match.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime, time, timedelta
+
+from flask import Response, current_app, stream_with_context
+
+from app.models.models import db, User, Order, OrderItem, ServiceOrderItem, Product, Service
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+ADMIN_COLUMNS = [
+    'order_id', 'order_number', 'created_at', 'status', 'payment_status', 'payment_method', 'total_amount',
+    'product_items', 'service_items', 'customer_id', 'customer_email', 'customer_name', 'shipping_phone',
+    'shipping_address',
+]
+
+SHOP_COLUMNS = [
+    'order_id', 'order_number', 'created_at', 'status', 'payment_status', 'payment_method', 'item_type',
+    'item_id', 'item_name', 'quantity', 'price', 'line_total', 'customer_name', 'shipping_phone',
+    'shipping_address',
+]
+
+# Cells starting with these are formulas to spreadsheet applications
+_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _parse_moment(value, end=False):
+    if 'T' in value or ' ' in value:
+        return datetime.fromisoformat(value)
+    day = date.fromisoformat(value)
+    # A plain end date includes the whole day
+    return datetime.combine(day + timedelta(days=1) if end else day, time.min)
+
+
+def parse_filters(args):
+    """Read format/start/end/status from request ``args``; raise ValueError on bad input."""
+    fmt = args.get('format', 'csv').lower()
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'. Use one of: {', '.join(EXPORT_FORMATS)}")
+
+    filters = {'format': fmt, 'start': None, 'end': None, 'end_inclusive': False}
+    try:
+        if args.get('start'):
+            filters['start'] = _parse_moment(args['start'])
+        if args.get('end'):
+            filters['end'] = _parse_moment(args['end'], end=True)
+            filters['end_inclusive'] = 'T' in args['end'] or ' ' in args['end']
+    except ValueError:
+        raise ValueError('start and end must be ISO dates (YYYY-MM-DD) or datetimes')
+    if filters['start'] and filters['end'] and (filters['start'] > filters['end'] if filters['end_inclusive']
+                                                 else filters['start'] >= filters['end']):
+        raise ValueError('start must not be after end')
+
+    filters['statuses'] = sorted({status.strip() for value in args.getlist('status')
+                                  for status in value.split(',') if status.strip()})
+    return filters
+
+
+def _filter_orders(query, filters):
+    if filters['start']:
+        query = query.where(Order.created_at >= filters['start'])
+    if filters['end']:
+        query = query.where(Order.created_at <= filters['end'] if filters['end_inclusive']
+                            else Order.created_at < filters['end'])
+    if filters['statuses']:
+        query = query.where(Order.status.in_(filters['statuses']))
+    return query
+
+
+def admin_orders_query(filters):
+    """One row per order, oldest first, in ADMIN_COLUMNS order."""
+    product_items = (db.select(db.func.count(OrderItem.id)).where(OrderItem.order_id == Order.id)
+                     .correlate(Order).scalar_subquery())
+    service_items = (db.select(db.func.count(ServiceOrderItem.id)).where(ServiceOrderItem.order_id == Order.id)
+                     .correlate(Order).scalar_subquery())
+    query = (
+        db.select(Order.id, Order.order_number, Order.created_at, Order.status, Order.payment_status,
+                  Order.payment_method, Order.total_amount, product_items, service_items, User.id, User.email,
+                  User.full_name, Order.shipping_phone, Order.shipping_address)
+        .join(User, User.id == Order.customer_id)
+        .order_by(Order.created_at, Order.id)
+    )
+    return _filter_orders(query, filters)
+
+
+def shop_items_query(shop_id, filters):
+    """One row per item of ``shop_id``, oldest order first, in SHOP_COLUMNS order."""
+    def items(model, item_model, item_column, item_type):
+        query = (
+            db.select(Order.id.label('order_id'), Order.order_number, Order.created_at, Order.status,
+                      Order.payment_status, Order.payment_method, db.literal(item_type).label('item_type'),
+                      item_column.label('item_id'), item_model.name, model.quantity, model.price,
+                      (model.quantity * model.price).label('line_total'), User.full_name,
+                      Order.shipping_phone, Order.shipping_address, model.id.label('row_id'))
+            .join(Order, Order.id == model.order_id)
+            .join(item_model, item_model.id == item_column)
+            .join(User, User.id == Order.customer_id)
+            .where(model.shop_id == shop_id)
+        )
+        return _filter_orders(query, filters)
+
+    union = db.union_all(items(OrderItem, Product, OrderItem.product_id, 'product'),
+                         items(ServiceOrderItem, Service, ServiceOrderItem.service_id, 'service')).subquery()
+    return (db.select(*[column for column in union.c if column.name != 'row_id'])
+            .order_by(union.c.created_at, union.c.order_id, union.c.item_type, union.c.row_id))
+
+
+def _cell(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def generate_rows(query, columns, fmt, batch_size=1000):
+    """Yield the export of ``query`` as text chunks of ``batch_size`` rows."""
+    result = db.session.execute(query.execution_options(yield_per=batch_size))
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for rows in result.partitions():
+            writer.writerows([_cell(value) for value in row] for row in rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+    else:
+        for rows in result.partitions():
+            yield ''.join(json.dumps(dict(zip(columns, map(_json_value, row))), ensure_ascii=False) + '\n'
+                          for row in rows)
+
+
+def export_response(query, columns, filters, name):
+    """Stream ``query`` as an attachment named ``name``.csv or ``name``.jsonl."""
+    fmt = filters['format']
+    batch_size = current_app.config.get('EXPORT_BATCH_SIZE', 1000)
+    response = Response(stream_with_context(generate_rows(query, columns, fmt, batch_size)),
+                        mimetype=EXPORT_FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename={name}.{fmt}'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+def export_name(prefix, filters):
+    """File name like ``orders-2026-09-01-to-2026-09-30``."""
+    parts = [prefix]
+    if filters['start']:
+        parts.append(filters['start'].date().isoformat())
+    if filters['end']:
+        end = filters['end'] if filters['end_inclusive'] else filters['end'] - timedelta(days=1)
+        parts += ['to', end.date().isoformat()]
+    return '-'.join(parts)
@@ -0,0 +1,173 @@
+"""
+OTP storage backends for the SHOP_SERV application.
+
+Two interchangeable stores are provided:
+
+* ``MemoryOTPStore`` keeps codes in a per-process dict with a TTL and an
+  attempt counter. Lookups are O(1) and nothing ever touches the database,
+  which makes it the right choice for single-worker deployments.
+* ``DatabaseOTPStore`` keeps codes in the ``otps`` table so that every
+  gunicorn worker sees the same state. Verification is a single indexed
+  UPDATE and expired/used rows are removed in bulk by a periodic sweeper.
+
+The active store is selected with ``Config.OTP_STORE`` and obtained through
+``get_otp_store()``.
+"""
+import hmac
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+
+class OTPStore(ABC):
+    """Common interface for OTP stores."""
+
+    def __init__(self, ttl_seconds=300, max_attempts=5, sweep_interval=300):
+        self.ttl_seconds = ttl_seconds
+        self.max_attempts = max_attempts
+        self.sweep_interval = sweep_interval
+        self._last_sweep = 0.0
+        self._sweep_lock = threading.Lock()
+
+    @abstractmethod
+    def issue(self, email, otp_code):
+        """Store ``otp_code`` for ``email``, replacing any previous code."""
+
+    @abstractmethod
+    def verify(self, email, otp_code):
+        """Consume ``otp_code`` for ``email``. Returns True on success."""
+
+    @abstractmethod
+    def purge_expired(self):
+        """Remove expired and used codes. Returns the number removed."""
+
+    def maybe_sweep(self):
+        """Run ``purge_expired`` at most once per ``sweep_interval`` seconds."""
+        now = time.monotonic()
+        if now - self._last_sweep < self.sweep_interval:
+            return 0
+        with self._sweep_lock:
+            if now - self._last_sweep < self.sweep_interval:
+                return 0
+            self._last_sweep = now
+        return self.purge_expired()
+
+
+class MemoryOTPStore(OTPStore):
+    """Per-process OTP store with automatic expiry and attempt counting."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._entries = {}  # email -> [otp_code, expires_at, attempts]
+        self._lock = threading.Lock()
+
+    def issue(self, email, otp_code):
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._entries[email] = [otp_code, expires_at, 0]
+        self.maybe_sweep()
+
+    def verify(self, email, otp_code):
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry is None:
+                return False
+
+            stored_code, expires_at, attempts = entry
+            if expires_at <= time.monotonic() or attempts >= self.max_attempts:
+                del self._entries[email]
+                return False
+
+            if hmac.compare_digest(stored_code, otp_code):
+                del self._entries[email]
+                return True
+
+            entry[2] += 1
+            if entry[2] >= self.max_attempts:
+                del self._entries[email]
+            return False
+
+    def purge_expired(self):
+        now = time.monotonic()
+        with self._lock:
+            expired = [email for email, entry in self._entries.items() if entry[1] <= now]
+            for email in expired:
+                del self._entries[email]
+        return len(expired)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DatabaseOTPStore(OTPStore):
+    """OTP store backed by the ``otps`` table, shared by all workers."""
+
+    def issue(self, email, otp_code):
+        from app.models.models import db, OTP
+
+        OTP.query.filter_by(email=email).delete(synchronize_session=False)
+        db.session.add(OTP(
+            email=email,
+            otp_code=otp_code,
+            expires_at=datetime.utcnow() + timedelta(seconds=self.ttl_seconds),
+            attempts=0
+        ))
+        db.session.commit()
+        self.maybe_sweep()
+
+    def verify(self, email, otp_code):
+        from app.models.models import db, OTP
+
+        now = datetime.utcnow()
+        # Consume the code in one statement; served by ix_otps_email_code_used
+        consumed = OTP.query.filter(
+            OTP.email == email,
+            OTP.otp_code == otp_code,
+            OTP.is_used == False,  # noqa: E712
+            OTP.expires_at > now,
+            OTP.attempts < self.max_attempts
+        ).update({OTP.is_used: True}, synchronize_session=False)
+
+        if not consumed:
+            OTP.query.filter(
+                OTP.email == email,
+                OTP.is_used == False  # noqa: E712
+            ).update({OTP.attempts: OTP.attempts + 1}, synchronize_session=False)
+
+        db.session.commit()
+        return bool(consumed)
+
+    def purge_expired(self):
+        from app.models.models import db, OTP
+
+        removed = OTP.query.filter(
+            db.or_(OTP.expires_at <= datetime.utcnow(), OTP.is_used == True)  # noqa: E712
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return removed
+
+
+OTP_STORES = {
+    'memory': MemoryOTPStore,
+    'database': DatabaseOTPStore,
+}
+
+
+def get_otp_store(app=None):
+    """Return the OTP store configured for ``app`` (created on first use)."""
+    app = app or current_app._get_current_object()
+    store = app.extensions.get('otp_store')
+    if store is None:
+        backend = app.config.get('OTP_STORE', 'database')
+        if backend not in OTP_STORES:
+            raise ValueError(f"Unknown OTP_STORE '{backend}'. Use one of: {', '.join(OTP_STORES)}")
+        store = OTP_STORES[backend](
+            ttl_seconds=app.config.get('OTP_EXPIRY_MINUTES', 5) * 60,
+            max_attempts=app.config.get('OTP_MAX_ATTEMPTS', 5),
+            sweep_interval=app.config.get('OTP_SWEEP_INTERVAL', 300)
+        )
+        app.extensions['otp_store'] = store
+    return store
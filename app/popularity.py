@@ -0,0 +1,138 @@
+"""
+Popularity scores for the SHOP_SERV application.
+
+Products and services carry ``popularity``, the units sold with each sale
+weighted by ``2 ** ((ordered_at - landmark) / half_life)``. A sale's weight
+depends only on when it happened, so ranking by the score is ranking by
+exponentially decayed sales without ever decaying the stored scores:
+``refresh_popularity()`` adds the order items written since its last run
+(``popularity_state.last_item_id``) and never rescans older orders.
+
+Weights double every half-life; once the newest would pass ``2 **
+REBASE_HALVINGS`` the refresh divides every score by the same power of two
+and moves the landmark forward, which leaves the ranking unchanged.
+
+Orders already cancelled when they are scored are skipped; an order
+cancelled afterwards keeps counting until ``rebuild_popularity()``.
+"""
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from app.models.models import db, Product, Service, Order, OrderItem, ServiceOrderItem, PopularityState
+
+# name: (scored model, order item model, the item's column pointing at the model)
+SOURCES = {
+    'products': (Product, OrderItem, OrderItem.product_id),
+    'services': (Service, ServiceOrderItem, ServiceOrderItem.service_id),
+}
+REBASE_HALVINGS = 64
+
+
+def _half_life():
+    return timedelta(days=current_app.config['POPULARITY_HALF_LIFE_DAYS'])
+
+
+def _add_scores(model, deltas):
+    """``popularity += delta`` per id in one executemany; not an edit, so ``updated_at`` stays."""
+    if not deltas:
+        return
+    table = model.__table__
+    statement = (db.update(table).where(table.c.id == db.bindparam('target_id'))
+                 .values(popularity=table.c.popularity + db.bindparam('delta'), updated_at=table.c.updated_at))
+    db.session.execute(statement, [{'target_id': target_id, 'delta': delta} for target_id, delta in deltas.items()])
+
+
+def _move_state(name, state, last_item_id, landmark):
+    """Set ``name``'s mark if it is still what ``state`` read; False if another run moved it first.
+
+    The compare-and-set is the first write of the transaction that adds the
+    scores, so two overlapping runs never both count the same items.
+    """
+    table = PopularityState.__table__
+    result = db.session.execute(
+        db.update(table)
+        .where(table.c.name == name, table.c.last_item_id == state.last_item_id, table.c.landmark == state.landmark)
+        .values(last_item_id=last_item_id, landmark=landmark))
+    return result.rowcount == 1
+
+
+def _load_state(name, now):
+    state = db.session.get(PopularityState, name, populate_existing=True)
+    if state is None:
+        db.session.add(PopularityState(name=name, last_item_id=0, landmark=now))
+        try:
+            db.session.commit()
+        except IntegrityError:  # Another run created it first
+            db.session.rollback()
+        state = db.session.get(PopularityState, name, populate_existing=True)
+    return state
+
+
+def _rebase(model, state, now, half_life):
+    halvings = int((now - state.landmark) / half_life)
+    if halvings <= REBASE_HALVINGS:
+        return
+    if not _move_state(state.name, state, state.last_item_id, state.landmark + halvings * half_life):
+        return  # Another run rebased
+    table = model.__table__
+    db.session.execute(db.update(table).where(table.c.popularity > 0)
+                       .values(popularity=table.c.popularity * 2.0 ** -halvings, updated_at=table.c.updated_at))
+
+
+def refresh_popularity(name, now=None, batch_size=None):
+    """Score the ``name`` ('products' or 'services') order items not scored yet; return how many.
+
+    Items of orders placed within ``POPULARITY_SETTLE_SECONDS`` wait for the
+    next run, so a slow checkout transaction that commits a lower item id
+    after a newer one is not skipped. Each batch commits its scores with the
+    new ``last_item_id``, so an interrupted run resumes without counting twice,
+    and a batch another run scored first is dropped and read again from its mark.
+    """
+    model, item, key = SOURCES[name]
+    now = now or datetime.utcnow()
+    batch_size = batch_size or current_app.config['POPULARITY_BATCH_SIZE']
+    settled = now - timedelta(seconds=current_app.config['POPULARITY_SETTLE_SECONDS'])
+    half_life = _half_life()
+
+    _rebase(model, _load_state(name, now), now, half_life)
+    db.session.commit()
+
+    query = (db.select(item.id, key, item.quantity, Order.created_at, Order.status)
+             .join(Order, Order.id == item.order_id).order_by(item.id).limit(batch_size))
+    scored = 0
+    while True:
+        state = _load_state(name, now)
+        rows = db.session.execute(query.where(item.id > state.last_item_id)).all()
+        deltas, last_item_id, count = {}, state.last_item_id, 0
+        for item_id, target_id, quantity, ordered_at, status in rows:
+            if ordered_at is None or ordered_at > settled:
+                rows = []  # Stop here; this and later items wait for the next run
+                break
+            if status != 'cancelled' and quantity:
+                deltas[target_id] = deltas.get(target_id, 0.0) + quantity * 2.0 ** ((ordered_at - state.landmark) / half_life)
+            last_item_id = item_id
+            count += 1
+        if count:
+            if not _move_state(name, state, last_item_id, state.landmark):
+                db.session.rollback()
+                continue
+            _add_scores(model, deltas)
+            db.session.commit()
+            scored += count
+        if len(rows) < batch_size:
+            return scored
+
+
+def rebuild_popularity(name, now=None, batch_size=None):
+    """Zero every ``name`` score and score all order items again; return how many items."""
+    model = SOURCES[name][0]
+    table = model.__table__
+    db.session.execute(db.update(table).where(table.c.popularity != 0)
+                       .values(popularity=0.0, updated_at=table.c.updated_at))
+    state = db.session.get(PopularityState, name)
+    if state is not None:
+        db.session.delete(state)
+    db.session.commit()
+    return refresh_popularity(name, now, batch_size)
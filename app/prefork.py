@@ -0,0 +1,60 @@
+"""
+Gunicorn ``--preload`` support for the SHOP_SERV application.
+
+With ``preload_app`` the master imports the app once and forks workers from
+it, so pages that were loaded before the fork are shared copy-on-write
+instead of being rebuilt in every worker. gunicorn.conf.py calls:
+
+* ``warm_app()`` in the master, after loading the app: compiles every
+  template, configures the SQLAlchemy mappers, loads the static manifest,
+  closes the master's database connections and moves everything allocated
+  so far into the garbage collector's permanent generation (``gc.freeze()``)
+  so that collections in the workers do not write to, and so unshare, those
+  pages;
+* ``reinit_after_fork()`` in each worker: gives every engine a fresh
+  connection pool, so no SQLite connection or pooled socket is shared
+  between processes.
+
+The image pool and the SQLite rate-limit storage already notice a changed
+pid and start over on their own.
+"""
+import gc
+import logging
+
+from jinja2 import TemplateError
+from sqlalchemy.orm import configure_mappers
+
+from app.models.models import db
+
+logger = logging.getLogger(__name__)
+
+
+def warm_app(app):
+    """Load in the master what every worker would otherwise load on its own."""
+    configure_mappers()
+
+    templates = app.jinja_env.list_templates()
+    for name in templates:
+        try:
+            app.jinja_env.get_template(name)
+        except TemplateError as e:
+            logger.warning(f"Could not precompile template {name}: {e}")
+
+    with app.app_context():
+        if 'static_manifest' in app.extensions:
+            from app.static_assets import get_manifest
+            get_manifest(app)
+        for engine in db.engines.values():
+            engine.dispose()
+
+    gc.collect()
+    gc.freeze()
+    logger.info(f"Preloaded {len(templates)} templates; {gc.get_freeze_count()} objects frozen")
+
+
+def reinit_after_fork(app):
+    """Drop pooled connections inherited from the master without closing them."""
+    with app.app_context():
+        for engine in db.engines.values():
+            # close=False: the master still owns those sockets/handles
+            engine.dispose(close=False)
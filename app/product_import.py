@@ -0,0 +1,421 @@
+"""
+Bulk product import for the SHOP_SERV application.
+
+Shop owners upload a CSV or XLSX sheet at ``/shop/products/import``. The
+first row names the columns:
+
+* ``name``, ``price`` and ``stock`` (required), ``description`` and
+  ``category``, checked with the ProductForm rules;
+* ``sku``: the owner's own product code, at most 64 characters;
+* ``image_url``: an http(s) URL of the product photo;
+* ``is_active``: yes/no, true/false or 1/0.
+
+A row updates the shop's product with the same SKU or, without one, the
+same name; a SKU row also adopts a same-name product that has no SKU yet,
+so a catalog entered by hand can be imported over. Other rows create
+products. The file is read as a stream, ``IMPORT_CHUNK_SIZE`` rows at a
+time: each chunk is validated, written with one bulk UPDATE and one bulk
+INSERT and committed, so memory stays flat and a bad row is reported
+without holding back the rest. Images are downloaded by a thread pool
+after their chunk commits and stored with ``save_image``, so they are
+deduplicated and, in 'pool' mode, resized in the image process pool.
+
+XLSX files need openpyxl (pip install openpyxl); CSV files must be UTF-8.
+"""
+import csv
+import io
+import ipaddress
+import logging
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import islice
+from urllib.parse import urljoin, urlsplit
+
+from flask import current_app
+
+from app.inventory import bump_version
+from app.models.models import db, Product
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ('csv', 'xlsx')
+COLUMNS = ['sku', 'name', 'description', 'price', 'stock', 'category', 'image_url', 'is_active']
+REQUIRED_COLUMNS = ['name', 'price', 'stock']
+SKU_MAX_LENGTH = 64
+MAX_REPORTED_ERRORS = 1000  # Rows listed in the report; 'failed' counts them all
+MAX_REDIRECTS = 3
+
+_BOOLEANS = {'1': True, 'true': True, 'yes': True, 'y': True,
+             '0': False, 'false': False, 'no': False, 'n': False}
+_IMAGE_TYPES = {'image/jpeg': 'jpg', 'image/png': 'png', 'image/gif': 'gif', 'image/webp': 'webp'}
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+class ImportFileError(ValueError):
+    """The upload cannot be read as a product sheet at all."""
+
+
+# --- Reading --------------------------------------------------------------
+
+def _csv_rows(stream):
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    try:
+        yield from csv.reader(text)
+    except UnicodeDecodeError:
+        raise ImportFileError('CSV files must be UTF-8 encoded')
+    finally:
+        # Leave the upload's stream open for werkzeug to clean up
+        text.detach()
+
+
+def _xlsx_rows(stream):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFileError('XLSX import needs openpyxl on the server; upload a CSV file instead')
+    try:
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+    except Exception:
+        raise ImportFileError('Not a valid .xlsx file')
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, float) and value.is_integer():
+        # Spreadsheets store 12 and SKU 1001 as floats
+        value = int(value)
+    return str(value).strip()
+
+
+def read_rows(file):
+    """Yield ``(row number, {column: text})`` for each non-blank row of ``file``.
+
+    The header is read straight away, so ImportFileError for an unknown
+    format or missing columns is raised by this call.
+    """
+    fmt = os.path.splitext(file.filename or '')[1].lower().lstrip('.')
+    if fmt not in IMPORT_FORMATS:
+        raise ImportFileError('Upload a .csv or .xlsx file')
+    rows = _csv_rows(file.stream) if fmt == 'csv' else _xlsx_rows(file.stream)
+
+    header = next(rows, None)
+    if header is None:
+        raise ImportFileError('The file is empty')
+    columns = [_text(name).lower().replace(' ', '_') for name in header]
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise ImportFileError(f"Missing column(s): {', '.join(missing)}")
+
+    def records():
+        for number, values in enumerate(rows, start=2):
+            # Short rows leave their trailing columns blank
+            row = {column: _text(values[i]) if i < len(values) else ''
+                   for i, column in enumerate(columns) if column in COLUMNS}
+            if any(row.values()):
+                yield number, row
+    return records()
+
+
+# --- Validation -----------------------------------------------------------
+
+def validate_row(row):
+    """Return ``(record, errors)`` for one row; ``record`` is None when invalid."""
+    from werkzeug.datastructures import MultiDict
+    from forms import ProductForm
+
+    form = ProductForm(formdata=MultiDict(row), meta={'csrf': False})
+    form.validate()
+    errors = [f'{form[name].label.text}: {message}' for name, messages in form.errors.items()
+              for message in messages]
+
+    sku = row.get('sku', '')
+    if len(sku) > SKU_MAX_LENGTH:
+        errors.append(f'SKU: Field cannot be longer than {SKU_MAX_LENGTH} characters.')
+    image_url = row.get('image_url', '')
+    if image_url:
+        parts = urlsplit(image_url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            errors.append('Image URL: Must be an http or https URL.')
+    is_active = row.get('is_active', '')
+    if is_active and is_active.lower() not in _BOOLEANS:
+        errors.append('Active: Use yes or no.')
+    if errors:
+        return None, errors
+
+    record = {
+        'sku': sku or None,
+        'name': form.name.data.strip(),
+        'price': form.price.data,
+        'stock': form.stock.data,
+        'image_url': image_url or None,
+    }
+    # Columns missing from the sheet leave existing values alone
+    for name in ('description', 'category'):
+        if name in row:
+            record[name] = row[name] or None
+    if 'is_active' in row:
+        record['is_active'] = _BOOLEANS.get(is_active.lower(), True)
+    return record, []
+
+
+# --- Writing --------------------------------------------------------------
+
+def _match_existing(shop_id, records):
+    """Map each record's index to the ``(id, sku)`` of the product it updates."""
+    by_sku = {}
+    skus = [record['sku'] for record in records if record['sku']]
+    if skus:
+        by_sku = {row.sku: row for row in db.session.execute(
+            db.select(Product.id, Product.sku)
+            .where(Product.shop_id == shop_id, Product.sku.in_(skus))
+        )}
+
+    names = {record['name'] for record in records if not record['sku'] or record['sku'] not in by_sku}
+    by_name, unkeyed_by_name = {}, {}
+    if names:
+        # The oldest product wins when a shop has several with one name
+        for row in db.session.execute(
+            db.select(Product.id, Product.sku, Product.name)
+            .where(Product.shop_id == shop_id, Product.name.in_(names))
+            .order_by(Product.id)
+        ):
+            by_name.setdefault(row.name, row)
+            if row.sku is None:
+                unkeyed_by_name.setdefault(row.name, row)
+
+    matches, claimed = {}, set()
+    for index, record in enumerate(records):
+        if record['sku']:
+            match = by_sku.get(record['sku']) or unkeyed_by_name.get(record['name'])
+        else:
+            match = by_name.get(record['name'])
+        # Two SKUs sharing a name must not both adopt one product
+        if match is not None and match.id not in claimed:
+            claimed.add(match.id)
+            matches[index] = match
+    return matches
+
+
+def _write_chunk(shop_id, records):
+    """Upsert ``records``; return ``(created, updated, [(product id, image url)])``."""
+    matches = _match_existing(shop_id, records)
+    now = datetime.utcnow()
+    updates, inserts, images, inserted_urls = [], [], [], []
+    for index, record in enumerate(records):
+        values = {key: value for key, value in record.items() if key != 'image_url'}
+        match = matches.get(index)
+        if match is not None:
+            values.update(id=match.id, sku=record['sku'] or match.sku, updated_at=now)
+            updates.append(values)
+            if record['image_url']:
+                images.append((match.id, record['image_url']))
+        else:
+            values.update(shop_id=shop_id, created_at=now, updated_at=now)
+            values.setdefault('is_active', True)
+            inserts.append(values)
+            inserted_urls.append(record['image_url'])
+
+    if updates:
+        db.session.execute(db.update(Product), updates)
+    if inserts:
+        ids = db.session.scalars(
+            db.insert(Product).returning(Product.id, sort_by_parameter_order=True), inserts
+        ).all()
+        images += [(product_id, url) for product_id, url in zip(ids, inserted_urls) if url]
+    if updates or inserts:
+        bump_version([shop_id])  # Bulk statements skip the mapper events
+    return len(inserts), len(updates), images
+
+
+def _chunks(rows, size):
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _report_error(report, number, row, errors):
+    report['failed'] += 1
+    if len(report['errors']) < MAX_REPORTED_ERRORS:
+        report['errors'].append({'row': number, 'sku': row.get('sku', ''), 'name': row.get('name', ''),
+                                 'errors': errors})
+
+
+def import_products(shop_id, file, chunk_size=500):
+    """Import the products in ``file`` into ``shop_id``.
+
+    Returns ``{'rows', 'created', 'updated', 'failed', 'images', 'errors'}``
+    where ``errors`` lists ``{'row', 'sku', 'name', 'errors'}`` for rows
+    that were skipped, plus ``'error'`` if the file stopped being readable
+    part-way. Raises ImportFileError when nothing can be read.
+    """
+    report = {'rows': 0, 'created': 0, 'updated': 0, 'failed': 0, 'images': 0, 'errors': [], 'error': None}
+    rows = read_rows(file)
+    seen = {}
+    try:
+        for chunk in _chunks(rows, chunk_size):
+            valid = []
+            for number, row in chunk:
+                report['rows'] += 1
+                record, errors = validate_row(row)
+                if record is not None:
+                    key = ('sku', record['sku']) if record['sku'] else ('name', record['name'])
+                    if key in seen:
+                        errors = [f'Duplicate of row {seen[key]}.']
+                    else:
+                        seen[key] = number
+                if errors:
+                    _report_error(report, number, row, errors)
+                else:
+                    valid.append((number, row, record))
+            if not valid:
+                continue
+
+            try:
+                created, updated, images = _write_chunk(shop_id, [record for _, _, record in valid])
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Product import chunk for shop {shop_id} failed: {e}")
+                for number, row, _ in valid:
+                    _report_error(report, number, row, ['Could not be saved; please try again.'])
+                continue
+            report['created'] += created
+            report['updated'] += updated
+            report['images'] += len(images)
+            queue_images(images)
+    except ImportFileError as e:
+        report['error'] = str(e)
+    return report
+
+
+# --- Images ---------------------------------------------------------------
+
+def _get_executor(app):
+    global _executor, _executor_pid
+    # Thread pools do not survive fork(); each gunicorn worker builds its own
+    if _executor is None or _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                _executor = ThreadPoolExecutor(max_workers=app.config.get('IMPORT_IMAGE_WORKERS', 4),
+                                               thread_name_prefix='product-import')
+                _executor_pid = os.getpid()
+    return _executor
+
+
+def queue_images(images):
+    """Fetch the ``[(product id, image url)]`` of a committed chunk in the background."""
+    app = current_app._get_current_object()
+    executor = _get_executor(app)
+    return [executor.submit(fetch_product_image, app, product_id, url) for product_id, url in images]
+
+
+def _resolve(hostname, allow_private=False):
+    """The address to fetch from ``hostname``; refuse loopback, private or link-local ones.
+
+    The download connects to this address rather than resolving the name a
+    second time, so a DNS answer that changes in between (rebinding) cannot
+    slip a private address past the check.
+    """
+    try:
+        addresses = [info[4][0] for info in socket.getaddrinfo(hostname, None, proto=socket.IPPROTO_TCP)]
+    except socket.gaierror:
+        raise ValueError(f'Unknown host {hostname}')
+    if not allow_private:
+        for address in addresses:
+            if not ipaddress.ip_address(address.split('%')[0]).is_global:
+                raise ValueError(f'{hostname} is not a public address')
+    return addresses[0]
+
+
+def _pinned_get(session, url, address, timeout):
+    """GET ``url`` from ``address``; the Host header, SNI and certificate check still use its hostname."""
+    from requests.adapters import HTTPAdapter
+
+    parts = urlsplit(url)
+
+    class PinnedAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            kwargs.update(server_hostname=parts.hostname, assert_hostname=parts.hostname)
+            super().init_poolmanager(*args, **kwargs)
+
+    def netloc(host):
+        return (f'[{host}]' if ':' in host else host) + (f':{parts.port}' if parts.port else '')
+
+    session.mount('https://', PinnedAdapter())
+    return session.get(parts._replace(netloc=netloc(address)).geturl(), headers={'Host': netloc(parts.hostname)},
+                       stream=True, timeout=timeout, allow_redirects=False)
+
+
+def download_image(url, max_bytes, timeout=10, allow_private=False):
+    """Fetch ``url`` into a FileStorage that ``save_image`` accepts."""
+    import requests
+    from werkzeug.datastructures import FileStorage
+
+    with requests.Session() as session:
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            if parts.scheme not in ('http', 'https') or not parts.hostname:
+                raise ValueError(f'Not an http(s) URL: {url}')
+            # Redirects are followed by hand so every hop is checked
+            response = _pinned_get(session, url, _resolve(parts.hostname, allow_private), timeout)
+            if not response.is_redirect:
+                break
+            response.close()
+            url = urljoin(url, response.headers['Location'])
+        else:
+            raise ValueError('Too many redirects')
+
+        with response:
+            response.raise_for_status()
+            content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+            extension = _IMAGE_TYPES.get(content_type)
+            if extension is None:
+                raise ValueError(f"Not an image ({content_type or 'no content type'})")
+            buffer = io.BytesIO()
+            for chunk in response.iter_content(64 * 1024):
+                buffer.write(chunk)
+                if buffer.tell() > max_bytes:
+                    raise ValueError(f'Larger than {max_bytes // (1024 * 1024)} MB')
+    buffer.seek(0)
+    return FileStorage(buffer, filename=f'import.{extension}', content_type=content_type)
+
+
+def fetch_product_image(app, product_id, url):
+    """Download ``url`` and make it the image of ``product_id``. Runs in the pool."""
+    from utils import delete_image, save_image
+
+    with app.app_context():
+        try:
+            file = download_image(url, app.config.get('MAX_CONTENT_LENGTH') or 16 * 1024 * 1024,
+                                  app.config.get('IMPORT_IMAGE_TIMEOUT', 10),
+                                  app.config.get('IMPORT_ALLOW_PRIVATE_URLS', False))
+            image_path = save_image(file, 'products')
+            product = db.session.get(Product, product_id)
+            if product is None:
+                # Deleted while the image was downloading
+                delete_image(image_path)
+            else:
+                old_image, product.image = product.image, image_path
+                # Also right for unchanged bytes: save_image took a second reference
+                delete_image(old_image)
+            db.session.commit()
+            return image_path
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Image for product {product_id} from {url} failed: {e}")
+            return None
@@ -0,0 +1,356 @@
+"""
+On-demand request profiling for the SHOP_SERV application.
+
+An admin profiles a single request in one of two ways:
+
+* by sending an ``X-Profile: 1`` header while logged in as an admin;
+* by opening a link created on the admin Profiles page (a POST). It carries a
+  ``_profile`` token signed with SECRET_KEY for that path, so it also
+  profiles the page as a customer or shop owner sees it. The token works
+  once, within ``PROFILE_TOKEN_MAX_AGE`` seconds: it names a nonce file in
+  ``PROFILE_FOLDER/tokens`` that the first request using it deletes, so a
+  link that leaks (logs, Referer, browser history) cannot be replayed on
+  any worker.
+
+While the view runs, a sampling thread records the request thread's stack
+every ``PROFILE_INTERVAL`` seconds. The GIL switch interval (5 ms by
+default) bounds the real resolution, which is plenty for the slow pages
+this is meant for. SQLAlchemy events time each SQL statement and Flask
+signals time each template render. The record is written as JSON to
+``PROFILE_FOLDER``, where the newest ``PROFILE_KEEP`` are kept.
+admin/profiles lists them and serves each as a speedscope file
+(https://www.speedscope.app) for flamegraph viewing. The response carries
+an ``X-Profile-Id`` header naming its record. ``PROFILING_ENABLED`` turns
+it all off and is off by default in ProductionConfig.
+"""
+import json
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from flask import g, request
+
+HEADER = 'X-Profile'
+QUERY_ARG = '_profile'
+TOKEN_SALT = 'request-profile'
+TOKEN_FOLDER = 'tokens'  # Unused nonces, under PROFILE_FOLDER
+MAX_QUERIES = 500  # Stored per profile; the totals count every statement
+_ID_PATTERN = re.compile(r'^[0-9]{8}-[0-9]{12}-[0-9a-f]{8}$')
+_NONCE_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+# The request being profiled on this thread, read by the SQL and template hooks
+_local = threading.local()
+
+
+class Sampler(threading.Thread):
+    """Sample another thread's Python stack at a fixed interval."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name='request-profiler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.frames = []
+        self.samples = []
+        self.weights = []
+        self._frame_ids = {}
+        self._done = threading.Event()
+
+    def run(self):
+        last = time.perf_counter()
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is None:
+                return
+            self.samples.append(self._stack(frame))
+            self.weights.append(round((now - last) * 1000, 3))
+            last = now
+
+    def _stack(self, frame):
+        """Frame ids of ``frame`` and its callers, outermost first."""
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            key = (getattr(code, 'co_qualname', code.co_name), code.co_filename, code.co_firstlineno)
+            frame_id = self._frame_ids.get(key)
+            if frame_id is None:
+                frame_id = self._frame_ids[key] = len(self.frames)
+                self.frames.append({'name': key[0], 'file': key[1], 'line': key[2]})
+            stack.append(frame_id)
+            frame = frame.f_back
+        stack.reverse()
+        return stack
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+class _Recording:
+    """Everything collected for one profiled request."""
+
+    def __init__(self, interval):
+        self.started = time.perf_counter()
+        self.sampler = Sampler(threading.get_ident(), interval)
+        self.queries = []
+        self.query_count = 0
+        self.query_ms = 0.0
+        self.templates = []
+        self._template_starts = []
+
+    def offset_ms(self, moment):
+        return round((moment - self.started) * 1000, 3)
+
+
+# --- SQL and template timing ----------------------------------------------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if getattr(_local, 'recording', None) is not None:
+        conn.info.setdefault('profile_query_starts', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    recording = getattr(_local, 'recording', None)
+    starts = conn.info.get('profile_query_starts')
+    if recording is None or not starts:
+        return
+    start = starts.pop()
+    ms = (time.perf_counter() - start) * 1000
+    recording.query_count += 1
+    recording.query_ms += ms
+    if len(recording.queries) < MAX_QUERIES:
+        recording.queries.append({'statement': statement, 'ms': round(ms, 3),
+                                  'start_ms': recording.offset_ms(start), 'executemany': executemany})
+
+
+def _template_started(sender, template, context, **extra):
+    recording = getattr(_local, 'recording', None)
+    if recording is not None:
+        recording._template_starts.append(time.perf_counter())
+
+
+def _template_rendered(sender, template, context, **extra):
+    recording = getattr(_local, 'recording', None)
+    if recording is not None and recording._template_starts:
+        start = recording._template_starts.pop()
+        recording.templates.append({'name': template.name, 'ms': round((time.perf_counter() - start) * 1000, 3),
+                                    'start_ms': recording.offset_ms(start)})
+
+
+# --- Tokens and storage ---------------------------------------------------
+
+def _serializer(app):
+    from itsdangerous import URLSafeTimedSerializer
+    return URLSafeTimedSerializer(app.secret_key, salt=TOKEN_SALT)
+
+
+def _token_folder(app):
+    return os.path.join(app.config['PROFILE_FOLDER'], TOKEN_FOLDER)
+
+
+def _prune_nonces(app, folder):
+    """Drop nonces of links that expired unused."""
+    expired = time.time() - app.config.get('PROFILE_TOKEN_MAX_AGE', 900)
+    for name in os.listdir(folder):
+        try:
+            if os.path.getmtime(os.path.join(folder, name)) < expired:
+                os.remove(os.path.join(folder, name))
+        except OSError:
+            pass  # Used or pruned by another worker meanwhile
+
+
+def profile_url(app, path):
+    """Return ``path`` with a signed, single-use token that profiles one visit to it."""
+    path = path if path.startswith('/') else '/' + path
+    base, _, query = path.partition('?')
+    folder = _token_folder(app)
+    os.makedirs(folder, exist_ok=True)
+    _prune_nonces(app, folder)
+    nonce = secrets.token_hex(16)
+    open(os.path.join(folder, nonce), 'x').close()
+    token = _serializer(app).dumps([base, nonce])
+    return f"{base}?{query + '&' if query else ''}{QUERY_ARG}={token}"
+
+
+def _token_matches(app, token):
+    """Whether ``token`` is valid for this request's path; consumes it if so."""
+    from itsdangerous import BadSignature
+    try:
+        path, nonce = _serializer(app).loads(token, max_age=app.config.get('PROFILE_TOKEN_MAX_AGE', 900))
+    except (BadSignature, TypeError, ValueError):
+        return False
+    if path != request.path or not _NONCE_PATTERN.match(str(nonce)):
+        return False
+    try:
+        # Atomic: of concurrent uses, in any worker, exactly one succeeds
+        os.remove(os.path.join(_token_folder(app), nonce))
+    except OSError:
+        return False
+    return True
+
+
+def _profile_path(app, profile_id):
+    if not _ID_PATTERN.match(profile_id or ''):
+        return None
+    return os.path.join(app.config['PROFILE_FOLDER'], f'{profile_id}.json')
+
+
+def save_profile(app, record):
+    """Write ``record`` and drop the oldest profiles beyond PROFILE_KEEP."""
+    folder = app.config['PROFILE_FOLDER']
+    os.makedirs(folder, exist_ok=True)
+    path = _profile_path(app, record['id'])
+    with open(path + '.tmp', 'w') as f:
+        json.dump(record, f)
+    os.replace(path + '.tmp', path)
+
+    names = sorted(name for name in os.listdir(folder) if name.endswith('.json'))
+    for name in names[:-app.config.get('PROFILE_KEEP', 100)]:
+        try:
+            os.remove(os.path.join(folder, name))
+        except OSError:
+            pass  # Another worker pruned it first
+
+
+def load_profile(app, profile_id):
+    """Return the stored record for ``profile_id``, or None."""
+    path = _profile_path(app, profile_id)
+    if path is None or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def list_profiles(app):
+    """Summaries of the stored profiles, newest first."""
+    folder = app.config['PROFILE_FOLDER']
+    if not os.path.isdir(folder):
+        return []
+    summaries = []
+    for name in sorted(os.listdir(folder), reverse=True):
+        if name.endswith('.json'):
+            record = load_profile(app, name[:-len('.json')])
+            if record:
+                record.pop('stacks', None)
+                record['sql'].pop('queries', None)
+                summaries.append(record)
+    return summaries
+
+
+def top_functions(record, limit=25):
+    """[(frame, self ms, total ms)] from the samples, by self time."""
+    stacks = record['stacks']
+    self_ms, total_ms = Counter(), Counter()
+    for stack, weight in zip(stacks['samples'], stacks['weights']):
+        if stack:
+            self_ms[stack[-1]] += weight
+        for frame_id in set(stack):
+            total_ms[frame_id] += weight
+    return [(stacks['frames'][frame_id], round(ms, 1), round(total_ms[frame_id], 1))
+            for frame_id, ms in self_ms.most_common(limit)]
+
+
+def to_speedscope(record):
+    """Convert a stored record into a speedscope file (a dict ready for JSON)."""
+    stacks = record['stacks']
+    name = f"{record['method']} {record['path']}"
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': name,
+        'exporter': 'shopserv',
+        'activeProfileIndex': 0,
+        'shared': {'frames': stacks['frames']},
+        'profiles': [{
+            'type': 'sampled',
+            'name': name,
+            'unit': 'milliseconds',
+            'startValue': 0,
+            'endValue': round(sum(stacks['weights']), 3),
+            'samples': stacks['samples'],
+            'weights': stacks['weights'],
+        }],
+    }
+
+
+# --- Request hooks --------------------------------------------------------
+
+def _profile_requested(app):
+    token = request.args.get(QUERY_ARG)
+    if token:
+        return _token_matches(app, token)
+    if request.headers.get(HEADER, '').lower() in ('1', 'true', 'yes'):
+        from flask_login import current_user
+        return current_user.is_authenticated and current_user.role == 'admin'
+    return False
+
+
+def _finish(recording):
+    _local.recording = None
+    recording.sampler.stop()
+
+
+def init_app(app):
+    """Profile the requests of ``app`` that ask for it (see above)."""
+    if not app.config.get('PROFILING_ENABLED', True):
+        return
+
+    from flask import before_render_template, template_rendered
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    # Listeners on the Engine class cover the primary and replica engines
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    before_render_template.connect(_template_started, app)
+    template_rendered.connect(_template_rendered, app)
+
+    @app.before_request
+    def start_profile():
+        if not _profile_requested(app):
+            return
+        recording = _Recording(app.config.get('PROFILE_INTERVAL', 0.001))
+        g.profile_recording = _local.recording = recording
+        recording.sampler.start()
+
+    @app.after_request
+    def save_request_profile(response):
+        recording = g.pop('profile_recording', None)
+        if recording is None:
+            return response
+        _finish(recording)
+
+        from flask_login import current_user
+        # Sortable by time, so pruning can go by file name
+        profile_id = f"{datetime.utcnow():%Y%m%d-%H%M%S%f}-{secrets.token_hex(4)}"
+        sampler = recording.sampler
+        save_profile(app, {
+            'id': profile_id,
+            'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'user': current_user.email if current_user.is_authenticated else None,
+            'duration_ms': recording.offset_ms(time.perf_counter()),
+            'interval_ms': sampler.interval * 1000,
+            'sql': {'count': recording.query_count, 'ms': round(recording.query_ms, 3),
+                    'queries': recording.queries},
+            'templates': {'ms': round(sum(t['ms'] for t in recording.templates), 3),
+                          'renders': recording.templates},
+            'stacks': {'frames': sampler.frames, 'samples': sampler.samples, 'weights': sampler.weights},
+        })
+        response.headers['X-Profile-Id'] = profile_id
+        return response
+
+    @app.teardown_request
+    def stop_abandoned_profile(exc):
+        # after_request does not run when the response could not be built
+        recording = g.pop('profile_recording', None)
+        if recording is not None:
+            _finish(recording)
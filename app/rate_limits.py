@@ -0,0 +1,30 @@
+"""
+Rate limits for the SHOP_SERV application.
+
+There is no application-wide default: ordinary browsing and the navbar
+polls (``/api/notifications`` every 30 seconds, ``/api/cart/count``) must
+never see a 429. Only the routes worth brute-forcing or that send email and
+SMS are limited, per client IP, with ``auth_limit``:
+
+    @auth.route('/login', methods=['GET', 'POST'])
+    @auth_limit
+    def login(): ...
+
+The limit is ``RATELIMIT_AUTH`` and counts POSTs only, so loading the form
+is free. Counters live in ``RATELIMIT_STORAGE_URI`` (see
+app/ratelimit_storage.py); ``RATELIMIT_ENABLED`` turns everything off.
+"""
+from flask import current_app
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+
+from . import ratelimit_storage  # noqa: F401  (registers the sqlite:// storage)
+
+limiter = Limiter(get_remote_address)
+
+auth_limit = limiter.limit(lambda: current_app.config['RATELIMIT_AUTH'], methods=['POST'])
+
+
+def init_app(app):
+    """Apply the RATELIMIT_* config of ``app``."""
+    limiter.init_app(app)
@@ -0,0 +1,132 @@
+"""
+Shared rate-limit storage for the SHOP_SERV application.
+
+``memory://`` keeps Flask-Limiter counters inside each gunicorn worker, so
+the effective limit is multiplied by the number of workers and every worker
+accumulates one counter per client IP forever. ``SQLiteStorage`` keeps the
+counters in a single SQLite file in WAL mode instead, which every process on
+the host can share:
+
+    RATELIMIT_STORAGE_URI = 'sqlite:////var/lib/shopserv/ratelimit.db'
+
+Each hit is one UPSERT statement. Expired windows are deleted in bulk at
+most once per ``compaction_interval`` seconds (see RATELIMIT_STORAGE_OPTIONS).
+
+Importing this module registers the ``sqlite://`` scheme with ``limits``.
+Only the fixed-window strategy (Flask-Limiter's default) is supported.
+"""
+import os
+import sqlite3
+import threading
+import time
+import urllib.parse
+
+from limits.storage import Storage
+
+
+class SQLiteStorage(Storage):
+    """Fixed-window rate-limit counters stored in a WAL-mode SQLite file."""
+
+    STORAGE_SCHEME = ['sqlite']
+
+    def __init__(self, uri, wrap_exceptions=False, compaction_interval=60, timeout=5.0, **options):
+        self.path = self._path_from_uri(uri)
+        self.compaction_interval = float(compaction_interval)
+        self.timeout = float(timeout)
+        self._local = threading.local()
+        self._last_compaction = 0.0
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS ratelimit ('
+                ' key TEXT PRIMARY KEY,'
+                ' count INTEGER NOT NULL,'
+                ' expiry REAL NOT NULL'
+                ') WITHOUT ROWID'
+            )
+
+    @staticmethod
+    def _path_from_uri(uri):
+        # Same convention as SQLAlchemy: sqlite:///relative.db, sqlite:////absolute.db
+        path = urllib.parse.urlparse(uri).path
+        if path.startswith('/'):
+            path = path[1:]
+        if not path:
+            raise ValueError(f"Rate-limit storage URI needs a file path: {uri}")
+        return path
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connect(self):
+        # One connection per thread and per process; forked workers reconnect
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                               check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA busy_timeout={int(self.timeout * 1000)}')
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _maybe_compact(self, conn, now):
+        if now - self._last_compaction < self.compaction_interval:
+            return
+        self._last_compaction = now
+        conn.execute('DELETE FROM ratelimit WHERE expiry <= ?', (now,))
+
+    def incr(self, key, expiry, amount=1, elastic_expiry=False):
+        # limits 3.x passes elastic_expiry (restart the window on every hit); 4.x dropped it
+        now = time.time()
+        conn = self._connect()
+        row = conn.execute(
+            'INSERT INTO ratelimit (key, count, expiry) VALUES (?, ?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET '
+            ' count = CASE WHEN expiry <= ? THEN excluded.count ELSE count + excluded.count END, '
+            ' expiry = CASE WHEN expiry <= ? OR ? THEN excluded.expiry ELSE expiry END '
+            'RETURNING count',
+            (key, amount, now + expiry, now, now, bool(elastic_expiry))
+        ).fetchone()
+        self._maybe_compact(conn, now)
+        return row[0]
+
+    def get(self, key):
+        row = self._connect().execute(
+            'SELECT count FROM ratelimit WHERE key = ? AND expiry > ?', (key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key):
+        now = time.time()
+        row = self._connect().execute(
+            'SELECT expiry FROM ratelimit WHERE key = ? AND expiry > ?', (key, now)
+        ).fetchone()
+        return row[0] if row else now
+
+    def check(self):
+        try:
+            self._connect().execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        return self._connect().execute('DELETE FROM ratelimit').rowcount
+
+    def clear(self, key):
+        self._connect().execute('DELETE FROM ratelimit WHERE key = ?', (key,))
+
+    def compact(self):
+        """Delete every expired window now. Returns the number of rows removed."""
+        now = time.time()
+        self._last_compaction = now
+        return self._connect().execute('DELETE FROM ratelimit WHERE expiry <= ?', (now,)).rowcount
@@ -0,0 +1,92 @@
+"""
+Read-replica routing for the SHOP_SERV application.
+
+With ``REPLICA_DATABASE_URL`` set, Config adds a ``replica`` entry to
+``SQLALCHEMY_BINDS`` and ``RoutingSession`` (the class behind
+``db.session``) decides per statement which engine to use:
+
+* GET/HEAD requests to views decorated with ``@replica_read`` (catalog,
+  detail pages, dashboards, ``/api/notifications``) read from the replica;
+* everything else, and anything outside a request (CLI scripts, image pool
+  callbacks), uses the primary;
+* once a request flushes or runs an INSERT/UPDATE/DELETE, the rest of that
+  request sticks to the primary;
+* a request that wrote pins the user's following requests to the primary
+  for ``REPLICA_STICKY_SECONDS``, so they read their own writes while the
+  replica catches up.
+
+Without a replica bind nothing changes. For local testing, keep a second
+SQLite file in sync with ``sync_replica.py``, which uses SQLite's online
+backup API (``sync_sqlite_replica()``).
+"""
+import sqlite3
+import time
+
+from flask import g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+
+REPLICA_BIND_KEY = 'replica'
+
+
+def replica_read(view):
+    """Mark a read-only view as safe to serve from the replica on GET/HEAD."""
+    view.replica_read = True
+    return view
+
+
+def _statement_writes(session, clause):
+    return session._flushing or getattr(clause, 'is_dml', False)
+
+
+class RoutingSession(Session):
+    """``db.session`` class that sends reads from ``@replica_read`` views to the replica."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or not has_request_context():
+            return engine
+
+        if _statement_writes(self, clause):
+            g.db_wrote = True
+            return engine
+
+        replica = self._db.engines.get(REPLICA_BIND_KEY)
+        if (replica is None or not g.get('db_replica_ok') or g.get('db_wrote')
+                or engine is not self._db.engines.get(None)):
+            return engine
+        return replica
+
+
+def init_app(app):
+    """Decide per request whether ``@replica_read`` views may use the replica."""
+    if REPLICA_BIND_KEY not in (app.config.get('SQLALCHEMY_BINDS') or {}):
+        return
+
+    @app.before_request
+    def choose_database():
+        view = app.view_functions.get(request.endpoint)
+        g.db_replica_ok = (
+            request.method in ('GET', 'HEAD')
+            and getattr(view, 'replica_read', False)
+            and session.get('db_primary_until', 0) < time.time()
+        )
+
+    @app.after_request
+    def stick_to_primary_after_write(response):
+        if g.get('db_wrote'):
+            session['db_primary_until'] = time.time() + app.config.get('REPLICA_STICKY_SECONDS', 5)
+        return response
+
+
+def sync_sqlite_replica(primary_path, replica_path):
+    """Copy the primary SQLite file onto the replica with the online backup API.
+
+    Readers of the replica see either the old or the new copy, never a mix.
+    """
+    source = sqlite3.connect(primary_path)
+    target = sqlite3.connect(replica_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
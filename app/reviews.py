@@ -0,0 +1,155 @@
+"""
+Reviews and rating aggregates for the SHOP_SERV application.
+
+Shops and products carry ``review_count``, ``average_rating`` and a
+histogram, ``rating_1_count`` .. ``rating_5_count``, so a listing card
+never aggregates ``reviews``. ``add_review()``, ``update_review()`` and
+``delete_review()`` are the write path: each changes the review and applies
+the difference to its shop or product with one UPDATE of relative
+increments. They run on ``db.session``, so the aggregates commit or roll
+back with the review, and concurrent reviews of one product cannot
+overwrite each other's counts.
+
+``check_ratings()`` recomputes the aggregates from ``reviews`` and lists the
+rows that disagree; ``rebuild_ratings()`` rewrites those rows. Both are run
+by ``rebuild_ratings.py``, which checks again after rebuilding.
+"""
+from app.models.models import db, Shop, Product, Review
+
+RATINGS = range(1, 6)
+HISTOGRAM = [f'rating_{rating}_count' for rating in RATINGS]
+
+
+def _target(review):
+    return (Product, review.product_id) if review.product_id else (Shop, review.shop_id)
+
+
+def _histogram_total(model):
+    return sum(rating * getattr(model, name) for rating, name in zip(RATINGS, HISTOGRAM))
+
+
+def _apply(model, target_id, remove=None, add=None):
+    """Move one review's rating out of bucket ``remove`` and into bucket ``add``."""
+    if remove == add:
+        return
+    values = {}
+    for rating in (remove, add):
+        if rating is not None:
+            column = getattr(model, f'rating_{rating}_count')
+            values[column.key] = column + (1 if rating == add else -1)
+
+    # SET expressions see the row as it was before this UPDATE
+    count = db.func.coalesce(model.review_count, 0) + (add is not None) - (remove is not None)
+    total = _histogram_total(model) + (add or 0) - (remove or 0)
+    values['review_count'] = count
+    values['average_rating'] = db.case((count > 0, db.cast(total, db.Float) / count), else_=0.0)
+    # A review is not an edit of the product; keeps inventory ETags stable
+    values['updated_at'] = model.updated_at
+    db.session.execute(db.update(model).where(model.id == target_id).values(values))
+
+
+def _check_rating(rating):
+    if isinstance(rating, bool) or not isinstance(rating, int) or rating not in RATINGS:
+        raise ValueError('Rating must be a whole number from 1 to 5')
+
+
+def add_review(user_id, rating, comment=None, shop_id=None, product_id=None):
+    """Add a review of a shop or a product and count it. The caller commits.
+
+    Raises ValueError for a bad rating or target, IntegrityError (on flush)
+    if the user already reviewed it.
+    """
+    _check_rating(rating)
+    if (shop_id is None) == (product_id is None):
+        raise ValueError('A review is for either a shop or a product')
+    review = Review(user_id=user_id, rating=rating, comment=comment or None, shop_id=shop_id,
+                    product_id=product_id)
+    db.session.add(review)
+    db.session.flush()
+    _apply(*_target(review), add=rating)
+    return review
+
+
+def update_review(review, rating, comment=None):
+    """Change ``review`` and move it between histogram buckets. The caller commits."""
+    _check_rating(rating)
+    _apply(*_target(review), remove=review.rating, add=rating)
+    review.rating = rating
+    review.comment = comment or None
+
+
+def delete_review(review):
+    """Delete ``review`` and uncount it. The caller commits."""
+    _apply(*_target(review), remove=review.rating)
+    db.session.delete(review)
+
+
+def recent_reviews(limit=10, **target):
+    """The newest reviews of a shop or product (``shop_id=`` / ``product_id=``), with their authors."""
+    query = Review.query.options(db.joinedload(Review.user)).filter_by(product_id=target.get('product_id'),
+                                                                       shop_id=target.get('shop_id'))
+    return query.order_by(Review.created_at.desc(), Review.id.desc()).limit(limit).all()
+
+
+def histogram(rated):
+    """``[(stars, count, percent)]`` from 5 down to 1 for a shop or product."""
+    total = rated.review_count or 0
+    return [(rating, getattr(rated, f'rating_{rating}_count') or 0,
+             round(100 * (getattr(rated, f'rating_{rating}_count') or 0) / total) if total else 0)
+            for rating in reversed(RATINGS)]
+
+
+# --- Verification and rebuild ---------------------------------------------
+
+def _expected(model):
+    """``{id: [count of 1 star, ..., count of 5 stars]}`` from ``reviews``."""
+    key = Review.product_id if model is Product else Review.shop_id
+    query = db.select(key, Review.rating, db.func.count()).where(key.isnot(None))
+    if model is Shop:
+        query = query.where(Review.product_id.is_(None))
+    histograms = {}
+    for target_id, rating, count in db.session.execute(query.group_by(key, Review.rating)):
+        if rating in RATINGS:
+            histograms.setdefault(target_id, [0] * len(RATINGS))[rating - 1] = count
+    return histograms
+
+
+def _aggregates(histogram):
+    count = sum(histogram)
+    total = sum(rating * n for rating, n in zip(RATINGS, histogram))
+    values = dict(zip(HISTOGRAM, histogram))
+    values.update(review_count=count, average_rating=total / count if count else 0.0)
+    return values
+
+
+def check_ratings(model, batch_size=5000):
+    """Yield ``{'id', 'stored', 'expected'}`` for each row of ``model`` whose aggregates are wrong."""
+    expected = _expected(model)
+    empty = [0] * len(RATINGS)
+    columns = [model.id, model.review_count, model.average_rating] + [getattr(model, name) for name in HISTOGRAM]
+    result = db.session.execute(db.select(*columns).order_by(model.id).execution_options(yield_per=batch_size))
+    for row in result:
+        stored = {'review_count': row.review_count or 0, 'average_rating': row.average_rating or 0.0,
+                  **{name: getattr(row, name) for name in HISTOGRAM}}
+        wanted = _aggregates(expected.get(row.id, empty))
+        if (any(stored[name] != wanted[name] for name in HISTOGRAM + ['review_count'])
+                or abs(stored['average_rating'] - wanted['average_rating']) > 1e-9):
+            yield {'id': row.id, 'stored': stored, 'expected': wanted}
+
+
+def rebuild_ratings(model, batch_size=5000):
+    """Rewrite the aggregates of each drifted row of ``model``; return how many were fixed.
+
+    Reviews written while this runs can leave new drift behind; run it
+    again (or check afterwards) when the site is busy.
+    """
+    table = model.__table__
+    names = HISTOGRAM + ['review_count', 'average_rating']
+    statement = (db.update(table).where(table.c.id == db.bindparam('target_id'))
+                 .values({**{name: db.bindparam(f'new_{name}') for name in names}, 'updated_at': table.c.updated_at}))
+    drift = [{'target_id': row['id'], **{f'new_{name}': row['expected'][name] for name in names}}
+             for row in check_ratings(model, batch_size)]
+    for start in range(0, len(drift), batch_size):
+        db.session.execute(statement, drift[start:start + batch_size])
+        db.session.commit()
+    return len(drift)
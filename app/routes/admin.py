@@ -0,0 +1,194 @@
+"""
+Admin routes for the SHOP_SERV application.
+"""
+from flask import Blueprint, render_template, redirect, url_for, flash, jsonify, request, abort, current_app
+from flask_login import login_required, current_user
+
+from app.models.models import db, User, Shop, Product, Order
+from app.user_cache import invalidate_user
+from app.replica_routing import replica_read
+from utils import create_notification
+
+admin = Blueprint('admin', __name__)
+
+
+@admin.route('/admin/dashboard')
+@login_required
+@replica_read
+def dashboard():
+    if current_user.role != 'admin':
+        flash('Access denied.', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    total_users = User.query.count()
+    total_shops = Shop.query.count()
+    total_products = Product.query.count()
+    total_orders = Order.query.count()
+    total_revenue = db.session.query(db.func.sum(Order.total_amount)).filter_by(payment_status='completed').scalar() or 0
+    
+    recent_orders = Order.query.order_by(Order.created_at.desc()).limit(10).all()
+    recent_users = User.query.order_by(User.created_at.desc()).limit(10).all()
+    
+    return render_template('admin/dashboard.html', 
+                         total_users=total_users, total_shops=total_shops,
+                         total_products=total_products, total_orders=total_orders,
+                         total_revenue=total_revenue, recent_orders=recent_orders,
+                         recent_users=recent_users)
+
+
+@admin.route('/admin/users')
+@login_required
+@replica_read
+def users():
+    if current_user.role != 'admin':
+        flash('Access denied.', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    users = User.query.order_by(User.created_at.desc()).all()
+    return render_template('admin/users.html', users=users)
+
+
+@admin.route('/admin/user/toggle/<int:user_id>', methods=['POST'])
+@login_required
+def toggle_user(user_id):
+    if current_user.role != 'admin':
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    
+    user = User.query.get_or_404(user_id)
+    
+    if user.role == 'admin':
+        return jsonify({'success': False, 'message': 'Cannot disable admin users'}), 400
+    
+    user.is_active = not user.is_active
+    db.session.commit()
+    invalidate_user(user.id)
+    
+    return jsonify({'success': True, 'message': 'User status updated', 'is_active': user.is_active})
+
+
+@admin.route('/admin/shops')
+@login_required
+@replica_read
+def shops():
+    if current_user.role != 'admin':
+        flash('Access denied.', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    shops = Shop.query.order_by(Shop.created_at.desc()).all()
+    return render_template('admin/shops.html', shops=shops)
+
+
+@admin.route('/admin/shop/toggle/<int:shop_id>', methods=['POST'])
+@login_required
+def toggle_shop(shop_id):
+    if current_user.role != 'admin':
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    
+    shop = Shop.query.get_or_404(shop_id)
+    shop.is_active = not shop.is_active
+    db.session.commit()
+    
+    # Notify shop owner
+    create_notification(
+        shop.owner_id,
+        f'Your shop "{shop.name}" has been {"activated" if shop.is_active else "deactivated"} by admin.'
+    )
+    
+    return jsonify({'success': True, 'message': 'Shop status updated', 'is_active': shop.is_active})
+
+
+@admin.route('/admin/products')
+@login_required
+@replica_read
+def products():
+    if current_user.role != 'admin':
+        flash('Access denied.', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    products = Product.query.order_by(Product.created_at.desc()).all()
+    return render_template('admin/products.html', products=products)
+
+
+@admin.route('/admin/product/toggle/<int:product_id>', methods=['POST'])
+@login_required
+def toggle_product(product_id):
+    if current_user.role != 'admin':
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    
+    product = Product.query.get_or_404(product_id)
+    product.is_active = not product.is_active
+    db.session.commit()
+    
+    return jsonify({'success': True, 'message': 'Product status updated', 'is_active': product.is_active})
+
+
+@admin.route('/admin/orders')
+@login_required
+@replica_read
+def orders():
+    if current_user.role != 'admin':
+        flash('Access denied.', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    orders = Order.query.order_by(Order.created_at.desc()).all()
+    return render_template('admin/orders.html', orders=orders)
+
+
+@admin.route('/admin/orders/export')
+@login_required
+@replica_read
+def export_orders():
+    if current_user.role != 'admin':
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    
+    from app.order_export import ADMIN_COLUMNS, admin_orders_query, export_name, export_response, parse_filters
+    try:
+        filters = parse_filters(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return export_response(admin_orders_query(filters), ADMIN_COLUMNS, filters, export_name('orders', filters))
+
+
+@admin.route('/admin/profiles', methods=['GET', 'POST'])
+@login_required
+def profiles():
+    if current_user.role != 'admin':
+        flash('Access denied.', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    from app.profiling import list_profiles, profile_url
+    # Creating a link writes a nonce file, so it is a POST
+    path = request.form.get('path', '').strip() if request.method == 'POST' else ''
+    link = profile_url(current_app, path) if path else None
+    return render_template('admin/profiles.html', profiles=list_profiles(current_app), path=path, link=link)
+
+
+@admin.route('/admin/profiles/<profile_id>')
+@login_required
+def profile_detail(profile_id):
+    if current_user.role != 'admin':
+        flash('Access denied.', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    from app.profiling import load_profile, top_functions
+    profile = load_profile(current_app, profile_id)
+    if profile is None:
+        abort(404)
+    queries = sorted(profile['sql']['queries'], key=lambda q: q['ms'], reverse=True)
+    return render_template('admin/profile_detail.html', profile=profile, queries=queries,
+                           functions=top_functions(profile))
+
+
+@admin.route('/admin/profiles/<profile_id>/speedscope')
+@login_required
+def profile_speedscope(profile_id):
+    if current_user.role != 'admin':
+        abort(403)
+    
+    from app.profiling import load_profile, to_speedscope
+    profile = load_profile(current_app, profile_id)
+    if profile is None:
+        abort(404)
+    response = jsonify(to_speedscope(profile))
+    response.headers['Content-Disposition'] = f'attachment; filename={profile_id}.speedscope.json'
+    return response
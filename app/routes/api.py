@@ -0,0 +1,144 @@
+"""
+JSON API routes for the SHOP_SERV application.
+"""
+from flask import Blueprint, current_app, jsonify, request
+from flask_login import login_required, current_user
+
+from app.models.models import db, Notification
+from app.image_pipeline import get_job_status
+from app.rate_limits import limiter
+from app.replica_routing import replica_read
+
+api = Blueprint('api', __name__)
+
+
+@api.route('/api/notifications')
+@limiter.exempt  # Polled by every open page (static/js/main.js)
+@login_required
+@replica_read
+def get_notifications():
+    notifications = Notification.query.filter_by(user_id=current_user.id, is_read=False).order_by(Notification.created_at.desc()).limit(10).all()
+    return jsonify({
+        'notifications': [{
+            'id': n.id,
+            'message': n.message,
+            'created_at': n.created_at.strftime('%Y-%m-%d %H:%M')
+        } for n in notifications],
+        'count': len(notifications)
+    })
+
+
+@api.route('/api/notification/read/<int:notification_id>', methods=['POST'])
+@login_required
+def mark_notification_read(notification_id):
+    notification = Notification.query.get_or_404(notification_id)
+    
+    if notification.user_id != current_user.id:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    
+    notification.is_read = True
+    db.session.commit()
+    
+    return jsonify({'success': True})
+
+
+@api.route('/api/image-status/<path:image_path>')
+@login_required
+def image_status(image_path):
+    status = get_job_status(image_path)
+    if status is None:
+        return jsonify({'success': False, 'message': 'No processing job for this image'}), 404
+    return jsonify({'success': True, **status})
+
+
+@api.route('/api/cart/count')
+@limiter.exempt  # Refetched after every cart change (static/js/main.js)
+@login_required
+def cart_count():
+    if current_user.role != 'customer':
+        return jsonify({'count': 0})
+    
+    from app import context_processors
+    return jsonify({'count': context_processors.cart_count(current_user.id)})
+
+
+def _inventory_shop():
+    """``(shop, None)`` for an inventory request, or ``(None, error response)``.
+
+    A POS sends the shop's API key as a Bearer token; otherwise the request
+    must come from the logged-in owner, and a POST must carry the CSRF token.
+    """
+    scheme, _, key = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() == 'bearer':
+        from app.inventory import shop_for_api_key
+        shop = shop_for_api_key(key.strip())
+        if shop is None:
+            return None, (jsonify({'success': False, 'message': 'Invalid inventory API key'}), 401)
+        return shop, None
+    
+    if not current_user.is_authenticated:
+        return None, (jsonify({'success': False, 'message': 'Send an inventory API key or log in'}), 401)
+    if current_user.role != 'shopowner':
+        return None, (jsonify({'success': False, 'message': 'Unauthorized'}), 403)
+    if request.method == 'POST' and current_app.config.get('WTF_CSRF_ENABLED', True):
+        from flask_wtf.csrf import CSRFError
+        try:
+            current_app.extensions['csrf'].protect()
+        except CSRFError as e:
+            return None, (jsonify({'success': False, 'message': e.description}), 400)
+    
+    shop = current_user.shops.first()
+    if not shop:
+        return None, (jsonify({'success': False, 'message': 'You need to create a shop first.'}), 404)
+    return shop, None
+
+
+@api.route('/api/shop/inventory')
+@replica_read
+def shop_inventory():
+    shop, error = _inventory_shop()
+    if error:
+        return error
+    
+    from app.compression import matching_etag
+    from app.inventory import inventory_rows, inventory_version
+    version = inventory_version(shop.id)
+    cached = matching_etag(request.if_none_match, version)
+    if cached:
+        # Skip building the list when the client already has it
+        response = current_app.response_class(status=304)
+        response.set_etag(cached)
+    else:
+        response = jsonify({'success': True, 'version': version, 'products': inventory_rows(shop.id)})
+        response.set_etag(version)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@api.route('/api/shop/inventory', methods=['POST'])
+def update_shop_inventory():
+    # CSRFProtect exempts this view (app/__init__.py); _inventory_shop() checks
+    # the token for cookie-authenticated requests
+    shop, error = _inventory_shop()
+    if error:
+        return error
+    
+    payload = request.get_json(silent=True)
+    items = payload.get('items') if isinstance(payload, dict) else payload
+    if not isinstance(items, list) or not items:
+        return jsonify({'success': False, 'message': 'Send a JSON list of {product_id or sku, stock, price}'}), 400
+    max_items = current_app.config.get('INVENTORY_BATCH_MAX', 5000)
+    if len(items) > max_items:
+        return jsonify({'success': False, 'message': f'At most {max_items} items per batch'}), 413
+    
+    from app.inventory import apply_updates
+    try:
+        summary = apply_updates(shop.id, items)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'Error updating inventory for shop {shop.id}: {str(e)}')
+        return jsonify({'success': False, 'message': 'The batch could not be saved; nothing was changed'}), 500
+    
+    response = jsonify({'success': summary['failed'] == 0, **summary})
+    response.set_etag(summary['version'])
+    return response
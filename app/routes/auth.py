@@ -0,0 +1,207 @@
+"""
+Registration, login and password-reset routes for the SHOP_SERV application.
+"""
+from flask import (Blueprint, current_app, render_template, redirect, url_for, flash, request,
+                   session)
+from flask_login import login_user, logout_user, login_required, current_user
+
+from app.models.models import db, User
+from app.rate_limits import auth_limit
+from app.user_cache import invalidate_user
+from utils import create_otp, verify_otp, send_email, send_sms
+
+auth = Blueprint('auth', __name__)
+
+
+@auth.route('/register', methods=['GET', 'POST'])
+@auth_limit
+def register():
+    if current_user.is_authenticated:
+        return redirect(url_for('main.dashboard'))
+    
+    from forms import RegistrationForm
+    form = RegistrationForm()
+    if form.validate_on_submit():
+        user = User(
+            email=form.email.data.lower(),
+            full_name=form.full_name.data,
+            phone=form.phone.data,
+            role=form.role.data
+        )
+        user.set_password(form.password.data)
+        
+        db.session.add(user)
+        db.session.commit()
+        
+        flash('Registration successful! Please log in.', 'success')
+        return redirect(url_for('auth.login'))
+    
+    return render_template('register.html', form=form)
+
+
+@auth.route('/login', methods=['GET', 'POST'])
+@auth_limit
+def login():
+    if current_user.is_authenticated:
+        return redirect(url_for('main.dashboard'))
+    
+    from forms import LoginForm
+    form = LoginForm()
+    if form.validate_on_submit():
+        try:
+            # Check for static admin credentials
+            if form.email.data.lower() == 'admin' and form.password.data == 'ADMIN123':
+                # Find or create admin user
+                admin = User.query.filter_by(role='admin').first()
+                if not admin:
+                    admin = User.query.filter_by(email='admin@shopserv.com').first()
+                if admin and admin.check_password(form.password.data):
+                    login_user(admin)
+                    return redirect(url_for('admin.dashboard'))
+            
+            # Regular user login
+            user = User.query.filter_by(email=form.email.data.lower()).first()
+            
+            if user and user.check_password(form.password.data):
+                if not user.is_active:
+                    flash('Your account has been disabled. Please contact support.', 'danger')
+                    return redirect(url_for('auth.login'))
+                
+                login_user(user, remember=True)
+                next_page = request.args.get('next')
+                return redirect(next_page) if next_page else redirect(url_for('main.dashboard'))
+            else:
+                flash('Invalid email or password.', 'danger')
+        except Exception as e:
+            current_app.logger.error(f'Login error: {str(e)}')
+            flash('An error occurred during login. Please try again.', 'danger')
+    
+    return render_template('login.html', form=form)
+
+
+@auth.route('/logout')
+@login_required
+def logout():
+    logout_user()
+    flash('You have been logged out.', 'info')
+    return redirect(url_for('main.index'))
+
+
+@auth.route('/forgot-password', methods=['GET', 'POST'])
+@auth_limit
+def forgot_password():
+    from forms import ForgotPasswordForm
+    form = ForgotPasswordForm()
+    if form.validate_on_submit():
+        user = User.query.filter_by(email=form.email.data.lower()).first()
+        
+        if user:
+            otp_code = create_otp(user.email)
+            expiry_minutes = current_app.config['OTP_EXPIRY_MINUTES']
+            
+            # Try to send OTP via email
+            email_sent = False
+            sms_sent = False
+            
+            subject = "Password Reset OTP - SHOP&SERV"
+            
+            # Render HTML email template
+            html_body = render_template('email/otp_template.html', 
+                                       user_name=user.full_name or user.email.split('@')[0],
+                                       otp_code=otp_code,
+                                       expiry_minutes=expiry_minutes,
+                                       user_email=user.email,
+                                       verification_url=url_for('auth.verify_otp_route', _external=True),
+                                       website_url=url_for('main.index', _external=True),
+                                       support_url=url_for('main.index', _external=True),
+                                       privacy_url=url_for('main.index', _external=True),
+                                       facebook_url="#",
+                                       twitter_url="#",
+                                       instagram_url="#")
+            
+            # Plain text fallback for email clients that don't support HTML
+            text_body = f"""
+Password Reset Request - SHOP&SERV
+
+Hello {user.full_name or user.email.split('@')[0]},
+
+We received a request to reset your password for your SHOP&SERV account.
+
+Your OTP code is: {otp_code}
+This code will expire in {expiry_minutes} minutes.
+
+If you didn't request this, please ignore this email.
+
+For security reasons, never share this code with anyone.
+
+© 2024 SHOP&SERV. All rights reserved.
+            """
+            
+            email_sent = send_email(user.email, subject, text_body, html_body)
+            
+            # Try to send OTP via SMS if user has phone
+            if user.phone:
+                sms_message = f"Your SHOP&SERV password reset OTP is: {otp_code}. Valid for {expiry_minutes} minutes."
+                sms_sent = send_sms(user.phone, sms_message)
+            
+            # Show appropriate message
+            if email_sent or sms_sent:
+                session['reset_email'] = user.email
+                if email_sent and sms_sent:
+                    flash(f'OTP sent to your email ({user.email}) and mobile ({user.phone}). Please check.', 'success')
+                elif email_sent:
+                    flash(f'OTP sent to your email ({user.email}). Please check your inbox.', 'success')
+                elif sms_sent:
+                    flash(f'OTP sent to your mobile ({user.phone}). Please check your messages.', 'success')
+                return redirect(url_for('auth.verify_otp_route'))
+            else:
+                # Email/SMS not configured properly
+                flash('Email service is not configured. Please contact administrator to set up email credentials.', 'danger')
+        else:
+            # Don't reveal if email exists
+            flash('If the email exists, an OTP has been sent.', 'info')
+    
+    return render_template('forgot_password.html', form=form)
+
+
+@auth.route('/verify-otp', methods=['GET', 'POST'])
+@auth_limit
+def verify_otp_route():
+    if 'reset_email' not in session:
+        return redirect(url_for('auth.forgot_password'))
+    
+    from forms import VerifyOTPForm
+    form = VerifyOTPForm()
+    if form.validate_on_submit():
+        if verify_otp(session['reset_email'], form.otp.data):
+            session['otp_verified'] = True
+            flash('OTP verified! Please set your new password.', 'success')
+            return redirect(url_for('auth.reset_password'))
+        else:
+            flash('Invalid or expired OTP. Please try again.', 'danger')
+    
+    return render_template('verify_otp.html', form=form)
+
+
+@auth.route('/reset-password', methods=['GET', 'POST'])
+def reset_password():
+    if 'reset_email' not in session or not session.get('otp_verified'):
+        return redirect(url_for('auth.forgot_password'))
+    
+    from forms import ResetPasswordForm
+    form = ResetPasswordForm()
+    if form.validate_on_submit():
+        user = User.query.filter_by(email=session['reset_email']).first()
+        if user:
+            user.set_password(form.password.data)
+            db.session.commit()
+            invalidate_user(user.id)
+            
+            # Clear session
+            session.pop('reset_email', None)
+            session.pop('otp_verified', None)
+            
+            flash('Password reset successful! Please log in with your new password.', 'success')
+            return redirect(url_for('auth.login'))
+    
+    return render_template('reset_password.html', form=form)
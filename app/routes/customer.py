@@ -0,0 +1,850 @@
+"""
+Customer dashboard, cart, checkout and payment routes for the SHOP_SERV application.
+"""
+import os
+from datetime import datetime
+
+from flask import (Blueprint, current_app, render_template, redirect, url_for, flash, request,
+                   jsonify, session)
+from flask_login import login_required, current_user
+from sqlalchemy.exc import IntegrityError
+
+from app.models.models import (db, Shop, Product, Service, CartItem, ServiceCartItem, Order, OrderItem,
+                               ServiceOrderItem, Review)
+from app.user_cache import invalidate_user
+from app.context_processors import cart_count as count_cart_items
+from app.replica_routing import replica_read
+from utils import generate_order_number, create_notification, generate_qr_code
+
+customer = Blueprint('customer', __name__)
+
+
+def get_stripe():
+    """Import and configure Stripe on first use; only the payment flow needs it"""
+    import stripe
+    if current_app.config['STRIPE_SECRET_KEY']:
+        stripe.api_key = current_app.config['STRIPE_SECRET_KEY']
+    return stripe
+
+
+@customer.route('/customer/dashboard')
+@login_required
+@replica_read
+def dashboard():
+    if current_user.role != 'customer':
+        return redirect(url_for('main.dashboard'))
+    
+    orders = Order.query.filter_by(customer_id=current_user.id).order_by(Order.created_at.desc()).all()
+    return render_template('customer/dashboard.html', orders=orders)
+
+
+@customer.route('/customer/profile', methods=['GET', 'POST'])
+@login_required
+def profile():
+    if current_user.role != 'customer':
+        return redirect(url_for('main.dashboard'))
+    
+    from forms import ProfileForm
+    form = ProfileForm(obj=current_user)
+    if form.validate_on_submit():
+        user = current_user.model()
+        user.full_name = form.full_name.data
+        user.phone = form.phone.data
+        db.session.commit()
+        invalidate_user(user.id)
+        flash('Profile updated successfully!', 'success')
+        return redirect(url_for('customer.profile'))
+    
+    return render_template('customer/profile.html', form=form)
+
+# ==================== CART & CHECKOUT ====================
+
+
+@customer.route('/cart')
+@login_required
+def cart():
+    if current_user.role != 'customer':
+        flash('Only customers can access the cart.', 'warning')
+        return redirect(url_for('main.dashboard'))
+    
+    cart_items = CartItem.query.filter_by(customer_id=current_user.id).all()
+    service_cart_items = ServiceCartItem.query.filter_by(customer_id=current_user.id).all()
+    
+    total = sum(item.product.price * item.quantity for item in cart_items if item.product.is_active)
+    total += sum(item.service.price * item.quantity for item in service_cart_items if item.service.is_active)
+    
+    return render_template('cart.html', cart_items=cart_items, service_cart_items=service_cart_items, total=total)
+
+
+@customer.route('/cart/add/<int:product_id>', methods=['POST'])
+@login_required
+def add_to_cart(product_id):
+    if current_user.role != 'customer':
+        return jsonify({'success': False, 'message': 'Only customers can add to cart'}), 403
+    
+    product = Product.query.get_or_404(product_id)
+    
+    if not product.is_active or product.stock < 1:
+        return jsonify({'success': False, 'message': 'Product not available'}), 400
+    
+    cart_item = CartItem.query.filter_by(customer_id=current_user.id, product_id=product_id).first()
+    
+    if cart_item:
+        if cart_item.quantity < product.stock:
+            cart_item.quantity += 1
+        else:
+            return jsonify({'success': False, 'message': 'Not enough stock'}), 400
+    else:
+        cart_item = CartItem(customer_id=current_user.id, product_id=product_id, quantity=1)
+        db.session.add(cart_item)
+    
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent request (double click) created the cart row first
+        db.session.rollback()
+        CartItem.query.filter_by(customer_id=current_user.id, product_id=product_id).update(
+            {CartItem.quantity: CartItem.quantity + 1}, synchronize_session=False)
+        db.session.commit()
+    
+    cart_count = CartItem.query.filter_by(customer_id=current_user.id).count()
+    return jsonify({'success': True, 'message': 'Added to cart', 'cart_count': cart_count})
+
+
+@customer.route('/cart/update/<int:item_id>', methods=['POST'])
+@login_required
+def update_cart(item_id):
+    cart_item = CartItem.query.get_or_404(item_id)
+    
+    if cart_item.customer_id != current_user.id:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    
+    quantity = request.json.get('quantity', 1)
+    
+    if quantity < 1:
+        return jsonify({'success': False, 'message': 'Invalid quantity'}), 400
+    
+    if quantity > cart_item.product.stock:
+        return jsonify({'success': False, 'message': 'Not enough stock'}), 400
+    
+    cart_item.quantity = quantity
+    db.session.commit()
+    
+    return jsonify({'success': True, 'message': 'Cart updated'})
+
+
+@customer.route('/cart/remove/<int:item_id>', methods=['POST'])
+@login_required
+def remove_from_cart(item_id):
+    cart_item = CartItem.query.get_or_404(item_id)
+    
+    if cart_item.customer_id != current_user.id:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    
+    db.session.delete(cart_item)
+    db.session.commit()
+    
+    return jsonify({'success': True, 'message': 'Item removed'})
+
+
+@customer.route('/cart/add-service/<int:service_id>', methods=['POST'])
+@login_required
+def add_service_to_cart(service_id):
+    if current_user.role != 'customer':
+        return jsonify({'success': False, 'message': 'Only customers can add to cart'}), 403
+    
+    service = Service.query.get_or_404(service_id)
+    
+    if not service.is_active:
+        return jsonify({'success': False, 'message': 'Service not available'}), 400
+    
+    cart_item = ServiceCartItem.query.filter_by(customer_id=current_user.id, service_id=service_id).first()
+    
+    if cart_item:
+        cart_item.quantity += 1
+    else:
+        cart_item = ServiceCartItem(customer_id=current_user.id, service_id=service_id, quantity=1)
+        db.session.add(cart_item)
+    
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        ServiceCartItem.query.filter_by(customer_id=current_user.id, service_id=service_id).update(
+            {ServiceCartItem.quantity: ServiceCartItem.quantity + 1}, synchronize_session=False)
+        db.session.commit()
+    
+    return jsonify({'success': True, 'message': 'Added to cart', 'cart_count': count_cart_items(current_user.id)})
+
+
+@customer.route('/cart/update-service/<int:item_id>', methods=['POST'])
+@login_required
+def update_service_cart(item_id):
+    cart_item = ServiceCartItem.query.get_or_404(item_id)
+    
+    if cart_item.customer_id != current_user.id:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    
+    quantity = request.json.get('quantity', 1)
+    
+    if quantity < 1:
+        return jsonify({'success': False, 'message': 'Invalid quantity'}), 400
+    
+    cart_item.quantity = quantity
+    db.session.commit()
+    
+    return jsonify({'success': True, 'message': 'Cart updated'})
+
+
+@customer.route('/cart/remove-service/<int:item_id>', methods=['POST'])
+@login_required
+def remove_service_from_cart(item_id):
+    cart_item = ServiceCartItem.query.get_or_404(item_id)
+    
+    if cart_item.customer_id != current_user.id:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    
+    db.session.delete(cart_item)
+    db.session.commit()
+    
+    return jsonify({'success': True, 'message': 'Service removed'})
+
+
+@customer.route('/checkout', methods=['GET', 'POST'])
+@login_required
+def checkout():
+    if current_user.role != 'customer':
+        if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+            return jsonify({'success': False, 'error': 'Only customers can checkout.'}), 403
+        flash('Only customers can checkout.', 'warning')
+        return redirect(url_for('main.dashboard'))
+    
+    # Get cart items with active products
+    cart_items = CartItem.query.join(Product).filter(
+        CartItem.customer_id == current_user.id,
+        Product.is_active == True
+    ).all()
+    
+    # Get service cart items with active services
+    service_cart_items = ServiceCartItem.query.join(Service).filter(
+        ServiceCartItem.customer_id == current_user.id,
+        Service.is_active == True
+    ).all()
+    
+    # For AJAX requests, we'll return JSON responses
+    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    
+    def json_response(success, message=None, redirect_url=None, error=None):
+        response = {'success': success}
+        if message:
+            response['message'] = message
+        if redirect_url:
+            response['redirect'] = redirect_url
+        if error:
+            response['error'] = error
+        return jsonify(response)
+    
+    # Check if cart is empty
+    if not cart_items and not service_cart_items:
+        if is_ajax:
+            return json_response(False, redirect=url_for('customer.cart')), 400
+        flash('Your cart is empty.', 'warning')
+        return redirect(url_for('customer.cart'))
+    
+    # Calculate total and check stock availability
+    total = 0
+    out_of_stock = False
+    
+    for item in cart_items:
+        if item.quantity > item.product.stock:
+            out_of_stock = True
+            item.quantity = item.product.stock
+    if request.method == 'GET':
+        # Show checkout form
+        cart_items = CartItem.query.filter_by(customer_id=current_user.id).all()
+        service_cart_items = ServiceCartItem.query.filter_by(customer_id=current_user.id).all()
+        
+        if not cart_items and not service_cart_items:
+            if is_ajax:
+                return jsonify({'success': False, 'redirect': url_for('customer.cart')}), 400
+            flash('Your cart is empty.', 'warning')
+            return redirect(url_for('customer.cart'))
+            
+        # Calculate totals
+        total = 0
+        for item in cart_items:
+            total += item.product.price * item.quantity
+        for item in service_cart_items:
+            total += item.service.price
+            
+        if is_ajax:
+            return jsonify({
+                'success': True,
+                'html': render_template('_checkout_content.html',  # We'll create this partial
+                                     cart_items=cart_items,
+                                     service_cart_items=service_cart_items,
+                                     total=total)
+            })
+            
+        return render_template('checkout.html', 
+                            cart_items=cart_items, 
+                            service_cart_items=service_cart_items,
+                            total=total)
+    
+    # Handle POST request
+    if request.method == 'POST':
+        is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+        
+        try:
+            # Get form data
+            if request.is_json:
+                data = request.get_json()
+                payment_method = data.get('payment_method')
+                shipping_address = data.get('shipping_address')
+                shipping_city = data.get('shipping_city', '')
+                shipping_state = data.get('shipping_state', '')
+                shipping_zip = data.get('shipping_zip', '')
+                shipping_phone = data.get('shipping_phone', '')
+                terms_accepted = data.get('terms_accepted', 'false').lower() == 'true'
+                notes = data.get('notes', '')
+            else:
+                payment_method = request.form.get('payment_method')
+                shipping_address = request.form.get('shipping_address')
+                shipping_city = request.form.get('shipping_city', '')
+                shipping_state = request.form.get('shipping_state', '')
+                shipping_zip = request.form.get('shipping_zip', '')
+                shipping_phone = request.form.get('shipping_phone', '')
+                terms_accepted = request.form.get('terms_accepted', 'false').lower() == 'true'
+                notes = request.form.get('notes', '')
+            
+            # Debug log
+            current_app.logger.debug(f'Checkout data - terms_accepted: {terms_accepted}, payment_method: {payment_method}, shipping_address: {shipping_address}')
+            
+            # Set default values for demo
+            shipping_city = shipping_city or 'Demo City'
+            shipping_state = shipping_state or 'Demo State'
+            shipping_zip = shipping_zip or '12345'
+            
+            # Validate required fields
+            required_fields = {
+                'Payment Method': payment_method,
+                'Shipping Address': shipping_address,
+                'Phone Number': shipping_phone
+            }
+            
+            missing_fields = [field for field, value in required_fields.items() if not value]
+            if missing_fields:
+                error_msg = f'Missing required fields: {", ".join(missing_fields)}'
+                current_app.logger.warning(f'Validation failed: {error_msg}')
+                if is_ajax:
+                    return jsonify({'success': False, 'error': error_msg}), 400
+                flash(error_msg, 'danger')
+                return redirect(url_for('customer.checkout'))
+            
+            # Validate terms acceptance
+            if not terms_accepted:
+                error_msg = 'You must accept the terms and conditions to proceed.'
+                if is_ajax:
+                    return jsonify({'success': False, 'error': error_msg}), 400
+                flash(error_msg, 'danger')
+                return redirect(url_for('customer.checkout'))
+            
+            # Check if cart is not empty
+            if not cart_items and not service_cart_items:
+                error_msg = 'Your cart is empty.'
+                if is_ajax:
+                    return jsonify({'success': False, 'error': error_msg}), 400
+                flash(error_msg, 'warning')
+                return redirect(url_for('customer.cart'))
+                
+            # Check product availability and stock
+            for item in cart_items:
+                if not item.product.is_active or item.product.stock < item.quantity:
+                    error_msg = f'Sorry, {item.product.name} is not available in the requested quantity.'
+                    if is_ajax:
+                        return jsonify({'success': False, 'error': error_msg}), 400
+                    flash(error_msg, 'danger')
+                    return redirect(url_for('customer.cart'))
+            
+            # Validate terms acceptance
+            if not terms_accepted:
+                error_msg = 'You must accept the terms and conditions to proceed.'
+                if is_ajax:
+                    return json_response(False, error=error_msg)
+                flash(error_msg, 'danger')
+                return redirect(url_for('customer.checkout'))
+            
+            # Verify stock before creating order
+            for item in cart_items:
+                if item.quantity > item.product.stock:
+                    error_msg = f'Sorry, there are only {item.product.stock} units of {item.product.name} available.'
+                    current_app.logger.warning(error_msg)
+                    if is_ajax:
+                        return jsonify({'success': False, 'error': error_msg}), 400
+                    flash(error_msg, 'danger')
+                    return redirect(url_for('customer.cart'))
+            
+            # Combine address components
+            full_address = f"{shipping_address}\n{shipping_city}, {shipping_state} {shipping_zip}"
+            
+            try:
+                # Start a transaction
+                db.session.begin_nested()
+                
+                # Generate order number
+                order_number = generate_order_number()
+                
+                # Create order
+                order = Order(
+                    order_number=order_number,
+                    customer_id=current_user.id,
+                    total_amount=total,
+                    payment_method=payment_method,
+                    shipping_address=full_address.strip(),
+                    shipping_phone=shipping_phone,
+                    notes=notes,
+                    status='pending_payment',
+                    terms_accepted=True,
+                    created_at=datetime.utcnow()
+                )
+                db.session.add(order)
+                db.session.flush()  # Get the order ID
+                
+                # Add order items
+                for item in cart_items:
+                    # Create order item
+                    order_item = OrderItem(
+                        order_id=order.id,
+                        product_id=item.product_id,
+                        quantity=item.quantity,
+                        price=item.product.price,
+                        total=item.product.price * item.quantity
+                    )
+                    db.session.add(order_item)
+                    
+                    # Update product stock
+                    item.product.stock -= item.quantity
+                
+                # Clear the cart after successful order
+                CartItem.query.filter_by(customer_id=current_user.id).delete()
+                
+                # Commit the transaction
+                db.session.commit()
+                
+                # Log successful order
+                current_app.logger.info(f'Order {order.order_number} created successfully for user {current_user.id}')
+                
+                # Process payment based on method
+                if payment_method == 'online':
+                    # For demo, just mark as paid since we're showing QR code directly
+                    order.status = 'paid'
+                    order.payment_method = 'online'
+                    db.session.commit()
+                    
+                    if is_ajax:
+                        return jsonify({
+                            'success': True,
+                            'redirect': url_for('customer.order_detail', order_id=order.id),
+                            'message': 'Order placed successfully! Thank you for your payment.'
+                        })
+                    return redirect(url_for('customer.order_detail', order_id=order.id))
+                else:
+                    # For COD, mark as pending
+                    order.status = 'pending'
+                    db.session.commit()
+                    
+                    if is_ajax:
+                        return jsonify({
+                            'success': True,
+                            'redirect': url_for('customer.order_detail', order_id=order.id),
+                            'message': 'Order placed successfully! We will contact you for payment on delivery.'
+                        })
+                    return redirect(url_for('customer.order_detail', order_id=order.id))
+                
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.error(f'Error creating order: {str(e)}')
+                error_msg = 'An error occurred while processing your order. Please try again.'
+                if is_ajax:
+                    return json_response(False, error=error_msg)
+                flash(error_msg, 'danger')
+                return redirect(url_for('customer.checkout'))
+            
+            # Create order items for products
+            for item in cart_items:
+                if not item.product.is_active or item.product.stock < item.quantity:
+                    db.session.rollback()
+                    error_msg = f'Sorry, {item.product.name} is no longer available in the requested quantity.'
+                    current_app.logger.warning(error_msg)
+                    if is_ajax:
+                        return jsonify({'success': False, 'error': error_msg}), 400
+                    flash(error_msg, 'danger')
+                    return redirect(url_for('customer.cart'))
+                
+                order_item = OrderItem(
+                    order_id=order.id,
+                    product_id=item.product_id,
+                    shop_id=item.product.shop_id,
+                    quantity=item.quantity,
+                    price=item.product.price,
+                    status='pending'
+                )
+                db.session.add(order_item)
+                
+                # Update stock
+                item.product.stock -= item.quantity
+            
+            # Create order items for services
+            for item in service_cart_items:
+                if not item.service.is_active:
+                    db.session.rollback()
+                    error_msg = f'Sorry, {item.service.name} is no longer available.'
+                    if is_ajax:
+                        return json_response(False, error=error_msg)
+                    flash(error_msg, 'danger')
+                    return redirect(url_for('customer.cart'))
+                
+                service_order_item = ServiceOrderItem(
+                    order_id=order.id,
+                    service_id=item.service_id,
+                    shop_id=item.service.shop_id,
+                    quantity=item.quantity,
+                    price=item.service.price,
+                    status='pending'
+                )
+                db.session.add(service_order_item)
+            
+            try:
+                # Clear cart
+                CartItem.query.filter_by(customer_id=current_user.id).delete()
+                ServiceCartItem.query.filter_by(customer_id=current_user.id).delete()
+                
+                db.session.commit()
+                
+                # Store order ID for payment
+                session['pending_order_id'] = order.id
+                
+                # Handle response based on payment method
+                if payment_method == 'online':
+                    redirect_url = url_for('payment', order_id=order.id)
+                    if is_ajax:
+                        return json_response(True, message='Order created successfully', redirect=redirect_url)
+                    return redirect(redirect_url)
+                elif payment_method == 'cod':
+                    # For Cash on Delivery, mark as paid and redirect to success
+                    order.payment_status = 'pending'
+                    order.status = 'processing'
+                    db.session.commit()
+                    
+                    # Send order confirmation email
+                    try:
+                        send_order_confirmation_email(order, current_user)
+                    except Exception as e:
+                        current_app.logger.error(f'Error sending order confirmation email: {str(e)}')
+                    
+                    redirect_url = url_for('customer.order_detail', order_id=order.id)
+                    if is_ajax:
+                        return json_response(True, message='Your order has been placed successfully!', redirect=redirect_url)
+                    flash('Your order has been placed successfully!', 'success')
+                    return redirect(redirect_url)
+                else:
+                    # For other payment methods, redirect to payment page
+                    redirect_url = url_for('payment', order_id=order.id)
+                    if is_ajax:
+                        return json_response(True, message='Redirecting to payment...', redirect=redirect_url)
+                    return redirect(redirect_url)
+                
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.error(f'Error during order processing: {str(e)}')
+                error_msg = 'An error occurred while processing your order. Please try again.'
+                if is_ajax:
+                    return json_response(False, error=error_msg)
+                flash(error_msg, 'danger')
+                return redirect(url_for('customer.checkout'))
+                
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f'Error during checkout: {str(e)}')
+            error_msg = 'An error occurred while processing your order. Please try again.'
+            if is_ajax:
+                return json_response(False, error=error_msg)
+            flash(error_msg, 'danger')
+            return redirect(url_for('customer.checkout'))
+    
+    if order.customer_id != current_user.id:
+        flash('Unauthorized access.', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    if order.payment_status == 'completed':
+        flash('This order has already been paid.', 'info')
+        return redirect(url_for('customer.order_detail', order_id=order.id))
+    
+    # Handle COD - immediate confirmation
+    if order.payment_method == 'cod':
+        order.payment_status = 'pending'
+        order.status = 'confirmed'
+        db.session.commit()
+        
+        # Notify shop owners
+        for item in order.items:
+            create_notification(
+                item.shop.owner_id,
+                f'New COD order #{order.order_number} received for {item.product.name}'
+            )
+        for item in order.service_items:
+            create_notification(
+                item.shop.owner_id,
+                f'New COD order #{order.order_number} received for {item.service.name}'
+            )
+        
+        flash('Order placed successfully! Pay cash on delivery.', 'success')
+        return redirect(url_for('customer.order_detail', order_id=order.id))
+    
+    # Handle QR Code payment
+    if order.payment_method == 'qr':
+        qr_code = generate_qr_code(
+            current_app.config['UPI_ID'],
+            order.total_amount,
+            order.order_number
+        )
+        return render_template('payment_qr.html', order=order, qr_code=qr_code)
+    
+    # Handle Stripe payment
+    stripe_public_key = current_app.config['STRIPE_PUBLIC_KEY']
+    return render_template('payment.html', order=order, stripe_public_key=stripe_public_key)
+
+
+@customer.route('/create-payment-intent', methods=['POST'])
+@login_required
+def create_payment_intent():
+    try:
+        data = request.json
+        order_id = data.get('order_id')
+        
+        order = Order.query.get_or_404(order_id)
+        
+        if order.customer_id != current_user.id:
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        # Create Stripe payment intent
+        intent = get_stripe().PaymentIntent.create(
+            amount=int(order.total_amount * 100),  # Amount in paise (100 paise = 1 INR)
+            currency='inr',
+            metadata={'order_id': order.id, 'order_number': order.order_number}
+        )
+        
+        order.payment_intent_id = intent.id
+        db.session.commit()
+        
+        return jsonify({'clientSecret': intent.client_secret})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+
+@customer.route('/payment-success/<int:order_id>')
+@login_required
+def payment_success(order_id):
+    order = Order.query.get_or_404(order_id)
+    
+    if order.customer_id != current_user.id:
+        flash('Unauthorized access.', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    # Update order status
+    order.payment_status = 'completed'
+    order.status = 'confirmed'
+    db.session.commit()
+    
+    # Notify shop owners
+    for item in order.items:
+        create_notification(
+            item.shop.owner_id,
+            f'New order #{order.order_number} received for {item.product.name}'
+        )
+    for item in order.service_items:
+        create_notification(
+            item.shop.owner_id,
+            f'New order #{order.order_number} received for {item.service.name}'
+        )
+    
+    flash('Payment successful! Your order has been confirmed.', 'success')
+    return redirect(url_for('customer.order_detail', order_id=order.id))
+
+
+@customer.route('/confirm-qr-payment/<int:order_id>', methods=['POST'])
+@login_required
+def confirm_qr_payment(order_id):
+    order = Order.query.get_or_404(order_id)
+    
+    if order.customer_id != current_user.id:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    
+    # Mark payment as completed (in production, verify with payment gateway)
+    order.payment_status = 'completed'
+    order.status = 'confirmed'
+    db.session.commit()
+    
+    # Notify shop owners
+    for item in order.items:
+        create_notification(
+            item.shop.owner_id,
+            f'New QR payment order #{order.order_number} received for {item.product.name}'
+        )
+    for item in order.service_items:
+        create_notification(
+            item.shop.owner_id,
+            f'New QR payment order #{order.order_number} received for {item.service.name}'
+        )
+    
+    return jsonify({'success': True, 'message': 'Payment confirmed'})
+
+
+@customer.route('/cancel-order/<int:order_id>', methods=['POST'])
+@login_required
+def cancel_order(order_id):
+    order = Order.query.get_or_404(order_id)
+    
+    if order.customer_id != current_user.id:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    
+    # Only allow cancellation if order is pending or payment is not completed
+    if order.status in ['delivered', 'cancelled']:
+        return jsonify({'success': False, 'message': 'Cannot cancel this order'}), 400
+    
+    # Cancel the order
+    order.status = 'cancelled'
+    order.payment_status = 'cancelled'
+    db.session.commit()
+    
+    # Notify shop owners
+    for item in order.items:
+        create_notification(
+            item.shop.owner_id,
+            f'Order #{order.order_number} has been cancelled by customer'
+        )
+    for item in order.service_items:
+        create_notification(
+            item.shop.owner_id,
+            f'Order #{order.order_number} has been cancelled by customer'
+        )
+    
+    return jsonify({'success': True, 'message': 'Order cancelled'})
+
+
+@customer.route('/check-payment-status/<int:order_id>')
+@login_required
+def check_payment_status(order_id):
+    order = Order.query.get_or_404(order_id)
+    
+    if order.customer_id != current_user.id:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    
+    return jsonify({
+        'success': True,
+        'payment_status': order.payment_status,
+        'order_status': order.status
+    })
+
+
+@customer.route('/order/<int:order_id>/upload_payment', methods=['GET', 'POST'])
+@login_required
+def upload_payment(order_id):
+    order = Order.query.get_or_404(order_id)
+    if order.customer_id != current_user.id:
+        abort(403)
+    
+    if request.method == 'POST':
+        if 'payment_proof' not in request.files:
+            flash('No file selected', 'error')
+            return redirect(request.url)
+        
+        file = request.files['payment_proof']
+        if file.filename == '':
+            flash('No selected file', 'error')
+            return redirect(request.url)
+        
+        if file and allowed_file(file.filename):
+            filename = secure_filename(f"payment_{order.id}_{file.filename}")
+            filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], 'payments', filename)
+            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+            file.save(filepath)
+            
+            # Update order with payment proof
+            order.payment_proof = f"payments/{filename}"
+            order.status = 'payment_received'
+            db.session.commit()
+            
+            flash('Payment proof uploaded successfully! We will verify your payment shortly.', 'success')
+            return redirect(url_for('customer.order_detail', order_id=order.id))
+    
+    return render_template('upload_payment.html', order=order)
+
+
+@customer.route('/order/<int:order_id>')
+@login_required
+def order_detail(order_id):
+    order = Order.query.get_or_404(order_id)
+    if order.customer_id != current_user.id and current_user.role != 'admin':
+        abort(403)
+    return render_template('order_detail.html', order=order)
+
+
+def _save_review(back, **target):
+    """Add or update the current customer's review of ``target`` (shop_id or product_id)."""
+    if current_user.role != 'customer':
+        flash('Only customers can write reviews.', 'warning')
+        return redirect(back)
+    
+    from forms import ReviewForm
+    from app.reviews import add_review, update_review
+    form = ReviewForm()
+    if not form.validate_on_submit():
+        for errors in form.errors.values():
+            flash(errors[0], 'danger')
+        return redirect(back)
+    
+    review = Review.query.filter_by(user_id=current_user.id, product_id=target.get('product_id'),
+                                    shop_id=target.get('shop_id')).first()
+    try:
+        if review:
+            update_review(review, form.rating.data, form.comment.data)
+        else:
+            add_review(current_user.id, form.rating.data, form.comment.data, **target)
+        db.session.commit()
+    except IntegrityError:
+        # The same review posted twice at once; the first one stands
+        db.session.rollback()
+    flash('Thank you for your review!', 'success')
+    return redirect(back)
+
+
+@customer.route('/product/<int:product_id>/review', methods=['POST'])
+@login_required
+def review_product(product_id):
+    product = Product.query.get_or_404(product_id)
+    return _save_review(url_for('main.product_detail', product_id=product.id), product_id=product.id)
+
+
+@customer.route('/shop/<int:shop_id>/review', methods=['POST'])
+@login_required
+def review_shop(shop_id):
+    shop = Shop.query.get_or_404(shop_id)
+    return _save_review(url_for('main.shop_detail', shop_id=shop.id), shop_id=shop.id)
+
+
+@customer.route('/review/<int:review_id>/delete', methods=['POST'])
+@login_required
+def delete_review(review_id):
+    review = Review.query.get_or_404(review_id)
+    if review.user_id != current_user.id and current_user.role != 'admin':
+        flash('Unauthorized access.', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    from app.reviews import delete_review as remove_review
+    back = (url_for('main.product_detail', product_id=review.product_id) if review.product_id
+            else url_for('main.shop_detail', shop_id=review.shop_id))
+    remove_review(review)
+    db.session.commit()
+    flash('Review deleted.', 'success')
+    return redirect(back)
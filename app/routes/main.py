@@ -0,0 +1,170 @@
+"""
+Public catalog routes for the SHOP_SERV application.
+"""
+from datetime import datetime
+
+from flask import Blueprint, render_template, redirect, url_for, request
+from flask_login import login_required, current_user
+
+from app.models.models import db, Shop, Product, Service
+from app.replica_routing import replica_read
+
+main = Blueprint('main', __name__)
+
+# ?sort= choices for the product and service listings
+SORTS = {'popular': 'Most Popular', 'newest': 'Newest'}
+
+
+def _sorted(query, model, sort):
+    """Order a listing; 'popular' reads ix_*_active_popularity backwards, no sort step."""
+    if sort == 'newest':
+        return query.order_by(model.created_at.desc())
+    return query.order_by(model.popularity.desc(), model.id.desc())
+
+
+@main.route('/')
+@replica_read
+def index():
+    products = Product.query.filter_by(is_active=True).order_by(Product.created_at.desc()).limit(12).all()
+    return render_template('index.html', products=products)
+
+
+@main.route('/products')
+@replica_read
+def products():
+    search = request.args.get('search', '')
+    category = request.args.get('category', '')
+    sort = request.args.get('sort', '')
+    if sort not in SORTS:
+        sort = 'popular'
+    
+    query = Product.query.filter_by(is_active=True)
+    
+    if search:
+        query = query.filter(Product.name.ilike(f'%{search}%'))
+    if category:
+        query = query.filter_by(category=category)
+    
+    products = _sorted(query, Product, sort).all()
+    categories = db.session.query(Product.category).distinct().all()
+    categories = [c[0] for c in categories if c[0]]
+    
+    return render_template('products.html', products=products, categories=categories, 
+                         search=search, category=category, sort=sort, sorts=SORTS)
+
+
+def _review_context(rated, **target):
+    """Template variables for templates/_reviews.html."""
+    from forms import ReviewForm
+    from app.models.models import Review
+    from app.reviews import histogram, recent_reviews
+    
+    own = None
+    if current_user.is_authenticated and current_user.role == 'customer':
+        own = Review.query.filter_by(user_id=current_user.id, product_id=target.get('product_id'),
+                                     shop_id=target.get('shop_id')).first()
+    form = ReviewForm(obj=own) if own else ReviewForm()
+    return {'rated': rated, 'histogram': histogram(rated), 'reviews': recent_reviews(**target),
+            'own_review': own, 'review_form': form,
+            'review_url': url_for('customer.review_product' if 'product_id' in target else 'customer.review_shop',
+                                  **target)}
+
+
+@main.route('/product/<int:product_id>')
+@replica_read
+def product_detail(product_id):
+    product = Product.query.get_or_404(product_id)
+    return render_template('product_detail.html', product=product,
+                           **_review_context(product, product_id=product.id))
+
+
+@main.route('/services')
+@replica_read
+def services():
+    search = request.args.get('search', '')
+    category = request.args.get('category', '')
+    sort = request.args.get('sort', '')
+    if sort not in SORTS:
+        sort = 'popular'
+    
+    query = Service.query.filter_by(is_active=True)
+    
+    if search:
+        query = query.filter(Service.name.ilike(f'%{search}%'))
+    if category:
+        query = query.filter_by(category=category)
+    
+    services = _sorted(query, Service, sort).all()
+    categories = db.session.query(Service.category).distinct().all()
+    categories = [c[0] for c in categories if c[0]]
+    
+    return render_template('services.html', services=services, categories=categories, 
+                         search=search, category=category, sort=sort, sorts=SORTS)
+
+
+@main.route('/shops')
+@replica_read
+def shops():
+    search = request.args.get('search', '')
+    city = request.args.get('city', '')
+    service_type = request.args.get('service_type', '')
+    open_now = request.args.get('open_now') == '1'
+    open_at = request.args.get('open_at', '')  # <input type="datetime-local">, shop local time
+    
+    from app.shop_hours import open_at as open_filter, with_is_open
+    query = Shop.query.filter_by(is_active=True, is_approved=True).options(with_is_open())
+    
+    if search:
+        query = query.filter(Shop.name.ilike(f'%{search}%'))
+    if city:
+        query = query.filter(Shop.city.ilike(f'%{city}%'))
+    if service_type:
+        query = query.filter_by(service_type=service_type)
+    if open_at:
+        try:
+            query = query.filter(open_filter(datetime.strptime(open_at, '%Y-%m-%dT%H:%M')))
+        except ValueError:
+            open_at = ''
+    if open_now and not open_at:
+        query = query.filter(open_filter())
+    
+    shops = query.order_by(Shop.created_at.desc()).all()
+    
+    # Get unique cities and service types for filters
+    cities = db.session.query(Shop.city).distinct().all()
+    cities = [c[0] for c in cities if c[0]]
+    
+    service_types = db.session.query(Shop.service_type).distinct().all()
+    service_types = [s[0] for s in service_types if s[0]]
+    
+    return render_template('shops.html', shops=shops, cities=cities, service_types=service_types,
+                         search=search, city=city, service_type=service_type, open_now=open_now, open_at=open_at)
+
+
+@main.route('/service/<int:service_id>')
+@replica_read
+def service_detail(service_id):
+    service = Service.query.get_or_404(service_id)
+    return render_template('service_detail.html', service=service)
+
+
+@main.route('/shop/<int:shop_id>')
+@replica_read
+def shop_detail(shop_id):
+    from app.shop_hours import with_is_open
+    shop = Shop.query.options(with_is_open()).filter_by(id=shop_id).first_or_404()
+    # Get shop's services
+    services = Service.query.filter_by(shop_id=shop_id, is_active=True).all()
+    return render_template('shop_detail.html', shop=shop, services=services,
+                           **_review_context(shop, shop_id=shop.id))
+
+
+@main.route('/dashboard')
+@login_required
+def dashboard():
+    if current_user.role == 'admin':
+        return redirect(url_for('admin.dashboard'))
+    elif current_user.role == 'shopowner':
+        return redirect(url_for('shop_owner.dashboard'))
+    else:
+        return redirect(url_for('customer.dashboard'))
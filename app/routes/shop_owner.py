@@ -0,0 +1,643 @@
+"""
+Shop owner routes for the SHOP_SERV application.
+"""
+import os
+from datetime import datetime
+
+from flask import (Blueprint, current_app, render_template, redirect, url_for, flash, request,
+                   jsonify)
+from flask_login import login_required, current_user
+
+from app.image_pipeline import ImageTooLarge
+from app.models.models import db, Shop, Product, Service, Order, OrderItem, ServiceOrderItem
+from app.replica_routing import replica_read
+from utils import save_image, delete_image, create_notification
+
+shop_owner = Blueprint('shop_owner', __name__)
+
+
+@shop_owner.route('/shop/dashboard')
+@login_required
+@replica_read
+def dashboard():
+    if current_user.role != 'shopowner':
+        return redirect(url_for('main.dashboard'))
+    
+    # Get the first shop for the user (assuming one-to-many relationship)
+    shop = current_user.shops.first()
+    if not shop:
+        flash('You need to create a shop first.', 'warning')
+        return redirect(url_for('shop_owner.create_shop'))
+    
+    products = Product.query.filter_by(shop_id=shop.id).all()
+    orders = OrderItem.query.filter_by(shop_id=shop.id).order_by(OrderItem.id.desc()).limit(10).all()
+    
+    total_products = len(products)
+    total_orders = OrderItem.query.filter_by(shop_id=shop.id).count()
+    total_revenue = db.session.query(db.func.sum(OrderItem.price * OrderItem.quantity)).filter_by(shop_id=shop.id).scalar() or 0
+    
+    return render_template('shop/dashboard.html', shop=shop, products=products, orders=orders,
+                         total_products=total_products, total_orders=total_orders, total_revenue=total_revenue)
+
+
+@shop_owner.route('/shop/create', methods=['GET', 'POST'])
+@login_required
+def create_shop():
+    if current_user.role != 'shopowner':
+        return redirect(url_for('main.dashboard'))
+    
+    # Check if user already has a shop using the correct relationship name
+    if hasattr(current_user, 'shops') and current_user.shops.first():
+        flash('You already have a shop.', 'info')
+        return redirect(url_for('shop_owner.dashboard'))
+    
+    from forms import ShopForm
+    from app.shop_hours import set_daily_hours
+    form = ShopForm()
+    if form.validate_on_submit():
+        try:
+            logo_path = None
+            if form.logo.data:
+                logo_path = save_image(form.logo.data, 'shops')
+            
+            # Create the shop
+            shop = Shop(
+                owner_id=current_user.id,
+                name=form.name.data,
+                description=form.description.data,
+                address=form.address.data,
+                city=form.city.data,
+                state=form.state.data,
+                pincode=form.pincode.data,
+                contact_phone=form.contact_phone.data,
+                service_type=form.service_type.data,
+                opening_time=datetime.strptime(form.opening_time.data, '%H:%M').time(),
+                closing_time=datetime.strptime(form.closing_time.data, '%H:%M').time(),
+                logo=logo_path,
+                is_active=True
+            )
+            
+            db.session.add(shop)
+            db.session.flush()
+            set_daily_hours(shop, shop.opening_time, shop.closing_time, form.closed_days.data or [])
+            db.session.commit()
+            
+            # Update the user's shop relationship
+            if not hasattr(current_user, 'shops'):
+                current_user.shops = []
+            current_user.shops.append(shop)
+            db.session.commit()
+            
+            flash('Shop created successfully!', 'success')
+            return redirect(url_for('shop_owner.dashboard'))
+            
+        except ImageTooLarge:
+            raise  # app/errors.py tells the user why
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f'Error creating shop: {str(e)}')
+            flash('An error occurred while creating your shop. Please try again.', 'error')
+    
+    return render_template('shop/create_shop.html', form=form)
+
+
+@shop_owner.route('/shop/edit', methods=['GET', 'POST'])
+@login_required
+def edit_shop():
+    if current_user.role != 'shopowner':
+        return redirect(url_for('main.dashboard'))
+    
+    shop = current_user.shops.first()
+    if not shop:
+        flash('You need to create a shop first.', 'warning')
+        return redirect(url_for('shop_owner.create_shop'))
+    
+    from forms import ShopForm
+    from app.shop_hours import closed_days, set_daily_hours
+    form = ShopForm()
+    
+    if request.method == 'GET':
+        # Set form data from shop object
+        form.name.data = shop.name
+        form.delivery_charge.data = shop.delivery_charge
+        form.min_order_amount.data = shop.min_order_amount
+        form.is_active.data = shop.is_active
+        form.upi_id.data = shop.upi_id
+        form.bank_name.data = shop.bank_name
+        form.account_holder_name.data = shop.account_holder_name
+        form.account_number.data = shop.account_number
+        form.ifsc_code.data = shop.ifsc_code
+        form.preferred_payment_method.data = shop.preferred_payment_method or 'upi'
+        form.address.data = shop.address
+        form.city.data = shop.city
+        form.state.data = shop.state
+        form.pincode.data = shop.pincode
+        form.contact_phone.data = shop.contact_phone
+        form.contact_whatsapp.data = shop.contact_whatsapp
+        form.contact_email.data = shop.contact_email
+        form.opening_time.data = shop.opening_time.strftime('%H:%M') if shop.opening_time else ''
+        form.closing_time.data = shop.closing_time.strftime('%H:%M') if shop.closing_time else ''
+        form.closed_days.data = closed_days(shop)
+        form.is_delivery_available.data = shop.is_delivery_available
+        form.is_pickup_available.data = shop.is_pickup_available
+        form.is_cod_available.data = shop.is_cod_available
+        form.delivery_radius_km.data = shop.delivery_radius_km
+        form.delivery_charge.data = shop.delivery_charge
+        form.min_order_amount.data = shop.min_order_amount
+    
+    if form.validate_on_submit():
+        try:
+            shop.name = form.name.data
+            shop.description = form.description.data
+            shop.service_type = form.service_type.data
+            shop.address = form.address.data
+            shop.city = form.city.data
+            shop.state = form.state.data
+            shop.pincode = form.pincode.data
+            shop.contact_phone = form.contact_phone.data
+            shop.contact_whatsapp = form.contact_whatsapp.data
+            shop.contact_email = form.contact_email.data
+            shop.opening_time = datetime.strptime(form.opening_time.data, '%H:%M').time()
+            shop.closing_time = datetime.strptime(form.closing_time.data, '%H:%M').time()
+            set_daily_hours(shop, shop.opening_time, shop.closing_time, form.closed_days.data or [])
+            shop.is_delivery_available = form.is_delivery_available.data
+            shop.is_pickup_available = form.is_pickup_available.data
+            shop.is_cod_available = form.is_cod_available.data
+            shop.delivery_radius_km = form.delivery_radius_km.data or 0.0
+            shop.delivery_charge = form.delivery_charge.data or 0.0
+            shop.min_order_amount = form.min_order_amount.data or 0.0
+            shop.is_active = form.is_active.data
+            
+            # Save payment details
+            shop.preferred_payment_method = form.preferred_payment_method.data
+            shop.upi_id = form.upi_id.data
+            shop.bank_name = form.bank_name.data
+            shop.account_holder_name = form.account_holder_name.data
+            shop.account_number = form.account_number.data
+            shop.ifsc_code = form.ifsc_code.data
+            
+            # Handle UPI QR code upload
+            if 'upi_qr_code' in request.files and request.files['upi_qr_code'].filename != '':
+                qr_file = request.files['upi_qr_code']
+                if qr_file and allowed_file(qr_file.filename):
+                    filename = secure_filename(f"qr_{shop.id}_{qr_file.filename}")
+                    qr_path = os.path.join(current_app.config['UPLOAD_FOLDER'], 'shops', filename)
+                    qr_file.save(qr_path)
+                    shop.upi_qr_code = f"shops/{filename}"
+            
+            # Handle QR code removal if checkbox is checked
+            if 'remove_qr_code' in request.form and request.form['remove_qr_code'] == 'y':
+                if shop.upi_qr_code:
+                    # Delete the old QR code file if it exists
+                    try:
+                        os.remove(os.path.join(current_app.config['UPLOAD_FOLDER'], shop.upi_qr_code))
+                    except OSError:
+                        pass
+                    shop.upi_qr_code = None
+            
+            # Handle file upload if a new logo is provided
+            if 'logo' in request.files and request.files['logo'].filename != '':
+                logo_file = request.files['logo']
+                if logo_file:
+                    # Save the new logo first, so a rejected upload keeps the old one
+                    try:
+                        logo_path = save_image(logo_file, 'shops')
+                    except ImageTooLarge:
+                        raise
+                    except Exception as e:
+                        current_app.logger.error(f"Error saving new logo: {str(e)}")
+                        flash('Error uploading logo. Please try again.', 'error')
+                        return render_template('shop/edit_shop.html', form=form, shop=shop)
+                    
+                    # Release old logo if exists
+                    if shop.logo:
+                        try:
+                            delete_image(shop.logo)
+                        except Exception as e:
+                            current_app.logger.error(f"Error deleting old logo: {str(e)}")
+                    shop.logo = logo_path
+                    flash('Logo updated successfully!', 'success')
+            
+            db.session.commit()
+            flash('Shop updated successfully!', 'success')
+            return redirect(url_for('shop_owner.dashboard'))
+            
+        except ImageTooLarge:
+            raise  # app/errors.py tells the user why
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error updating shop: {str(e)}")
+            flash('An error occurred while updating the shop. Please try again.', 'error')
+    
+    # If form didn't validate or it's a GET request
+    return render_template('shop/edit_shop.html', form=form, shop=shop)
+
+
+@shop_owner.route('/shop/products')
+@login_required
+def products():
+    # Check if user is a shop owner and has shops
+    if current_user.role != 'shopowner' or not hasattr(current_user, 'shops') or not current_user.shops.first():
+        flash('You need to create a shop first to manage products!', 'warning')
+        return redirect(url_for('shop_owner.create_shop'))
+    
+    try:
+        # Get the first shop (assuming one shop per user for now)
+        shop = current_user.shops.first()
+        
+        # Get search and category parameters
+        search = request.args.get('search', '')
+        category = request.args.get('category', '')
+        
+        # Build the base query
+        query = Product.query.filter_by(shop_id=shop.id)
+        
+        # Apply filters if provided
+        if search:
+            query = query.filter(Product.name.ilike(f'%{search}%'))
+        if category:
+            query = query.filter_by(category=category)
+        
+        # Get unique categories for the filter dropdown
+        categories = db.session.query(Product.category).filter_by(shop_id=shop.id).distinct().all()
+        categories = [c[0] for c in categories if c[0]]
+        
+        # Get the filtered products
+        products = query.order_by(Product.created_at.desc()).all()
+        
+        return render_template('shop/products.html', 
+                             products=products, 
+                             categories=categories,
+                             search=search,
+                             current_category=category,
+                             shop=shop)
+    except Exception as e:
+        current_app.logger.error(f"Error in shop_products: {str(e)}")
+        flash('An error occurred while loading products. Please try again.', 'error')
+        return redirect(url_for('main.dashboard'))
+
+
+@shop_owner.route('/shop/product/add', methods=['GET', 'POST'])
+@login_required
+def add_product():
+    if current_user.role != 'shopowner':
+        flash('You need to be a shop owner to add products.', 'warning')
+        return redirect(url_for('main.dashboard'))
+    
+    # Check for shop using the same method as in shop_dashboard
+    shop = current_user.shops.first() if hasattr(current_user, 'shops') else None
+    if not shop:
+        flash('You need to create a shop first before adding products.', 'warning')
+        return redirect(url_for('shop_owner.create_shop'))
+    
+    from forms import ProductForm
+    form = ProductForm()
+    if form.validate_on_submit():
+        image_path = None
+        if form.image.data:
+            image_path = save_image(form.image.data, 'products')
+        
+        product = Product(
+            shop_id=shop.id,
+            name=form.name.data,
+            description=form.description.data,
+            price=form.price.data,
+            stock=form.stock.data,
+            category=form.category.data,
+            image=image_path
+        )
+        
+        db.session.add(product)
+        db.session.commit()
+        
+        flash('Product added successfully!', 'success')
+        return redirect(url_for('shop_owner.products'))
+    
+    return render_template('shop/add_product.html', form=form)
+
+
+@shop_owner.route('/shop/products/import', methods=['GET', 'POST'])
+@login_required
+def import_products():
+    if current_user.role != 'shopowner':
+        flash('You need to be a shop owner to import products.', 'warning')
+        return redirect(url_for('main.dashboard'))
+
+    shop = current_user.shops.first()
+    if not shop:
+        flash('You need to create a shop first before adding products.', 'warning')
+        return redirect(url_for('shop_owner.create_shop'))
+
+    from app.product_import import COLUMNS, ImportFileError, import_products as run_import
+    report = None
+    if request.method == 'POST':
+        file = request.files.get('file')
+        if not file or not file.filename:
+            flash('Choose a CSV or XLSX file to import.', 'warning')
+        else:
+            try:
+                report = run_import(shop.id, file, current_app.config.get('IMPORT_CHUNK_SIZE', 500))
+            except ImportFileError as e:
+                flash(str(e), 'danger')
+            else:
+                flash(f"Imported {report['created']} new and {report['updated']} updated products"
+                      f"{', ' + str(report['failed']) + ' rows skipped' if report['failed'] else ''}.",
+                      'warning' if report['failed'] or report['error'] else 'success')
+
+    return render_template('shop/import_products.html', shop=shop, report=report, columns=COLUMNS)
+
+
+@shop_owner.route('/shop/inventory/api-key', methods=['POST'])
+@login_required
+def inventory_api_key():
+    if current_user.role != 'shopowner':
+        return redirect(url_for('main.dashboard'))
+
+    shop = current_user.shops.first()
+    if not shop:
+        flash('You need to create a shop first.', 'warning')
+        return redirect(url_for('shop_owner.create_shop'))
+
+    from app.inventory import issue_api_key
+    key = issue_api_key(shop)
+    db.session.commit()
+    # Only the hash is stored, so this is the one chance to copy it
+    flash(f'New inventory API key (copy it now, it is not shown again): {key}', 'success')
+    return redirect(url_for('shop_owner.import_products'))
+
+
+@shop_owner.route('/shop/product/edit/<int:product_id>', methods=['GET', 'POST'])
+@login_required
+def edit_product(product_id):
+    if current_user.role != 'shopowner':
+        return redirect(url_for('main.dashboard'))
+    
+    shop = current_user.shops.first()
+    if not shop:
+        flash('You need to create a shop first.', 'warning')
+        return redirect(url_for('shop_owner.create_shop'))
+    
+    product = Product.query.get_or_404(product_id)
+    
+    # Verify the product belongs to the user's shop
+    if product.shop_id != shop.id:
+        flash('Unauthorized access.', 'danger')
+        return redirect(url_for('shop_owner.products'))
+    
+    from forms import ProductForm
+    form = ProductForm(obj=product)
+    
+    if form.validate_on_submit():
+        try:
+            product.name = form.name.data
+            product.description = form.description.data
+            product.price = form.price.data
+            product.stock = form.stock.data
+            product.category = form.category.data
+            
+            # Check if a new image was uploaded
+            if hasattr(form.image.data, 'filename') and form.image.data.filename:
+                # Save the new image first, so a rejected upload keeps the old one
+                try:
+                    image_path = save_image(form.image.data, 'products')
+                except ImageTooLarge:
+                    raise
+                except Exception as e:
+                    current_app.logger.error(f'Error saving new image: {str(e)}')
+                    flash('Error updating product image. Please try again.', 'danger')
+                    return render_template('shop/edit_product.html', form=form, product=product)
+                
+                # Release old image if it exists
+                if product.image:
+                    try:
+                        delete_image(product.image)
+                    except Exception as e:
+                        current_app.logger.error(f'Error deleting old image: {str(e)}')
+                product.image = image_path
+            
+            db.session.commit()
+            flash('Product updated successfully!', 'success')
+            return redirect(url_for('shop_owner.products'))
+            
+        except ImageTooLarge:
+            raise  # app/errors.py tells the user why
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f'Error updating product: {str(e)}')
+            flash('An error occurred while updating the product. Please try again.', 'danger')
+    
+    return render_template('shop/edit_product.html', form=form, product=product)
+
+
+@shop_owner.route('/shop/product/<int:product_id>/delete', methods=['POST'])
+@shop_owner.route('/shop/product/<int:product_id>/delete/', methods=['POST'])  # Handle with or without trailing slash
+@login_required
+def delete_product(product_id):
+    if current_user.role != 'shopowner':
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    
+    shop = current_user.shops.first()
+    if not shop:
+        return jsonify({'success': False, 'message': 'Shop not found'}), 404
+    
+    product = Product.query.get_or_404(product_id)
+    
+    # Verify the product belongs to the user's shop
+    if product.shop_id != shop.id:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    
+    try:
+        # Delete associated order items first (SQLite cascade delete workaround)
+        OrderItem.query.filter_by(product_id=product_id).delete()
+        
+        # Release the product image (shared images are kept for other products)
+        if product.image:
+            try:
+                delete_image(product.image)
+            except Exception as e:
+                current_app.logger.error(f'Error deleting product image: {str(e)}')
+        
+        db.session.delete(product)
+        db.session.commit()
+        
+        return jsonify({'success': True, 'message': 'Product deleted successfully', 'id': product_id})
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'Error deleting product: {str(e)}')
+        return jsonify({'success': False, 'message': 'An error occurred while deleting the product'}), 500
+
+
+@shop_owner.route('/shop/services')
+@login_required
+def services():
+    if current_user.role != 'shopowner':
+        return redirect(url_for('main.dashboard'))
+    
+    shop = current_user.shops.first()
+    if not shop:
+        flash('You need to create a shop first.', 'warning')
+        return redirect(url_for('shop_owner.create_shop'))
+    
+    services = Service.query.filter_by(shop_id=shop.id).all()
+    return render_template('shop/services.html', services=services, shop=shop)
+
+
+@shop_owner.route('/shop/service/add', methods=['GET', 'POST'])
+@login_required
+def add_service():
+    if current_user.role != 'shopowner':
+        return redirect(url_for('main.dashboard'))
+    
+    shop = current_user.shops.first()
+    if not shop:
+        flash('You need to create a shop first.', 'warning')
+        return redirect(url_for('shop_owner.create_shop'))
+    
+    from forms import ServiceForm
+    form = ServiceForm()
+    if form.validate_on_submit():
+        image_path = None
+        if form.image.data:
+            image_path = save_image(form.image.data, 'services')
+        
+        service = Service(
+            shop_id=shop.id,
+            name=form.name.data,
+            description=form.description.data,
+            price=form.price.data,
+            duration=form.duration.data,
+            category=form.category.data,
+            image=image_path
+        )
+        
+        db.session.add(service)
+        db.session.commit()
+        
+        flash('Service added successfully!', 'success')
+        return redirect(url_for('shop_owner.services'))
+    
+    return render_template('shop/add_service.html', form=form)
+
+
+@shop_owner.route('/shop/service/edit/<int:service_id>', methods=['GET', 'POST'])
+@login_required
+def edit_service(service_id):
+    if current_user.role != 'shopowner':
+        return redirect(url_for('main.dashboard'))
+    
+    service = Service.query.get_or_404(service_id)
+    
+    if service.shop.owner_id != current_user.id:
+        flash('Unauthorized access.', 'danger')
+        return redirect(url_for('shop_owner.services'))
+    
+    from forms import ServiceForm
+    form = ServiceForm(obj=service)
+    if form.validate_on_submit():
+        service.name = form.name.data
+        service.description = form.description.data
+        service.price = form.price.data
+        service.duration = form.duration.data
+        service.category = form.category.data
+        
+        if form.image.data:
+            # Save first: a rejected upload (ImageTooLarge) keeps the old image
+            image_path = save_image(form.image.data, 'services')
+            if service.image:
+                delete_image(service.image)
+            service.image = image_path
+        
+        db.session.commit()
+        flash('Service updated successfully!', 'success')
+        return redirect(url_for('shop_owner.services'))
+    
+    return render_template('shop/edit_service.html', form=form, service=service)
+
+
+@shop_owner.route('/shop/service/delete/<int:service_id>', methods=['POST'])
+@login_required
+def delete_service(service_id):
+    if current_user.role != 'shopowner':
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    
+    service = Service.query.get_or_404(service_id)
+    
+    if service.shop.owner_id != current_user.id:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    
+    try:
+        # Delete associated service order items first (SQLite cascade delete workaround)
+        ServiceOrderItem.query.filter_by(service_id=service_id).delete()
+        
+        if service.image:
+            delete_image(service.image)
+        
+        db.session.delete(service)
+        db.session.commit()
+        
+        return jsonify({'success': True, 'message': 'Service deleted', 'id': service_id})
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'Error deleting service: {str(e)}')
+        return jsonify({'success': False, 'message': 'An error occurred while deleting the service'}), 500
+
+
+@shop_owner.route('/shop/orders')
+@login_required
+def orders():
+    if current_user.role != 'shopowner':
+        return redirect(url_for('main.dashboard'))
+    
+    shop = current_user.shops.first()
+    if not shop:
+        flash('You need to create a shop first.', 'warning')
+        return redirect(url_for('shop_owner.create_shop'))
+    
+    order_items = OrderItem.query.filter_by(shop_id=shop.id).order_by(OrderItem.id.desc()).all()
+    return render_template('shop/orders.html', order_items=order_items, shop=shop)
+
+
+@shop_owner.route('/shop/orders/export')
+@login_required
+@replica_read
+def export_orders():
+    if current_user.role != 'shopowner':
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    
+    shop = current_user.shops.first()
+    if not shop:
+        return jsonify({'success': False, 'message': 'You need to create a shop first.'}), 404
+    
+    from app.order_export import SHOP_COLUMNS, export_name, export_response, parse_filters, shop_items_query
+    try:
+        filters = parse_filters(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return export_response(shop_items_query(shop.id, filters), SHOP_COLUMNS, filters,
+                           export_name(f'shop-{shop.id}-orders', filters))
+
+
+@shop_owner.route('/shop/order/update-status/<int:order_id>', methods=['POST'])
+@login_required
+def update_order_status(order_id):
+    if current_user.role != 'shopowner':
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    
+    order = Order.query.get_or_404(order_id)
+    status = request.json.get('status')
+    
+    if status not in ['pending', 'confirmed', 'processing', 'shipped', 'delivered', 'cancelled']:
+        return jsonify({'success': False, 'message': 'Invalid status'}), 400
+    
+    order.status = status
+    db.session.commit()
+    
+    # Notify customer
+    create_notification(
+        order.customer_id,
+        f'Your order #{order.order_number} status updated to: {status}'
+    )
+    
+    return jsonify({'success': True, 'message': 'Order status updated'})
@@ -0,0 +1,107 @@
+"""
+Weekly opening hours for the SHOP_SERV application.
+
+A shop's schedule is stored in ``shop_hours`` as minute-of-week intervals,
+``opens_at <= m < closes_at`` with Monday 00:00 as minute 0, in SHOP_TIMEZONE
+local time. Hours past midnight (22:00-02:00) are one interval; only hours
+running from Sunday into Monday are split at the end of the week. Intervals
+are also cut at MAX_SPAN minutes, so "open at minute m" only has to look at
+intervals that opened in the MAX_SPAN minutes up to m: one range scan of
+``ix_shop_hours_interval``.
+
+``set_daily_hours()`` writes a schedule from the shop form; ``open_at()`` is
+the listing filter and ``with_is_open()`` the query option that loads
+``Shop.is_open`` in the same SELECT. A shop with no rows has unknown hours:
+``is_open`` is None and the open-now filter leaves it out.
+"""
+from datetime import datetime, timezone
+
+from flask import current_app
+
+from app.models.models import db, Shop, ShopHours
+
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+MAX_SPAN = MINUTES_PER_DAY
+
+
+def local_now():
+    """The current wall-clock time where the shops are, as a naive datetime."""
+    from zoneinfo import ZoneInfo
+    return datetime.now(timezone.utc).astimezone(ZoneInfo(current_app.config['SHOP_TIMEZONE'])).replace(tzinfo=None)
+
+
+def minute_of_week(moment):
+    return moment.weekday() * MINUTES_PER_DAY + moment.hour * 60 + moment.minute
+
+
+def weekly_intervals(spans):
+    """``[(weekday, opens, closes)]`` (``datetime.time``s) as sorted ``[(opens_at, closes_at)]`` rows.
+
+    ``closes`` at or before ``opens`` means the next day, so 22:00-02:00 is
+    open overnight and 09:00-09:00 is open 24 hours. Overlapping or touching
+    spans are merged before the cuts at the end of the week and at MAX_SPAN.
+    """
+    pieces = []
+    for weekday, opens, closes in spans:
+        opens, closes = opens.hour * 60 + opens.minute, closes.hour * 60 + closes.minute
+        start = weekday * MINUTES_PER_DAY + opens
+        end = start + ((closes - opens) % MINUTES_PER_DAY or MINUTES_PER_DAY)
+        if end > MINUTES_PER_WEEK:
+            pieces += [(start, MINUTES_PER_WEEK), (0, end - MINUTES_PER_WEEK)]
+        else:
+            pieces.append((start, end))
+
+    merged = []
+    for start, end in sorted(pieces):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(cut, min(cut + MAX_SPAN, end)) for start, end in merged for cut in range(start, end, MAX_SPAN)]
+
+
+def set_schedule(shop, spans):
+    """Replace ``shop``'s weekly schedule (see ``weekly_intervals()``). The caller commits."""
+    ShopHours.query.filter_by(shop_id=shop.id).delete(synchronize_session=False)
+    db.session.add_all(ShopHours(shop_id=shop.id, opens_at=opens_at, closes_at=closes_at)
+                       for opens_at, closes_at in weekly_intervals(spans))
+
+
+def set_daily_hours(shop, opening_time, closing_time, closed_days=()):
+    """The same hours every day except ``closed_days`` (weekday numbers, Monday = 0)."""
+    closed = set(closed_days)
+    set_schedule(shop, [(day, opening_time, closing_time) for day in range(7) if day not in closed])
+
+
+def closed_days(shop):
+    """Weekdays on which ``shop`` does not open at its ``opening_time``, for the shop form."""
+    if shop.opening_time is None:
+        return []
+    minute = shop.opening_time.hour * 60 + shop.opening_time.minute
+    rows = ShopHours.query.filter_by(shop_id=shop.id).with_entities(ShopHours.opens_at, ShopHours.closes_at).all()
+    return [day for day in range(7)
+            if not any(opens_at <= day * MINUTES_PER_DAY + minute < closes_at for opens_at, closes_at in rows)]
+
+
+def _covers(minute):
+    return db.and_(ShopHours.opens_at <= minute, ShopHours.opens_at > minute - MAX_SPAN, ShopHours.closes_at > minute)
+
+
+def open_at(moment=None):
+    """Filter for shops open at ``moment`` (local time, default now)."""
+    minute = minute_of_week(moment or local_now())
+    return Shop.id.in_(db.select(ShopHours.shop_id).where(_covers(minute)))
+
+
+def with_is_open(moment=None):
+    """Query option setting ``Shop.is_open`` for ``moment`` (local time, default now).
+
+    A shop without any ``shop_hours`` rows gets None: its hours are unknown,
+    and the templates show no open/closed badge for it.
+    """
+    minute = minute_of_week(moment or local_now())
+    has_hours = db.exists().where(ShopHours.shop_id == Shop.id)
+    return db.with_expression(Shop.is_open, db.case(
+        (has_hours, db.exists().where(ShopHours.shop_id == Shop.id, _covers(minute))), else_=db.null()))
@@ -0,0 +1,63 @@
+"""
+SQLite performance profile for the SHOP_SERV application.
+
+With the stock settings every gunicorn worker opens ``shopserv.db`` in
+rollback-journal mode with ``synchronous=FULL``. Readers and the single
+writer block each other, each commit costs several fsyncs, and concurrent
+requests fail with "database is locked". ``init_app()`` attaches a
+``connect`` listener to every SQLite engine that applies ``SQLITE_PRAGMAS``
+to each new connection:
+
+    journal_mode=WAL      readers no longer block the writer, or the reverse
+    synchronous=NORMAL    no fsync per commit in WAL mode; still crash-safe
+    mmap_size             reads served from the page cache without copies
+    cache_size            per-connection page cache (negative = KiB)
+    busy_timeout          wait for the write lock instead of failing
+    temp_store=MEMORY     sorts and temp indexes stay off disk
+
+With ``SQLITE_BEGIN_IMMEDIATE`` the implicit ``BEGIN`` that pysqlite emits
+before the first INSERT/UPDATE/DELETE becomes ``BEGIN IMMEDIATE``. The
+write lock is then taken up front and waits under ``busy_timeout``. It is
+never upgraded mid-transaction, where SQLite fails immediately instead of
+waiting. Plain SELECTs still start no transaction, so readers are not
+serialized.
+"""
+from sqlalchemy import event
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64000,
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+
+
+def apply_profile(engine, pragmas=None, begin_immediate=True):
+    """Apply ``pragmas`` to every new connection of a SQLite ``engine``."""
+    if engine.dialect.name != 'sqlite':
+        return False
+    pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+        if begin_immediate:
+            dbapi_connection.isolation_level = 'IMMEDIATE'
+
+    return True
+
+
+def init_app(app, db):
+    """Tune every SQLite engine Flask-SQLAlchemy created for ``app``."""
+    pragmas = app.config.get('SQLITE_PRAGMAS', DEFAULT_PRAGMAS)
+    begin_immediate = app.config.get('SQLITE_BEGIN_IMMEDIATE', True)
+    with app.app_context():
+        for engine in db.engines.values():
+            apply_profile(engine, pragmas, begin_immediate)
@@ -0,0 +1,190 @@
+"""
+Fingerprinted static assets for the SHOP_SERV application.
+
+``style.css`` and ``main.js`` used to be served with Flask's default caching,
+so every page view revalidated them. ``build_manifest()`` copies each file
+under ``static/`` (except uploads) to a content-hashed name and writes
+precompressed siblings for text assets:
+
+    static/dist/css/style.3f2a1b9c0d4e.css
+    static/dist/css/style.3f2a1b9c0d4e.css.gz
+    static/dist/css/style.3f2a1b9c0d4e.css.br    (when Brotli is installed)
+    static/dist/manifest.json
+
+Once ``init_app()`` has run, ``url_for('static', filename='css/style.css')``
+returns the hashed URL, so templates do not change. Hashed files are served
+with ``Cache-Control: public, max-age=31536000, immutable``. The smallest
+encoding the client accepts is sent with a matching ``Content-Encoding``
+and ``Vary: Accept-Encoding``. A changed file gets a new name, so a stale
+copy can never be served.
+
+Each worker builds the manifest on first use unless
+``STATIC_BUILD_ON_STARTUP`` is off. In that case run ``build_static.py`` as
+a deploy step instead.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+
+from flask import current_app, request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # optional; only gzip siblings are written without it
+    brotli = None
+
+OUTPUT_FOLDER = 'dist'
+MANIFEST_NAME = 'manifest.json'
+EXCLUDED_FOLDERS = {'uploads', OUTPUT_FOLDER}
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.svg', '.json', '.txt', '.map', '.html', '.xml'}
+HASH_LENGTH = 12
+
+_manifest_lock = threading.Lock()
+
+# Preference order when the client accepts several
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=11) if brotli else None
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _write(path, data):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _iter_assets(static_folder):
+    for dirpath, dirnames, filenames in os.walk(static_folder):
+        if dirpath == static_folder:
+            dirnames[:] = [d for d in dirnames if d not in EXCLUDED_FOLDERS]
+        for filename in sorted(filenames):
+            if filename.startswith('.'):
+                continue
+            full_path = os.path.join(dirpath, filename)
+            yield os.path.relpath(full_path, static_folder).replace(os.sep, '/'), full_path
+
+
+def build_manifest(static_folder, report=None):
+    """Hash, copy and precompress every static asset; write and return the manifest.
+
+    Files whose hashed copy already exists are not rewritten, so running this
+    on every startup only costs one read and hash per asset.
+    """
+    output_root = os.path.join(static_folder, OUTPUT_FOLDER)
+    files = {}
+    for relative_path, full_path in _iter_assets(static_folder):
+        with open(full_path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+        root, ext = os.path.splitext(relative_path)
+        hashed_path = f'{OUTPUT_FOLDER}/{root}.{digest}{ext}'
+        hashed_file = os.path.join(static_folder, hashed_path)
+        os.makedirs(os.path.dirname(hashed_file), exist_ok=True)
+        if not os.path.exists(hashed_file):
+            _write(hashed_file, data)
+
+        encodings = []
+        if ext.lower() in COMPRESSIBLE_EXTENSIONS:
+            for encoding, suffix in ENCODINGS:
+                if os.path.exists(hashed_file + suffix):
+                    encodings.append(encoding)
+                    continue
+                compressed = _compress(data, encoding)
+                # Not worth a sibling if it does not save anything
+                if compressed is not None and len(compressed) < len(data):
+                    _write(hashed_file + suffix, compressed)
+                    encodings.append(encoding)
+
+        files[relative_path] = {'path': hashed_path, 'encodings': encodings}
+        if report:
+            report(f"{relative_path} -> {hashed_path} {' '.join(encodings)}".rstrip())
+
+    os.makedirs(output_root, exist_ok=True)
+    _write(os.path.join(output_root, MANIFEST_NAME), json.dumps({'files': files}, indent=2).encode())
+    return files
+
+
+def load_manifest(static_folder):
+    """Return the manifest written by ``build_manifest()``, or None if there is none."""
+    try:
+        with open(os.path.join(static_folder, OUTPUT_FOLDER, MANIFEST_NAME)) as f:
+            return json.load(f)['files']
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _send_hashed(filename, entry):
+    app = current_app
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    for encoding, suffix in ENCODINGS:
+        if encoding in entry['encodings'] and request.accept_encodings.quality(encoding) > 0:
+            served_name, content_encoding = filename + suffix, encoding
+            break
+    else:
+        served_name, content_encoding = filename, None
+
+    response = send_from_directory(app.static_folder, served_name, mimetype=mimetype,
+                                   max_age=app.config.get('STATIC_IMMUTABLE_MAX_AGE', 31536000))
+    if content_encoding:
+        response.headers['Content-Encoding'] = content_encoding
+    if entry['encodings']:
+        response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def get_manifest(app):
+    """Return ``{logical path: entry}`` for ``app``, building or loading it on first use.
+
+    Deferred to the first ``url_for('static')`` so importing the app does no
+    file I/O.
+    """
+    state = app.extensions['static_manifest']
+    if 'files' not in state:
+        with _manifest_lock:
+            if 'files' not in state:
+                if app.config.get('STATIC_BUILD_ON_STARTUP', True):
+                    files = build_manifest(app.static_folder)
+                else:
+                    files = load_manifest(app.static_folder)
+                    if files is None:
+                        app.logger.warning("No static manifest found; run build_static.py. "
+                                           "Serving unhashed assets.")
+                        files = {}
+                state['hashed'] = {entry['path']: entry for entry in files.values()}
+                state['files'] = files
+    return state['files']
+
+
+def init_app(app):
+    """Route static URLs through the manifest."""
+    if not app.config.get('STATIC_FINGERPRINT', True) or not app.static_folder:
+        return
+    app.extensions['static_manifest'] = {}
+
+    @app.url_defaults
+    def hashed_static_url(endpoint, values):
+        if endpoint == 'static':
+            entry = get_manifest(app).get(values.get('filename'))
+            if entry is not None:
+                values['filename'] = entry['path']
+
+    send_static = app.view_functions['static']
+
+    def static(filename):
+        get_manifest(app)
+        entry = app.extensions['static_manifest']['hashed'].get(filename)
+        if entry is None:
+            return send_static(filename=filename)
+        return _send_hashed(filename, entry)
+
+    app.view_functions['static'] = static
@@ -0,0 +1,167 @@
+"""
+Garbage collection of orphaned uploads for the SHOP_SERV application.
+
+Files under ``static/uploads`` are only ever added: replaced logos, failed
+requests and payment proofs all leave files behind. ``collect_garbage()``
+walks the upload tree with ``os.scandir`` and checks files against the
+Product/Service/Shop/Order image columns in fixed-size batches, so memory
+stays bounded no matter how many files or rows there are.
+
+* Responsive variants (``abc_320w.webp``, ``abc.variants.json``) belong to
+  their original and are kept or removed with it.
+* Files younger than the grace period are never touched, which protects
+  uploads whose row has not been committed yet.
+* Anything left in ``IMAGE_STAGING_FOLDER`` past the grace period is a job
+  that never ran and is removed as well.
+
+Run it through ``cleanup_uploads.py``; it is a dry run unless asked to delete.
+"""
+import os
+import re
+import time
+
+VARIANT_SUFFIX = re.compile(r'_\d+w$')
+MANIFEST_SUFFIX = '.variants.json'
+IGNORED_FILES = {'.gitkeep'}
+
+
+def iter_files(root):
+    """Yield ``(relative_path, DirEntry)`` for every file below ``root``."""
+    stack = ['']
+    while stack:
+        relative_dir = stack.pop()
+        try:
+            entries = os.scandir(os.path.join(root, relative_dir))
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                relative_path = f'{relative_dir}/{entry.name}' if relative_dir else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(relative_path)
+                elif entry.is_file(follow_symlinks=False) and entry.name not in IGNORED_FILES:
+                    yield relative_path, entry
+
+
+def owner_candidates(relative_path, extensions):
+    """Paths a database column would hold if it referenced this file."""
+    folder, name = os.path.split(relative_path)
+    if name.endswith(MANIFEST_SUFFIX):
+        root = name[:-len(MANIFEST_SUFFIX)]
+    else:
+        root, _ = os.path.splitext(name)
+        if not VARIANT_SUFFIX.search(root):
+            return [relative_path]
+        root = VARIANT_SUFFIX.sub('', root)
+
+    prefix = f'{folder}/{root}' if folder else root
+    return [f'{prefix}.{ext}' for ext in extensions] + [f'{prefix}.{ext.upper()}' for ext in extensions]
+
+
+def reference_columns():
+    """Return ``(columns, skipped_folders)`` for paths relative to UPLOAD_FOLDER.
+
+    A folder whose only referencing column does not exist in this schema
+    (``payments/`` without ``orders.payment_proof``) cannot be checked, so it
+    is skipped rather than treated as entirely orphaned.
+    """
+    from app.models.models import Product, Service, Shop, Order
+
+    references = [(Product, 'image', None), (Service, 'image', None), (Shop, 'logo', None),
+                  (Shop, 'upi_qr_code', None), (Order, 'payment_proof', 'payments')]
+    columns, skipped_folders = [], []
+    for model, name, folder in references:
+        if name in model.__table__.columns:
+            columns.append(getattr(model, name))
+        elif folder:
+            skipped_folders.append(folder)
+    return columns, skipped_folders
+
+
+def _referenced(paths, columns):
+    from app.models.models import db
+
+    found = set()
+    for column in columns:
+        found.update(
+            value for (value,) in db.session.query(column).filter(column.in_(paths)).distinct()
+        )
+    return found
+
+
+def _remove(full_path, stats):
+    try:
+        os.remove(full_path)
+        stats['deleted'] += 1
+    except OSError as e:
+        stats['errors'] += 1
+        stats['error_messages'].append(f'{full_path}: {e}')
+
+
+def _process_batch(batch, upload_folder, columns, extensions, dry_run, report, stats):
+    from app.models.models import db, ImageRef
+
+    owners = {path: owner_candidates(path, extensions) for path, _ in batch}
+    all_candidates = sorted({candidate for candidates in owners.values() for candidate in candidates})
+    referenced = _referenced(all_candidates, columns)
+
+    orphaned_originals = []
+    for path, entry in batch:
+        if referenced.intersection(owners[path]):
+            continue
+        size = entry.stat(follow_symlinks=False).st_size
+        stats['orphans'] += 1
+        stats['bytes'] += size
+        report(f"{'would delete' if dry_run else 'deleting'} {path} ({size} bytes)")
+        if owners[path] == [path]:
+            orphaned_originals.append(path)
+        if not dry_run:
+            _remove(os.path.join(upload_folder, path), stats)
+
+    if orphaned_originals and not dry_run:
+        ImageRef.query.filter(ImageRef.image_path.in_(orphaned_originals)).delete(synchronize_session=False)
+        db.session.commit()
+
+
+def collect_garbage(upload_folder, staging_folder=None, extensions=('png', 'jpg', 'jpeg', 'gif', 'webp'),
+                    grace_seconds=24 * 3600, batch_size=500, dry_run=True, report=print):
+    """Find (and unless ``dry_run``, delete) uploads no row refers to.
+
+    Must run inside an application context. Returns a dict of counters.
+    """
+    stats = {'scanned': 0, 'skipped_recent': 0, 'orphans': 0, 'bytes': 0,
+             'deleted': 0, 'errors': 0, 'error_messages': []}
+    cutoff = time.time() - grace_seconds
+    columns, skipped_folders = reference_columns()
+    for folder in skipped_folders:
+        report(f"skipping {folder}/: no column references it in this schema")
+
+    batch = []
+    for path, entry in iter_files(upload_folder):
+        if path.split('/', 1)[0] in skipped_folders:
+            continue
+        stats['scanned'] += 1
+        if entry.stat(follow_symlinks=False).st_mtime > cutoff:
+            stats['skipped_recent'] += 1
+            continue
+        batch.append((path, entry))
+        if len(batch) >= batch_size:
+            _process_batch(batch, upload_folder, columns, extensions, dry_run, report, stats)
+            batch = []
+    if batch:
+        _process_batch(batch, upload_folder, columns, extensions, dry_run, report, stats)
+
+    if staging_folder:
+        for path, entry in iter_files(staging_folder):
+            stats['scanned'] += 1
+            stat = entry.stat(follow_symlinks=False)
+            if stat.st_mtime > cutoff:
+                stats['skipped_recent'] += 1
+                continue
+            stats['orphans'] += 1
+            stats['bytes'] += stat.st_size
+            report(f"{'would delete' if dry_run else 'deleting'} staged upload {path} ({stat.st_size} bytes)")
+            if not dry_run:
+                _remove(entry.path, stats)
+
+    return stats
@@ -0,0 +1,131 @@
+"""
+Per-process user cache for Flask-Login's user_loader.
+
+Loading the logged-in user used to cost one query on every authenticated
+request. The loader now keeps a small TTL/LRU cache of plain column values
+and hands Flask-Login a ``UserSnapshot`` built from them. Anything that is
+not part of the snapshot (relationships such as ``shops``, or methods like
+``check_password``) transparently loads the real ``User`` row on first use.
+
+The cache lives in each worker process, so a change made in one worker is
+seen by the others after at most ``USER_CACHE_TTL`` seconds. Views that
+modify a user must call ``invalidate_user()`` after committing.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from flask_login import UserMixin
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class UserSnapshot(UserMixin):
+    """Detached, read-only view of a ``User`` row."""
+
+    FIELDS = ('id', 'email', 'full_name', 'phone', 'role', 'is_active', 'created_at')
+
+    def __init__(self, values):
+        self.__dict__.update(values)
+        self.__dict__['_user'] = None
+
+    @classmethod
+    def values_from(cls, user):
+        return {field: getattr(user, field) for field in cls.FIELDS}
+
+    @property
+    def is_active(self):
+        return self.__dict__['is_active']
+
+    def model(self):
+        """Return the real ``User`` row, loading it once per request."""
+        if self.__dict__['_user'] is None:
+            from app.models.models import db, User
+            self.__dict__['_user'] = db.session.get(User, self.id)
+        return self.__dict__['_user']
+
+    def __getattr__(self, name):
+        # Only reached for attributes that are not part of the snapshot
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.model(), name)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(
+            f"UserSnapshot is read-only; update current_user.model().{name} and call invalidate_user()"
+        )
+
+    def __repr__(self):
+        return f"<User {self.email}>"
+
+
+def _get_cache(app=None):
+    app = app or current_app._get_current_object()
+    cache = app.extensions.get('user_cache')
+    if cache is None:
+        cache = TTLCache(
+            maxsize=app.config.get('USER_CACHE_SIZE', 1024),
+            ttl=app.config.get('USER_CACHE_TTL', 60)
+        )
+        app.extensions['user_cache'] = cache
+    return cache
+
+
+def load_cached_user(user_id):
+    """user_loader implementation: serve from cache, fall back to the DB."""
+    from app.models.models import db, User
+
+    user_id = int(user_id)
+    cache = _get_cache()
+    values = cache.get(user_id)
+    if values is None:
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        values = UserSnapshot.values_from(user)
+        cache.set(user_id, values)
+    return UserSnapshot(values)
+
+
+def invalidate_user(user_id):
+    """Drop ``user_id`` from this process's cache after it was modified."""
+    _get_cache().pop(int(user_id))
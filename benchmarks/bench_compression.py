@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark bytes on the wire and CPU cost of response compression.
+
+Renders typical pages (/shops, /products, /admin/orders and /checkout with
+a filled cart) from an in-memory database with seeded data, then compresses
+each body with several gzip levels and Brotli qualities. The last table
+times whole requests through app/compression.py at the configured settings.
+
+Usage:
+    python benchmarks/bench_compression.py [--shops 40] [--products 300] [--orders 300]
+"""
+import argparse
+import gzip
+import importlib.util
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ['RATELIMIT_ENABLED'] = 'false'
+
+from app.compression import brotli
+
+SETTINGS = [('gzip', 1), ('gzip', 6), ('gzip', 9), ('br', 1), ('br', 4), ('br', 5), ('br', 11)]
+
+
+def load_app():
+    spec = importlib.util.spec_from_file_location('app_module', os.path.join(ROOT, 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.app.config.update(WTF_CSRF_ENABLED=False)
+    return module.app
+
+
+def seed(app, shops, products, orders):
+    from app.models.models import db, User, Shop, Product, CartItem, Order, OrderItem
+
+    with app.app_context():
+        db.create_all()
+        admin = User(email='admin@example.com', full_name='Admin', role='admin')
+        customer = User(email='customer@example.com', full_name='Customer Name', role='customer')
+        for user in (admin, customer):
+            user.set_password('password123')
+            db.session.add(user)
+        db.session.flush()
+
+        shop_rows = []
+        for i in range(shops):
+            owner = User(email=f'owner{i}@example.com', full_name=f'Owner {i}', role='shopowner')
+            owner.set_password('password123')
+            db.session.add(owner)
+            db.session.flush()
+            shop = Shop(owner_id=owner.id, name=f'Shop number {i}', description='Fresh goods every day ' * 3,
+                        city='Pune', address=f'{i} Market Road', service_type='Bakery')
+            db.session.add(shop)
+            shop_rows.append(shop)
+        db.session.flush()
+
+        product_rows = []
+        for i in range(products):
+            product = Product(shop_id=shop_rows[i % shops].id, name=f'Product {i}',
+                              description='A tasty, freshly made item. ' * 4, price=10 + i % 90,
+                              stock=50, category=('Bread', 'Cakes', 'Snacks')[i % 3])
+            db.session.add(product)
+            product_rows.append(product)
+        db.session.flush()
+
+        for product in product_rows[:8]:
+            db.session.add(CartItem(customer_id=customer.id, product_id=product.id, quantity=2))
+        for i in range(orders):
+            product = product_rows[i % products]
+            order = Order(order_number=f'ORD{i:08d}', customer_id=customer.id, total_amount=product.price * 2,
+                          shipping_address='221B Baker Street, Pune 411001', shipping_phone='9876543210')
+            db.session.add(order)
+            db.session.flush()
+            db.session.add(OrderItem(order_id=order.id, product_id=product.id, shop_id=product.shop_id,
+                                     quantity=2, price=product.price))
+        db.session.commit()
+
+
+def fetch_bodies(app):
+    bodies = {}
+    for email, pages in (('admin@example.com', ['/shops', '/products', '/admin/orders']),
+                         ('customer@example.com', ['/checkout'])):
+        client = app.test_client()
+        client.post('/login', data={'email': email, 'password': 'password123'})
+        for page in pages:
+            response = client.get(page, headers={'Accept-Encoding': 'identity'})
+            assert response.status_code == 200, (page, response.status_code)
+            bodies[f'{page} ({response.mimetype})'] = response.data
+    return bodies
+
+
+def compress(data, algorithm, level):
+    if algorithm == 'br':
+        return brotli.compress(data, quality=level)
+    return gzip.compress(data, compresslevel=level)
+
+
+def cpu_ms(func, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        result = func()
+    return (time.process_time() - start) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--shops', type=int, default=40)
+    parser.add_argument('--products', type=int, default=300)
+    parser.add_argument('--orders', type=int, default=300)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    app = load_app()
+    seed(app, args.shops, args.products, args.orders)
+    bodies = fetch_bodies(app)
+    settings = [s for s in SETTINGS if s[0] == 'gzip' or brotli is not None]
+
+    for name, data in bodies.items():
+        print(f"\n{name}: {len(data) / 1024:.1f} KB uncompressed")
+        for algorithm, level in settings:
+            ms, out = cpu_ms(lambda: compress(data, algorithm, level), args.repeat)
+            print(f"  {algorithm:<4} {level:>2}  {len(out) / 1024:7.1f} KB  "
+                  f"{len(data) / len(out):5.1f}x  {ms:6.2f} ms CPU")
+
+    print(f"\nWhole request, configured settings (gzip {app.config['COMPRESS_GZIP_LEVEL']}, "
+          f"br {app.config['COMPRESS_BROTLI_QUALITY']})")
+    client = app.test_client()
+    client.post('/login', data={'email': 'admin@example.com', 'password': 'password123'})
+    for page in ('/shops', '/admin/orders'):
+        for accept in ('identity', 'gzip', 'br'):
+            if accept == 'br' and brotli is None:
+                continue
+            ms, response = cpu_ms(lambda: client.get(page, headers={'Accept-Encoding': accept}), args.repeat)
+            print(f"  {page:<14} {accept:<9} {len(response.data) / 1024:7.1f} KB  {ms:6.2f} ms CPU")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark peak memory and time of processing one large upload.
+
+Each run happens in a freshly spawned process and reports its peak resident
+set size (``VmHWM``, falling back to ``ru_maxrss`` off Linux), so the number
+reflects that single upload. The "full" path decodes the image at its
+stored resolution before thumbnailing, as save_image used to; the "bounded"
+path is app.image_pipeline.process_image, which uses JPEG draft decoding and
+rejects images over the pixel budget before decoding them.
+
+Usage:
+    python benchmarks/bench_image_decode.py [--width 6000] [--height 4000]
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+from app.image_pipeline import MAX_IMAGE_PIXELS, MAX_IMAGE_SIZE, ImageTooLarge, process_image
+
+
+def make_source(path, width, height):
+    # Gradient plus noise so the encoders cannot cheat with flat colour
+    gradient = Image.linear_gradient('L').resize((width, height))
+    noise = Image.effect_noise((width, height), 64)
+    Image.merge('RGB', (gradient, noise, gradient.transpose(Image.Transpose.FLIP_LEFT_RIGHT))).save(path)
+
+
+def full_decode(source, target):
+    img = Image.open(source)
+    img.load()
+    if img.mode in ('RGBA', 'LA', 'P'):
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
+        img = background
+    img.thumbnail(MAX_IMAGE_SIZE, Image.Resampling.LANCZOS, reducing_gap=None)
+    img.save(target, quality=85, optimize=True)
+
+
+def bounded_decode(source, target):
+    process_image(source, target, MAX_IMAGE_SIZE, variants=False, max_pixels=MAX_IMAGE_PIXELS)
+
+
+def peak_rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # KiB on Linux, bytes on macOS; only reached off Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024)
+
+
+def _measure(mode, source, target, queue):
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    try:
+        (full_decode if mode == 'full' else bounded_decode)(source, target)
+        outcome = 'ok'
+    except ImageTooLarge:
+        outcome = 'rejected'
+    elapsed = time.perf_counter() - start
+    peak = peak_rss_mb()
+    queue.put((outcome, elapsed, peak, peak - baseline))
+
+
+def measure(mode, source, target):
+    # spawn, not fork: a forked child starts with the parent's pages
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_measure, args=(mode, source, target, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--width', type=int, default=6000)
+    parser.add_argument('--height', type=int, default=4000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Processing one {args.width}x{args.height} upload "
+              f"(budget {MAX_IMAGE_PIXELS / 1e6:.0f} MP)")
+        print(f"  {'source':<6} {'path':<8} {'result':<9} {'time':>8} {'peak RSS':>10} {'growth':>9}")
+        for fmt in ('jpg', 'png'):
+            source = os.path.join(tmp, f'source.{fmt}')
+            make_source(source, args.width, args.height)
+            for mode in ('full', 'bounded'):
+                outcome, elapsed, peak, growth = measure(mode, source, os.path.join(tmp, f'out_{mode}.jpg'))
+                print(f"  {fmt:<6} {mode:<8} {outcome:<9} {elapsed * 1000:6.0f}ms "
+                      f"{peak:8.0f}MB {growth:7.0f}MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Measure how long importing app.py takes and which modules it pulls in.
+
+Each run starts a fresh interpreter with ``python -X importtime`` and loads
+app.py the way gunicorn and the scripts do, against an in-memory database,
+so nothing is cached between runs. It reports the median total import time,
+the heaviest top-level packages, and whether any dependency that should
+load on first use (Stripe, qrcode, Pillow, requests, smtplib, forms,
+Flask-Migrate) was imported eagerly.
+
+Usage:
+    python benchmarks/bench_import_time.py [--runs 5] [--top 15]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules most requests never touch; they must load on first use
+LAZY_MODULES = ('stripe', 'qrcode', 'PIL', 'requests', 'smtplib', 'forms',
+                'flask_migrate', 'alembic')
+
+IMPORT_APP = f"""
+import importlib.util, sys
+sys.path.insert(0, {ROOT!r})
+spec = importlib.util.spec_from_file_location('app_module', {os.path.join(ROOT, 'app.py')!r})
+spec.loader.exec_module(importlib.util.module_from_spec(spec))
+print(' '.join(sorted(m for m in {LAZY_MODULES!r} if m in sys.modules)))
+"""
+
+
+def import_app():
+    """Import app.py in a fresh interpreter; return (per-module timings, eager lazy modules)."""
+    env = dict(os.environ, DATABASE_URL='sqlite://')
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', IMPORT_APP],
+                            cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    timings = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        timings.append((name.rstrip(), int(self_us), int(cumulative_us)))
+    return timings, result.stdout.split()
+
+
+def total_ms(timings):
+    return sum(self_us for _, self_us, _ in timings) / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help='top-level packages to list')
+    args = parser.parse_args()
+
+    runs = [import_app() for _ in range(args.runs)]
+    totals = [total_ms(timings) for timings, _ in runs]
+    timings, eager = runs[-1]
+
+    by_package = defaultdict(int)
+    for name, self_us, _ in timings:
+        by_package[name.strip().split('.')[0]] += self_us
+
+    print(f"Import time over {args.runs} runs: median {statistics.median(totals):.0f} ms, "
+          f"min {min(totals):.0f} ms, max {max(totals):.0f} ms ({len(timings)} modules)")
+    print("\nHeaviest top-level packages (self time, last run):")
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {package:<28} {self_us / 1000:7.1f} ms")
+
+    if eager:
+        print(f"\n❌ Imported eagerly: {', '.join(eager)}")
+        return 1
+    print(f"\n✓ None of {', '.join(LAZY_MODULES)} imported at startup")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark the per-request overhead of the rate-limit storage backends.
+
+Compares Flask-Limiter's per-process memory:// storage with the shared
+sqlite:// storage from app/ratelimit_storage.py, first at the storage level
+(one fixed-window hit per "request") and then from several processes hitting
+the same key to confirm the counter is shared.
+
+Usage:
+    python benchmarks/bench_ratelimit.py [--hits 20000] [--workers 4]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter
+
+from app import ratelimit_storage  # noqa: F401  registers sqlite://
+
+LIMIT = parse('1000000 per hour')
+
+
+def time_hits(uri, hits, distinct_keys):
+    limiter = FixedWindowRateLimiter(storage_from_string(uri))
+    start = time.perf_counter()
+    for i in range(hits):
+        limiter.hit(LIMIT, 'bench', f'10.0.{(i % distinct_keys) // 256}.{i % 256}')
+    elapsed = time.perf_counter() - start
+    return elapsed / hits * 1e6
+
+
+def _worker(uri, hits):
+    limiter = FixedWindowRateLimiter(storage_from_string(uri))
+    for _ in range(hits):
+        limiter.hit(LIMIT, 'bench', 'shared-client')
+
+
+def shared_count(uri, workers, hits):
+    processes = [multiprocessing.Process(target=_worker, args=(uri, hits)) for _ in range(workers)]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join()
+    limiter = FixedWindowRateLimiter(storage_from_string(uri))
+    return limiter.get_window_stats(LIMIT, 'bench', 'shared-client').remaining
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--hits', type=int, default=20000)
+    parser.add_argument('--keys', type=int, default=1000, help='distinct client IPs')
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite_uri = 'sqlite:///' + os.path.join(tmp, 'ratelimit.db')
+
+        print(f"Per-hit overhead ({args.hits} hits, {args.keys} distinct keys)")
+        for uri in ('memory://', sqlite_uri):
+            name = uri.split(':', 1)[0]
+            print(f"  {name:<8} {time_hits(uri, args.hits, args.keys):8.1f} us/hit")
+
+        per_worker = max(args.hits // (args.workers * 10), 1)
+        expected = args.workers * per_worker
+        remaining = shared_count(sqlite_uri, args.workers, per_worker)
+        counted = LIMIT.amount - remaining
+        print(f"\nShared counter across {args.workers} processes: "
+              f"{counted}/{expected} hits counted ({'OK' if counted == expected else 'MISMATCH'})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark concurrent SQLite access with and without the tuning profile.
+
+Several processes (standing in for gunicorn workers) share one database
+file. Each runs a request-like mix: mostly catalog reads, and some
+checkouts that read a product, decrement its stock and insert an order.
+Each mode is run twice: with SQLite's defaults (rollback journal,
+synchronous=FULL, deferred BEGIN) and with app/sqlite_tuning.py's profile.
+It reports throughput, latency percentiles and "database is locked"
+failures.
+
+Usage:
+    python benchmarks/bench_sqlite_profile.py [--workers 8] [--ops 2000] [--write-ratio 0.2]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.sqlite_tuning import apply_profile
+
+PRODUCTS = 5000
+
+
+def make_engine(path, profile):
+    # Same pool options as Config.SQLALCHEMY_ENGINE_OPTIONS
+    engine = create_engine(f'sqlite:///{path}', pool_pre_ping=True, pool_recycle=300)
+    if profile:
+        apply_profile(engine)
+    return engine
+
+
+def setup(path, profile):
+    engine = make_engine(path, profile)
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE products (id INTEGER PRIMARY KEY, shop_id INTEGER, name TEXT, '
+                          'price REAL, stock INTEGER, created_at REAL)'))
+        conn.execute(text('CREATE INDEX ix_products_shop ON products (shop_id, created_at)'))
+        conn.execute(text('CREATE TABLE orders (id INTEGER PRIMARY KEY, product_id INTEGER, '
+                          'quantity INTEGER, total REAL, created_at REAL)'))
+        conn.execute(text('INSERT INTO products (shop_id, name, price, stock, created_at) '
+                          'VALUES (:shop, :name, :price, 1000000, :now)'),
+                     [{'shop': i % 50, 'name': f'Product {i}', 'price': 10 + i % 90, 'now': time.time()}
+                      for i in range(PRODUCTS)])
+    engine.dispose()
+
+
+def _worker(path, profile, ops, write_ratio, seed, queue):
+    engine = make_engine(path, profile)
+    rng = random.Random(seed)
+    latencies, errors = [], 0
+    for _ in range(ops):
+        start = time.perf_counter()
+        try:
+            if rng.random() < write_ratio:
+                with engine.begin() as conn:
+                    product_id = rng.randint(1, PRODUCTS)
+                    price = conn.execute(text('SELECT price FROM products WHERE id = :id'),
+                                         {'id': product_id}).scalar()
+                    conn.execute(text('UPDATE products SET stock = stock - 1 WHERE id = :id'), {'id': product_id})
+                    conn.execute(text('INSERT INTO orders (product_id, quantity, total, created_at) '
+                                      'VALUES (:id, 1, :total, :now)'),
+                                 {'id': product_id, 'total': price, 'now': time.time()})
+            else:
+                with engine.connect() as conn:
+                    conn.execute(text('SELECT id, name, price FROM products WHERE shop_id = :shop '
+                                      'ORDER BY created_at DESC LIMIT 20'), {'shop': rng.randint(0, 49)}).all()
+        except OperationalError:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+    engine.dispose()
+    queue.put((latencies, errors))
+
+
+def run(path, profile, workers, ops, write_ratio):
+    queue = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=_worker, args=(path, profile, ops, write_ratio, i, queue))
+                 for i in range(workers)]
+    start = time.perf_counter()
+    for p in processes:
+        p.start()
+    results = [queue.get() for _ in processes]
+    for p in processes:
+        p.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(l for result in results for l in result[0])
+    errors = sum(result[1] for result in results)
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0] * 99
+    return {
+        'ops_per_sec': len(latencies) / elapsed,
+        'p50_ms': quantiles[49] * 1000,
+        'p99_ms': quantiles[98] * 1000,
+        'errors': errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--ops', type=int, default=2000, help='operations per worker')
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    args = parser.parse_args()
+
+    print(f"{args.workers} processes x {args.ops} ops, {args.write_ratio:.0%} checkouts")
+    print(f"  {'mode':<8} {'ops/s':>8} {'p50':>9} {'p99':>10} {'locked':>7}")
+    for name, profile in (('default', False), ('profile', True)):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bench.db')
+            setup(path, profile)
+            result = run(path, profile, args.workers, args.ops, args.write_ratio)
+        print(f"  {name:<8} {result['ops_per_sec']:8.0f} {result['p50_ms']:7.2f}ms "
+              f"{result['p99_ms']:8.2f}ms {result['errors']:7d}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the hot helpers in utils.py, with a stored baseline.
+
+A pytest-benchmark suite over fixed inputs: save_image (new upload and
+duplicate), generate_qr_code, generate_order_number, create_otp/verify_otp
+for each OTP store, format_currency, email MIME construction and the
+format_currency template filter. Run directly, it compares the medians with
+benchmarks/baselines/utils.json and exits non-zero when any benchmark is
+slower than the baseline by more than --threshold percent. Baselines are
+machine-specific: re-record one with --save before comparing on another
+machine, then rerun the comparison after a change. Needs pytest-benchmark
+(pip install pytest-benchmark).
+
+Usage:
+    python benchmarks/bench_utils.py [--threshold 20]
+    python benchmarks/bench_utils.py --save
+    python -m pytest benchmarks/bench_utils.py   # plain pytest-benchmark table
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+BASELINE = os.path.join(ROOT, 'benchmarks', 'baselines', 'utils.json')
+
+AMOUNTS = [0, 9.5, 1234.5, 99999.99, 1234567.891, '250', None, 'n/a']
+EMAIL_TEXT = 'Your order ORD-20260101120000-ABC123 has shipped.\n' * 20
+EMAIL_HTML = '<tr><td>Masala Chai 250g</td><td>2</td><td>&#8377;360.00</td></tr>\n' * 60
+PRICE_TABLE = '{% for price in prices %}<td>{{ price|format_currency }}</td>{% endfor %}'
+
+
+@pytest.fixture(scope='module')
+def app():
+    from app import create_app
+    from app.models.models import db
+
+    with tempfile.TemporaryDirectory() as uploads:
+        app = create_app('testing')
+        app.config.update(UPLOAD_FOLDER=uploads, IMAGE_PROCESSING_MODE='sync')
+        with app.app_context():
+            db.create_all(bind_key=None)
+            yield app
+            db.session.remove()
+            db.drop_all(bind_key=None)
+
+
+def jpeg(seed):
+    """A 1200x900 JPEG whose bytes differ for every ``seed``."""
+    from PIL import Image
+    from werkzeug.datastructures import FileStorage
+
+    image = Image.new('RGB', (1200, 900), (200, 120, 40))
+    # One black or white 32px block per bit survives JPEG quantization
+    for bit in range(20):
+        image.paste((0, 0, 0) if seed >> bit & 1 else (255, 255, 255), (bit * 32, 0, bit * 32 + 32, 32))
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=90)
+    buffer.seek(0)
+    return FileStorage(buffer, filename='photo.jpg')
+
+
+def test_save_image_new(app, benchmark):
+    from utils import save_image
+
+    seeds = iter(range(1, 1_000_000))
+    path = benchmark.pedantic(save_image, setup=lambda: ((jpeg(next(seeds)), 'products'), {}),
+                              rounds=20, warmup_rounds=1)
+    assert path.startswith('products/')
+
+
+def test_save_image_duplicate(app, benchmark):
+    from utils import save_image
+
+    save_image(jpeg(0), 'products')
+    path = benchmark.pedantic(save_image, setup=lambda: ((jpeg(0), 'products'), {}), rounds=50)
+    assert path.startswith('products/')
+
+
+def test_generate_qr_code(app, benchmark):
+    from utils import generate_qr_code
+
+    assert benchmark(generate_qr_code, 'shopserv@upi', 1249.5, 'ORD-20260101120000-ABC123')
+
+
+def test_generate_order_number(benchmark):
+    from utils import generate_order_number
+
+    assert benchmark(generate_order_number).startswith('ORD-')
+
+
+@pytest.mark.parametrize('store', ['memory', 'database'])
+def test_create_and_verify_otp(app, benchmark, store):
+    from app.otp_store import get_otp_store
+    from utils import create_otp, verify_otp
+
+    app.config['OTP_STORE'] = store
+    app.extensions.pop('otp_store', None)
+    assert type(get_otp_store()).__name__.lower().startswith(store)
+
+    def issue_and_verify():
+        return verify_otp('customer@example.com', create_otp('customer@example.com'))
+
+    try:
+        assert benchmark(issue_and_verify)
+    finally:
+        app.extensions.pop('otp_store', None)
+
+
+def test_format_currency(benchmark):
+    from utils import format_currency
+
+    assert benchmark(lambda: [format_currency(amount) for amount in AMOUNTS[:5]])[3] == '₹99,999.99'
+
+
+def test_format_currency_filter(benchmark):
+    from app.context_processors import format_currency
+
+    assert benchmark(lambda: [format_currency(amount) for amount in AMOUNTS])[-2] == '₹0'
+
+
+def test_format_currency_filter_in_template(app, benchmark):
+    template = app.jinja_env.from_string(PRICE_TABLE)
+    prices = [i * 37.25 for i in range(200)]
+    assert '₹7,412.75' in benchmark(template.render, prices=prices)
+
+
+def test_build_email_message(benchmark):
+    from utils import build_email_message
+
+    def build():
+        return build_email_message('customer@example.com', 'Your SHOP&SERV order has shipped',
+                                   EMAIL_TEXT, EMAIL_HTML, 'orders@shopserv.local').as_bytes()
+
+    assert b'multipart/alternative' in benchmark(build)
+
+
+# --- Baseline comparison --------------------------------------------------
+
+def medians(path):
+    with open(path) as f:
+        return {bench['name']: bench['stats']['median'] for bench in json.load(f)['benchmarks']}
+
+
+def compare(baseline, current, threshold):
+    """Print a comparison table; return the names slower than ``threshold`` percent."""
+    print(f"\n{'benchmark':<50}{'baseline':>12}{'current':>12}{'change':>9}")
+    regressions = []
+    for name in sorted(current):
+        if name not in baseline:
+            print(f"{name:<50}{'-':>12}{current[name] * 1e6:>10.1f}us{'new':>9}")
+            continue
+        change = (current[name] / baseline[name] - 1) * 100
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  ❌'
+        print(f"{name:<50}{baseline[name] * 1e6:>10.1f}us{current[name] * 1e6:>10.1f}us{change:>+8.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--save', action='store_true', help=f'record a new baseline in {os.path.relpath(BASELINE, ROOT)}')
+    parser.add_argument('--threshold', type=float, default=20, help='allowed median slowdown in percent')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('pytest_args', nargs='*', help='extra arguments for pytest, e.g. -k otp')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = os.path.join(tmp, 'results.json')
+        status = pytest.main([__file__, '-q', '-p', 'no:cacheprovider', f'--benchmark-json={results}',
+                              '--benchmark-sort=name', *args.pytest_args])
+        if status != 0:
+            raise SystemExit(status)
+
+        if args.save:
+            os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+            with open(results) as f:
+                data = json.load(f)
+            # Summary statistics only; the per-round timings run to megabytes
+            baseline = {
+                'datetime': data['datetime'],
+                'machine_info': {key: data['machine_info'].get(key) for key in
+                                 ('node', 'processor', 'python_implementation', 'python_version', 'cpu')},
+                'benchmarks': [{'name': bench['name'], 'stats': {key: value for key, value in bench['stats'].items()
+                                                                 if key != 'data'}}
+                               for bench in data['benchmarks']],
+            }
+            with open(args.baseline, 'w') as f:
+                json.dump(baseline, f, indent=2)
+            print(f"\n✓ Baseline saved to {args.baseline}")
+            return
+
+        if not os.path.exists(args.baseline):
+            raise SystemExit(f"❌ No baseline at {args.baseline}; record one with --save")
+        regressions = compare(medians(args.baseline), medians(results), args.threshold)
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} benchmark(s) more than {args.threshold:g}% slower than the baseline")
+        raise SystemExit(1)
+    print(f"\n✓ No benchmark more than {args.threshold:g}% slower than the baseline")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Measure per-worker memory of gunicorn with and without --preload.
+
+Starts ``gunicorn -c gunicorn.conf.py wsgi:app`` twice against the same
+seeded SQLite file, once with GUNICORN_PRELOAD=false and once with it on.
+Each run serves a mix of catalog and login pages until every worker has
+rendered them, then reads /proc/<pid>/smaps_rollup of the master and each
+worker. RSS counts shared pages in full, so the columns that show the
+copy-on-write savings are PSS (shared pages split between the processes
+that map them) and USS (pages private to the worker).
+
+Usage:
+    python benchmarks/bench_worker_memory.py [--workers 4] [--requests 400]
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PAGES = ['/', '/products', '/shops', '/services', '/login', '/register', '/product/1', '/shop/1']
+
+
+def seed(database_path, products):
+    os.environ['DATABASE_URL'] = f'sqlite:///{database_path}'
+    from app import create_app
+    from app.models.models import db, User, Shop, Product
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        owner = User(email='owner@example.com', full_name='Owner', role='shopowner')
+        owner.set_password('password123')
+        db.session.add(owner)
+        db.session.flush()
+        shop = Shop(owner_id=owner.id, name='Bakery', city='Pune', service_type='Bakery',
+                    description='Fresh goods every day')
+        db.session.add(shop)
+        db.session.flush()
+        db.session.add_all(Product(shop_id=shop.id, name=f'Product {i}', description='A tasty item',
+                                   price=10 + i % 90, stock=50, category='Bread') for i in range(products))
+        db.session.commit()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def smaps(pid):
+    """Return {'rss', 'pss', 'uss'} in MiB for ``pid``."""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                values[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return {'rss': values['Rss'], 'pss': values['Pss'],
+            'uss': values['Private_Clean'] + values['Private_Dirty']}
+
+
+def worker_pids(master_pid):
+    with open(f'/proc/{master_pid}/task/{master_pid}/children') as f:
+        return [int(pid) for pid in f.read().split()]
+
+
+def get(url):
+    try:
+        with urllib.request.urlopen(url, timeout=10) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def run(preload, workers, requests, env):
+    port = free_port()
+    env = dict(env, GUNICORN_PRELOAD=str(preload).lower(), GUNICORN_WORKERS=str(workers),
+               GUNICORN_BIND=f'127.0.0.1:{port}')
+    master = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+                              cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        base = f'http://127.0.0.1:{port}'
+        for _ in range(100):
+            try:
+                get(base + '/login')
+                break
+            except OSError:
+                time.sleep(0.1)
+        # Enough concurrent traffic that every worker renders every page
+        with ThreadPoolExecutor(workers * 2) as pool:
+            statuses = list(pool.map(get, [base + PAGES[i % len(PAGES)] for i in range(requests)]))
+        errors = sum(status >= 500 for status in statuses)
+        time.sleep(0.5)
+        return smaps(master.pid), [smaps(pid) for pid in worker_pids(master.pid)], errors
+    finally:
+        master.terminate()
+        master.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--products', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_path = os.path.join(tmp, 'shop.db')
+        seed(database_path, args.products)
+        env = dict(os.environ, DATABASE_URL=f'sqlite:///{database_path}', RATELIMIT_ENABLED='false',
+                   RATELIMIT_STORAGE_URI='memory://', COMPRESS_ENABLED='false')
+
+        print(f"{args.workers} workers, {args.requests} requests over {len(PAGES)} pages (MiB)\n")
+        print(f"{'mode':<12}{'worker RSS':>12}{'worker PSS':>12}{'worker USS':>12}"
+              f"{'master RSS':>12}{'total PSS':>12}{'5xx':>6}")
+        for preload in (False, True):
+            master, workers, errors = run(preload, args.workers, args.requests, env)
+            total_pss = master['pss'] + sum(w['pss'] for w in workers)
+            mean = {key: statistics.mean(w[key] for w in workers) for key in ('rss', 'pss', 'uss')}
+            print(f"{'preload' if preload else 'no preload':<12}{mean['rss']:>12.1f}{mean['pss']:>12.1f}"
+                  f"{mean['uss']:>12.1f}{master['rss']:>12.1f}{total_pss:>12.1f}{errors:>6}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,565 @@
+#!/usr/bin/env python3
+"""
+Load-test the customer, shop-owner and admin journeys under gunicorn.
+
+Starts ``gunicorn -c gunicorn.conf.py wsgi:app`` against a database
+generated with app/datagen.py (or --database), with mail and SMS pointed
+at local stubs so no message leaves the machine. Virtual users then log in
+through the real form (CSRF included) and loop over their journey until
+--duration runs out:
+
+    customer  browse -> search -> product_detail -> add_to_cart
+              -> checkout_page -> checkout -> confirm_qr_payment
+    owner     shop_orders -> update_order_status
+    admin     admin_dashboard -> admin_orders -> admin_users
+              -> admin_shops -> admin_products
+
+A step counts as an error on a transport failure, an unexpected status or a
+JSON body with ``"success": false``. When checkout does not return an
+order, confirm_qr_payment uses the customer's newest existing order so the
+step is still measured. Per step the summary has RPS, latency percentiles
+(ms), error rate, status counts and the first error seen; --output writes
+it as JSON. Every generated account's password is "password123"; an admin
+account is added to the database if it has none.
+
+Usage:
+    python benchmarks/load_test.py [--duration 30] [--customers 8] [--owners 2] [--admins 1]
+    python benchmarks/load_test.py --database sqlite:////tmp/scale.db --workers 4 --output load.json
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 --database sqlite:///instance/shop.db
+"""
+import argparse
+import http.client
+import http.server
+import json
+import os
+import random
+import re
+import socket
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from collections import Counter, defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PASSWORD = 'password123'
+ADMIN_EMAIL = 'admin@example.com'
+ORDER_STATES = ['confirmed', 'processing', 'shipped', 'delivered']
+ADMIN_PAGES = [('admin_dashboard', '/admin/dashboard'), ('admin_orders', '/admin/orders'),
+               ('admin_users', '/admin/users'), ('admin_shops', '/admin/shops'),
+               ('admin_products', '/admin/products')]
+CSRF_PATTERN = re.compile(rb'name="csrf[-_]token"[^>]*?(?:content|value)="([^"]+)"')
+
+
+def percentile(values, q):
+    """Linear-interpolated percentile of sorted ``values`` (q in 0..100)."""
+    if not values:
+        return 0.0
+    position = (len(values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+class Recorder:
+    """Thread-safe collector of (step, seconds, status, error) samples."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.errors = defaultdict(int)
+        self.first_error = {}
+
+    def record(self, step, seconds, status, error=None):
+        with self.lock:
+            self.samples[step].append(seconds)
+            self.statuses[step][status] += 1
+            if error:
+                self.errors[step] += 1
+                self.first_error.setdefault(step, error)
+
+    def summary(self, elapsed):
+        """Return the per-step and overall summary as a JSON-ready dict."""
+        def describe(latencies, errors, statuses=None, first_error=None):
+            latencies = sorted(latencies)
+            result = {
+                'requests': len(latencies),
+                'rps': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+                'errors': errors,
+                'error_rate': round(errors / len(latencies), 4) if latencies else 0.0,
+                'latency_ms': {
+                    'mean': round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+                    **{f'p{q}': round(percentile(latencies, q) * 1000, 2) for q in (50, 90, 95, 99)},
+                    'max': round(latencies[-1] * 1000, 2) if latencies else 0.0,
+                },
+            }
+            if statuses is not None:
+                result['statuses'] = {str(code): count for code, count in sorted(statuses.items(), key=str)}
+            if first_error:
+                result['first_error'] = first_error
+            return result
+
+        with self.lock:
+            steps = {step: describe(self.samples[step], self.errors[step], self.statuses[step],
+                                    self.first_error.get(step))
+                     for step in sorted(self.samples)}
+            total = describe([s for samples in self.samples.values() for s in samples],
+                             sum(self.errors.values()))
+        return {'elapsed_s': round(elapsed, 2), 'total': total, 'steps': steps}
+
+
+# --- Mail and SMS stubs ---------------------------------------------------
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib's ehlo/login/send_message/quit."""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        self.reply('220 shopserv-stub ESMTP')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors='replace').strip().upper()
+            if command.startswith(('EHLO', 'HELO')):
+                self.wfile.write(b'250-shopserv-stub\r\n250-AUTH PLAIN LOGIN\r\n250 SIZE 10485760\r\n')
+            elif command.startswith('AUTH'):
+                self.reply('235 2.7.0 Authentication successful')
+            elif command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                while self.rfile.readline() not in (b'.\r\n', b'.\n', b''):
+                    pass
+                self.server.count()
+                self.reply('250 2.0.0 Queued')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:  # MAIL, RCPT, RSET, NOOP
+                self.reply('250 OK')
+
+
+class _SMSHandler(http.server.BaseHTTPRequestHandler):
+    """Answers like Fast2SMS's bulk endpoint."""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.server.count()
+        body = b'{"return": true, "request_id": "stub", "message": ["SMS sent successfully."]}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _CountingMixin:
+    daemon_threads = True
+    allow_reuse_address = True
+    messages = 0
+
+    def count(self):
+        with self.lock:
+            self.messages += 1
+
+
+class SMTPStub(_CountingMixin, socketserver.ThreadingTCPServer):
+    def __init__(self):
+        self.lock = threading.Lock()
+        super().__init__(('127.0.0.1', 0), _SMTPHandler)
+
+
+class SMSStub(_CountingMixin, http.server.ThreadingHTTPServer):
+    def __init__(self):
+        self.lock = threading.Lock()
+        super().__init__(('127.0.0.1', 0), _SMSHandler)
+
+
+def start(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# --- Database fixtures ----------------------------------------------------
+
+def generate_database(url, args):
+    from sqlalchemy import create_engine
+    from app.datagen import generate
+    from app.models.models import db
+
+    engine = create_engine(url)
+    db.metadata.create_all(engine, tables=[t for t in db.metadata.sorted_tables if t.info.get('bind_key') is None])
+    counts = generate(engine, seed=args.seed, orders=args.orders, customers=max(args.orders // 10, 1),
+                      shops=max(args.orders // 500, 20))
+    with engine.begin() as conn:
+        conn.exec_driver_sql('ANALYZE')
+    engine.dispose()
+    return counts
+
+
+def load_fixtures(url, customers, owners):
+    """Pick accounts, products and orders for the virtual users."""
+    from sqlalchemy import create_engine, text
+    from werkzeug.security import generate_password_hash
+
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        if not conn.execute(text("SELECT 1 FROM users WHERE role = 'admin' LIMIT 1")).first():
+            conn.execute(text("INSERT INTO users (email, password_hash, full_name, role, is_active, created_at) "
+                              "VALUES (:email, :hash, 'Load Test Admin', 'admin', :yes, CURRENT_TIMESTAMP)"),
+                         {'email': ADMIN_EMAIL, 'hash': generate_password_hash(PASSWORD), 'yes': True})
+        admin = conn.execute(text("SELECT email FROM users WHERE role = 'admin' AND is_active ORDER BY id")).scalar()
+        customer_rows = conn.execute(text('''
+            SELECT u.email, MAX(o.id) FROM users u JOIN orders o ON o.customer_id = u.id
+            WHERE u.role = 'customer' AND u.is_active GROUP BY u.id, u.email ORDER BY u.id LIMIT :n
+        '''), {'n': customers}).all()
+        owner_rows = conn.execute(text('''
+            SELECT u.email, s.id FROM users u JOIN shops s ON s.owner_id = u.id
+            WHERE u.role = 'shopowner' AND u.is_active ORDER BY u.id LIMIT :n
+        '''), {'n': owners}).all()
+        shop_orders = {
+            shop_id: [row[0] for row in conn.execute(text(
+                'SELECT DISTINCT order_id FROM order_items WHERE shop_id = :shop ORDER BY order_id DESC LIMIT 200'
+            ), {'shop': shop_id})]
+            for _, shop_id in owner_rows
+        }
+        products = conn.execute(text('SELECT id, name FROM products WHERE is_active AND stock > 0 '
+                                     'ORDER BY id LIMIT 1000')).all()
+    engine.dispose()
+    if len(customer_rows) < customers or len(owner_rows) < owners or not products:
+        raise SystemExit('Database has too few customers with orders, shop owners or products in stock')
+    return {
+        'admin': admin,
+        'customers': [{'email': email, 'order_id': order_id} for email, order_id in customer_rows],
+        'owners': [{'email': email, 'orders': shop_orders[shop_id]} for email, shop_id in owner_rows],
+        'products': [product_id for product_id, _ in products],
+        'terms': sorted({name.split()[-1] for _, name in products}),
+    }
+
+
+# --- Virtual users --------------------------------------------------------
+
+class Client:
+    """Keep-alive HTTP client with a cookie jar, one per virtual user."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.connection = None
+        self.cookies = {}
+        self.csrf_token = None
+
+    def request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{k}={v}' for k, v in self.cookies.items())
+        for attempt in (1, 2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            try:
+                self.connection.request(method, path, body=body, headers=headers)
+                response = self.connection.getresponse()
+                data = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # gunicorn closed an idle keep-alive connection; retry once on a new one
+                self.connection.close()
+                self.connection = None
+                if attempt == 2:
+                    raise
+        for header in response.headers.get_all('Set-Cookie') or []:
+            name, _, value = header.split(';', 1)[0].partition('=')
+            self.cookies[name.strip()] = value
+        match = CSRF_PATTERN.search(data)
+        if match:
+            self.csrf_token = match.group(1).decode()
+        return response.status, response.headers, data
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+
+
+class VirtualUser(threading.Thread):
+    scenario = None
+
+    def __init__(self, index, address, recorder, fixtures, deadline, think_time, seed):
+        super().__init__(daemon=True)
+        self.index = index
+        self.client = Client(*address)
+        self.recorder = recorder
+        self.fixtures = fixtures
+        self.deadline = deadline
+        self.think_time = think_time
+        self.random = random.Random(seed * 1000 + index)
+
+    def step(self, name, method, path, expect=(200,), form=None, json_body=None, ajax=False):
+        """Time one request and record it; return (status, parsed JSON or None)."""
+        headers = {}
+        body = None
+        if form is not None:
+            body = urllib.parse.urlencode(form)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        elif json_body is not None:
+            body = json.dumps(json_body)
+            headers['Content-Type'] = 'application/json'
+        if method == 'POST' and self.client.csrf_token:
+            headers['X-CSRFToken'] = self.client.csrf_token
+        if ajax:
+            headers['X-Requested-With'] = 'XMLHttpRequest'
+
+        error = None
+        status = 'error'
+        data = None
+        started = time.perf_counter()
+        try:
+            status, response_headers, content = self.client.request(method, path, body, headers)
+        except (OSError, http.client.HTTPException) as e:
+            error = f'{type(e).__name__}: {e}'
+        elapsed = time.perf_counter() - started
+
+        if error is None:
+            if response_headers.get_content_type() == 'application/json':
+                try:
+                    data = json.loads(content)
+                except ValueError:
+                    pass
+            if status not in expect:
+                error = f'HTTP {status} from {method} {path}'
+            elif isinstance(data, dict) and data.get('success') is False:
+                error = f"success=false from {method} {path}: {data.get('error') or data.get('message')}"
+            elif status == 302 and '/login' in response_headers.get('Location', ''):
+                error = f'redirected to login from {method} {path}'
+        self.recorder.record(f'{self.scenario}.{name}', elapsed, status, error)
+        return status if error is None else None, data
+
+    def login(self, email):
+        self.step('login_page', 'GET', '/login')
+        status, _ = self.step('login', 'POST', '/login', expect=(302,),
+                              form={'email': email, 'password': PASSWORD,
+                                    'csrf_token': self.client.csrf_token or ''})
+        return status is not None
+
+    def run(self):
+        try:
+            if self.login(self.account()):
+                while time.monotonic() < self.deadline:
+                    self.journey()
+        finally:
+            self.client.close()
+
+    def pause(self):
+        if self.think_time:
+            time.sleep(self.random.uniform(0, 2 * self.think_time))
+
+
+class Customer(VirtualUser):
+    scenario = 'customer'
+
+    def account(self):
+        return self.fixtures['customers'][self.index]['email']
+
+    def journey(self):
+        fixtures = self.fixtures
+        self.step('browse', 'GET', '/products')
+        self.pause()
+        term = self.random.choice(fixtures['terms'])
+        self.step('search', 'GET', '/products?' + urllib.parse.urlencode({'search': term}))
+        self.pause()
+        product_id = self.random.choice(fixtures['products'])
+        self.step('product_detail', 'GET', f'/product/{product_id}')
+        self.step('add_to_cart', 'POST', f'/cart/add/{product_id}', ajax=True)
+        self.pause()
+        self.step('checkout_page', 'GET', '/checkout')
+        status, data = self.step('checkout', 'POST', '/checkout', ajax=True, form={
+            'payment_method': 'qr', 'shipping_address': f'{self.index} Load Test Street, Pune',
+            'shipping_phone': '9876543210', 'terms_accepted': 'true',
+            'csrf_token': self.client.csrf_token or '',
+        })
+        match = re.search(r'/order/(\d+)', (data or {}).get('redirect', '')) if status else None
+        order_id = int(match.group(1)) if match else fixtures['customers'][self.index]['order_id']
+        self.step('confirm_qr_payment', 'POST', f'/confirm-qr-payment/{order_id}', ajax=True)
+        self.pause()
+
+
+class ShopOwner(VirtualUser):
+    scenario = 'owner'
+
+    def account(self):
+        return self.fixtures['owners'][self.index]['email']
+
+    def journey(self):
+        self.step('shop_orders', 'GET', '/shop/orders')
+        self.pause()
+        orders = self.fixtures['owners'][self.index]['orders']
+        if orders:
+            self.step('update_order_status', 'POST', f'/shop/order/update-status/{self.random.choice(orders)}',
+                      json_body={'status': self.random.choice(ORDER_STATES)})
+        self.pause()
+
+
+class Admin(VirtualUser):
+    scenario = 'admin'
+
+    def account(self):
+        return self.fixtures['admin']
+
+    def journey(self):
+        for name, path in ADMIN_PAGES:
+            self.step(name, 'GET', path)
+            self.pause()
+
+
+# --- Runner ---------------------------------------------------------------
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(host, port, process=None, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise SystemExit(f'gunicorn exited with status {process.returncode}')
+        try:
+            connection = http.client.HTTPConnection(host, port, timeout=5)
+            connection.request('GET', '/login')
+            connection.getresponse().read()
+            connection.close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit(f'{host}:{port} did not answer within {timeout}s')
+
+
+def start_gunicorn(args, database_url, smtp, sms, log_path):
+    port = free_port()
+    # Every virtual user logs in from 127.0.0.1, which RATELIMIT_AUTH would throttle
+    env = dict(
+        os.environ, DATABASE_URL=database_url, RATELIMIT_ENABLED='false', RATELIMIT_STORAGE_URI='memory://',
+        GUNICORN_BIND=f'127.0.0.1:{port}', GUNICORN_WORKERS=str(args.workers), GUNICORN_THREADS=str(args.threads),
+        MAIL_SERVER='127.0.0.1', MAIL_PORT=str(smtp.server_address[1]), MAIL_USE_TLS='false',
+        MAIL_USE_SSL='false', MAIL_USERNAME='loadtest@shopserv.local', MAIL_PASSWORD='stub',
+        MAIL_MAX_RETRIES='1', FAST2SMS_API_KEY='stub',
+        FAST2SMS_API_URL=f'http://127.0.0.1:{sms.server_address[1]}/dev/bulkV2', UPI_ID='shopserv@upi',
+    )
+    log = open(log_path, 'wb')
+    process = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+                               cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+    log.close()
+    return process, ('127.0.0.1', port)
+
+
+def run_load(address, fixtures, args):
+    """Run every virtual user until the deadline; return the summary."""
+    recorder = Recorder()
+    deadline = time.monotonic() + args.duration
+    users = [cls(i, address, recorder, fixtures, deadline, args.think_time, args.seed)
+             for cls, count in ((Customer, args.customers), (ShopOwner, args.owners), (Admin, args.admins))
+             for i in range(count)]
+    started = time.monotonic()
+    for user in users:
+        user.start()
+    for user in users:
+        user.join()
+    return recorder.summary(time.monotonic() - started)
+
+
+def print_summary(summary):
+    print(f"{'step':<30}{'reqs':>7}{'rps':>8}{'err%':>7}{'p50':>8}{'p90':>8}{'p95':>8}{'p99':>8}{'max':>8}")
+    rows = list(summary['steps'].items()) + [('TOTAL', summary['total'])]
+    for step, stats in rows:
+        latency = stats['latency_ms']
+        print(f"{step:<30}{stats['requests']:>7}{stats['rps']:>8.1f}{stats['error_rate'] * 100:>7.1f}"
+              f"{latency['p50']:>8.1f}{latency['p90']:>8.1f}{latency['p95']:>8.1f}{latency['p99']:>8.1f}"
+              f"{latency['max']:>8.1f}")
+    for step, stats in summary['steps'].items():
+        if 'first_error' in stats:
+            print(f"  {step}: {stats['first_error']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--database', help='database URL (default: generate a fresh SQLite file)')
+    parser.add_argument('--url', help='target an already running server instead of starting gunicorn')
+    parser.add_argument('--orders', type=int, default=20000, help='orders to generate without --database')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--duration', type=float, default=30, help='seconds of load')
+    parser.add_argument('--customers', type=int, default=8, help='customer virtual users')
+    parser.add_argument('--owners', type=int, default=2, help='shop-owner virtual users')
+    parser.add_argument('--admins', type=int, default=1, help='admin virtual users')
+    parser.add_argument('--think-time', type=float, default=0, help='mean pause between steps in seconds')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--output', help='write the JSON summary to this file ("-" for stdout)')
+    args = parser.parse_args(argv)
+    # Keep stdout clean for the JSON summary with --output -
+    log = sys.stderr if args.output == '-' else sys.stdout
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database
+        if not database_url:
+            if args.url:
+                parser.error('--url needs --database to pick accounts and orders')
+            database_url = f'sqlite:///{os.path.join(tmp, "load.db")}'
+            counts = generate_database(database_url, args)
+            print(f"✓ Generated {sum(counts.values()):,} rows ({args.orders:,} orders)", file=log)
+        fixtures = load_fixtures(database_url, args.customers, args.owners)
+
+        smtp, sms = start(SMTPStub()), start(SMSStub())
+        process = None
+        log_path = os.path.join(tmp, 'gunicorn.log')
+        try:
+            if args.url:
+                parsed = urllib.parse.urlsplit(args.url)
+                address = (parsed.hostname, parsed.port or 80)
+                wait_until_up(*address)
+            else:
+                process, address = start_gunicorn(args, database_url, smtp, sms, log_path)
+                wait_until_up(*address, process=process)
+            print(f"✓ Serving on {address[0]}:{address[1]}; {args.customers} customers, {args.owners} owners, "
+                  f"{args.admins} admins for {args.duration:g}s\n", file=log)
+            summary = run_load(address, fixtures, args)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait(timeout=30)
+            smtp.shutdown()
+            sms.shutdown()
+
+        summary['config'] = {
+            'url': args.url, 'workers': None if args.url else args.workers, 'threads': None if args.url else args.threads,
+            'customers': args.customers, 'owners': args.owners, 'admins': args.admins,
+            'duration_s': args.duration, 'think_time_s': args.think_time, 'seed': args.seed,
+        }
+        summary['stubs'] = {'emails': smtp.messages, 'sms': sms.messages}
+        if process is not None and process.returncode not in (0, -15):
+            with open(log_path, errors='replace') as f:
+                print(f.read()[-4000:], file=sys.stderr)
+
+    if args.output == '-':
+        json.dump(summary, sys.stdout, indent=2)
+        print()
+    else:
+        print_summary(summary)
+        print(f"\nStubs received {summary['stubs']['emails']} emails and {summary['stubs']['sms']} SMS")
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(summary, f, indent=2)
+            print(f"✓ Summary written to {args.output}")
+    return summary
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Build content-hashed, precompressed copies of the static assets
+
+Writes static/dist/ and its manifest.json (see app/static_assets.py). The app
+does this itself at startup unless STATIC_BUILD_ON_STARTUP is False, in which
+case run this once per deploy.
+
+Usage:
+    python build_static.py
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.static_assets import build_manifest, brotli
+
+
+def main():
+    static_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+    files = build_manifest(static_folder, report=lambda message: print(f"✓ {message}"))
+    print(f"\n{len(files)} assets fingerprinted into {os.path.join(static_folder, 'dist')}")
+    if brotli is None:
+        print("❌ Brotli is not installed; only .gz siblings were written")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Find and delete uploaded files that no product, service, shop or order uses
+
+Dry run by default; pass --delete to remove the files.
+
+Usage:
+    python cleanup_uploads.py [--delete] [--grace-hours 24] [--batch-size 500]
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Import the app.py file as a module
+import importlib.util
+spec = importlib.util.spec_from_file_location("app_module", os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py"))
+app_module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(app_module)
+
+from app.upload_gc import collect_garbage
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Remove orphaned files from static/uploads')
+    parser.add_argument('--delete', action='store_true', help='delete files instead of only reporting them')
+    parser.add_argument('--grace-hours', type=float, default=24, help='ignore files modified more recently than this')
+    parser.add_argument('--batch-size', type=int, default=500, help='files checked against the database per query')
+    parser.add_argument('--quiet', action='store_true', help='only print the summary')
+    args = parser.parse_args()
+
+    app = app_module.app
+    with app.app_context():
+        stats = collect_garbage(
+            app.config['UPLOAD_FOLDER'],
+            staging_folder=app.config.get('IMAGE_STAGING_FOLDER'),
+            extensions=sorted(app.config['ALLOWED_EXTENSIONS']),
+            grace_seconds=args.grace_hours * 3600,
+            batch_size=args.batch_size,
+            dry_run=not args.delete,
+            report=(lambda message: None) if args.quiet else print
+        )
+
+    print("\n" + "=" * 40)
+    print(f"Files scanned:        {stats['scanned']}")
+    print(f"Within grace period:  {stats['skipped_recent']}")
+    print(f"Orphaned files:       {stats['orphans']} ({stats['bytes'] / 1024 / 1024:.1f} MB)")
+    if args.delete:
+        print(f"Deleted:              {stats['deleted']}")
+        for message in stats['error_messages']:
+            print(f"❌ {message}")
+    else:
+        print("Dry run - nothing was deleted. Re-run with --delete to remove these files.")
+
+
+if __name__ == "__main__":
+    main()
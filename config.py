@@ -21,12 +21,53 @@ class Config:
         'pool_pre_ping': True,
         'pool_recycle': 300,
     }
+    # Read replica for GET views marked @replica_read (app/replica_routing.py)
+    REPLICA_DATABASE_URL = os.environ.get('REPLICA_DATABASE_URL')
+    SQLALCHEMY_BINDS = {'replica': REPLICA_DATABASE_URL} if REPLICA_DATABASE_URL else {}
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))  # Primary-only reads after a write
+    # Applied to every new SQLite connection (app/sqlite_tuning.py); ignored for other databases
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),  # Bytes
+        'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -64000)),  # Negative = KiB per connection
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),  # Milliseconds
+        'temp_store': 'MEMORY',
+    }
+    SQLITE_BEGIN_IMMEDIATE = True  # Writers take the lock up front instead of upgrading mid-transaction
     
     # File uploads
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
     
+    # Image processing: 'pool' resizes uploads in background processes, 'sync' in the request
+    IMAGE_PROCESSING_MODE = os.environ.get('IMAGE_PROCESSING_MODE', 'pool')
+    IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', 2))
+    IMAGE_MAX_PIXELS = int(os.environ.get('IMAGE_MAX_PIXELS', 24_000_000))  # Decoded-size budget per upload
+    IMAGE_VARIANTS = os.environ.get('IMAGE_VARIANTS', 'True').lower() == 'true'  # WebP/AVIF srcset copies
+    IMAGE_STAGING_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'upload_staging')
+    
+    # Fingerprinted static assets with .gz/.br siblings (app/static_assets.py)
+    STATIC_FINGERPRINT = os.environ.get('STATIC_FINGERPRINT', 'True').lower() == 'true'
+    STATIC_BUILD_ON_STARTUP = os.environ.get('STATIC_BUILD_ON_STARTUP', 'True').lower() == 'true'  # False if build_static.py runs at deploy
+    STATIC_IMMUTABLE_MAX_AGE = 365 * 24 * 3600  # Seconds
+    
+    # gzip/Brotli response compression (app/compression.py); turn off if a proxy already compresses
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'True').lower() == 'true'
+    COMPRESS_ALGORITHMS = ('br', 'gzip')  # Preference order when the client accepts both
+    # Safe for pages with the CSRF token: it is masked per response against BREACH (app/csrf.py)
+    COMPRESS_MIMETYPES = {'text/html', 'text/css', 'text/plain', 'text/xml', 'text/csv', 'text/javascript',
+                          'application/json', 'application/javascript', 'application/xml',
+                          'application/x-ndjson', 'image/svg+xml'}
+    COMPRESS_MIN_SIZE = 500  # Bytes; smaller bodies are sent as-is
+    COMPRESS_GZIP_LEVEL = 6
+    COMPRESS_BROTLI_QUALITY = 4  # 0-11; above ~5 costs far more CPU than it saves bytes
+    COMPRESS_STREAMS = True  # Compress streamed responses chunk by chunk
+    
+    # Shop opening hours are wall-clock times in this zone (app/shop_hours.py)
+    SHOP_TIMEZONE = os.environ.get('SHOP_TIMEZONE', 'Asia/Kolkata')
+    
     # Session config
     PERMANENT_SESSION_LIFETIME = timedelta(days=7)
     SESSION_COOKIE_SECURE = os.environ.get('SESSION_COOKIE_SECURE', 'False').lower() == 'true'
@@ -53,6 +94,16 @@ class Config:
     MAIL_RETRY_DELAY = int(os.environ.get('MAIL_RETRY_DELAY', 5))  # Seconds between retries
     MAIL_MAX_RETRIES = int(os.environ.get('MAIL_MAX_RETRIES', 3))
     
+    # OTP storage: 'database' is shared by all workers, 'memory' is per-process
+    OTP_STORE = os.environ.get('OTP_STORE', 'database')
+    OTP_EXPIRY_MINUTES = int(os.environ.get('OTP_EXPIRY_MINUTES', 5))
+    OTP_MAX_ATTEMPTS = int(os.environ.get('OTP_MAX_ATTEMPTS', 5))
+    OTP_SWEEP_INTERVAL = int(os.environ.get('OTP_SWEEP_INTERVAL', 300))  # Seconds between expired-code sweeps
+    
+    # Per-process cache of logged-in users (see app/user_cache.py)
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))  # Seconds
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 1024))
+    
     # Stripe config
     STRIPE_PUBLIC_KEY = os.environ.get('STRIPE_PUBLIC_KEY')
     STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY')
@@ -63,14 +114,47 @@ class Config:
     
     # SMS config (Fast2SMS)
     FAST2SMS_API_KEY = os.environ.get('FAST2SMS_API_KEY')
+    FAST2SMS_API_URL = os.environ.get('FAST2SMS_API_URL', 'https://www.fast2sms.com/dev/bulkV2')
     
     # Security
     WTF_CSRF_ENABLED = True
     WTF_CSRF_TIME_LIMIT = 3600  # 1 hour
     
+    # Rows fetched per round trip by the streaming order exports (app/order_export.py)
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+    
+    # Bulk product import (app/product_import.py)
+    IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', 500))  # Rows validated and written per transaction
+    IMPORT_IMAGE_WORKERS = int(os.environ.get('IMPORT_IMAGE_WORKERS', 4))  # Threads downloading image_url columns
+    IMPORT_IMAGE_TIMEOUT = int(os.environ.get('IMPORT_IMAGE_TIMEOUT', 10))  # Seconds per image request
+    IMPORT_ALLOW_PRIVATE_URLS = False  # Let image_url point at loopback/LAN hosts
+    
+    # Items accepted per POST /api/shop/inventory batch (app/inventory.py)
+    INVENTORY_BATCH_MAX = int(os.environ.get('INVENTORY_BATCH_MAX', 5000))
+
+    # "Most popular" sort score, refreshed by refresh_popularity.py (app/popularity.py)
+    POPULARITY_HALF_LIFE_DAYS = float(os.environ.get('POPULARITY_HALF_LIFE_DAYS', 14))  # Rerun with --rebuild after changing
+    POPULARITY_SETTLE_SECONDS = int(os.environ.get('POPULARITY_SETTLE_SECONDS', 300))  # Leave orders this new for the next run
+    POPULARITY_BATCH_SIZE = int(os.environ.get('POPULARITY_BATCH_SIZE', 5000))  # Order items scored per transaction
+    
+    # On-demand request profiling for admins (see app/profiling.py)
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'True').lower() == 'true'
+    PROFILE_FOLDER = os.environ.get('PROFILE_FOLDER') or \
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'profiles')
+    PROFILE_INTERVAL = float(os.environ.get('PROFILE_INTERVAL', 0.001))  # Seconds between stack samples
+    PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', 100))  # Newest profiles kept on disk
+    PROFILE_TOKEN_MAX_AGE = int(os.environ.get('PROFILE_TOKEN_MAX_AGE', 900))  # Seconds a (single-use) profiling link works
+    
     # Rate limiting
-    RATELIMIT_DEFAULT = '200 per day;50 per hour'
-    RATELIMIT_STORAGE_URI = 'memory://'
+    RATELIMIT_ENABLED = os.environ.get('RATELIMIT_ENABLED', 'True').lower() == 'true'
+    # No default limit: browsing and the navbar polls are never throttled.
+    # Login, registration, password reset and OTP POSTs get RATELIMIT_AUTH
+    # per client IP (app/rate_limits.py)
+    RATELIMIT_AUTH = os.environ.get('RATELIMIT_AUTH', '10 per minute;50 per hour')
+    # Counters live in a WAL-mode SQLite file shared by all workers (app/ratelimit_storage.py)
+    RATELIMIT_STORAGE_URI = os.environ.get('RATELIMIT_STORAGE_URI') or \
+        'sqlite:///' + os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'ratelimit.db')
+    RATELIMIT_STORAGE_OPTIONS = {'compaction_interval': 60}  # Seconds between expired-window sweeps
     
     # CORS settings for API
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', '*').split(',')
@@ -83,9 +167,14 @@ class Config:
     ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL', 'admin@example.com')
     ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD', 'admin123')
 
+    @classmethod
+    def init_app(cls, app):
+        """Per-environment setup, called by create_app()."""
+
 
 class DevelopmentConfig(Config):
     DEBUG = True
+    STATIC_FINGERPRINT = False  # Edited CSS/JS shows up without a restart
     SQLALCHEMY_ECHO = True
     WTF_CSRF_ENABLED = True
 
@@ -94,11 +183,17 @@ class TestingConfig(Config):
     TESTING = True
     WTF_CSRF_ENABLED = False
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    RATELIMIT_STORAGE_URI = 'memory://'
+    RATELIMIT_ENABLED = False
+    IMAGE_PROCESSING_MODE = 'sync'
+    COMPRESS_ENABLED = False
 
 
 class ProductionConfig(Config):
     SESSION_COOKIE_SECURE = True
     WTF_CSRF_SSL_STRICT = True
+    # Off unless asked for: each profiled request writes to PROFILE_FOLDER
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'False').lower() == 'true'
     
     # Security headers
     @classmethod
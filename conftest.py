@@ -0,0 +1,26 @@
+"""
+Shared test fixtures
+"""
+
+import pytest
+
+from app import create_app
+from app.models.models import db
+from config import TestingConfig
+
+
+@pytest.fixture(scope='session')
+def make_app():
+    """``make_app(path, create_tables=True, **overrides)``: the app on the SQLite file ``path``.
+
+    The config is TestingConfig with ``overrides``; ``create_tables=False``
+    is for databases something else (app/datagen.py) has already built.
+    """
+    def make_app(path, create_tables=True, **overrides):
+        config = type('FileConfig', (TestingConfig,), {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}', **overrides})
+        app = create_app(config)
+        if create_tables:
+            with app.app_context():
+                db.create_all(bind_key=None)
+        return app
+    return make_app
@@ -1,10 +1,20 @@
 from flask_wtf import FlaskForm
 from flask_wtf.file import FileField, FileAllowed
-from wtforms import StringField, PasswordField, TextAreaField, FloatField, IntegerField, SelectField, BooleanField
-from wtforms.validators import DataRequired, Email, EqualTo, Length, ValidationError, NumberRange, Optional, Regexp
+from wtforms import (StringField, PasswordField, TextAreaField, FloatField, IntegerField, SelectField, BooleanField,
+                     SelectMultipleField)
+from wtforms.widgets import CheckboxInput, ListWidget
+from wtforms.validators import (DataRequired, Email, EqualTo, InputRequired, Length, ValidationError, NumberRange,
+                                Optional, Regexp)
+from app.csrf import MaskedFormCSRF
 from app.models.models import User
+from app.shop_hours import DAYS
 
-class RegistrationForm(FlaskForm):
+class Form(FlaskForm):
+    """Base of the forms below: the CSRF field holds a masked token (app/csrf.py)."""
+    class Meta:
+        csrf_class = MaskedFormCSRF
+
+class RegistrationForm(Form):
     full_name = StringField('Full Name', validators=[DataRequired(), Length(min=2, max=100)])
     email = StringField('Email', validators=[DataRequired(), Email()])
     phone = StringField('Phone', validators=[Optional(), Length(max=20)])
@@ -17,25 +27,25 @@ class RegistrationForm(FlaskForm):
         if user:
             raise ValidationError('Email already registered. Please use a different email.')
 
-class LoginForm(FlaskForm):
+class LoginForm(Form):
     email = StringField('Email', validators=[DataRequired(), Email()])
     password = PasswordField('Password', validators=[DataRequired()])
 
-class ForgotPasswordForm(FlaskForm):
+class ForgotPasswordForm(Form):
     email = StringField('Email', validators=[DataRequired(), Email()])
 
-class VerifyOTPForm(FlaskForm):
+class VerifyOTPForm(Form):
     otp = StringField('OTP Code', validators=[DataRequired(), Length(min=6, max=6)])
 
-class ResetPasswordForm(FlaskForm):
+class ResetPasswordForm(Form):
     password = PasswordField('New Password', validators=[DataRequired(), Length(min=6)])
     confirm_password = PasswordField('Confirm Password', validators=[DataRequired(), EqualTo('password')])
 
-class ProfileForm(FlaskForm):
+class ProfileForm(Form):
     full_name = StringField('Full Name', validators=[DataRequired(), Length(min=2, max=100)])
     phone = StringField('Phone', validators=[Optional(), Length(max=20)])
 
-class ShopForm(FlaskForm):
+class ShopForm(Form):
     # Basic Information
     name = StringField('Shop Name', validators=[DataRequired(), Length(min=2, max=100)])
     description = TextAreaField('Description', validators=[Optional()])
@@ -61,6 +71,9 @@ class ShopForm(FlaskForm):
                              validators=[DataRequired(), Length(min=5, max=5)])
     closing_time = StringField('Closing Time (e.g., 21:00)', 
                              validators=[DataRequired(), Length(min=5, max=5)])
+    closed_days = SelectMultipleField('Closed On', coerce=int, validators=[Optional()],
+                                      choices=list(enumerate(DAYS)),
+                                      widget=ListWidget(prefix_label=False), option_widget=CheckboxInput())
     
     # Delivery Settings
     is_delivery_available = BooleanField('Offer Delivery Service', default=True)
@@ -145,15 +158,15 @@ class ShopForm(FlaskForm):
                     
         return True
 
-class ProductForm(FlaskForm):
+class ProductForm(Form):
     name = StringField('Product Name', validators=[DataRequired(), Length(min=2, max=100)])
     description = TextAreaField('Description', validators=[Optional()])
     price = FloatField('Price', validators=[DataRequired(), NumberRange(min=0.01)])
-    stock = IntegerField('Stock', validators=[DataRequired(), NumberRange(min=0)])
+    stock = IntegerField('Stock', validators=[InputRequired(), NumberRange(min=0)])  # DataRequired rejects 0
     category = StringField('Category', validators=[Optional(), Length(max=50)])
     image = FileField('Product Image', validators=[FileAllowed(['jpg', 'jpeg', 'png', 'gif', 'webp'], 'Images only!')])
 
-class ServiceForm(FlaskForm):
+class ServiceForm(Form):
     name = StringField('Service Name', validators=[DataRequired(), Length(min=2, max=100)])
     description = TextAreaField('Description', validators=[Optional()])
     price = FloatField('Price', validators=[DataRequired(), NumberRange(min=0.01)])
@@ -161,7 +174,7 @@ class ServiceForm(FlaskForm):
     category = StringField('Category', validators=[Optional(), Length(max=50)])
     image = FileField('Service Image', validators=[FileAllowed(['jpg', 'jpeg', 'png', 'gif', 'webp'], 'Images only!')])
 
-class CheckoutForm(FlaskForm):
+class CheckoutForm(Form):
     # Delivery Information
     delivery_option = SelectField('Delivery Option', 
                                 choices=[
@@ -245,7 +258,7 @@ class CheckoutForm(FlaskForm):
         return True
 
 
-class ReviewForm(FlaskForm):
+class ReviewForm(Form):
     """Form for submitting product/shop reviews."""
     RATING_CHOICES = [
         (5, '⭐⭐⭐⭐⭐ - Excellent'),
@@ -264,16 +277,6 @@ class ReviewForm(FlaskForm):
                             'aria-label': 'Select rating'
                         })
     
-    title = StringField('Review Title', 
-                       validators=[
-                           DataRequired(),
-                           Length(max=100)
-                       ],
-                       render_kw={
-                           'placeholder': 'Brief summary of your experience',
-                           'maxlength': '100'
-                       })
-    
     comment = TextAreaField('Your Review',
                           validators=[
                               DataRequired(),
@@ -285,8 +288,6 @@ class ReviewForm(FlaskForm):
                               'maxlength': '1000'
                           })
     
-    is_anonymous = BooleanField('Post as Anonymous', default=False)
-    
     def validate_rating(self, field):
         if field.data not in [1, 2, 3, 4, 5]:
             raise ValidationError('Please select a valid rating')
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic SHOP_SERV dataset for scale testing
+
+Creates the tables if needed, then inserts customers, shops, products,
+services, carts, orders, notifications and reviews with app/datagen.py. The same
+--seed and --until always give the same data. Every generated account's
+password is "password123".
+
+Usage:
+    python generate_data.py --database sqlite:///scale.db --orders 1000000
+    python generate_data.py --orders 20000 --customers 2000 --shops 100 --reset
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic dataset for scale testing')
+    parser.add_argument('--database', help='database URL (default: DATABASE_URL or the app database)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--orders', type=int, default=100000)
+    parser.add_argument('--customers', type=int, help='default: one per 10 orders')
+    parser.add_argument('--shops', type=int, help='default: one per 500 orders, at least 20')
+    parser.add_argument('--products-per-shop', type=int, default=20)
+    parser.add_argument('--services-per-shop', type=int, default=2)
+    parser.add_argument('--cart-ratio', type=float, default=0.2, help='share of customers with a cart')
+    parser.add_argument('--reviews', type=int, help='default: one per 5 orders')
+    parser.add_argument('--days', type=int, default=365, help='days of order history')
+    parser.add_argument('--until', type=datetime.fromisoformat, help='newest timestamp (default: today 00:00 UTC)')
+    parser.add_argument('--chunk-size', type=int, default=20000, help='rows per transaction')
+    parser.add_argument('--reset', action='store_true', help='drop and recreate all tables first')
+    args = parser.parse_args()
+
+    # Config reads DATABASE_URL at import time
+    if args.database:
+        os.environ['DATABASE_URL'] = args.database
+
+    from app import create_app
+    from app.datagen import generate
+    from app.models.models import db
+
+    app = create_app()
+    with app.app_context():
+        print(f"Database: {db.engine.url.render_as_string(hide_password=True)}")
+        if args.reset:
+            db.drop_all(bind_key=None)
+        db.create_all(bind_key=None)
+
+        start = time.perf_counter()
+        counts = generate(
+            db.engine, seed=args.seed, orders=args.orders,
+            customers=args.customers or max(args.orders // 10, 1),
+            shops=args.shops or max(args.orders // 500, 20),
+            products_per_shop=args.products_per_shop, services_per_shop=args.services_per_shop,
+            cart_ratio=args.cart_ratio, reviews=args.reviews if args.reviews is not None else args.orders // 5,
+            days=args.days, until=args.until, chunk_size=args.chunk_size,
+            report=lambda message: print(f"✓ {message}"),
+        )
+        if db.engine.url.get_backend_name() == 'sqlite':
+            with db.engine.begin() as conn:
+                conn.exec_driver_sql('ANALYZE')
+
+    print(f"\n{sum(counts.values()):,} rows in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
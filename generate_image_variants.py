@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Backfill responsive WebP/AVIF variants for uploads that have no manifest yet
+
+Usage:
+    python generate_image_variants.py [--force]
+"""
+
+import os
+import re
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from PIL import Image
+
+from config import Config
+from app.image_variants import build_variants, manifest_path
+
+IMAGE_FOLDERS = ('products', 'shops', 'services')
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+
+
+VARIANT_NAME = re.compile(r'_\d+w$')
+
+
+def is_original(filename):
+    root, ext = os.path.splitext(filename)
+    # Skip variant files (abc_320w.webp) and in-flight temporaries (abc.tmp.jpg)
+    return (ext.lower() in IMAGE_EXTENSIONS
+            and not VARIANT_NAME.search(root)
+            and not root.endswith('.tmp'))
+
+
+def generate_variants(upload_folder, force=False):
+    created = 0
+    for folder in IMAGE_FOLDERS:
+        folder_path = os.path.join(upload_folder, folder)
+        if not os.path.isdir(folder_path):
+            continue
+        for entry in os.scandir(folder_path):
+            if not entry.is_file() or not is_original(entry.name):
+                continue
+            if not force and os.path.exists(manifest_path(entry.path)):
+                continue
+            try:
+                with Image.open(entry.path) as img:
+                    build_variants(img, entry.path)
+                created += 1
+                print(f"✓ {folder}/{entry.name}")
+            except Exception as e:
+                print(f"✗ {folder}/{entry.name}: {e}")
+    return created
+
+
+if __name__ == "__main__":
+    force = '--force' in sys.argv
+    print("Generating responsive image variants...")
+    count = generate_variants(Config.UPLOAD_FOLDER, force=force)
+    print(f"\nDone! Variants generated for {count} image(s).")
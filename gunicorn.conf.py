@@ -0,0 +1,32 @@
+"""
+Gunicorn settings for SHOP_SERV.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+The app is preloaded in the master (GUNICORN_PRELOAD=false to turn it off),
+so workers share its templates, metadata and imported modules copy-on-write.
+Measure the effect with ``python benchmarks/bench_worker_memory.py``.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+accesslog = os.environ.get('GUNICORN_ACCESSLOG')
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded app is imported, before any fork
+    if server.cfg.preload_app:
+        from app.prefork import warm_app
+        warm_app(server.app.wsgi())
+
+
+def post_fork(server, worker):
+    # Without preload the worker imports the app itself, after this hook
+    if server.cfg.preload_app:
+        from app.prefork import reinit_after_fork
+        reinit_after_fork(server.app.wsgi())
@@ -0,0 +1,57 @@
+"""Add composite indexes for hot queries and unique cart constraints
+
+Revision ID: 20261019_add_hot_query_indexes
+Revises: 20261019_add_image_refs_table
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '20261019_add_hot_query_indexes'
+down_revision = '20261019_add_image_refs_table'
+branch_labels = None
+depends_on = None
+
+def _merge_duplicate_cart_rows(table, item_column):
+    # Keep the oldest row per (customer, item) with the summed quantity
+    op.execute(f"""
+        UPDATE {table} SET quantity = (
+            SELECT SUM(COALESCE(dup.quantity, 1)) FROM {table} dup
+            WHERE dup.customer_id = {table}.customer_id AND dup.{item_column} = {table}.{item_column}
+        )
+        WHERE id IN (
+            SELECT MIN(id) FROM {table} GROUP BY customer_id, {item_column} HAVING COUNT(*) > 1
+        )
+    """)
+    op.execute(f"""
+        DELETE FROM {table} WHERE id NOT IN (
+            SELECT MIN(id) FROM {table} GROUP BY customer_id, {item_column}
+        )
+    """)
+
+def upgrade():
+    op.create_index('ix_products_active_created', 'products', ['is_active', 'created_at'])
+    op.create_index('ix_products_shop_created', 'products', ['shop_id', 'created_at'])
+    op.create_index('ix_order_items_shop_id', 'order_items', ['shop_id', 'id'])
+    op.create_index('ix_orders_customer_created', 'orders', ['customer_id', 'created_at'])
+    op.create_index('ix_notifications_user_unread', 'notifications', ['user_id', 'is_read', 'created_at'])
+
+    _merge_duplicate_cart_rows('cart_items', 'product_id')
+    _merge_duplicate_cart_rows('service_cart_items', 'service_id')
+    with op.batch_alter_table('cart_items', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_cart_items_customer_product', ['customer_id', 'product_id'])
+    with op.batch_alter_table('service_cart_items', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_service_cart_items_customer_service', ['customer_id', 'service_id'])
+
+def downgrade():
+    with op.batch_alter_table('service_cart_items', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_service_cart_items_customer_service', type_='unique')
+    with op.batch_alter_table('cart_items', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_cart_items_customer_product', type_='unique')
+
+    op.drop_index('ix_notifications_user_unread', table_name='notifications')
+    op.drop_index('ix_orders_customer_created', table_name='orders')
+    op.drop_index('ix_order_items_shop_id', table_name='order_items')
+    op.drop_index('ix_products_shop_created', table_name='products')
+    op.drop_index('ix_products_active_created', table_name='products')
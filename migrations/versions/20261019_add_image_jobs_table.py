@@ -0,0 +1,31 @@
+"""Add image_jobs table for background image processing
+
+Revision ID: 20261019_add_image_jobs_table
+Revises: 20261019_add_otp_attempts_index
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261019_add_image_jobs_table'
+down_revision = '20261019_add_otp_attempts_index'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('image_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('image_path', sa.String(200), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False, server_default='pending'),
+        sa.Column('error', sa.String(500), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_image_jobs_image_path', 'image_jobs', ['image_path'])
+
+def downgrade():
+    op.drop_index('ix_image_jobs_image_path', table_name='image_jobs')
+    op.drop_table('image_jobs')
@@ -0,0 +1,31 @@
+"""Add image_refs table for content-addressed uploads
+
+Revision ID: 20261019_add_image_refs_table
+Revises: 20261019_add_image_jobs_table
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261019_add_image_refs_table'
+down_revision = '20261019_add_image_jobs_table'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('image_refs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('image_path', sa.String(200), nullable=False),
+        sa.Column('content_hash', sa.String(64), nullable=False),
+        sa.Column('refcount', sa.Integer(), nullable=False, server_default='1'),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('image_path')
+    )
+    op.create_index('ix_image_refs_content_hash', 'image_refs', ['content_hash'])
+
+def downgrade():
+    op.drop_index('ix_image_refs_content_hash', table_name='image_refs')
+    op.drop_table('image_refs')
@@ -0,0 +1,24 @@
+"""Add shops.inventory_key_hash for POS access to the inventory API
+
+Revision ID: 20261019_add_inventory_api_keys
+Revises: 20261019_add_shop_hours
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261019_add_inventory_api_keys'
+down_revision = '20261019_add_shop_hours'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('shops', sa.Column('inventory_key_hash', sa.String(length=64), nullable=True))
+    op.create_index('uq_shops_inventory_key_hash', 'shops', ['inventory_key_hash'], unique=True)
+
+def downgrade():
+    op.drop_index('uq_shops_inventory_key_hash', table_name='shops')
+    with op.batch_alter_table('shops', schema=None) as batch_op:
+        batch_op.drop_column('inventory_key_hash')
@@ -0,0 +1,22 @@
+"""Add shops.inventory_version, the inventory API's ETag
+
+Revision ID: 20261019_add_inventory_versions
+Revises: 20261019_add_inventory_api_keys
+Create Date: 2026-10-19 23:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261019_add_inventory_versions'
+down_revision = '20261019_add_inventory_api_keys'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('shops', sa.Column('inventory_version', sa.Integer(), nullable=False, server_default='0'))
+
+def downgrade():
+    with op.batch_alter_table('shops', schema=None) as batch_op:
+        batch_op.drop_column('inventory_version')
@@ -0,0 +1,26 @@
+"""Add indexes for order exports and per-order item lookups
+
+Revision ID: 20261019_add_order_export_indexes
+Revises: 20261019_add_hot_query_indexes
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '20261019_add_order_export_indexes'
+down_revision = '20261019_add_hot_query_indexes'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index('ix_orders_created_at', 'orders', ['created_at'])
+    op.create_index('ix_order_items_order_id', 'order_items', ['order_id'])
+    op.create_index('ix_service_order_items_order_id', 'service_order_items', ['order_id'])
+    op.create_index('ix_service_order_items_shop_id', 'service_order_items', ['shop_id', 'id'])
+
+def downgrade():
+    op.drop_index('ix_service_order_items_shop_id', table_name='service_order_items')
+    op.drop_index('ix_service_order_items_order_id', table_name='service_order_items')
+    op.drop_index('ix_order_items_order_id', table_name='order_items')
+    op.drop_index('ix_orders_created_at', table_name='orders')
@@ -0,0 +1,30 @@
+"""Add OTP attempt counter and lookup indexes
+
+Revision ID: 20261019_add_otp_attempts_index
+Revises: 20241110_add_reviews_table
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261019_add_otp_attempts_index'
+down_revision = '20241110_add_reviews_table'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table('otps', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.create_index('ix_otps_email_code_used', ['email', 'otp_code', 'is_used'])
+        batch_op.create_index('ix_otps_expires_at', ['expires_at'])
+
+    # Expired and used codes were never purged before; clear them out once
+    op.execute("DELETE FROM otps WHERE is_used = 1 OR expires_at <= CURRENT_TIMESTAMP")
+
+def downgrade():
+    with op.batch_alter_table('otps', schema=None) as batch_op:
+        batch_op.drop_index('ix_otps_expires_at')
+        batch_op.drop_index('ix_otps_email_code_used')
+        batch_op.drop_column('attempts')
@@ -0,0 +1,43 @@
+"""Add popularity scores to products and services, their listing indexes, and popularity_state
+
+The scores start at 0; the first run of refresh_popularity.py scores every
+existing order.
+
+Revision ID: 20261019_add_popularity_scores
+Revises: 20261019_add_rating_histograms
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261019_add_popularity_scores'
+down_revision = '20261019_add_rating_histograms'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('products', 'services'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('popularity', sa.Float(), nullable=False, server_default='0'))
+        op.create_index(f'ix_{table}_active_popularity', table, ['is_active', 'popularity', 'id'])
+
+    op.create_table(
+        'popularity_state',
+        sa.Column('name', sa.String(length=20), nullable=False),
+        sa.Column('last_item_id', sa.Integer(), nullable=False),
+        sa.Column('landmark', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('name'),
+    )
+
+
+def downgrade():
+    op.drop_table('popularity_state')
+
+    for table in ('services', 'products'):
+        op.drop_index(f'ix_{table}_active_popularity', table_name=table)
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('popularity')
@@ -0,0 +1,26 @@
+"""Add products.sku and the lookup indexes used by bulk product imports
+
+Revision ID: 20261019_add_product_sku
+Revises: 20261019_add_order_export_indexes
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261019_add_product_sku'
+down_revision = '20261019_add_order_export_indexes'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('products', sa.Column('sku', sa.String(length=64), nullable=True))
+    op.create_index('uq_products_shop_sku', 'products', ['shop_id', 'sku'], unique=True)
+    op.create_index('ix_products_shop_name', 'products', ['shop_id', 'name'])
+
+def downgrade():
+    op.drop_index('ix_products_shop_name', table_name='products')
+    op.drop_index('uq_products_shop_sku', table_name='products')
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_column('sku')
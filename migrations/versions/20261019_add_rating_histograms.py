@@ -0,0 +1,59 @@
+"""Add rating histograms to shops and products, review indexes, and backfill the aggregates
+
+Revision ID: 20261019_add_rating_histograms
+Revises: 20261019_add_product_sku
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261019_add_rating_histograms'
+down_revision = '20261019_add_product_sku'
+branch_labels = None
+depends_on = None
+
+RATINGS = range(1, 6)
+
+
+def _backfill(table, key, extra=''):
+    # review_count/average_rating were added without a server default and
+    # nothing maintained them, so derive everything from reviews once
+    def count(condition=''):
+        return f"(SELECT COUNT(*) FROM reviews r WHERE r.{key} = {table}.id{extra}{condition})"
+    histogram = ', '.join(f"rating_{rating}_count = {count(f' AND r.rating = {rating}')}" for rating in RATINGS)
+    op.execute(f"""
+        UPDATE {table} SET {histogram},
+            review_count = {count()},
+            average_rating = COALESCE((SELECT AVG(r.rating * 1.0) FROM reviews r
+                                       WHERE r.{key} = {table}.id{extra}), 0)
+    """)
+
+
+def upgrade():
+    for table in ('shops', 'products'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for rating in RATINGS:
+                batch_op.add_column(sa.Column(f'rating_{rating}_count', sa.Integer(), nullable=False,
+                                              server_default='0'))
+
+    op.create_index('uq_reviews_user_shop', 'reviews', ['user_id', 'shop_id'], unique=True)
+    op.create_index('uq_reviews_user_product', 'reviews', ['user_id', 'product_id'], unique=True)
+    op.create_index('ix_reviews_shop_rating', 'reviews', ['shop_id', 'rating'])
+    op.create_index('ix_reviews_product_rating', 'reviews', ['product_id', 'rating'])
+
+    _backfill('shops', 'shop_id', ' AND r.product_id IS NULL')
+    _backfill('products', 'product_id')
+
+
+def downgrade():
+    op.drop_index('ix_reviews_product_rating', table_name='reviews')
+    op.drop_index('ix_reviews_shop_rating', table_name='reviews')
+    op.drop_index('uq_reviews_user_product', table_name='reviews')
+    op.drop_index('uq_reviews_user_shop', table_name='reviews')
+
+    for table in ('products', 'shops'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for rating in reversed(RATINGS):
+                batch_op.drop_column(f'rating_{rating}_count')
@@ -0,0 +1,68 @@
+"""Add shop_hours weekly schedules and fill them from each shop's daily opening/closing time
+
+Revision ID: 20261019_add_shop_hours
+Revises: 20261019_add_popularity_scores
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261019_add_shop_hours'
+down_revision = '20261019_add_popularity_scores'
+branch_labels = None
+depends_on = None
+
+DAY = 24 * 60
+WEEK = 7 * DAY
+MAX_SPAN = DAY  # app/shop_hours.py; rows are never longer
+
+
+def _daily_intervals(opening_time, closing_time):
+    """Rows for the same hours every day, built as app.shop_hours.weekly_intervals() does."""
+    opens = opening_time.hour * 60 + opening_time.minute
+    length = (closing_time.hour * 60 + closing_time.minute - opens) % DAY or DAY
+    pieces = []
+    for start in range(opens, WEEK, DAY):
+        end = start + length
+        pieces += [(start, WEEK), (0, end - WEEK)] if end > WEEK else [(start, end)]
+    merged = []
+    for start, end in sorted(pieces):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(cut, min(cut + MAX_SPAN, end)) for start, end in merged for cut in range(start, end, MAX_SPAN)]
+
+
+def upgrade():
+    shop_hours = op.create_table(
+        'shop_hours',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('shop_id', sa.Integer(), nullable=False),
+        sa.Column('opens_at', sa.Integer(), nullable=False),
+        sa.Column('closes_at', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['shop_id'], ['shops.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_shop_hours_interval', 'shop_hours', ['opens_at', 'closes_at', 'shop_id'])
+    op.create_index('ix_shop_hours_shop', 'shop_hours', ['shop_id', 'opens_at', 'closes_at'])
+
+    shops = sa.table('shops', sa.column('id', sa.Integer), sa.column('opening_time', sa.Time),
+                     sa.column('closing_time', sa.Time))
+    conn = op.get_bind()
+    rows = []
+    for shop_id, opening_time, closing_time in conn.execute(
+            sa.select(shops.c.id, shops.c.opening_time, shops.c.closing_time)
+            .where(shops.c.opening_time.isnot(None), shops.c.closing_time.isnot(None))):
+        rows += [{'shop_id': shop_id, 'opens_at': opens_at, 'closes_at': closes_at}
+                 for opens_at, closes_at in _daily_intervals(opening_time, closing_time)]
+    if rows:
+        op.bulk_insert(shop_hours, rows)
+
+
+def downgrade():
+    op.drop_index('ix_shop_hours_shop', table_name='shop_hours')
+    op.drop_index('ix_shop_hours_interval', table_name='shop_hours')
+    op.drop_table('shop_hours')
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Recompute shop and product rating aggregates from the reviews table
+
+Checks every shop and product against its reviews, rewrites the rows that
+disagree, then checks again. Exits non-zero if any drift remains. Pass
+--check to only report.
+
+Usage:
+    python rebuild_ratings.py [--check] [--batch-size 5000]
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Import the app.py file as a module
+import importlib.util
+spec = importlib.util.spec_from_file_location("app_module", os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py"))
+app_module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(app_module)
+
+from app.models.models import Shop, Product
+from app.reviews import check_ratings, rebuild_ratings
+
+
+def run(check_only=False, batch_size=5000, report=print):
+    """Check (and unless ``check_only``, rebuild) both tables; return the rows still drifting."""
+    remaining = 0
+    for model in (Shop, Product):
+        name = model.__tablename__
+        drift = list(check_ratings(model, batch_size))
+        report(f"{name}: {len(drift)} row(s) out of step with their reviews")
+        for row in drift[:5]:
+            report(f"  {name} {row['id']}: stored {row['stored']['review_count']} review(s) averaging "
+                   f"{row['stored']['average_rating']:.2f}, expected {row['expected']['review_count']} "
+                   f"averaging {row['expected']['average_rating']:.2f}")
+        if check_only or not drift:
+            remaining += len(drift)
+            continue
+        fixed = rebuild_ratings(model, batch_size)
+        left = sum(1 for _ in check_ratings(model, batch_size))
+        report(f"{name}: rebuilt {fixed} row(s); {left} still out of step")
+        remaining += left
+    return remaining
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Recompute shop and product rating aggregates from reviews')
+    parser.add_argument('--check', action='store_true', help='only report rows whose aggregates are wrong')
+    parser.add_argument('--batch-size', type=int, default=5000, help='rows fetched and updated per round trip')
+    args = parser.parse_args()
+
+    with app_module.app.app_context():
+        remaining = run(args.check, args.batch_size)
+
+    print("\n" + "=" * 40)
+    if remaining:
+        print(f"❌ {remaining} row(s) out of step" + ("" if args.check else " after the rebuild"))
+        raise SystemExit(1)
+    print("✓ All rating aggregates match the reviews")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Add new orders to the product and service popularity scores
+
+Only order items written since the previous run are read, so this is cheap
+enough to run every few minutes, e.g. from cron:
+
+    */10 * * * * cd /srv/shopserv && python refresh_popularity.py --quiet
+
+Pass --rebuild to recount every order from scratch (after changing
+POPULARITY_HALF_LIFE_DAYS, or to drop orders cancelled after they were
+counted); "Most popular" lists are incomplete until it finishes.
+
+Usage:
+    python refresh_popularity.py [--rebuild] [--batch-size 5000] [--quiet]
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Import the app.py file as a module
+import importlib.util
+spec = importlib.util.spec_from_file_location("app_module", os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py"))
+app_module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(app_module)
+
+from app.popularity import SOURCES, rebuild_popularity, refresh_popularity
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Update product and service popularity scores from new orders')
+    parser.add_argument('--rebuild', action='store_true', help='reset the scores and recount every order')
+    parser.add_argument('--batch-size', type=int, default=None, help='order items scored per transaction')
+    parser.add_argument('--quiet', action='store_true', help='only print errors')
+    args = parser.parse_args()
+
+    with app_module.app.app_context():
+        for name in SOURCES:
+            score = rebuild_popularity if args.rebuild else refresh_popularity
+            scored = score(name, batch_size=args.batch_size)
+            if not args.quiet:
+                print(f"✓ {name}: scored {scored} order item(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -115,7 +115,8 @@ async function markNotificationRead(notificationId) {
         await fetch(`/api/notification/read/${notificationId}`, {
             method: 'POST',
             headers: {
-                'Content-Type': 'application/json'
+                'Content-Type': 'application/json',
+                'X-CSRFToken': getCSRFToken()
             }
         });
         loadNotifications();
@@ -126,10 +127,8 @@ async function markNotificationRead(notificationId) {
 
 // ==================== CART ====================
 function initCartBadge() {
+    // The page renders the current count; it is refetched after cart changes
     cartBadge = document.getElementById('cartBadge');
-    if (cartBadge) {
-        updateCartBadge();
-    }
 }
 
 async function updateCartBadge() {
@@ -225,10 +224,11 @@ async function deleteProduct(productId) {
     if (!confirm('Are you sure you want to delete this product?')) return;
     
     try {
-        const response = await fetch(`/shop/product/delete/${productId}`, {
+        const response = await fetch(`/shop/product/${productId}/delete`, {
             method: 'POST',
             headers: {
-                'Content-Type': 'application/json'
+                'Content-Type': 'application/json',
+                'X-CSRFToken': getCSRFToken()
             }
         });
         
@@ -251,7 +251,8 @@ async function updateOrderStatus(orderId, status) {
         const response = await fetch(`/shop/order/update-status/${orderId}`, {
             method: 'POST',
             headers: {
-                'Content-Type': 'application/json'
+                'Content-Type': 'application/json',
+                'X-CSRFToken': getCSRFToken()
             },
             body: JSON.stringify({ status })
         });
@@ -276,7 +277,8 @@ async function toggleUser(userId) {
         const response = await fetch(`/admin/user/toggle/${userId}`, {
             method: 'POST',
             headers: {
-                'Content-Type': 'application/json'
+                'Content-Type': 'application/json',
+                'X-CSRFToken': getCSRFToken()
             }
         });
         
@@ -299,7 +301,8 @@ async function toggleShop(shopId) {
         const response = await fetch(`/admin/shop/toggle/${shopId}`, {
             method: 'POST',
             headers: {
-                'Content-Type': 'application/json'
+                'Content-Type': 'application/json',
+                'X-CSRFToken': getCSRFToken()
             }
         });
         
@@ -322,7 +325,8 @@ async function toggleProduct(productId) {
         const response = await fetch(`/admin/product/toggle/${productId}`, {
             method: 'POST',
             headers: {
-                'Content-Type': 'application/json'
+                'Content-Type': 'application/json',
+                'X-CSRFToken': getCSRFToken()
             }
         });
         
@@ -432,14 +436,17 @@ function formatDate(dateString) {
 function filterProducts() {
     const searchInput = document.getElementById('searchInput');
     const categorySelect = document.getElementById('categorySelect');
+    const sortSelect = document.getElementById('sortSelect');
     
-    if (searchInput || categorySelect) {
+    if (searchInput || categorySelect || sortSelect) {
         const search = searchInput ? searchInput.value : '';
         const category = categorySelect ? categorySelect.value : '';
+        const sort = sortSelect ? sortSelect.value : '';
         
         const params = new URLSearchParams();
         if (search) params.append('search', search);
         if (category) params.append('category', category);
+        if (sort) params.append('sort', sort);
         
         window.location.href = `/products?${params.toString()}`;
     }
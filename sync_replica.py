@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Keep a local SQLite read replica in sync with the primary database
+
+For trying out read-replica routing without a real replica: point
+REPLICA_DATABASE_URL at a second SQLite file and run this next to the app.
+Each pass copies the primary onto the replica with SQLite's backup API.
+
+Usage:
+    REPLICA_DATABASE_URL=sqlite:///replica.db python sync_replica.py [--interval 2] [--once]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Import the app.py file as a module
+import importlib.util
+spec = importlib.util.spec_from_file_location("app_module", os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py"))
+app_module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(app_module)
+
+from app.models.models import db
+from app.replica_routing import REPLICA_BIND_KEY, sync_sqlite_replica
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Copy the primary SQLite database onto the replica')
+    parser.add_argument('--interval', type=float, default=2, help='seconds between syncs')
+    parser.add_argument('--once', action='store_true', help='sync once and exit')
+    args = parser.parse_args()
+
+    app = app_module.app
+    with app.app_context():
+        if REPLICA_BIND_KEY not in db.engines:
+            print("❌ REPLICA_DATABASE_URL is not set")
+            sys.exit(1)
+        primary, replica = db.engines[None].url, db.engines[REPLICA_BIND_KEY].url
+    if primary.get_backend_name() != 'sqlite' or replica.get_backend_name() != 'sqlite':
+        print("❌ Both databases must be SQLite files; use real replication for anything else")
+        sys.exit(1)
+
+    print(f"Syncing {primary.database} -> {replica.database}")
+    while True:
+        start = time.perf_counter()
+        sync_sqlite_replica(primary.database, replica.database)
+        print(f"✓ synced in {(time.perf_counter() - start) * 1000:.0f} ms")
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
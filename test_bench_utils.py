@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Test the utils micro-benchmark suite and its baseline comparison
+"""
+
+import importlib.util
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+spec = importlib.util.spec_from_file_location('bench_utils', os.path.join(ROOT, 'benchmarks', 'bench_utils.py'))
+bench_utils = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(bench_utils)
+
+
+def test_compare_flags_only_slowdowns_over_the_threshold(capsys):
+    baseline = {'fast': 1.0, 'steady': 1.0, 'slower': 1.0, 'faster': 1.0}
+    current = {'fast': 1.19, 'steady': 1.0, 'slower': 1.25, 'faster': 0.5, 'added': 2.0}
+    assert bench_utils.compare(baseline, current, threshold=20) == ['slower']
+    assert 'new' in capsys.readouterr().out
+
+
+def test_stored_baseline_covers_every_benchmark():
+    names = set(bench_utils.medians(bench_utils.BASELINE))
+    assert {'test_save_image_new', 'test_generate_qr_code', 'test_create_and_verify_otp[database]',
+            'test_build_email_message', 'test_format_currency_filter'} <= names
+
+
+def test_suite_runs_without_timing():
+    result = subprocess.run([sys.executable, '-m', 'pytest', '-q', '-p', 'no:cacheprovider', '--benchmark-disable',
+                             os.path.join('benchmarks', 'bench_utils.py')], cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout[-2000:]
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, '-q']))
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test gzip/Brotli response compression
+"""
+
+import gzip
+
+import brotli
+from flask import Flask, Response, jsonify, stream_with_context
+from flask_wtf.csrf import generate_csrf
+
+from app import compression
+from app.csrf import masked_csrf_token, unmask
+
+PAGE = '<html><body>' + '<div class="shop-card">Fresh bread</div>' * 200 + '</body></html>'
+
+
+def make_app(**config):
+    app = Flask(__name__)
+    app.config.update(SECRET_KEY='test', **config)
+    compression.init_app(app)
+
+    @app.route('/page')
+    def page():
+        return PAGE
+
+    @app.route('/form', methods=['GET', 'POST'])
+    def form():
+        return PAGE + f'<input name="csrf_token" value="{masked_csrf_token()}">'
+
+    @app.route('/tiny')
+    def tiny():
+        return jsonify(ok=True)
+
+    @app.route('/image')
+    def image():
+        return Response(b'\x89PNG' * 500, mimetype='image/png')
+
+    @app.route('/stream')
+    def stream():
+        def rows():
+            for i in range(100):
+                yield f'ORD{i:05d},delivered,120.00\n'
+        return Response(stream_with_context(rows()), mimetype='text/csv')
+
+    return app
+
+
+def test_prefers_brotli_and_falls_back_to_gzip():
+    client = make_app().test_client()
+
+    response = client.get('/page', headers={'Accept-Encoding': 'gzip, deflate, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert brotli.decompress(response.data).decode() == PAGE
+    assert response.content_length == len(response.data)
+
+    response = client.get('/page', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.data).decode() == PAGE
+
+    response = client.get('/page', headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.data.decode() == PAGE
+
+
+def test_threshold_allowlist_and_config():
+    client = make_app().test_client()
+    assert 'Content-Encoding' not in client.get('/tiny', headers={'Accept-Encoding': 'gzip'}).headers
+    assert 'Content-Encoding' not in client.get('/image', headers={'Accept-Encoding': 'gzip'}).headers
+
+    client = make_app(COMPRESS_ENABLED=False).test_client()
+    assert 'Content-Encoding' not in client.get('/page', headers={'Accept-Encoding': 'gzip'}).headers
+
+    client = make_app(COMPRESS_ALGORITHMS=('gzip',)).test_client()
+    assert client.get('/page', headers={'Accept-Encoding': 'br, gzip'}).headers['Content-Encoding'] == 'gzip'
+
+
+def test_pages_with_the_csrf_token_are_compressed_with_a_fresh_mask():
+    client = make_app().test_client()
+    gzip_only = {'Accept-Encoding': 'gzip'}
+    bodies = []
+    for response in [client.get('/form?search=tea', headers=gzip_only), client.post('/form', data={'q': 'tea'},
+                                                                                    headers=gzip_only)]:
+        assert response.headers['Content-Encoding'] == 'gzip'
+        bodies.append(gzip.decompress(response.data).decode())
+
+    # BREACH: the token bytes differ in every response, the token inside does not
+    tokens = [body[len(PAGE):].split('value="')[1].split('"')[0] for body in bodies]
+    assert tokens[0] != tokens[1]
+    with make_app().test_request_context():
+        assert unmask(tokens[0]) != tokens[0] and unmask('not-masked.token') == 'not-masked.token'
+        assert unmask(masked_csrf_token()) == generate_csrf()
+
+
+def test_streamed_response_is_compressed_incrementally():
+    client = make_app().test_client()
+    response = client.get('/stream', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    body = gzip.decompress(response.data).decode()
+    assert body.count('\n') == 100 and body.startswith('ORD00000,')
+
+    response = make_app(COMPRESS_STREAMS=False).test_client().get('/stream', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, '-q']))
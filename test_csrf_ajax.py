@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test that the AJAX POSTs in the templates and main.js carry the CSRF token
+"""
+
+import re
+from pathlib import Path
+
+import pytest
+
+from app.csrf import unmask
+from app.models.models import db, User, Shop, Product, CartItem, Notification, Order
+
+ROOT = Path(__file__).parent
+TOKEN = re.compile(r'<meta name="csrf-token" content="([^"]+)"')
+
+
+def fetch_posts(text):
+    """The option blocks of every ``fetch(..., {method: 'POST', ...})`` call."""
+    for match in re.finditer(r'fetch\(', text):
+        options = text[match.end():match.end() + 600]
+        if re.search(r"method:\s*'POST'", options.split('})')[0]):
+            yield options.split('})')[0]
+
+
+def test_every_fetch_post_sends_the_token():
+    sources = [ROOT / 'static' / 'js' / 'main.js', *sorted((ROOT / 'templates').rglob('*.html'))]
+    missing = [str(path.relative_to(ROOT)) for path in sources
+               for options in fetch_posts(path.read_text(encoding='utf-8')) if 'X-CSRFToken' not in options]
+    assert missing == []
+
+
+@pytest.fixture()
+def app(make_app, tmp_path):
+    app = make_app(tmp_path / 'shop.db', WTF_CSRF_ENABLED=True)
+    with app.app_context():
+        owner = User(email='owner@example.com', full_name='Owner', role='shopowner', password_hash='x')
+        customer = User(email='customer@example.com', full_name='Customer', role='customer')
+        customer.set_password('password123')
+        db.session.add_all([owner, customer])
+        db.session.flush()
+        shop = Shop(owner_id=owner.id, name='Corner Store')
+        db.session.add(shop)
+        db.session.flush()
+        product = Product(shop_id=shop.id, name='Tea', description='Tea', price=10, stock=50)
+        db.session.add(product)
+        db.session.flush()
+        db.session.add_all([CartItem(customer_id=customer.id, product_id=product.id, quantity=1),
+                            Notification(user_id=customer.id, message='Hello'),
+                            Order(order_number='ORD-1', customer_id=customer.id, total_amount=10,
+                                  shipping_address='x', status='pending')])
+        db.session.commit()
+    return app
+
+
+def test_ajax_posts_pass_with_the_header_and_fail_without(app):
+    client = app.test_client()
+    token = TOKEN.search(client.get('/login').get_data(as_text=True)).group(1)
+    response = client.post('/login', data={'email': 'customer@example.com', 'password': 'password123',
+                                           'csrf_token': token})
+    assert response.status_code == 302
+    token = TOKEN.search(client.get('/cart').get_data(as_text=True)).group(1)
+
+    posts = [('/cart/update/1', {'quantity': 2}), ('/api/notification/read/1', None),
+             ('/cancel-order/1', None), ('/cart/remove/1', None)]
+    for url, body in posts:
+        assert client.post(url, json=body).status_code == 400, url
+        response = client.post(url, json=body, headers={'X-CSRFToken': token})
+        assert response.status_code == 200 and response.get_json()['success'], url
+
+
+def test_tokens_are_masked_per_response(app):
+    client = app.test_client()
+    pages = [client.get('/login').get_data(as_text=True) for _ in range(2)]
+    meta = [TOKEN.search(page).group(1) for page in pages]
+    field = [re.search(r'name="csrf_token" type="hidden" value="([^"]+)"', page).group(1) for page in pages]
+    assert len({*meta, *field}) == 4
+
+    # The form's own field passes too, and so does the unmasked token
+    response = client.post('/login', data={'email': 'customer@example.com', 'password': 'password123',
+                                           'csrf_token': field[0]})
+    assert response.status_code == 302
+    assert client.post('/api/notification/read/1', headers={'X-CSRFToken': unmask(meta[1])}).status_code == 200
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, '-q']))
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test the synthetic data generator: determinism, volumes and consistency
+"""
+
+from datetime import datetime
+
+from sqlalchemy import create_engine, text
+
+from app.datagen import generate
+from app.models.models import db, Shop, Product
+from app.reviews import check_ratings
+
+UNTIL = datetime(2026, 10, 1)
+SIZES = dict(customers=200, shops=10, products_per_shop=5, services_per_shop=2, orders=1500, reviews=600,
+             chunk_size=400)
+
+
+def make_database(path, seed=7):
+    engine = create_engine(f'sqlite:///{path}')
+    db.metadata.create_all(engine, tables=[t for t in db.metadata.sorted_tables if t.info.get('bind_key') is None])
+    counts = generate(engine, seed=seed, until=UNTIL, **SIZES)
+    return engine, counts
+
+
+def dump(engine, table, skip=()):
+    with engine.connect() as conn:
+        rows = conn.execute(text(f'SELECT * FROM {table} ORDER BY id')).mappings().all()
+    return [{k: v for k, v in row.items() if k not in skip} for row in rows]
+
+
+def test_same_seed_gives_same_rows(tmp_path):
+    first, counts = make_database(tmp_path / 'a.db')
+    second, _ = make_database(tmp_path / 'b.db')
+    other, _ = make_database(tmp_path / 'c.db', seed=8)
+
+    for table in counts:
+        skip = ('password_hash',) if table == 'users' else ()
+        assert dump(first, table, skip) == dump(second, table, skip), table
+    assert dump(first, 'orders') != dump(other, 'orders')
+
+
+def test_volumes_and_consistency(tmp_path):
+    engine, counts = make_database(tmp_path / 'a.db')
+    assert counts['users'] == 210 and counts['shops'] == 10 and counts['orders'] == 1500
+    assert counts['products'] == 50 and counts['services'] == 20
+    assert counts['notifications'] == 1500
+    assert 1500 <= counts['order_items'] <= 4 * 1500
+
+    with engine.connect() as conn:
+        # Totals match the items; items point at products of the item's shop
+        mismatched = conn.execute(text('''
+            SELECT COUNT(*) FROM orders o WHERE ABS(o.total_amount - (
+                SELECT COALESCE(SUM(quantity * price), 0) FROM order_items WHERE order_id = o.id) - (
+                SELECT COALESCE(SUM(quantity * price), 0) FROM service_order_items WHERE order_id = o.id)) > 0.01
+        ''')).scalar()
+        assert mismatched == 0
+        assert conn.execute(text('SELECT COUNT(*) FROM order_items i JOIN products p ON p.id = i.product_id '
+                                 'WHERE p.shop_id != i.shop_id')).scalar() == 0
+        assert conn.execute(text("SELECT COUNT(*) FROM orders o JOIN users u ON u.id = o.customer_id "
+                                 "WHERE u.role != 'customer'")).scalar() == 0
+        assert conn.execute(text('SELECT MAX(created_at) FROM orders')).scalar() < str(UNTIL)
+        assert conn.execute(text('SELECT COUNT(*) FROM shops WHERE latitude IS NULL OR opening_time IS NULL')).scalar() == 0
+
+
+def test_reviews_are_unique_and_counted(make_app, tmp_path):
+    engine, counts = make_database(tmp_path / 'a.db')
+    assert counts['reviews'] == 600
+    with engine.connect() as conn:
+        assert conn.execute(text('SELECT COUNT(*) FROM (SELECT 1 FROM reviews GROUP BY user_id, shop_id, '
+                                 'product_id HAVING COUNT(*) > 1)')).scalar() == 0
+        assert conn.execute(text('SELECT COUNT(*) FROM reviews WHERE (shop_id IS NULL) = (product_id IS NULL)')
+                            ).scalar() == 0
+        assert 0 < conn.execute(text('SELECT COUNT(*) FROM reviews WHERE shop_id IS NOT NULL')).scalar() < 600
+        assert conn.execute(text('SELECT SUM(review_count) FROM products')).scalar() + \
+            conn.execute(text('SELECT SUM(review_count) FROM shops')).scalar() == 600
+
+    with make_app(tmp_path / 'a.db', create_tables=False).app_context():
+        assert list(check_ratings(Shop)) == [] and list(check_ratings(Product)) == []
+
+
+def test_appends_after_existing_rows(make_app, tmp_path):
+    engine, _ = make_database(tmp_path / 'a.db')
+    counts = generate(engine, seed=9, until=UNTIL, **SIZES)
+    with engine.connect() as conn:
+        assert conn.execute(text('SELECT COUNT(*) FROM orders')).scalar() == 2 * counts['orders']
+        assert conn.execute(text('SELECT COUNT(DISTINCT owner_id) FROM shops')).scalar() == 20
+
+    with make_app(tmp_path / 'a.db', create_tables=False).app_context():
+        assert list(check_ratings(Shop)) == [] and list(check_ratings(Product)) == []
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, '-q']))
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test memory-bounded image decoding and the background job pool
+"""
+
+import io
+import threading
+import time
+
+import pytest
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+
+from app import image_pipeline
+from app.image_pipeline import ImageTooLarge, get_job_status, open_image, process_image, submit_image
+from app.models.models import db
+
+
+def encoded(size, fmt):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, (200, 30, 30)).save(buffer, fmt)
+    buffer.seek(0)
+    return buffer
+
+
+def test_jpeg_is_drafted_to_a_fraction_of_its_size():
+    img = open_image(encoded((4000, 3000), 'JPEG'), max_size=(800, 800))
+    # DCT scaling keeps at least 2x the target: 4000x3000 -> 1/2 -> 2000x1500
+    assert img.size == (2000, 1500)
+    img.load()
+    assert img.size == (2000, 1500)
+
+
+def test_pixel_budget_is_checked_before_decoding():
+    with pytest.raises(ImageTooLarge):
+        open_image(encoded((4000, 3000), 'PNG'), max_pixels=5_000_000)
+
+    # The same budget admits a JPEG that only decodes at 1/2 scale
+    open_image(encoded((4000, 3000), 'JPEG'), max_pixels=5_000_000).close()
+
+
+def test_process_image_output_is_unchanged(tmp_path):
+    target = tmp_path / 'out.jpg'
+    process_image(encoded((4000, 3000), 'JPEG'), str(target), (800, 800), variants=False)
+    with Image.open(target) as img:
+        assert img.size == (800, 600)
+
+
+def test_job_status_is_written_off_the_pool_result_thread(make_app, tmp_path, monkeypatch):
+    app = make_app(tmp_path / 'shop.db', UPLOAD_FOLDER=str(tmp_path / 'uploads'),
+                   IMAGE_STAGING_FOLDER=str(tmp_path / 'staging'), IMAGE_PROCESSING_MODE='pool', IMAGE_VARIANTS=False)
+    threads = []
+    update_job = image_pipeline._update_job
+
+    def recording_update_job(*args, **kwargs):
+        threads.append(threading.current_thread().name)
+        update_job(*args, **kwargs)
+
+    monkeypatch.setattr(image_pipeline, '_update_job', recording_update_job)
+    with app.test_request_context():
+        image_path = submit_image(FileStorage(encoded((1600, 1200), 'JPEG'), 'photo.jpg'), 'products', 'photo.jpg')
+        # The job row is not committed yet: the status write has to wait for it
+        time.sleep(1)
+        db.session.commit()
+
+    with app.app_context():
+        for _ in range(100):
+            if get_job_status(image_path)['status'] != 'pending':
+                break
+            time.sleep(0.05)
+            db.session.remove()
+        assert get_job_status(image_path)['status'] == 'done'
+    assert threads and all(name.startswith('image-status') for name in threads)
+    with Image.open(tmp_path / 'uploads' / 'products' / 'photo.jpg') as img:
+        assert img.size == (800, 600)
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, '-q']))
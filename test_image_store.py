@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test content-addressed image storage and reference counting
+"""
+
+import io
+import os
+
+from flask import Flask
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+
+from app.models.models import db, ImageRef, User, Shop, Product
+import utils
+
+
+def make_app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI='sqlite://',
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        UPLOAD_FOLDER=str(tmp_path),
+        ALLOWED_EXTENSIONS={'png', 'jpg', 'jpeg'},
+        IMAGE_PROCESSING_MODE='sync',
+        IMAGE_VARIANTS=False,
+    )
+    db.init_app(app)
+    return app
+
+
+def upload(color, filename='photo.jpg'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (40, 30), color).save(buffer, 'JPEG')
+    buffer.seek(0)
+    return FileStorage(buffer, filename=filename)
+
+
+def test_identical_uploads_share_one_file(tmp_path):
+    app = make_app(tmp_path)
+    with app.app_context():
+        db.create_all()
+
+        first = utils.save_image(upload('red'), 'products')
+        second = utils.save_image(upload('red', 'PHOTO.JPG'), 'products')
+        other = utils.save_image(upload('blue'), 'products')
+        db.session.commit()
+
+        assert first == second != other
+        assert len(os.listdir(tmp_path / 'products')) == 2
+        assert ImageRef.query.filter_by(image_path=first).one().refcount == 2
+
+        utils.delete_image(first)
+        db.session.commit()
+        assert os.path.exists(tmp_path / first)
+
+        utils.delete_image(second)
+        db.session.commit()
+        assert not os.path.exists(tmp_path / first)
+        assert ImageRef.query.filter_by(image_path=first).first() is None
+
+
+def test_legacy_images_without_refs_are_deleted(tmp_path):
+    app = make_app(tmp_path)
+    with app.app_context():
+        db.create_all()
+        os.makedirs(tmp_path / 'products')
+        (tmp_path / 'products' / 'legacy.jpg').write_bytes(b'x')
+
+        utils.delete_image('products/legacy.jpg')
+        # Unlinked on commit only: a rolled-back change keeps its image
+        assert os.path.exists(tmp_path / 'products' / 'legacy.jpg')
+        db.session.rollback()
+        db.session.commit()
+        assert os.path.exists(tmp_path / 'products' / 'legacy.jpg')
+
+        utils.delete_image('products/legacy.jpg')
+        db.session.commit()
+        assert not os.path.exists(tmp_path / 'products' / 'legacy.jpg')
+
+
+def test_rejected_replacement_keeps_the_old_image(make_app, tmp_path):
+    app = make_app(tmp_path / 'shop.db', UPLOAD_FOLDER=str(tmp_path / 'uploads'), IMAGE_VARIANTS=False,
+                   IMAGE_MAX_PIXELS=10_000)
+    with app.app_context():
+        owner = User(email='owner@example.com', full_name='Owner', role='shopowner')
+        owner.set_password('password123')
+        db.session.add(owner)
+        db.session.flush()
+        shop = Shop(owner_id=owner.id, name='Bakery')
+        db.session.add(shop)
+        db.session.flush()
+        image = utils.save_image(upload('red'), 'products')
+        db.session.add(Product(shop_id=shop.id, name='Bread', price=40, stock=5, image=image))
+        db.session.commit()
+
+    client = app.test_client()
+    client.post('/login', data={'email': 'owner@example.com', 'password': 'password123'})
+    buffer = io.BytesIO()
+    Image.new('RGB', (200, 200), 'blue').save(buffer, 'PNG')
+    buffer.seek(0)
+    response = client.post('/shop/product/edit/1', data={'name': 'Bread', 'price': '40', 'stock': '5',
+                                                         'image': (buffer, 'huge.png')},
+                           headers={'Referer': '/shop/product/edit/1'}, follow_redirects=True)
+    assert 'Please upload a smaller image' in response.get_data(as_text=True)
+    with app.app_context():
+        assert db.session.get(Product, 1).image == image
+        assert ImageRef.query.filter_by(image_path=image).one().refcount == 1
+    assert os.path.exists(tmp_path / 'uploads' / image)
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, '-q']))
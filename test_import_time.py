@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Test that importing app.py stays cheap: no eager heavy dependencies, and a time budget
+"""
+
+import importlib.util
+import os
+
+BENCHMARK = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'bench_import_time.py')
+
+# About twice the measured time (~300 ms under -X importtime); eager
+# imports of Stripe, Flask-Migrate etc. used to put it at ~470 ms
+IMPORT_BUDGET_MS = float(os.environ.get('IMPORT_BUDGET_MS', 600))
+
+
+def load_benchmark():
+    spec = importlib.util.spec_from_file_location('bench_import_time', BENCHMARK)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_heavy_modules_load_on_first_use():
+    _, eager = load_benchmark().import_app()
+    assert eager == []
+
+
+def test_import_time_within_budget():
+    bench = load_benchmark()
+    # Best of three, to ride out a busy machine
+    best = min(bench.total_ms(bench.import_app()[0]) for _ in range(3))
+    assert best < IMPORT_BUDGET_MS, f"importing app.py took {best:.0f} ms (budget {IMPORT_BUDGET_MS:.0f} ms)"
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, '-q']))
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Test the batch stock/price API and its inventory ETag
+"""
+
+import re
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+from app.models.models import db, User, Shop, Product
+
+CONFIG = {'COMPRESS_ENABLED': True, 'INVENTORY_BATCH_MAX': 10}
+
+
+def seed(app):
+    with app.app_context():
+        for n, email in enumerate(['owner@example.com', 'other@example.com', 'customer@example.com']):
+            user = User(email=email, full_name=email, role='customer' if n == 2 else 'shopowner')
+            user.set_password('password123')
+            db.session.add(user)
+            db.session.flush()
+            if n < 2:
+                shop = Shop(owner_id=user.id, name=f'Shop {n}')
+                db.session.add(shop)
+                db.session.flush()
+                db.session.add_all(Product(shop_id=shop.id, name=f'Tea {n}-{i}', price=100 + i, stock=10,
+                                           sku=f'T{i}') for i in range(30))
+        db.session.commit()
+    return app
+
+
+@pytest.fixture()
+def app(make_app, tmp_path):
+    return seed(make_app(tmp_path / 'shop.db', **CONFIG))
+
+
+def login(app, email='owner@example.com'):
+    client = app.test_client()
+    assert client.post('/login', data={'email': email, 'password': 'password123'}).status_code == 302
+    return client
+
+
+def product(app, shop, sku):
+    with app.app_context():
+        return db.session.execute(db.select(Product.stock, Product.price).join(Shop)
+                                  .where(Shop.name == shop, Product.sku == sku)).one()
+
+
+def test_batch_applies_valid_items_in_one_statement(app):
+    client = login(app)
+    with app.app_context():
+        ids = [p.id for p in Product.query.filter(Product.name.like('Tea 0-%')).order_by(Product.id)]
+        other_id = Product.query.filter_by(name='Tea 1-0').one().id
+
+    updates = []
+    with app.app_context():
+        listener = lambda conn, cursor, statement, params, context, executemany: (
+            statement.startswith('UPDATE products') and updates.append(executemany))
+        event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        response = client.post('/api/shop/inventory', json=[
+            {'product_id': ids[0], 'stock': 3},
+            {'sku': 'T1', 'price': 149.5, 'stock': '7'},
+            {'product_id': ids[2], 'stock': 10, 'price': 102},  # already so
+            {'product_id': ids[3], 'price': 0},
+            {'product_id': other_id, 'stock': 1},
+            {'sku': 'T0', 'stock': 4},
+            {'product_id': ids[4]},
+            {'product_id': ids[5], 'stock': 2.5},
+        ])
+    finally:
+        with app.app_context():
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert not body['success'] and (body['updated'], body['unchanged'], body['failed']) == (2, 1, 5)
+    assert [r['status'] for r in body['results']] == ['updated', 'updated', 'unchanged', 'error', 'error',
+                                                      'error', 'error', 'error']
+    messages = [r.get('message') for r in body['results']]
+    assert messages[3] == 'price must be at least 0.01'
+    assert messages[4] == 'Product not found in your shop'
+    assert messages[5] == 'Duplicate of item 0'
+    assert messages[7] == 'stock must be a whole number'
+    assert updates == [True]  # One executemany for the whole batch
+
+    assert tuple(product(app, 'Shop 0', 'T0')) == (3, 100)
+    assert tuple(product(app, 'Shop 0', 'T1')) == (7, 149.5)
+    assert tuple(product(app, 'Shop 1', 'T0')) == (10, 100)
+
+
+def test_inventory_etag_changes_once_per_batch(app):
+    client = login(app)
+    first = client.get('/api/shop/inventory', headers={'Accept-Encoding': 'gzip'})
+    assert first.status_code == 200 and first.headers['Content-Encoding'] == 'gzip'
+    etag = first.headers['ETag']
+    assert etag.endswith('-gzip"')
+
+    cached = client.get('/api/shop/inventory', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert cached.status_code == 304 and cached.headers['ETag'] == etag
+
+    batch = client.post('/api/shop/inventory', json={'items': [{'sku': f'T{i}', 'stock': 1} for i in range(10)]})
+    assert batch.get_json()['updated'] == 10
+    version = batch.get_json()['version']
+
+    fresh = client.get('/api/shop/inventory', headers={'If-None-Match': etag})
+    assert fresh.status_code == 200
+    assert fresh.headers['ETag'] == f'"{version}"' and fresh.get_json()['version'] == version
+    stocks = {row['sku']: row['stock'] for row in fresh.get_json()['products']}
+    assert len(stocks) == 30 and stocks['T9'] == 1 and stocks['T10'] == 10
+
+    # Nothing changed: same version
+    assert client.post('/api/shop/inventory', json=[{'sku': 'T0', 'stock': 1}]).get_json()['version'] == version
+
+
+def test_inventory_etag_follows_writes_stamped_before_the_last_batch(app):
+    client = login(app)
+    etag = client.get('/api/shop/inventory').headers['ETag']
+    other = login(app, 'other@example.com').get('/api/shop/inventory').headers['ETag']
+    with app.app_context():
+        # A checkout that stamped updated_at before waiting for the write lock
+        tea = db.session.execute(db.select(Product).join(Shop).where(Shop.name == 'Shop 0', Product.sku == 'T0')).scalar()
+        tea.stock -= 1
+        tea.updated_at = datetime(2000, 1, 1)
+        db.session.commit()
+
+    assert client.get('/api/shop/inventory', headers={'If-None-Match': etag}).status_code == 200
+    assert login(app, 'other@example.com').get('/api/shop/inventory', headers={'If-None-Match': other}).status_code == 304
+
+
+def test_out_of_range_numbers_fail_only_their_item(app):
+    client = login(app)
+    body = '[{"sku": "T0", "stock": 1e999}, {"sku": "T1", "stock": Infinity}, {"sku": "T2", "price": -Infinity},' \
+           ' {"sku": "T3", "stock": 99999999999999999999}, {"sku": "T4", "price": NaN}, {"sku": "T5", "stock": 5}]'
+    response = client.post('/api/shop/inventory', data=body, content_type='application/json')
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert [r['status'] for r in results] == ['error'] * 5 + ['updated']
+    assert [r['message'] for r in results[:5]] == ['stock must be a number', 'stock must be a number',
+                                                  'price must be a number', 'stock is too large',
+                                                  'price must be a number']
+    assert tuple(product(app, 'Shop 0', 'T5')) == (5, 105)
+
+
+def test_pos_clients_use_an_api_key_and_browsers_the_csrf_token(make_app, tmp_path):
+    app = seed(make_app(tmp_path / 'shop.db', **CONFIG, WTF_CSRF_ENABLED=True))
+    token = re.compile(r'<meta name="csrf-token" content="([^"]+)"')
+    browser = app.test_client()
+    csrf = token.search(browser.get('/login').get_data(as_text=True)).group(1)
+    browser.post('/login', data={'email': 'owner@example.com', 'password': 'password123', 'csrf_token': csrf})
+    page = browser.get('/shop/products/import').get_data(as_text=True)
+    csrf = token.search(page).group(1)
+    page = browser.post('/shop/inventory/api-key', data={'csrf_token': csrf}, follow_redirects=True)
+    key = re.search(r'it is not shown again\): ([\w-]+)', page.get_data(as_text=True)).group(1)
+
+    pos = app.test_client()
+    response = pos.post('/api/shop/inventory', json=[{'sku': 'T0', 'stock': 4}],
+                        headers={'Authorization': f'Bearer {key}'})
+    assert response.status_code == 200 and response.get_json()['updated'] == 1
+    assert pos.get('/api/shop/inventory', headers={'Authorization': f'Bearer {key}'}).status_code == 200
+    response = pos.post('/api/shop/inventory', json=[{'sku': 'T0', 'stock': 5}],
+                        headers={'Authorization': 'Bearer wrong'})
+    assert response.status_code == 401 and not response.get_json()['success']
+    assert pos.post('/api/shop/inventory', json=[{'sku': 'T0', 'stock': 5}]).status_code == 401
+
+    # The owner's browser session still needs the CSRF token, and gets JSON errors
+    response = browser.post('/api/shop/inventory', json=[{'sku': 'T0', 'stock': 5}])
+    assert response.status_code == 400 and 'CSRF' in response.get_json()['message']
+    response = browser.post('/api/shop/inventory', json=[{'sku': 'T0', 'stock': 5}], headers={'X-CSRFToken': csrf})
+    assert response.status_code == 200 and tuple(product(app, 'Shop 0', 'T0')) == (5, 100)
+
+
+def test_bad_requests(app):
+    client = login(app)
+    assert client.post('/api/shop/inventory', data='nope', content_type='application/json').status_code == 400
+    assert client.post('/api/shop/inventory', json={'items': []}).status_code == 400
+    assert client.post('/api/shop/inventory', json=[{'sku': 'T0', 'stock': 1}] * 11).status_code == 413
+    assert login(app, 'customer@example.com').get('/api/shop/inventory').status_code == 403
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, '-q']))
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test the load-test harness: summary maths, mail/SMS stubs and a short run
+"""
+
+import importlib.util
+import os
+
+import pytest
+
+from app import create_app
+from utils import send_email, send_sms
+
+spec = importlib.util.spec_from_file_location(
+    'load_test', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'load_test.py'))
+load_test = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(load_test)
+
+
+def test_summary_percentiles_and_error_rates():
+    recorder = load_test.Recorder()
+    for ms in range(1, 101):
+        recorder.record('customer.browse', ms / 1000, 200)
+    recorder.record('customer.checkout', 0.5, 200, error='success=false')
+    recorder.record('customer.checkout', 0.5, 'error', error='ConnectionRefusedError')
+
+    summary = recorder.summary(elapsed=10)
+    browse = summary['steps']['customer.browse']
+    assert browse['requests'] == 100 and browse['rps'] == 10 and browse['errors'] == 0
+    assert browse['latency_ms']['p50'] == pytest.approx(50.5)
+    assert browse['latency_ms']['p99'] == pytest.approx(99.01)
+    assert browse['latency_ms']['max'] == 100
+
+    checkout = summary['steps']['customer.checkout']
+    assert checkout['error_rate'] == 1 and checkout['first_error'] == 'success=false'
+    assert checkout['statuses'] == {'200': 1, 'error': 1}
+    assert summary['total']['requests'] == 102 and summary['total']['errors'] == 2
+
+
+def test_stubs_receive_mail_and_sms():
+    smtp, sms = load_test.start(load_test.SMTPStub()), load_test.start(load_test.SMSStub())
+    try:
+        app = create_app('testing')
+        app.config.update(MAIL_SERVER='127.0.0.1', MAIL_PORT=smtp.server_address[1], MAIL_USE_TLS=False,
+                          MAIL_USE_SSL=False, MAIL_USERNAME='loadtest@shopserv.local', MAIL_PASSWORD='stub',
+                          FAST2SMS_API_KEY='stub',
+                          FAST2SMS_API_URL=f'http://127.0.0.1:{sms.server_address[1]}/dev/bulkV2')
+        with app.app_context():
+            assert send_email('customer@example.com', 'Hello', 'Body', '<p>Body</p>')
+            assert send_sms('9876543210', 'Hello')
+        assert smtp.messages == 1 and sms.messages == 1
+    finally:
+        smtp.shutdown()
+        sms.shutdown()
+
+
+def test_short_run_under_gunicorn(tmp_path):
+    output = tmp_path / 'load.json'
+    summary = load_test.main(['--orders', '600', '--duration', '2', '--customers', '1', '--owners', '1',
+                              '--admins', '1', '--workers', '1', '--threads', '2', '--output', str(output)])
+    assert output.exists()
+    steps = summary['steps']
+    for step in ('customer.login', 'customer.browse', 'customer.search', 'customer.add_to_cart',
+                 'customer.confirm_qr_payment', 'owner.shop_orders', 'owner.update_order_status',
+                 'admin.admin_dashboard'):
+        assert steps[step]['requests'] > 0, step
+        assert steps[step]['errors'] == 0, steps[step].get('first_error')
+    assert 'customer.checkout' in steps
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, '-q']))
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test the streaming CSV/JSONL order exports
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+
+from app.datagen import generate
+from app.models.models import db, User
+from app.order_export import ADMIN_COLUMNS, SHOP_COLUMNS, admin_orders_query, generate_rows, parse_filters
+from werkzeug.datastructures import MultiDict
+
+UNTIL = datetime(2026, 10, 1)
+
+
+@pytest.fixture(scope='module')
+def app(make_app, tmp_path_factory):
+    app = make_app(tmp_path_factory.mktemp('export') / 'shop.db')
+    with app.app_context():
+        generate(db.engine, seed=3, customers=100, shops=5, products_per_shop=5, services_per_shop=2,
+                 orders=1200, days=90, until=UNTIL)
+        admin = User(email='admin@example.com', full_name='Admin', role='admin')
+        admin.set_password('password123')
+        db.session.add(admin)
+        db.session.commit()
+    return app
+
+
+def login(app, email):
+    client = app.test_client()
+    assert client.post('/login', data={'email': email, 'password': 'password123'}).status_code == 302
+    return client
+
+
+def scalar(app, sql, **params):
+    with app.app_context():
+        return db.session.execute(text(sql), params).scalar()
+
+
+def test_admin_csv_export_applies_date_and_status_filters(app):
+    client = login(app, 'admin@example.com')
+    response = client.get('/admin/orders/export?start=2026-08-01&end=2026-08-31&status=delivered,cancelled')
+    assert response.status_code == 200 and response.is_streamed
+    assert response.mimetype == 'text/csv'
+    assert 'filename=orders-2026-08-01-to-2026-08-31.csv' in response.headers['Content-Disposition']
+
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    expected = scalar(app, "SELECT COUNT(*) FROM orders WHERE created_at >= '2026-08-01' AND created_at < '2026-09-01' "
+                           "AND status IN ('delivered', 'cancelled')")
+    assert 0 < len(rows) == expected
+    assert list(rows[0]) == ADMIN_COLUMNS
+    assert {row['status'] for row in rows} <= {'delivered', 'cancelled'}
+    assert all('2026-08-01' <= row['created_at'] < '2026-09-01' for row in rows)
+    assert [row['created_at'] for row in rows] == sorted(row['created_at'] for row in rows)
+    assert sum(int(row['product_items']) + int(row['service_items']) for row in rows) > 0
+
+
+def test_shop_jsonl_export_only_has_the_owners_items(app):
+    owner_email, shop_id = None, None
+    with app.app_context():
+        owner_email, shop_id = db.session.execute(text(
+            'SELECT u.email, s.id FROM users u JOIN shops s ON s.owner_id = u.id ORDER BY s.id LIMIT 1')).one()
+    response = login(app, owner_email).get('/shop/orders/export?format=jsonl')
+    assert response.status_code == 200 and response.mimetype == 'application/x-ndjson'
+
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    expected = scalar(app, 'SELECT (SELECT COUNT(*) FROM order_items WHERE shop_id = :s) + '
+                           '(SELECT COUNT(*) FROM service_order_items WHERE shop_id = :s)', s=shop_id)
+    assert len(rows) == expected and list(rows[0]) == SHOP_COLUMNS
+    assert {row['item_type'] for row in rows} == {'product', 'service'}
+    assert all(row['line_total'] == pytest.approx(row['quantity'] * row['price']) for row in rows)
+    names = {row['item_name'] for row in rows}
+    other_shop_names = scalar(app, 'SELECT COUNT(*) FROM products WHERE shop_id = :s AND name IN (%s)' % ','.join(
+        f"'{name}'" for name in names), s=shop_id)
+    assert other_shop_names > 0
+
+
+def test_bad_filters_and_other_roles_are_rejected(app):
+    client = login(app, 'admin@example.com')
+    assert client.get('/admin/orders/export?format=xlsx').status_code == 400
+    assert client.get('/admin/orders/export?start=yesterday').status_code == 400
+    assert client.get('/admin/orders/export?start=2026-09-02&end=2026-09-01').status_code == 400
+    customer_email = scalar(app, "SELECT email FROM users WHERE role = 'customer' AND is_active ORDER BY id LIMIT 1")
+    customer = login(app, customer_email)
+    assert customer.get('/admin/orders/export').status_code == 403
+    assert customer.get('/shop/orders/export').status_code == 403
+
+
+def test_rows_stream_in_batches(app):
+    with app.app_context():
+        filters = parse_filters(MultiDict({'format': 'jsonl'}))
+        chunks = list(generate_rows(admin_orders_query(filters), ADMIN_COLUMNS, 'jsonl', batch_size=100))
+    assert len(chunks) == 12 and all(chunk.count('\n') == 100 for chunk in chunks)
+
+
+def test_csv_cells_cannot_start_formulas(app):
+    with app.app_context():
+        db.session.execute(text("UPDATE users SET full_name = '=HYPERLINK(\"x\")' WHERE id = "
+                                "(SELECT customer_id FROM orders ORDER BY created_at, id LIMIT 1)"))
+        db.session.commit()
+    text_body = login(app, 'admin@example.com').get('/admin/orders/export').get_data(as_text=True)
+    first = next(csv.DictReader(io.StringIO(text_body)))
+    assert first['customer_name'] == '\'=HYPERLINK("x")'
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, '-q']))
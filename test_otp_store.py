@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test the OTP stores (memory and database backends)
+"""
+
+import time
+
+from flask import Flask
+
+from app.models.models import db, OTP
+from app.otp_store import MemoryOTPStore, DatabaseOTPStore, get_otp_store
+
+
+def make_app(**overrides):
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI='sqlite://',
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        **overrides
+    )
+    db.init_app(app)
+    return app
+
+
+def test_memory_store_consumes_code_once():
+    store = MemoryOTPStore(ttl_seconds=60)
+    store.issue('a@example.com', '123456')
+    assert store.verify('a@example.com', '123456')
+    assert not store.verify('a@example.com', '123456')
+
+
+def test_memory_store_expires_codes():
+    store = MemoryOTPStore(ttl_seconds=0.01)
+    store.issue('a@example.com', '123456')
+    time.sleep(0.02)
+    assert store.purge_expired() == 1
+    assert not store.verify('a@example.com', '123456')
+
+
+def test_memory_store_locks_after_max_attempts():
+    store = MemoryOTPStore(ttl_seconds=60, max_attempts=3)
+    store.issue('a@example.com', '123456')
+    for _ in range(3):
+        assert not store.verify('a@example.com', '000000')
+    assert not store.verify('a@example.com', '123456')
+    assert len(store) == 0
+
+
+def test_database_store_verify_and_sweep():
+    app = make_app(OTP_STORE='database', OTP_MAX_ATTEMPTS=2)
+    with app.app_context():
+        db.create_all()
+        store = get_otp_store()
+        assert isinstance(store, DatabaseOTPStore)
+
+        store.issue('a@example.com', '123456')
+        assert not store.verify('a@example.com', '000000')
+        assert store.verify('a@example.com', '123456')
+        assert not store.verify('a@example.com', '123456')
+
+        store.issue('b@example.com', '654321')
+        assert not store.verify('b@example.com', '000000')
+        assert not store.verify('b@example.com', '000000')
+        # Attempts exhausted, the right code is refused too
+        assert not store.verify('b@example.com', '654321')
+
+        assert store.purge_expired() == 1  # the used code for a@example.com
+        assert OTP.query.count() == 1
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, '-q']))
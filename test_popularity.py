@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test popularity scores: incremental refresh, time decay and the indexed sort
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import popularity
+from app.models.models import db, User, Shop, Product, Service, Order, OrderItem, ServiceOrderItem, PopularityState
+from app.popularity import REBASE_HALVINGS, rebuild_popularity, refresh_popularity
+from app.routes.main import _sorted
+
+NOW = datetime(2026, 10, 19, 12, 0)
+
+
+@pytest.fixture()
+def app(make_app, tmp_path):
+    app = make_app(tmp_path / 'shop.db', POPULARITY_HALF_LIFE_DAYS=7)
+    with app.app_context():
+        owner = User(email='owner@example.com', full_name='Owner', role='shopowner', password_hash='x')
+        customer = User(email='customer@example.com', full_name='Customer', role='customer', password_hash='x')
+        db.session.add_all([owner, customer])
+        db.session.flush()
+        shop = Shop(owner_id=owner.id, name='Corner Store')
+        db.session.add(shop)
+        db.session.flush()
+        db.session.add_all(Product(shop_id=shop.id, name=name, description=name, price=10, stock=50,
+                                   created_at=NOW - timedelta(days=i))
+                           for i, name in enumerate(['Old Hit', 'New Hit', 'Slow Mover']))
+        db.session.add_all(Service(shop_id=shop.id, name=name, description=name, price=10,
+                                   created_at=NOW - timedelta(days=i))
+                           for i, name in enumerate(['Haircut', 'Shave']))
+        db.session.commit()
+    return app
+
+
+def place_order(items, days_ago=0, status='pending', services=None):
+    """``items``/``services``: {name: quantity}."""
+    customer = User.query.filter_by(role='customer').one()
+    order = Order(order_number=f'ORD-{Order.query.count() + 1}', customer_id=customer.id, total_amount=10,
+                  shipping_address='x', status=status, created_at=NOW - timedelta(days=days_ago))
+    db.session.add(order)
+    db.session.flush()
+    for name, quantity in items.items():
+        product = Product.query.filter_by(name=name).one()
+        db.session.add(OrderItem(order_id=order.id, product_id=product.id, shop_id=product.shop_id,
+                                 quantity=quantity, price=10))
+    for name, quantity in (services or {}).items():
+        service = Service.query.filter_by(name=name).one()
+        db.session.add(ServiceOrderItem(order_id=order.id, service_id=service.id, shop_id=service.shop_id,
+                                        quantity=quantity, price=10))
+    db.session.commit()
+
+
+def scores():
+    return {p.name: p.popularity for p in Product.query}
+
+
+def test_refresh_only_reads_new_orders_and_decays_old_sales(app):
+    with app.app_context():
+        place_order({'Old Hit': 10}, days_ago=28)  # Four half-lives: worth 10 / 16
+        place_order({'New Hit': 1, 'Slow Mover': 1}, days_ago=1)
+        place_order({'Slow Mover': 50}, days_ago=2, status='cancelled')
+        place_order({'New Hit': 1}, days_ago=0)  # Still settling
+        updated_at = {p.name: p.updated_at for p in Product.query}
+
+        assert refresh_popularity('products', now=NOW, batch_size=2) == 4
+        first = scores()
+        assert first['Old Hit'] / first['Slow Mover'] == pytest.approx(10 / 16 * 2 ** (1 / 7))
+        assert first['New Hit'] == first['Slow Mover']
+        assert {p.name: p.updated_at for p in Product.query} == updated_at
+
+        assert refresh_popularity('products', now=NOW) == 0 and scores() == first
+        later = NOW + timedelta(hours=1)
+        assert refresh_popularity('products', now=later) == 1
+        assert scores()['New Hit'] > first['New Hit'] and scores()['Old Hit'] == first['Old Hit']
+        assert db.session.get(PopularityState, 'products').last_item_id == OrderItem.query.count()
+
+        incremental = scores()
+        assert rebuild_popularity('products', now=later) == 5
+        rebuilt = scores()
+        ratio = incremental['Old Hit'] / rebuilt['Old Hit']  # Landmarks differ; rankings must not
+        assert all(incremental[name] == pytest.approx(ratio * rebuilt[name]) for name in rebuilt)
+
+        place_order({}, services={'Shave': 3}, days_ago=1)
+        assert refresh_popularity('services', now=NOW) == 1
+        assert [s.name for s in _sorted(Service.query, Service, 'popular')] == ['Shave', 'Haircut']
+
+
+def test_rebase_keeps_scores_finite_and_ranking_unchanged(app):
+    with app.app_context():
+        place_order({'Old Hit': 3, 'New Hit': 1}, days_ago=10)
+        refresh_popularity('products', now=NOW)
+        before = scores()
+
+        far = NOW + timedelta(days=7 * (REBASE_HALVINGS + 6))
+        place_order({'Slow Mover': 1}, days_ago=-7 * (REBASE_HALVINGS + 6) + 1)
+        assert refresh_popularity('products', now=far) == 1
+        state = db.session.get(PopularityState, 'products')
+        assert far - state.landmark < timedelta(days=7)
+        after = scores()
+        assert after['Old Hit'] / after['New Hit'] == pytest.approx(before['Old Hit'] / before['New Hit'])
+        assert after['Old Hit'] < before['Old Hit'] and after['Slow Mover'] < 2
+
+
+def test_overlapping_refreshes_count_each_item_once(app, monkeypatch):
+    with app.app_context():
+        place_order({'Old Hit': 2, 'New Hit': 1}, days_ago=1)
+        refresh_popularity('products', now=NOW)
+        place_order({'Old Hit': 1, 'Slow Mover': 4}, days_ago=1)
+        expected = scores()
+
+        move_state = popularity._move_state
+        def overtaken(*args):
+            # A second run scores the same batch between this run's read and its write
+            monkeypatch.setattr(popularity, '_move_state', move_state)
+            with app.app_context():
+                assert refresh_popularity('products', now=NOW) == 2
+                expected.update(scores())
+            return move_state(*args)
+        monkeypatch.setattr(popularity, '_move_state', overtaken)
+
+        assert refresh_popularity('products', now=NOW) == 0
+        assert scores() == expected and expected['Slow Mover'] > 0
+        assert db.session.get(PopularityState, 'products').last_item_id == OrderItem.query.count()
+
+
+def test_popular_listing_is_one_index_scan_and_the_default(app):
+    with app.app_context():
+        place_order({'Slow Mover': 5, 'Old Hit': 1}, days_ago=3)
+        refresh_popularity('products', now=NOW)
+
+        query = _sorted(Product.query.filter_by(is_active=True), Product, 'popular')
+        statement = query.statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+        plan = ' | '.join(row[-1] for row in db.session.execute(db.text(f'EXPLAIN QUERY PLAN {statement}')))
+        assert 'ix_products_active_popularity' in plan and 'TEMP B-TREE' not in plan
+
+    client = app.test_client()
+    page = client.get('/products').get_data(as_text=True)
+    assert page.index('Slow Mover') < page.index('Old Hit') < page.index('New Hit')
+    page = client.get('/products?sort=newest').get_data(as_text=True)
+    assert page.index('Old Hit') < page.index('New Hit') < page.index('Slow Mover')
+    assert client.get('/services?sort=bogus').status_code == 200
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, '-q']))
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Test the bulk product import: chunked upserts, row errors, XLSX and images
+"""
+
+import io
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.models.models import db, User, Shop, Product
+from app.product_import import download_image
+
+OWNER = 'owner@example.com'
+
+
+@pytest.fixture()
+def app(make_app, tmp_path):
+    app = make_app(tmp_path / 'shop.db', UPLOAD_FOLDER=str(tmp_path / 'uploads'), IMPORT_CHUNK_SIZE=2,
+                   IMAGE_VARIANTS=False)
+    with app.app_context():
+        owner = User(email=OWNER, full_name='Owner', role='shopowner')
+        owner.set_password('password123')
+        db.session.add(owner)
+        db.session.flush()
+        db.session.add(Shop(owner_id=owner.id, name='Tea House'))
+        db.session.commit()
+    return app
+
+
+def login(app):
+    client = app.test_client()
+    assert client.post('/login', data={'email': OWNER, 'password': 'password123'}).status_code == 302
+    return client
+
+
+def upload(client, content, filename='products.csv'):
+    data = content.encode() if isinstance(content, str) else content
+    return client.post('/shop/products/import', data={'file': (io.BytesIO(data), filename)},
+                       content_type='multipart/form-data')
+
+
+def products(app):
+    with app.app_context():
+        return {p.name: p for p in Product.query.order_by(Product.id)}
+
+
+def test_csv_import_creates_products_and_reports_bad_rows(app):
+    response = upload(login(app), (
+        'SKU,Name,Price,Stock,Category,Description\n'
+        'T-1,Masala Chai,180,25,Tea,Spiced\n'
+        'T-2,Green Tea,120,0,Tea,\n'
+        'T-3,X,90,5,Tea,\n'                  # name too short
+        'T-4,Oolong,free,5,Tea,\n'           # price not a number
+        'T-1,Chai Again,150,5,Tea,\n'        # SKU repeated
+        ',,,,,\n'                            # blank lines are ignored
+        ',Honey,250,-1,,\n'                  # negative stock
+        ',Jaggery,60,40\n'                   # short row
+    ))
+    assert response.status_code == 200
+    page = response.get_data(as_text=True)
+    assert 'Duplicate of row 2.' in page and 'Product Name: Field must be between 2 and 100 characters long.' in page
+
+    stored = products(app)
+    assert sorted(stored) == ['Green Tea', 'Jaggery', 'Masala Chai']
+    assert stored['Masala Chai'].sku == 'T-1' and stored['Masala Chai'].price == 180
+    assert stored['Green Tea'].stock == 0 and stored['Green Tea'].description is None
+    assert stored['Jaggery'].sku is None and stored['Jaggery'].is_active
+
+
+def test_reimport_updates_by_sku_then_name_and_adopts_unkeyed_products(app):
+    with app.app_context():
+        shop = Shop.query.one()
+        db.session.add_all([
+            Product(shop_id=shop.id, name='Masala Chai', price=150, stock=3, description='Hand made'),
+            Product(shop_id=shop.id, name='Green Tea', price=100, stock=1, sku='G-1'),
+        ])
+        db.session.commit()
+
+    client = login(app)
+    response = upload(client, 'sku,name,price,stock,is_active\n'
+                              'M-1,Masala Chai,190,10,yes\n'     # adopts the hand-made product
+                              'G-1,Green Tea Leaves,130,8,no\n'  # renamed, found by SKU
+                              ',Ginger,40,12,\n')
+    assert response.status_code == 200
+    response = upload(client, 'name,price,stock\nMasala Chai,200,11\n')  # no SKU: matched by name
+    assert response.status_code == 200
+
+    stored = products(app)
+    assert sorted(stored) == ['Ginger', 'Green Tea Leaves', 'Masala Chai']
+    chai = stored['Masala Chai']
+    assert (chai.sku, chai.price, chai.stock, chai.description) == ('M-1', 200, 11, 'Hand made')
+    assert stored['Green Tea Leaves'].price == 130 and not stored['Green Tea Leaves'].is_active
+
+
+def test_xlsx_import_and_unreadable_files(app):
+    openpyxl = pytest.importorskip('openpyxl')
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(['SKU', 'Name', 'Price', 'Stock', 'Category'])
+    for i in range(1, 6):
+        sheet.append([1000 + i, f'Biscuit {i}', 10.5 * i, i, 'Snacks'])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+
+    client = login(app)
+    assert upload(client, buffer.getvalue(), 'products.xlsx').status_code == 200
+    stored = products(app)
+    assert len(stored) == 5 and stored['Biscuit 3'].sku == '1003' and stored['Biscuit 3'].price == 31.5
+
+    assert 'Missing column(s): price, stock' in upload(client, 'name\nTea\n').get_data(as_text=True)
+    assert 'Upload a .csv or .xlsx file' in upload(client, 'x', 'products.txt').get_data(as_text=True)
+    assert 'Not a valid .xlsx file' in upload(client, 'x', 'products.xlsx').get_data(as_text=True)
+    assert len(products(app)) == 5
+
+
+class ImageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == '/moved.png':
+            self.send_response(302)
+            self.send_header('Location', '/tea.png')
+            self.end_headers()
+            return
+        from PIL import Image
+        buffer = io.BytesIO()
+        Image.new('RGB', (40, 30), (0, 128, 0)).save(buffer, 'PNG')
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(buffer.tell()))
+        self.end_headers()
+        self.wfile.write(buffer.getvalue())
+
+    def log_message(self, *args):
+        pass
+
+
+def test_images_are_fetched_in_the_background(app):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ImageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+    try:
+        with pytest.raises(ValueError, match='not a public address'):
+            download_image(f'{base}/tea.png', 1024 * 1024)
+
+        app.config['IMPORT_ALLOW_PRIVATE_URLS'] = True
+        upload(login(app), f'name,price,stock,image_url\nMasala Chai,180,5,{base}/moved.png\n'
+                           f'Green Tea,120,5,{base}/tea.png\n')
+        deadline = time.time() + 10
+        while time.time() < deadline and not all(p.image for p in products(app).values()):
+            time.sleep(0.05)
+    finally:
+        server.shutdown()
+
+    stored = products(app)
+    # Same bytes: stored once, shared through image_refs
+    assert stored['Masala Chai'].image == stored['Green Tea'].image
+    assert stored['Masala Chai'].image.startswith('products/') and stored['Masala Chai'].image.endswith('.png')
+
+
+def test_downloads_connect_to_the_address_that_was_checked(monkeypatch):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ImageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    getaddrinfo, answers = socket.getaddrinfo, []
+
+    def rebinding(host, *args, **kwargs):
+        # The first answer is checked; a second lookup would get a different address
+        if host == 'images.example.test':
+            address = '127.0.0.1' if not answers else '192.0.2.1'
+            answers.append(address)
+            return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', (address, 0))]
+        return getaddrinfo(host, *args, **kwargs)
+
+    monkeypatch.setattr(socket, 'getaddrinfo', rebinding)
+    try:
+        file = download_image(f'http://images.example.test:{port}/tea.png', 1024 * 1024, timeout=2,
+                              allow_private=True)
+    finally:
+        server.shutdown()
+    assert file.content_type == 'image/png'
+    assert answers == ['127.0.0.1']  # requests connected to it without a lookup of its own
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, '-q']))
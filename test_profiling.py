@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Test on-demand request profiling and the speedscope export
+"""
+
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from app import create_app
+from app.models.models import db, User, Shop, Product
+from app.profiling import Sampler, list_profiles, profile_url
+from config import ProductionConfig
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app('testing')
+    app.config.update(PROFILE_FOLDER=str(tmp_path / 'profiles'), PROFILE_INTERVAL=0.0005)
+    with app.app_context():
+        db.create_all(bind_key=None)
+        for role in ('admin', 'shopowner', 'customer'):
+            user = User(email=f'{role}@example.com', full_name=role.title(), role=role)
+            user.set_password('password123')
+            db.session.add(user)
+        db.session.flush()
+        shop = Shop(owner_id=2, name='Bakery', city='Pune', service_type='Bakery')
+        db.session.add(shop)
+        db.session.flush()
+        db.session.add(Product(shop_id=shop.id, name='Bread', description='Fresh', price=40, stock=5, category='Food'))
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.drop_all(bind_key=None)
+
+
+def login(app, role):
+    client = app.test_client()
+    assert client.post('/login', data={'email': f'{role}@example.com', 'password': 'password123'}).status_code == 302
+    return client
+
+
+def test_admin_header_profiles_the_request(app):
+    client = login(app, 'admin')
+    response = client.get('/admin/dashboard', headers={'X-Profile': '1'})
+    assert response.status_code == 200
+    profile_id = response.headers['X-Profile-Id']
+
+    [summary] = list_profiles(app)
+    assert summary['id'] == profile_id and summary['endpoint'] == 'admin.dashboard'
+    assert summary['user'] == 'admin@example.com' and summary['sql']['count'] >= 5
+    assert summary['templates']['ms'] > 0
+
+    detail = client.get(f'/admin/profiles/{profile_id}')
+    assert detail.status_code == 200 and b'admin/dashboard.html' in detail.data and b'SELECT' in detail.data
+
+    download = client.get(f'/admin/profiles/{profile_id}/speedscope')
+    assert 'attachment' in download.headers['Content-Disposition']
+    speedscope = json.loads(download.data)
+    profile = speedscope['profiles'][0]
+    assert profile['type'] == 'sampled' and len(profile['samples']) == len(profile['weights'])
+    frames = len(speedscope['shared']['frames'])
+    assert all(0 <= frame < frames for stack in profile['samples'] for frame in stack)
+
+    assert b'/admin/dashboard' in client.get('/admin/profiles').data
+    assert client.get('/admin/profiles/../../config').status_code == 404
+
+
+def test_links_are_created_by_post_only(app):
+    client = login(app, 'admin')
+    tokens = os.path.join(app.config['PROFILE_FOLDER'], 'tokens')
+    assert b'_profile=' not in client.get('/admin/profiles?path=/shops').data
+    assert not os.path.exists(tokens)
+
+    page = client.post('/admin/profiles', data={'path': '/shops'}).get_data(as_text=True)
+    assert '/shops?_profile=' in page and len(os.listdir(tokens)) == 1
+    assert not ProductionConfig.PROFILING_ENABLED  # Opt-in in production
+
+
+def test_header_is_ignored_for_other_roles(app):
+    for client in (app.test_client(), login(app, 'customer')):
+        assert 'X-Profile-Id' not in client.get('/products', headers={'X-Profile': '1'}).headers
+    assert login(app, 'customer').get('/admin/profiles').status_code == 302
+    assert list_profiles(app) == []
+
+
+def test_signed_link_profiles_one_path(app):
+    client = app.test_client()
+    with app.test_request_context():
+        link = profile_url(app, '/products?search=bread')
+        other = profile_url(app, '/shops')
+    assert link.startswith('/products?search=bread&_profile=')
+
+    # The token is bound to its path and to SECRET_KEY
+    assert 'X-Profile-Id' not in client.get('/products?_profile=' + other.split('=', 1)[1]).headers
+    assert 'X-Profile-Id' not in client.get(link[:-2] + 'xx').headers
+    assert 'X-Profile-Id' in client.get(link).headers
+    # ...and works once
+    assert 'X-Profile-Id' not in client.get(link).headers
+    assert 'X-Profile-Id' in client.get(other).headers
+    shops, products = list_profiles(app)
+    assert shops['path'].startswith('/shops?') and products['path'].startswith('/products?search=bread')
+    assert products['user'] is None
+
+
+def test_unused_links_expire(app):
+    app.config['PROFILE_TOKEN_MAX_AGE'] = 0
+    with app.test_request_context():
+        link = profile_url(app, '/shops')
+        time.sleep(1.1)
+        profile_url(app, '/products')
+    assert 'X-Profile-Id' not in app.test_client().get(link).headers
+    assert len(os.listdir(os.path.join(app.config['PROFILE_FOLDER'], 'tokens'))) == 1
+
+
+def test_only_the_newest_profiles_are_kept(app):
+    app.config['PROFILE_KEEP'] = 2
+    client = login(app, 'admin')
+    ids = [client.get('/products', headers={'X-Profile': '1'}).headers['X-Profile-Id'] for _ in range(4)]
+    assert [summary['id'] for summary in list_profiles(app)] == ids[:1:-1]
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampler_records_the_target_threads_stack():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,))
+    worker.start()
+    sampler = Sampler(worker.ident, 0.001)
+    sampler.start()
+    time.sleep(0.1)
+    sampler.stop()
+    stop.set()
+    worker.join()
+
+    assert sampler.samples and len(sampler.samples) == len(sampler.weights)
+    names = [sampler.frames[stack[-1]]['name'] for stack in sampler.samples]
+    assert names.count('busy_loop') > len(names) / 2
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, '-q']))
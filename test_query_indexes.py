@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Test that the hot catalog/cart/order queries use their composite indexes
+"""
+
+import importlib.util
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from flask import Flask
+
+from app.models.models import db, User, Shop, Product, CartItem, ServiceCartItem, Order, OrderItem, Notification
+
+MIGRATION = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         'migrations', 'versions', '20261019_add_hot_query_indexes.py')
+NEW_INDEXES = {
+    'products': ['ix_products_active_created', 'ix_products_shop_created'],
+    'order_items': ['ix_order_items_shop_id'],
+    'orders': ['ix_orders_customer_created'],
+    'notifications': ['ix_notifications_user_unread'],
+}
+
+
+def make_app():
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://', SQLALCHEMY_TRACK_MODIFICATIONS=False)
+    db.init_app(app)
+    return app
+
+
+def seed():
+    now = datetime.utcnow()
+    owner = User(email='owner@example.com', full_name='Owner', password_hash='x', role='shopowner')
+    customer = User(email='customer@example.com', full_name='Customer', password_hash='x', role='customer')
+    db.session.add_all([owner, customer])
+    db.session.flush()
+    shop = Shop(owner_id=owner.id, name='Bakery', city='Pune', service_type='Bakery')
+    db.session.add(shop)
+    db.session.flush()
+    products = [Product(shop_id=shop.id, name=f'P{i}', price=10, stock=5, is_active=i % 4 != 0,
+                        created_at=now - timedelta(minutes=i)) for i in range(200)]
+    db.session.add_all(products)
+    db.session.flush()
+    for i in range(50):
+        order = Order(order_number=f'ORD{i}', customer_id=customer.id, total_amount=10,
+                      shipping_address='x', created_at=now - timedelta(hours=i))
+        db.session.add(order)
+        db.session.flush()
+        db.session.add(OrderItem(order_id=order.id, product_id=products[i].id, shop_id=shop.id,
+                                 quantity=1, price=10))
+        db.session.add(Notification(user_id=customer.id, message='m', is_read=i % 2 == 0,
+                                    created_at=now - timedelta(hours=i)))
+    db.session.commit()
+    db.session.execute(db.text('ANALYZE'))
+    return shop, customer
+
+
+def query_plan(query):
+    statement = query.statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+    rows = db.session.execute(db.text(f'EXPLAIN QUERY PLAN {statement}')).all()
+    return ' | '.join(row[-1] for row in rows)
+
+
+@pytest.fixture
+def data():
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        yield seed()
+
+
+def test_hot_queries_use_their_indexes(data):
+    shop, customer = data
+    # (query as written in app.py, index it must use)
+    # SQLite backs UNIQUE constraints with sqlite_autoindex_<table>_N
+    cases = [
+        (Product.query.filter_by(is_active=True).order_by(Product.created_at.desc()).limit(12),
+         'ix_products_active_created'),
+        (Product.query.filter_by(shop_id=shop.id).order_by(Product.created_at.desc()),
+         'ix_products_shop_created'),
+        (OrderItem.query.filter_by(shop_id=shop.id).order_by(OrderItem.id.desc()).limit(10),
+         'ix_order_items_shop_id'),
+        (CartItem.query.filter_by(customer_id=customer.id, product_id=1),
+         'sqlite_autoindex_cart_items_1 (customer_id=? AND product_id=?)'),
+        (ServiceCartItem.query.filter_by(customer_id=customer.id, service_id=1),
+         'sqlite_autoindex_service_cart_items_1 (customer_id=? AND service_id=?)'),
+        (Notification.query.filter_by(user_id=customer.id, is_read=False)
+         .order_by(Notification.created_at.desc()).limit(10),
+         'ix_notifications_user_unread'),
+        (Order.query.filter_by(customer_id=customer.id).order_by(Order.created_at.desc()),
+         'ix_orders_customer_created'),
+    ]
+    for query, index in cases:
+        plan = query_plan(query)
+        assert f'USING INDEX {index}' in plan or f'USING COVERING INDEX {index}' in plan, plan
+        # The index order satisfies ORDER BY; no sort step
+        assert 'TEMP B-TREE' not in plan, plan
+
+
+def test_cart_pairs_are_unique(data):
+    _, customer = data
+    db.session.add_all([CartItem(customer_id=customer.id, product_id=1, quantity=1),
+                        CartItem(customer_id=customer.id, product_id=1, quantity=1)])
+    with pytest.raises(Exception, match='UNIQUE'):
+        db.session.commit()
+
+
+def load_migration():
+    spec = importlib.util.spec_from_file_location('hot_query_indexes', MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_migration_merges_duplicate_cart_rows_and_round_trips():
+    migration = load_migration()
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        with db.engine.begin() as conn:
+            # Recreate the pre-migration schema
+            for table, indexes in NEW_INDEXES.items():
+                for index in indexes:
+                    conn.exec_driver_sql(f'DROP INDEX {index}')
+            for table, item in (('cart_items', 'product_id'), ('service_cart_items', 'service_id')):
+                conn.exec_driver_sql(f'DROP TABLE {table}')
+                conn.exec_driver_sql(f'CREATE TABLE {table} (id INTEGER PRIMARY KEY, customer_id INTEGER NOT NULL, '
+                                     f'{item} INTEGER NOT NULL, quantity INTEGER, added_at DATETIME)')
+            conn.exec_driver_sql('INSERT INTO cart_items (customer_id, product_id, quantity) '
+                                 'VALUES (1, 7, 2), (1, 7, 3), (1, 8, 1), (2, 7, NULL)')
+
+            with Operations.context(MigrationContext.configure(conn)):
+                migration.upgrade()
+            rows = conn.exec_driver_sql('SELECT customer_id, product_id, quantity FROM cart_items '
+                                        'ORDER BY id').all()
+            assert [tuple(r) for r in rows] == [(1, 7, 5), (1, 8, 1), (2, 7, None)]
+            indexes = {r[0] for r in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'")}
+            assert {i for names in NEW_INDEXES.values() for i in names} <= indexes
+
+            with Operations.context(MigrationContext.configure(conn)):
+                migration.downgrade()
+            indexes = {r[0] for r in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'")}
+            assert not {i for names in NEW_INDEXES.values() for i in names} & indexes
+            conn.exec_driver_sql('INSERT INTO cart_items (customer_id, product_id, quantity) VALUES (1, 7, 1)')
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, '-q']))
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Test rate limits: browsing and the navbar polls are unlimited, auth POSTs are not
+"""
+
+import pytest
+
+from app.models.models import db, User
+
+
+@pytest.fixture()
+def app(make_app, tmp_path):
+    app = make_app(tmp_path / 'shop.db', RATELIMIT_ENABLED=True, RATELIMIT_STORAGE_URI=f"sqlite:///{tmp_path / 'rl.db'}",
+                   RATELIMIT_AUTH='3 per minute')
+    with app.app_context():
+        customer = User(email='customer@example.com', full_name='Customer', role='customer')
+        customer.set_password('password123')
+        db.session.add(customer)
+        db.session.commit()
+    return app
+
+
+def test_browsing_and_polling_are_not_limited(app):
+    client = app.test_client()
+    assert all(client.get('/products').status_code == 200 for _ in range(60))
+
+    client.post('/login', data={'email': 'customer@example.com', 'password': 'password123'})
+    for _ in range(60):
+        assert client.get('/api/notifications').status_code == 200
+        assert client.get('/api/cart/count').status_code == 200
+
+
+def test_auth_posts_are_limited_per_route(app):
+    client = app.test_client()
+    login = {'email': 'customer@example.com', 'password': 'wrong'}
+    assert [client.post('/login', data=login).status_code for _ in range(4)] == [200, 200, 200, 429]
+    assert client.get('/login').status_code == 200  # Only POSTs count
+    assert client.post('/forgot-password', data={'email': 'nobody@example.com'}).status_code != 429
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, '-q']))
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Test the shared SQLite rate-limit storage
+"""
+
+import time
+
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter
+
+from app.ratelimit_storage import SQLiteStorage
+
+
+def test_scheme_is_registered(tmp_path):
+    storage = storage_from_string(f'sqlite:///{tmp_path}/rl.db')
+    assert isinstance(storage, SQLiteStorage)
+    assert storage.check()
+
+
+def test_counters_are_shared_between_instances(tmp_path):
+    uri = f'sqlite:///{tmp_path}/rl.db'
+    limit = parse('3 per minute')
+    first = FixedWindowRateLimiter(storage_from_string(uri))
+    second = FixedWindowRateLimiter(storage_from_string(uri))
+
+    assert first.hit(limit, '1.2.3.4')
+    assert second.hit(limit, '1.2.3.4')
+    assert first.hit(limit, '1.2.3.4')
+    assert not second.hit(limit, '1.2.3.4')
+
+
+def test_expired_windows_restart_and_compact(tmp_path):
+    storage = SQLiteStorage(f'sqlite:///{tmp_path}/rl.db', compaction_interval=3600)
+    assert storage.incr('k', expiry=0.05) == 1
+    assert storage.incr('k', expiry=0.05) == 2
+    time.sleep(0.06)
+    assert storage.get('k') == 0
+    assert storage.compact() == 1
+    assert storage.incr('k', expiry=10) == 1
+
+
+def test_elastic_expiry_from_limits_3_restarts_the_window(tmp_path):
+    storage = SQLiteStorage(f'sqlite:///{tmp_path}/rl.db')
+    assert storage.incr('fixed', 0.1, amount=1) == 1
+    assert storage.incr('elastic', 0.1, elastic_expiry=False, amount=1) == 1
+    time.sleep(0.06)
+    assert storage.incr('fixed', 0.1) == 2
+    assert storage.incr('elastic', 0.1, elastic_expiry=True, amount=1) == 2
+    time.sleep(0.06)
+    assert storage.get('fixed') == 0
+    assert storage.get('elastic') == 2
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, '-q']))
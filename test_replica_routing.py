@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test read-replica session routing with a second SQLite file
+"""
+
+import pytest
+from flask import Flask, jsonify
+
+from app import replica_routing
+from app.models.models import db, User
+from app.replica_routing import replica_read, sync_sqlite_replica
+
+
+@pytest.fixture(autouse=True)
+def drop_replica_bind():
+    # init_app() registers the bind's metadata on the shared db for good;
+    # later apps without the bind would fail in db.create_all()
+    yield
+    db.metadatas.pop('replica', None)
+
+
+def make_app(tmp_path, sticky_seconds=5):
+    primary, replica = tmp_path / 'primary.db', tmp_path / 'replica.db'
+    app = Flask(__name__)
+    app.config.update(
+        SECRET_KEY='test',
+        SQLALCHEMY_DATABASE_URI=f'sqlite:///{primary}',
+        SQLALCHEMY_BINDS={'replica': f'sqlite:///{replica}'},
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        REPLICA_STICKY_SECONDS=sticky_seconds,
+    )
+    db.init_app(app)
+    replica_routing.init_app(app)
+
+    def user_count():
+        return db.session.query(User).count()
+
+    @app.route('/users')
+    @replica_read
+    def users():
+        return jsonify(count=user_count())
+
+    @app.route('/users/primary')
+    def users_primary():
+        return jsonify(count=user_count())
+
+    @app.route('/users/touch')
+    @replica_read
+    def touch():
+        # A "read-only" view that writes anyway must not read stale data afterwards
+        db.session.add(User(email='touch@example.com', full_name='T', password_hash='x'))
+        db.session.flush()
+        count = user_count()
+        db.session.commit()
+        return jsonify(count=count)
+
+    @app.route('/users', methods=['POST'])
+    def add_user():
+        db.session.add(User(email=f'u{user_count()}@example.com', full_name='U', password_hash='x'))
+        db.session.commit()
+        return jsonify(count=user_count())
+
+    with app.app_context():
+        db.create_all(bind_key=None)
+    sync_sqlite_replica(str(primary), str(replica))
+
+    with app.app_context():
+        # Only on the primary until the next sync
+        db.session.add(User(email='new@example.com', full_name='N', password_hash='x'))
+        db.session.commit()
+    return app, primary, replica
+
+
+def test_reads_go_to_replica_and_writes_to_primary(tmp_path):
+    app, primary, replica = make_app(tmp_path)
+    client = app.test_client()
+
+    assert client.get('/users').json['count'] == 0           # replica, not yet synced
+    assert client.get('/users/primary').json['count'] == 1   # unmarked view
+
+    sync_sqlite_replica(str(primary), str(replica))
+    assert client.get('/users').json['count'] == 1
+
+
+def test_sticks_to_primary_after_a_write(tmp_path):
+    app, _, _ = make_app(tmp_path)
+    client = app.test_client()
+
+    assert client.post('/users').json['count'] == 2
+    # Replica still has 0 users, but this client just wrote
+    assert client.get('/users').json['count'] == 2
+    # Another client is not pinned
+    assert app.test_client().get('/users').json['count'] == 0
+
+
+def test_sticky_window_expires(tmp_path):
+    app, _, _ = make_app(tmp_path, sticky_seconds=0)
+    client = app.test_client()
+    client.post('/users')
+    assert client.get('/users').json['count'] == 0
+
+
+def test_write_inside_read_view_switches_to_primary(tmp_path):
+    app, _, _ = make_app(tmp_path)
+    assert app.test_client().get('/users/touch').json['count'] == 2
+
+
+def test_outside_requests_use_primary(tmp_path):
+    app, _, _ = make_app(tmp_path)
+    with app.app_context():
+        assert db.session.query(User).count() == 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, '-q']))
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Test reviews: O(1) rating aggregates, histograms and the verified rebuild
+"""
+
+import random
+
+import pytest
+from sqlalchemy import event
+
+from app.models.models import db, User, Shop, Product, Review
+from app.reviews import HISTOGRAM, add_review, check_ratings, delete_review, rebuild_ratings, update_review
+
+
+@pytest.fixture()
+def app(make_app, tmp_path):
+    app = make_app(tmp_path / 'shop.db')
+    with app.app_context():
+        owner = User(email='owner@example.com', full_name='Owner', role='shopowner')
+        owner.set_password('password123')
+        db.session.add(owner)
+        for i in range(20):
+            customer = User(email=f'customer{i}@example.com', full_name=f'Customer {i}', role='customer')
+            customer.set_password('password123')
+            db.session.add(customer)
+        db.session.flush()
+        shop = Shop(owner_id=owner.id, name='Tea House')
+        db.session.add(shop)
+        db.session.flush()
+        db.session.add_all(Product(shop_id=shop.id, name=f'Tea {i}', price=100, stock=5) for i in range(3))
+        db.session.commit()
+    return app
+
+
+def aggregates(row):
+    return (row.review_count, round(row.average_rating, 6), [getattr(row, name) for name in HISTOGRAM])
+
+
+def test_each_write_is_one_relative_update_in_the_reviews_transaction(app):
+    with app.app_context():
+        product = Product.query.first()
+        customers = [user.id for user in User.query.filter_by(role='customer').limit(3)]
+        updated_at = product.updated_at
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement.split()[0:2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            reviews = [add_review(customers[0], 5, 'Lovely', product_id=product.id),
+                       add_review(customers[1], 4, product_id=product.id),
+                       add_review(customers[2], 2, product_id=product.id)]
+            db.session.commit()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        assert statements.count(['UPDATE', 'products']) == 3
+        assert not any(s == ['SELECT', 'reviews'] for s in statements)  # No re-aggregation
+
+        db.session.refresh(product)
+        assert aggregates(product) == (3, round(11 / 3, 6), [0, 1, 0, 1, 1])
+        assert product.updated_at == updated_at
+
+        update_review(reviews[2], 3, 'Better second time')
+        db.session.commit()
+        db.session.refresh(product)
+        assert aggregates(product) == (3, 4.0, [0, 0, 1, 1, 1])
+
+        delete_review(reviews[0])
+        db.session.commit()
+        db.session.refresh(product)
+        assert aggregates(product) == (2, 3.5, [0, 0, 1, 1, 0])
+
+        # Rolled back with the review
+        add_review(customers[0], 1, product_id=product.id)
+        db.session.rollback()
+        db.session.refresh(product)
+        assert aggregates(product) == (2, 3.5, [0, 0, 1, 1, 0])
+
+        with pytest.raises(ValueError):
+            add_review(customers[0], 6, product_id=product.id)
+        with pytest.raises(ValueError):
+            add_review(customers[0], 3)
+
+
+def test_random_writes_never_drift_and_rebuild_repairs_drift(app):
+    rng = random.Random(7)
+    with app.app_context():
+        customers = [user.id for user in User.query.filter_by(role='customer')]
+        targets = [{'product_id': p.id} for p in Product.query] + [{'shop_id': Shop.query.first().id}]
+        reviews = {}
+        for _ in range(300):
+            key = (rng.choice(customers), tuple(rng.choice(targets).items())[0])
+            review = reviews.get(key)
+            if review is None:
+                reviews[key] = add_review(key[0], rng.randint(1, 5), **dict([key[1]]))
+            elif rng.random() < 0.3:
+                delete_review(reviews.pop(key))
+            else:
+                update_review(review, rng.randint(1, 5))
+            db.session.commit()
+
+        assert list(check_ratings(Product)) == [] and list(check_ratings(Shop)) == []
+        shop = Shop.query.first()
+        assert shop.review_count == Review.query.filter_by(shop_id=shop.id).count() > 0
+
+        # Drift from outside the write path (e.g. a raw SQL fix-up)
+        Product.query.filter(Product.id.in_([targets[0]['product_id'], targets[1]['product_id']])).update(
+            {Product.review_count: 99, Product.rating_5_count: 0}, synchronize_session=False)
+        Shop.query.update({Shop.average_rating: None}, synchronize_session=False)
+        db.session.commit()
+        drift = list(check_ratings(Product))
+        assert sorted(row['id'] for row in drift) == [targets[0]['product_id'], targets[1]['product_id']]
+        assert drift[0]['stored']['review_count'] == 99
+
+        assert rebuild_ratings(Product, batch_size=1) == 2 and rebuild_ratings(Shop) == 1
+        assert list(check_ratings(Product)) == [] and list(check_ratings(Shop)) == []
+
+
+def test_customer_review_pages(app):
+    client = app.test_client()
+    assert client.post('/login', data={'email': 'customer0@example.com', 'password': 'password123'}).status_code == 302
+    with app.app_context():
+        product_id = Product.query.first().id
+        shop_id = Shop.query.first().id
+
+    url = f'/product/{product_id}/review'
+    assert client.post(url, data={'rating': 4, 'comment': 'Fresh and fragrant'}).status_code == 302
+    assert client.post(url, data={'rating': 2, 'comment': 'Stale this time'}).status_code == 302  # Updates
+    assert client.post(f'/shop/{shop_id}/review', data={'rating': 5, 'comment': 'Friendly owner'}).status_code == 302
+
+    page = client.get(f'/product/{product_id}').get_data(as_text=True)
+    assert 'Stale this time' in page and 'Fresh and fragrant' not in page and 'Update Review' in page
+    with app.app_context():
+        assert aggregates(db.session.get(Product, product_id)) == (1, 2.0, [0, 1, 0, 0, 0])
+        assert aggregates(db.session.get(Shop, shop_id)) == (1, 5.0, [0, 0, 0, 0, 1])
+        review_id = Review.query.filter_by(product_id=product_id).one().id
+
+    assert client.post(f'/review/{review_id}/delete').status_code == 302
+    with app.app_context():
+        assert aggregates(db.session.get(Product, product_id)) == (0, 0.0, [0, 0, 0, 0, 0])
+    assert 'No reviews yet.' in client.get(f'/product/{product_id}').get_data(as_text=True)
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, '-q']))
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test weekly shop hours: minute-of-week intervals, open-at filters and is_open
+"""
+
+from datetime import datetime, time
+
+import pytest
+
+from app.models.models import db, User, Shop
+from app.shop_hours import (MAX_SPAN, MINUTES_PER_WEEK, closed_days, open_at, set_daily_hours, weekly_intervals,
+                            with_is_open)
+
+# 2026-10-19 is a Monday
+MONDAY = datetime(2026, 10, 19)
+
+
+def at(day, hour, minute=0):
+    return MONDAY.replace(day=MONDAY.day + day, hour=hour, minute=minute)
+
+
+def test_weekly_intervals():
+    # Overnight hours stay one interval; only Sunday night is cut at the end of the week
+    assert weekly_intervals([(0, time(22), time(2)), (6, time(22), time(2))]) == [
+        (0, 120), (1320, 1560), (9960, MINUTES_PER_WEEK)]
+    # Touching spans merge, then long intervals are cut at MAX_SPAN
+    assert weekly_intervals([(day, time(0), time(0)) for day in range(7)]) == [
+        (start, start + MAX_SPAN) for start in range(0, MINUTES_PER_WEEK, MAX_SPAN)]
+    assert weekly_intervals([(2, time(9), time(13)), (2, time(12), time(18))]) == [(3420, 3960)]
+    assert weekly_intervals([]) == []
+
+
+@pytest.fixture()
+def app(make_app, tmp_path):
+    app = make_app(tmp_path / 'shop.db')
+    with app.app_context():
+        hours = {'Day Shop': (time(9), time(21), []), 'Night Bar': (time(22), time(2), [0]),
+                 'All Hours': (time(0), time(0), []), 'Shut Shop': (time(9), time(17), list(range(7)))}
+        for name, (opens, closes, closed) in hours.items():
+            owner = User(email=f'{name.split()[0].lower()}@example.com', full_name=name, role='shopowner',
+                         password_hash='x')
+            db.session.add(owner)
+            db.session.flush()
+            shop = Shop(owner_id=owner.id, name=name, opening_time=opens, closing_time=closes)
+            db.session.add(shop)
+            db.session.flush()
+            set_daily_hours(shop, opens, closes, closed)
+        db.session.commit()
+    return app
+
+
+def open_shops(moment):
+    return sorted(shop.name for shop in Shop.query.filter(open_at(moment)))
+
+
+def test_open_at_and_is_open(app):
+    with app.app_context():
+        assert open_shops(at(0, 12)) == ['All Hours', 'Day Shop']
+        assert open_shops(at(0, 1)) == ['All Hours', 'Night Bar']  # Sunday night runs into Monday
+        assert open_shops(at(0, 23)) == ['All Hours']  # Closed Mondays
+        assert open_shops(at(1, 1, 59)) == ['All Hours']
+        assert open_shops(at(1, 22)) == ['All Hours', 'Night Bar']
+        assert open_shops(at(2, 1, 59)) == ['All Hours', 'Night Bar']
+        assert open_shops(at(2, 2)) == ['All Hours']  # Closing time is exclusive
+        assert open_shops(at(6, 23, 59)) == ['All Hours', 'Night Bar']
+
+        flags = {shop.name: shop.is_open for shop in Shop.query.options(with_is_open(at(3, 9)))}
+        # Shut Shop has no rows, so its hours are unknown rather than closed
+        assert flags == {'Day Shop': True, 'Night Bar': False, 'All Hours': True, 'Shut Shop': None}
+        assert Shop.query.filter_by(name='Day Shop').one().is_open is None  # Not loaded without the option
+
+        assert closed_days(Shop.query.filter_by(name='Night Bar').one()) == [0]
+        assert closed_days(Shop.query.filter_by(name='Shut Shop').one()) == list(range(7))
+        assert closed_days(Shop.query.filter_by(name='All Hours').one()) == []
+
+
+def test_open_filter_is_an_interval_index_range_scan(app):
+    with app.app_context():
+        statement = Shop.query.filter(open_at(at(4, 10))).statement
+        statement = statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+        plan = ' | '.join(row[-1] for row in db.session.execute(db.text(f'EXPLAIN QUERY PLAN {statement}')))
+        assert 'COVERING INDEX ix_shop_hours_interval (opens_at>? AND opens_at<?)' in plan
+
+
+def test_shop_pages(app):
+    client = app.test_client()
+    page = client.get('/shops?open_at=2026-10-21T01:30').get_data(as_text=True)
+    assert 'Night Bar' in page and 'All Hours' in page and 'Day Shop' not in page
+    page = client.get('/shops?open_at=bogus').get_data(as_text=True)
+    assert 'Shut Shop' in page and ('Open now' in page or 'Closed now' in page)
+    assert client.get('/shops?open_now=1').status_code == 200
+    with app.app_context():
+        shut, day = (Shop.query.filter_by(name=name).one().id for name in ('Shut Shop', 'Day Shop'))
+    page = client.get(f'/shop/{shut}').get_data(as_text=True)
+    assert 'Open now' not in page and 'Closed now' not in page
+    page = client.get(f'/shop/{day}').get_data(as_text=True)
+    assert 'Open now' in page or 'Closed now' in page
+
+    with app.app_context():
+        owner = User(email='new@example.com', full_name='New Owner', role='shopowner')
+        owner.set_password('password123')
+        db.session.add(owner)
+        db.session.commit()
+    client.post('/login', data={'email': 'new@example.com', 'password': 'password123'})
+    form = {'name': 'Late Cafe', 'service_type': 'Cafe', 'address': '1 Road', 'city': 'Pune',
+            'state': 'Maharashtra', 'pincode': '411001', 'contact_phone': '9999999999',
+            'opening_time': '18:00', 'closing_time': '01:00', 'closed_days': ['1', '2'], 'upi_id': 'cafe@upi'}
+    assert client.post('/shop/create', data=form).status_code == 302
+    with app.app_context():
+        shop = Shop.query.filter_by(name='Late Cafe').one()
+        assert closed_days(shop) == [1, 2]
+        assert 'Late Cafe' in open_shops(at(0, 0, 30)) and 'Late Cafe' not in open_shops(at(2, 0, 30))
+    page = client.get('/shop/edit').get_data(as_text=True)
+    assert page.count('name="closed_days"') == 7 and page.count('checked') >= 2
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, '-q']))
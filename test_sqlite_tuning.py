@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test the SQLite connection profile
+"""
+
+import sqlite3
+
+import pytest
+from flask import Flask
+
+from app import sqlite_tuning
+from app.models.models import db, User
+
+
+def make_app(tmp_path, **config):
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'shop.db'}",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        **config
+    )
+    db.init_app(app)
+    sqlite_tuning.init_app(app, db)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def test_pragmas_applied_on_connect(tmp_path):
+    app = make_app(tmp_path)
+    with app.app_context():
+        pragma = lambda name: db.session.execute(db.text(f'PRAGMA {name}')).scalar()
+        assert pragma('journal_mode') == 'wal'
+        assert pragma('synchronous') == 1  # NORMAL
+        assert pragma('busy_timeout') == 5000
+        assert pragma('cache_size') == -64000
+        assert pragma('temp_store') == 2  # MEMORY
+
+
+def test_writer_takes_lock_up_front_and_readers_are_not_blocked(tmp_path):
+    app = make_app(tmp_path)
+    with app.app_context():
+        db.session.add(User(email='a@example.com', full_name='A', password_hash='x', role='customer'))
+        db.session.flush()  # BEGIN IMMEDIATE + INSERT, not committed yet
+
+        other = sqlite3.connect(tmp_path / 'shop.db', timeout=0)
+        # WAL: a reader still sees the last committed state
+        assert other.execute('SELECT COUNT(*) FROM users').fetchone()[0] == 0
+        with pytest.raises(sqlite3.OperationalError, match='locked'):
+            other.execute('BEGIN IMMEDIATE')
+
+        db.session.commit()
+        assert other.execute('SELECT COUNT(*) FROM users').fetchone()[0] == 1
+        other.close()
+
+
+def test_profile_can_be_disabled(tmp_path):
+    app = make_app(tmp_path, SQLITE_PRAGMAS={}, SQLITE_BEGIN_IMMEDIATE=False)
+    with app.app_context():
+        assert db.session.execute(db.text('PRAGMA journal_mode')).scalar() == 'delete'
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, '-q']))
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test fingerprinted, precompressed static assets
+"""
+
+import gzip
+
+from flask import Flask, url_for
+
+from app import static_assets
+
+CSS = b'body { color: #333; }\n' * 200
+
+
+def make_app(tmp_path):
+    static = tmp_path / 'static'
+    (static / 'css').mkdir(parents=True)
+    (static / 'uploads' / 'products').mkdir(parents=True)
+    (static / 'css' / 'style.css').write_bytes(CSS)
+    (static / 'uploads' / 'products' / 'a.jpg').write_bytes(b'jpeg')
+
+    app = Flask(__name__, static_folder=str(static))
+    static_assets.init_app(app)
+    return app
+
+
+def test_url_for_points_at_hashed_copy(tmp_path):
+    app = make_app(tmp_path)
+    with app.test_request_context():
+        url = url_for('static', filename='css/style.css')
+        assert url.startswith('/static/dist/css/style.') and url.endswith('.css')
+        # Uploads are not fingerprinted
+        assert url_for('static', filename='uploads/products/a.jpg') == '/static/uploads/products/a.jpg'
+
+    files = static_assets.get_manifest(app)
+    assert 'uploads/products/a.jpg' not in files
+    assert files['css/style.css']['encodings'][-1] == 'gzip'
+
+
+def test_hashed_asset_is_immutable_and_encoded(tmp_path):
+    app = make_app(tmp_path)
+    with app.test_request_context():
+        url = url_for('static', filename='css/style.css')
+    client = app.test_client()
+
+    response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.mimetype == 'text/css'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert response.cache_control.immutable
+    assert response.cache_control.max_age == 31536000
+    assert gzip.decompress(response.data) == CSS
+
+    plain = client.get(url, headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.data == CSS
+
+    # The original name still works, with default caching
+    original = client.get('/static/css/style.css')
+    assert original.data == CSS and not original.cache_control.immutable
+
+
+def test_changed_file_gets_new_name(tmp_path):
+    app = make_app(tmp_path)
+    first = static_assets.get_manifest(app)['css/style.css']['path']
+    (tmp_path / 'static' / 'css' / 'style.css').write_bytes(CSS + b'a { color: red; }\n')
+    files = static_assets.build_manifest(str(tmp_path / 'static'))
+    assert files['css/style.css']['path'] != first
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, '-q']))
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test the orphaned upload garbage collector
+"""
+
+import os
+import time
+
+from flask import Flask
+
+from app.models.models import db, User, Shop, Product
+from app.upload_gc import collect_garbage
+
+
+def touch(path, age_seconds):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b'x')
+    old = time.time() - age_seconds
+    os.utime(path, (old, old))
+
+
+def test_only_old_unreferenced_files_are_removed(tmp_path):
+    uploads, staging = tmp_path / 'uploads', tmp_path / 'staging'
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://', SQLALCHEMY_TRACK_MODIFICATIONS=False)
+    db.init_app(app)
+
+    day = 24 * 3600
+    touch(uploads / 'products' / 'used.jpg', 2 * day)
+    touch(uploads / 'products' / 'used_320w.webp', 2 * day)
+    touch(uploads / 'products' / 'used.variants.json', 2 * day)
+    touch(uploads / 'products' / 'gone.jpg', 2 * day)
+    touch(uploads / 'products' / 'gone_160w.webp', 2 * day)
+    touch(uploads / 'products' / 'fresh.jpg', 60)
+    touch(uploads / 'shops' / 'logo.png', 2 * day)
+    touch(uploads / 'payments' / 'payment_1_proof.png', 2 * day)
+    touch(staging / 'abandoned_upload.jpg', 2 * day)
+
+    with app.app_context():
+        db.create_all()
+        owner = User(email='o@example.com', full_name='Owner', role='shopowner', password_hash='x')
+        db.session.add(owner)
+        db.session.flush()
+        shop = Shop(owner_id=owner.id, name='Shop', logo='shops/logo.png')
+        db.session.add(shop)
+        db.session.flush()
+        db.session.add(Product(shop_id=shop.id, name='P', price=1, image='products/used.jpg'))
+        db.session.commit()
+
+        report = collect_garbage(str(uploads), str(staging), batch_size=2, dry_run=True, report=lambda m: None)
+        assert report['orphans'] == 3
+        assert os.path.exists(uploads / 'products' / 'gone.jpg')
+
+        collect_garbage(str(uploads), str(staging), batch_size=2, dry_run=False, report=lambda m: None)
+
+    remaining = sorted(str(p.relative_to(tmp_path)) for p in tmp_path.rglob('*') if p.is_file())
+    assert remaining == [
+        'uploads/payments/payment_1_proof.png',  # no payment_proof column to check against
+        'uploads/products/fresh.jpg',
+        'uploads/products/used.jpg',
+        'uploads/products/used.variants.json',
+        'uploads/products/used_320w.webp',
+        'uploads/shops/logo.png',
+    ]
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, '-q']))
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Test the per-process user cache used by the Flask-Login user_loader
+"""
+
+import time
+
+from flask import Flask
+
+from app.models.models import db, User
+from app.user_cache import TTLCache, UserSnapshot, load_cached_user, invalidate_user
+
+
+def test_ttl_cache_evicts_oldest_and_expired():
+    cache = TTLCache(maxsize=2, ttl=0.05)
+    cache.set(1, 'a')
+    cache.set(2, 'b')
+    cache.get(1)
+    cache.set(3, 'c')
+    assert cache.get(2) is None  # least recently used
+    assert cache.get(1) == 'a'
+    time.sleep(0.06)
+    assert cache.get(1) is None
+
+
+def test_loader_serves_snapshot_until_invalidated():
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://', SQLALCHEMY_TRACK_MODIFICATIONS=False)
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        user = User(email='c@example.com', full_name='Old Name', role='customer')
+        user.set_password('secret1')
+        db.session.add(user)
+        db.session.commit()
+
+        snapshot = load_cached_user(str(user.id))
+        assert isinstance(snapshot, UserSnapshot)
+        assert snapshot.full_name == 'Old Name'
+        assert snapshot.check_password('secret1')  # delegated to the real row
+
+        user.full_name = 'New Name'
+        db.session.commit()
+        assert load_cached_user(user.id).full_name == 'Old Name'
+
+        invalidate_user(user.id)
+        assert load_cached_user(user.id).full_name == 'New Name'
+        assert load_cached_user(999) is None
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, '-q']))
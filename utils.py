@@ -1,20 +1,18 @@
 import os
 import secrets
 import string
-import smtplib
 import time
 import logging
-from datetime import datetime, timedelta
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from datetime import datetime
 from werkzeug.utils import secure_filename
 from flask import current_app
-from app.models.models import db, OTP
-from PIL import Image
-import qrcode
+from app.models.models import db
+from app.otp_store import get_otp_store
+from app import image_store as image_refs
+from app.image_pipeline import MAX_IMAGE_PIXELS, MAX_IMAGE_SIZE, process_image, submit_image
+from app.image_variants import variant_paths
 import io
 import base64
-import requests
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -25,48 +23,44 @@ def allowed_file(filename):
            filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
 
 def save_image(file, folder='products'):
-    """Save uploaded image with secure filename"""
+    """Save uploaded image under a content hash of its bytes.
+
+    An image that is already stored is not processed again; it just gains a
+    reference (see app/image_store.py). With IMAGE_PROCESSING_MODE = 'pool'
+    the resize runs in a background process and the returned path shows a
+    placeholder until it is done.
+    """
     if file and allowed_file(file.filename):
-        # Generate unique filename
-        random_hex = secrets.token_hex(8)
+        max_size = current_app.config.get('IMAGE_MAX_SIZE', MAX_IMAGE_SIZE)
         _, f_ext = os.path.splitext(file.filename)
-        filename = random_hex + f_ext
+        digest = image_refs.content_hash(file, salt=f'{max_size}')
+        filename = digest[:32] + f_ext.lower()
+        image_path = f'{folder}/{filename}'
         
         # Create folder path
         folder_path = os.path.join(current_app.config['UPLOAD_FOLDER'], folder)
         os.makedirs(folder_path, exist_ok=True)
-        
-        # Save path
         file_path = os.path.join(folder_path, filename)
         
-        # Resize and optimize image
-        img = Image.open(file)
-        
-        # Convert RGBA to RGB if necessary
-        if img.mode in ('RGBA', 'LA', 'P'):
-            background = Image.new('RGB', img.size, (255, 255, 255))
-            background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-            img = background
+        if image_refs.acquire(image_path, digest) and os.path.exists(file_path):
+            return image_path
         
-        # Resize if too large
-        max_size = (800, 800)
-        img.thumbnail(max_size, Image.Resampling.LANCZOS)
+        if current_app.config.get('IMAGE_PROCESSING_MODE') == 'pool':
+            return submit_image(file, folder, filename)
         
-        # Save optimized image
-        img.save(file_path, quality=85, optimize=True)
+        # Resize, optimize and save
+        process_image(file, file_path, max_size,
+                      variants=current_app.config.get('IMAGE_VARIANTS', True),
+                      max_pixels=current_app.config.get('IMAGE_MAX_PIXELS', MAX_IMAGE_PIXELS))
         
-        return f'{folder}/{filename}'
+        return image_path
     return None
 
 def delete_image(image_path):
-    """Delete image file"""
-    if image_path:
-        full_path = os.path.join(current_app.config['UPLOAD_FOLDER'], image_path)
-        if os.path.exists(full_path):
-            try:
-                os.remove(full_path)
-            except:
-                pass
+    """Drop a reference to an image; once the caller commits, delete it and its variants when unused"""
+    if image_path and image_refs.release(image_path):
+        image_refs.delete_after_commit(os.path.join(current_app.config['UPLOAD_FOLDER'], path)
+                                       for path in [image_path] + variant_paths(image_path))
 
 def generate_otp():
     """Generate 6-digit OTP"""
@@ -74,32 +68,13 @@ def generate_otp():
 
 def create_otp(email):
     """Create and store OTP for email"""
-    # Delete old OTPs for this email
-    OTP.query.filter_by(email=email).delete()
-    
-    # Generate new OTP
     otp_code = generate_otp()
-    expires_at = datetime.utcnow() + timedelta(minutes=5)
-    
-    otp = OTP(email=email, otp_code=otp_code, expires_at=expires_at)
-    db.session.add(otp)
-    db.session.commit()
-    
+    get_otp_store().issue(email, otp_code)
     return otp_code
 
 def verify_otp(email, otp_code):
     """Verify OTP code"""
-    otp = OTP.query.filter_by(
-        email=email,
-        otp_code=otp_code,
-        is_used=False
-    ).first()
-    
-    if otp and otp.expires_at > datetime.utcnow():
-        otp.is_used = True
-        db.session.commit()
-        return True
-    return False
+    return get_otp_store().verify(email, otp_code)
 
 def get_email_provider_config():
     """Get email provider configuration based on MAIL_PROVIDER setting"""
@@ -138,8 +113,27 @@ def get_email_provider_config():
     
     return providers.get(provider, providers['gmail'])
 
+def build_email_message(to, subject, body, html_body=None, sender=None):
+    """Build the multipart/alternative message that send_email sends"""
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
+    
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = subject
+    msg['From'] = sender
+    msg['To'] = to
+    msg['Date'] = datetime.now().strftime('%a, %d %b %Y %H:%M:%S %z')
+    
+    # Add body parts
+    msg.attach(MIMEText(body, 'plain', 'utf-8'))
+    if html_body:
+        msg.attach(MIMEText(html_body, 'html', 'utf-8'))
+    return msg
+
 def send_email(to, subject, body, html_body=None, retries=None):
     """Send email using SMTP with retry logic and proper error handling"""
+    import smtplib
+    
     if retries is None:
         retries = current_app.config.get('MAIL_MAX_RETRIES', 3)
     
@@ -172,20 +166,7 @@ def send_email(to, subject, body, html_body=None, retries=None):
         logger.error(f"Invalid recipient email format: {to}")
         return False
     
-    # Create message
-    msg = MIMEMultipart('alternative')
-    msg['Subject'] = subject
-    msg['From'] = mail_sender
-    msg['To'] = to
-    msg['Date'] = datetime.now().strftime('%a, %d %b %Y %H:%M:%S %z')
-    
-    # Add body parts
-    text_part = MIMEText(body, 'plain', 'utf-8')
-    msg.attach(text_part)
-    
-    if html_body:
-        html_part = MIMEText(html_body, 'html', 'utf-8')
-        msg.attach(html_part)
+    msg = build_email_message(to, subject, body, html_body, mail_sender)
     
     # Attempt to send with retry logic
     for attempt in range(retries):
@@ -249,6 +230,8 @@ def send_email(to, subject, body, html_body=None, retries=None):
 
 def send_sms(phone, message):
     """Send SMS using Fast2SMS API"""
+    import requests
+    
     try:
         api_key = current_app.config.get('FAST2SMS_API_KEY')
         
@@ -257,7 +240,7 @@ def send_sms(phone, message):
             return False
         
         # Fast2SMS API endpoint
-        url = "https://www.fast2sms.com/dev/bulkV2"
+        url = current_app.config.get('FAST2SMS_API_URL', "https://www.fast2sms.com/dev/bulkV2")
         
         # Prepare payload
         payload = {
@@ -309,6 +292,8 @@ def create_notification(user_id, message):
 
 def generate_qr_code(upi_id, amount, order_number):
     """Generate UPI QR code for payment"""
+    import qrcode
+    
     # UPI payment string format
     upi_string = f"upi://pay?pa={upi_id}&pn=SHOPSERV&am={amount}&cu=INR&tn=Order {order_number}"
     
@@ -0,0 +1,8 @@
+"""
+WSGI entry point for gunicorn: ``gunicorn -c gunicorn.conf.py wsgi:app``.
+"""
+import os
+
+from app import create_app
+
+app = create_app(os.environ.get('SHOPSERV_CONFIG', 'config.Config'))